@@ -59,12 +59,21 @@ resource "azapi_resource" "configure_search_index" {
   depends_on = [
     azurerm_storage_blob.upload_data_script,
     azurerm_storage_blob.fetch_data_script,
+    azurerm_storage_blob.stream_data_script,
+    azurerm_storage_blob.blob_copy_script,
     azurerm_storage_blob.data_requirements,
     azurerm_storage_blob.search_index_utils,
     azurerm_storage_blob.search_common_utils,
+    azurerm_storage_blob.search_data_manifest,
+    azurerm_storage_blob.search_reconcile,
+    azurerm_storage_blob.search_json_template,
+    azurerm_storage_blob.search_indexer_run,
+    azurerm_storage_blob.search_vector_storage,
     azurerm_storage_blob.document_data_source,
     azurerm_storage_blob.document_index,
     azurerm_storage_blob.document_indexer,
+    azurerm_storage_blob.indexer_profiles,
+    azurerm_storage_blob.vector_profiles,
     azurerm_storage_blob.document_skillset,
     null_resource.verify_rbac_propagation,
     time_sleep.wait_for_storage_network,
@@ -152,6 +161,18 @@ resource "azapi_resource" "configure_search_index" {
           name  = "BASE_INDEX_NAME"
           value = "${var.ai_search_base_index_name}"
         },
+        {
+          name  = "INDEXER_PROFILE"
+          value = var.ai_search_indexer_profile
+        },
+        {
+          name  = "VECTOR_PROFILE"
+          value = var.ai_search_vector_profile
+        },
+        {
+          name  = "REBUILD_INDEX"
+          value = tostring(var.ai_search_rebuild_index)
+        },
         {
           name  = "OPENAI_ENDPOINT"
           value = "${module.azure_open_ai.endpoint}"
@@ -308,6 +329,132 @@ resource "azurerm_storage_blob" "search_common_utils" {
   }
 }
 
+resource "azurerm_storage_blob" "search_data_manifest" {
+  name                   = "src/search/data_manifest.py"
+  storage_account_name   = azurerm_storage_account.deployment_container.name
+  storage_container_name = azurerm_storage_container.scripts.name
+  type                   = "Block"
+  source                 = "${path.root}/../src/search/data_manifest.py"
+
+  depends_on = [
+    azurerm_storage_container.scripts,
+    time_sleep.wait_for_rbac
+  ]
+
+  # Force recreation on each deployment to ensure latest version
+  lifecycle {
+    replace_triggered_by = [terraform_data.force_script_update]
+  }
+}
+
+resource "azurerm_storage_blob" "stream_data_script" {
+  name                   = "src/search/stream_data.py"
+  storage_account_name   = azurerm_storage_account.deployment_container.name
+  storage_container_name = azurerm_storage_container.scripts.name
+  type                   = "Block"
+  source                 = "${path.root}/../src/search/stream_data.py"
+
+  depends_on = [
+    azurerm_storage_container.scripts,
+    time_sleep.wait_for_rbac
+  ]
+
+  # Force recreation on each deployment to ensure latest version
+  lifecycle {
+    replace_triggered_by = [terraform_data.force_script_update]
+  }
+}
+
+resource "azurerm_storage_blob" "blob_copy_script" {
+  name                   = "src/search/blob_copy.py"
+  storage_account_name   = azurerm_storage_account.deployment_container.name
+  storage_container_name = azurerm_storage_container.scripts.name
+  type                   = "Block"
+  source                 = "${path.root}/../src/search/blob_copy.py"
+
+  depends_on = [
+    azurerm_storage_container.scripts,
+    time_sleep.wait_for_rbac
+  ]
+
+  # Force recreation on each deployment to ensure latest version
+  lifecycle {
+    replace_triggered_by = [terraform_data.force_script_update]
+  }
+}
+
+resource "azurerm_storage_blob" "search_reconcile" {
+  name                   = "src/search/reconcile.py"
+  storage_account_name   = azurerm_storage_account.deployment_container.name
+  storage_container_name = azurerm_storage_container.scripts.name
+  type                   = "Block"
+  source                 = "${path.root}/../src/search/reconcile.py"
+
+  depends_on = [
+    azurerm_storage_container.scripts,
+    time_sleep.wait_for_rbac
+  ]
+
+  # Force recreation on each deployment to ensure latest version
+  lifecycle {
+    replace_triggered_by = [terraform_data.force_script_update]
+  }
+}
+
+resource "azurerm_storage_blob" "search_json_template" {
+  name                   = "src/search/json_template.py"
+  storage_account_name   = azurerm_storage_account.deployment_container.name
+  storage_container_name = azurerm_storage_container.scripts.name
+  type                   = "Block"
+  source                 = "${path.root}/../src/search/json_template.py"
+
+  depends_on = [
+    azurerm_storage_container.scripts,
+    time_sleep.wait_for_rbac
+  ]
+
+  # Force recreation on each deployment to ensure latest version
+  lifecycle {
+    replace_triggered_by = [terraform_data.force_script_update]
+  }
+}
+
+resource "azurerm_storage_blob" "search_indexer_run" {
+  name                   = "src/search/indexer_run.py"
+  storage_account_name   = azurerm_storage_account.deployment_container.name
+  storage_container_name = azurerm_storage_container.scripts.name
+  type                   = "Block"
+  source                 = "${path.root}/../src/search/indexer_run.py"
+
+  depends_on = [
+    azurerm_storage_container.scripts,
+    time_sleep.wait_for_rbac
+  ]
+
+  # Force recreation on each deployment to ensure latest version
+  lifecycle {
+    replace_triggered_by = [terraform_data.force_script_update]
+  }
+}
+
+resource "azurerm_storage_blob" "search_vector_storage" {
+  name                   = "src/search/vector_storage.py"
+  storage_account_name   = azurerm_storage_account.deployment_container.name
+  storage_container_name = azurerm_storage_container.scripts.name
+  type                   = "Block"
+  source                 = "${path.root}/../src/search/vector_storage.py"
+
+  depends_on = [
+    azurerm_storage_container.scripts,
+    time_sleep.wait_for_rbac
+  ]
+
+  # Force recreation on each deployment to ensure latest version
+  lifecycle {
+    replace_triggered_by = [terraform_data.force_script_update]
+  }
+}
+
 # Upload index configuration files
 resource "azurerm_storage_blob" "document_data_source" {
   name                   = "src/search/index_config/documentDataSource.json"
@@ -363,6 +510,24 @@ resource "azurerm_storage_blob" "document_indexer" {
   }
 }
 
+resource "azurerm_storage_blob" "indexer_profiles" {
+  name                   = "src/search/index_config/indexerProfiles.json"
+  storage_account_name   = azurerm_storage_account.deployment_container.name
+  storage_container_name = azurerm_storage_container.scripts.name
+  type                   = "Block"
+  source                 = "${path.root}/../src/search/index_config/indexerProfiles.json"
+
+  depends_on = [
+    azurerm_storage_container.scripts,
+    time_sleep.wait_for_rbac
+  ]
+
+  # Force recreation on each deployment to ensure latest version
+  lifecycle {
+    replace_triggered_by = [terraform_data.force_script_update]
+  }
+}
+
 resource "azurerm_storage_blob" "document_skillset" {
   name                   = "src/search/index_config/documentSkillSet.json"
   storage_account_name   = azurerm_storage_account.deployment_container.name
@@ -381,6 +546,24 @@ resource "azurerm_storage_blob" "document_skillset" {
   }
 }
 
+resource "azurerm_storage_blob" "vector_profiles" {
+  name                   = "src/search/index_config/vectorProfiles.json"
+  storage_account_name   = azurerm_storage_account.deployment_container.name
+  storage_container_name = azurerm_storage_container.scripts.name
+  type                   = "Block"
+  source                 = "${path.root}/../src/search/index_config/vectorProfiles.json"
+
+  depends_on = [
+    azurerm_storage_container.scripts,
+    time_sleep.wait_for_rbac
+  ]
+
+  # Force recreation on each deployment to ensure latest version
+  lifecycle {
+    replace_triggered_by = [terraform_data.force_script_update]
+  }
+}
+
 # Null resource to verify RBAC propagation before script execution
 resource "null_resource" "verify_rbac_propagation" {
   depends_on = [
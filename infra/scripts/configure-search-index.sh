@@ -20,26 +20,10 @@ pip install --upgrade pip
 mkdir -p /tmp/scripts && cd /tmp/scripts
 az storage blob download-batch --destination . --source scripts --account-name $SCRIPT_STORAGE_ACCOUNT_NAME --auth-mode login
 
-# Step 1: Fetch data files from source to local directory
-echo "=== Step 1: Fetching data files from $DATA_SOURCE_TYPE source ==="
-
-# First install requirements from the src/search directory where fetch_data.py is located
+# First install requirements from the src/search directory where the data scripts are located
 cd /tmp/scripts/src/search
 pip install -r requirements.txt
 
-# Create local data directory
-mkdir -p /tmp/local_data
-
-# Fetch data using fetch_data.py
-python fetch_data.py \
-  --source_type "$DATA_SOURCE_TYPE" \
-  --source_url "$DATA_SOURCE_URL" \
-  --source_path "$DATA_SOURCE_PATH" \
-  --output_dir "/tmp/local_data" \
-  --file_pattern "$DATA_FILE_PATTERN"
-
-# Step 2: Upload fetched data files to main storage account
-echo "=== Step 2: Uploading data files to main storage account ==="
 echo "Debug: MAIN_STORAGE_ACCOUNT_NAME = $MAIN_STORAGE_ACCOUNT_NAME"
 echo "Debug: DATA_CONTAINER_NAME = $DATA_CONTAINER_NAME"
 echo "Debug: AZURE_CLIENT_ID = $AZURE_CLIENT_ID"
@@ -58,15 +42,38 @@ az storage container exists --name "$DATA_CONTAINER_NAME" --account-name "$MAIN_
 echo "=== Testing container creation with Azure CLI ==="
 az storage container create --name "$DATA_CONTAINER_NAME" --account-name "$MAIN_STORAGE_ACCOUNT_NAME" --auth-mode login || echo "Container creation failed"
 
-# Run upload_data.py from the correct directory  
-python upload_data.py \
+# Steps 1 and 2: Fetch data files from the source and upload them to the main storage account.
+# stream_data.py overlaps both phases through a bounded queue, so the local disk only holds
+# the files in flight instead of the whole corpus. With --sync, files whose blob already has the
+# same size and MD5 are not uploaded again; blobs of removed files are only pruned on request.
+echo "=== Steps 1-2: Streaming data files from $DATA_SOURCE_TYPE source to main storage account ==="
+DELETE_EXTRANEOUS_FLAG=""
+if [ "${DELETE_EXTRANEOUS_BLOBS:-false}" = "true" ]; then
+  DELETE_EXTRANEOUS_FLAG="--delete_extraneous"
+fi
+# Blob sources are copied account-to-account by the storage service instead of through this machine
+SERVER_SIDE_COPY_FLAG=""
+if [ "$DATA_SOURCE_TYPE" = "blob" ]; then
+  SERVER_SIDE_COPY_FLAG="--server_side_copy"
+fi
+python stream_data.py \
+  --source_type "$DATA_SOURCE_TYPE" \
+  --source_url "$DATA_SOURCE_URL" \
+  --source_path "$DATA_SOURCE_PATH" \
+  --file_pattern "$DATA_FILE_PATTERN" \
   --storage_account_name "$MAIN_STORAGE_ACCOUNT_NAME" \
   --container_name "$DATA_CONTAINER_NAME" \
-  --data_path "/tmp/local_data" \
-  --file_pattern "$DATA_FILE_PATTERN"
+  --sync \
+  $DELETE_EXTRANEOUS_FLAG \
+  $SERVER_SIDE_COPY_FLAG
 
 # Step 3: Configure search index
 echo "=== Step 3: Configuring search index ==="
+# Changes that cannot be applied to the existing index fail unless the rebuild is requested
+REBUILD_FLAG=""
+if [ "${REBUILD_INDEX:-false}" = "true" ]; then
+  REBUILD_FLAG="--rebuild_index"
+fi
 python index_utils.py \
   --aisearch_name $SEARCH_SERVICE_NAME \
   --base_index_name "$BASE_INDEX_NAME" \
@@ -75,6 +82,9 @@ python index_utils.py \
   --resource_group_name $RESOURCE_GROUP_NAME \
   --storage_name "$MAIN_STORAGE_ACCOUNT_NAME" \
   --container_name $DATA_CONTAINER_NAME \
-  --client_id "$AZURE_CLIENT_ID"
+  --indexer_profile "$INDEXER_PROFILE" \
+  --vector_profile "$VECTOR_PROFILE" \
+  --client_id "$AZURE_CLIENT_ID" \
+  $REBUILD_FLAG
   
 echo "=== Search index configuration completed successfully ==="
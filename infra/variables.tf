@@ -453,6 +453,34 @@ variable "ai_search_base_index_name" {
   }
 }
 
+variable "ai_search_indexer_profile" {
+  type        = string
+  default     = "default"
+  description = "Tuning profile of the AI Search indexer batch size, failure thresholds and schedule, defined in src/search/index_config/indexerProfiles.json. Options: 'default' (service defaults), 'small', 'bulk', 'continuous'"
+
+  validation {
+    condition     = contains(["default", "small", "bulk", "continuous"], var.ai_search_indexer_profile)
+    error_message = "ai_search_indexer_profile must be one of: default, small, bulk, continuous"
+  }
+}
+
+variable "ai_search_vector_profile" {
+  type        = string
+  default     = "default"
+  description = "Storage profile of the AI Search vectors (dimensions, element type, compression, retrievable copy), defined in src/search/index_config/vectorProfiles.json. Options: 'default' (full 3072 dimensions), 'scalar', 'binary', 'scalar-1024', 'binary-1024', 'half-256', 'compact'. Changing it on a deployed index cannot be applied in place: the index configuration fails unless ai_search_rebuild_index is true"
+
+  validation {
+    condition     = contains(["default", "scalar", "binary", "scalar-1024", "binary-1024", "half-256", "compact"], var.ai_search_vector_profile)
+    error_message = "ai_search_vector_profile must be one of: default, scalar, binary, scalar-1024, binary-1024, half-256, compact"
+  }
+}
+
+variable "ai_search_rebuild_index" {
+  type        = bool
+  default     = false
+  description = "Delete and recreate the AI Search index, then reset and run the indexer, when its configuration changes cannot be applied in place (e.g. another ai_search_vector_profile). The index is empty until the indexer has processed the data again"
+}
+
 variable "primary_pe_subnet_address_spaces" {
   description = "Address space for the primary private endpoint subnet"
   type        = list(string)
@@ -0,0 +1,333 @@
+# Copyright (c) Microsoft Corporation.
+# Licensed under the MIT license.
+
+"""
+Server-side blob-to-blob copy for Copilot Studio Azure AI Search Project
+
+Blobs are copied account-to-account with asynchronous Copy Blob operations: the storage service
+moves the bytes, and this module only starts the copies, keeping a bounded window of them in
+flight, polls their status and reports the outcome. The source is authorized with a read-only user
+delegation SAS, so the identity running the copy only needs data-plane RBAC on the source account.
+"""
+
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+from azure.storage.blob import (
+    BlobSasPermissions,
+    BlobServiceClient,
+    ContainerClient,
+    generate_blob_sas,
+)
+from upload_data import UploadSummary, is_blob_up_to_date, list_remote_blobs
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_COPY_CONCURRENCY = 16
+DEFAULT_COPY_BATCH_SIZE = 100
+DEFAULT_POLL_INTERVAL = 2.0
+DEFAULT_COPY_TIMEOUT = 3600
+# Lifetime of the SAS handed to the service; it must outlive the slowest copy
+DEFAULT_SAS_LIFETIME = timedelta(hours=4)
+
+
+@dataclass
+class CopyRequest:
+    """A blob to copy server-side."""
+
+    source_name: str
+    destination_name: str
+    size: int
+    # Content MD5 of the source blob, used to skip blobs already present at the destination
+    md5: Optional[bytes] = None
+
+
+def user_delegation_signer(
+    source: ContainerClient, lifetime: timedelta = DEFAULT_SAS_LIFETIME
+) -> Callable[[str], str]:
+    """
+    Build a function returning read-only user delegation SAS URLs for blobs of a container.
+
+    The user delegation key is requested once and shared by every URL.
+
+    Args:
+        source: Client of the source container, authenticated with an Entra ID credential
+        lifetime: Validity of the delegation key and of the SAS tokens
+
+    Returns:
+        A function mapping a source blob name to its signed URL
+    """
+    service = BlobServiceClient(
+        account_url=f"{source.scheme}://{source.primary_hostname}",
+        credential=source.credential,
+    )
+    # Allow for clock skew between the runner and the storage service
+    start = datetime.now(timezone.utc) - timedelta(minutes=5)
+    expiry = start + lifetime
+    delegation_key = service.get_user_delegation_key(start, expiry)
+
+    def sign(blob_name: str) -> str:
+        sas = generate_blob_sas(
+            account_name=source.account_name,
+            container_name=source.container_name,
+            blob_name=blob_name,
+            user_delegation_key=delegation_key,
+            permission=BlobSasPermissions(read=True),
+            start=start,
+            expiry=expiry,
+        )
+        return f"{source.get_blob_client(blob_name).url}?{sas}"
+
+    return sign
+
+
+class BlobCopier:
+    """Copy blobs between containers with server-side asynchronous copy operations."""
+
+    def __init__(
+        self,
+        source: ContainerClient,
+        destination: ContainerClient,
+        sign_source_url: Optional[Callable[[str], str]] = None,
+        max_concurrency: int = DEFAULT_COPY_CONCURRENCY,
+        batch_size: int = DEFAULT_COPY_BATCH_SIZE,
+        poll_interval: float = DEFAULT_POLL_INTERVAL,
+        copy_timeout: float = DEFAULT_COPY_TIMEOUT,
+    ):
+        """
+        Initialize the copier.
+
+        Args:
+            source: Client of the source container
+            destination: Client of the destination container
+            sign_source_url: Function returning the authorized URL of a source blob;
+                the plain blob URL is used when omitted (public containers)
+            max_concurrency: Number of copy requests and status polls sent in parallel
+            batch_size: Maximum number of copies in flight
+            poll_interval: Seconds between two status polls of the copies in flight
+            copy_timeout: Seconds after which a pending copy is aborted
+        """
+        self.source = source
+        self.destination = destination
+        self.sign_source_url = sign_source_url or (
+            lambda blob_name: source.get_blob_client(blob_name).url
+        )
+        self.max_concurrency = max_concurrency
+        self.batch_size = batch_size
+        self.poll_interval = poll_interval
+        self.copy_timeout = copy_timeout
+
+    def copy_blobs(
+        self,
+        requests: Iterable[CopyRequest],
+        destination_blobs: Optional[Dict[str, object]] = None,
+    ) -> UploadSummary:
+        """
+        Copy blobs, skipping the ones whose destination already has the same content.
+
+        Up to batch_size copies run at once; a new copy starts as soon as one finishes, so a slow
+        copy only holds its own slot. Requests whose destination name was already used by another
+        source are failed instead of overwriting each other. Failures are keyed by destination
+        blob name.
+
+        Args:
+            requests: Blobs to copy
+            destination_blobs: Listing of the destination by blob name, when the caller already
+                has it; the destination is listed when omitted
+
+        Returns:
+            Summary with the copied and skipped blobs, the failures and the elapsed time
+        """
+        summary = UploadSummary()
+        started = time.monotonic()
+        if destination_blobs is None:
+            destination_blobs = list_remote_blobs(self.destination)
+        # Destination blob name -> source blob name of every request seen
+        sources: Dict[str, str] = {}
+        # Destination blob name -> (request, copy id, deadline) of the copies still running
+        in_flight: Dict[str, Tuple[CopyRequest, Optional[str], float]] = {}
+
+        to_start = []
+        with ThreadPoolExecutor(max_workers=self.max_concurrency) as executor:
+            for request in requests:
+                destination_name = request.destination_name
+                other = sources.setdefault(destination_name, request.source_name)
+                if other != request.source_name:
+                    message = (
+                        f"{request.source_name} and {other} both map to "
+                        f"destination blob {destination_name}"
+                    )
+                    logger.error(f"Copy skipped: {message}")
+                    self._record_failure(destination_name, message, summary)
+                    continue
+                if request.md5 and is_blob_up_to_date(
+                    destination_blobs.get(destination_name),
+                    request.size,
+                    request.md5,
+                ):
+                    summary.skipped += 1
+                    summary.skipped_bytes += request.size
+                    continue
+                to_start.append(request)
+                if len(in_flight) + len(to_start) >= self.batch_size:
+                    self._start_copies(executor, to_start, in_flight, summary)
+                    to_start = []
+                    while len(in_flight) >= self.batch_size:
+                        self._poll_copies(executor, in_flight, summary)
+            self._start_copies(executor, to_start, in_flight, summary)
+            while in_flight:
+                self._poll_copies(executor, in_flight, summary)
+
+        summary.elapsed = time.monotonic() - started
+        return summary
+
+    def _start_copy(self, request: CopyRequest) -> Tuple[str, Optional[str]]:
+        """
+        Start the copy of one blob.
+
+        Args:
+            request: Blob to copy
+
+        Returns:
+            The copy status reported by the service and the copy id
+        """
+        result = self.destination.get_blob_client(
+            request.destination_name
+        ).start_copy_from_url(self.sign_source_url(request.source_name))
+        return result["copy_status"], result.get("copy_id")
+
+    def _start_copies(
+        self,
+        executor: ThreadPoolExecutor,
+        requests: List[CopyRequest],
+        in_flight: Dict[str, Tuple[CopyRequest, Optional[str], float]],
+        summary: UploadSummary,
+    ):
+        """
+        Start copies, adding the ones that did not complete right away to the copies in flight.
+
+        Args:
+            executor: Executor running the copy requests
+            requests: Copies to start
+            in_flight: Copies still running, by destination blob name
+            summary: Summary updated with the copies that completed or failed
+        """
+
+        def start(request):
+            try:
+                return request, self._start_copy(request), None
+            except Exception as e:
+                return request, None, e
+
+        deadline = time.monotonic() + self.copy_timeout
+        for request, started, error in executor.map(start, requests):
+            destination_name = request.destination_name
+            if error is not None:
+                logger.error(
+                    f"Exception starting copy of {request.source_name}: {error}"
+                )
+                self._record_failure(destination_name, str(error), summary)
+            elif started[0] == "success":
+                self._record_success(request, summary)
+            else:
+                in_flight[destination_name] = (request, started[1], deadline)
+
+    def _poll_copies(
+        self,
+        executor: ThreadPoolExecutor,
+        in_flight: Dict[str, Tuple[CopyRequest, Optional[str], float]],
+        summary: UploadSummary,
+    ):
+        """
+        Wait one poll interval, then retire the copies that succeeded, failed or timed out.
+
+        Args:
+            executor: Executor running the status polls
+            in_flight: Copies still running, by destination blob name
+            summary: Summary updated with the outcome of the finished copies
+        """
+        time.sleep(self.poll_interval)
+        names = list(in_flight)
+        now = time.monotonic()
+        for destination_name, (status, description) in zip(
+            names, executor.map(self._poll_copy, names)
+        ):
+            request, copy_id, deadline = in_flight[destination_name]
+            if status == "pending":
+                if now < deadline:
+                    continue
+                self._abort_copy(destination_name, copy_id)
+                status, description = "aborted", "copy timed out"
+            del in_flight[destination_name]
+            if status == "success":
+                self._record_success(request, summary)
+            else:
+                logger.error(
+                    f"Copy of {request.source_name} ended with status {status}: {description}"
+                )
+                self._record_failure(
+                    destination_name, f"{status}: {description}", summary
+                )
+        if in_flight:
+            logger.info(f"Waiting for {len(in_flight)} copies to complete")
+
+    def _poll_copy(self, destination_name: str) -> Tuple[str, Optional[str]]:
+        """
+        Read the copy status of a destination blob.
+
+        Args:
+            destination_name: Name of the destination blob
+
+        Returns:
+            The copy status and its description
+        """
+        try:
+            copy = (
+                self.destination.get_blob_client(destination_name)
+                .get_blob_properties()
+                .copy
+            )
+            return copy.status, copy.status_description
+        except Exception as e:
+            # A transient error on the status poll does not fail the copy itself
+            logger.warning(f"Exception polling copy of {destination_name}: {e}")
+            return "pending", None
+
+    def _abort_copy(self, destination_name: str, copy_id: Optional[str]):
+        """
+        Abort a pending copy, ignoring copies that completed in the meantime.
+
+        Args:
+            destination_name: Name of the destination blob
+            copy_id: Id of the copy operation
+        """
+        try:
+            self.destination.get_blob_client(destination_name).abort_copy(copy_id)
+        except Exception as e:
+            logger.warning(f"Exception aborting copy of {destination_name}: {e}")
+
+    @staticmethod
+    def _record_failure(destination_name: str, message: str, summary: UploadSummary):
+        """
+        Record a failure under the destination blob name, like the uploads do.
+
+        A destination can fail twice, when another source maps to it and its own copy fails,
+        so the messages are kept together.
+        """
+        previous = summary.failed.get(destination_name)
+        summary.failed[destination_name] = (
+            f"{previous}; {message}" if previous else message
+        )
+
+    @staticmethod
+    def _record_success(request: CopyRequest, summary: UploadSummary):
+        """Count a completed copy in the summary."""
+        logger.info(
+            f"Copied {request.source_name} to {request.destination_name} server-side"
+        )
+        summary.uploaded += 1
+        summary.uploaded_bytes += request.size
@@ -0,0 +1,514 @@
+# Copyright (c) Microsoft Corporation.
+# Licensed under the MIT license.
+
+"""
+Chunking preview for Copilot Studio Azure AI Search Project
+
+Splits the files of a local data directory the way the SplitSkill of documentSkillSet.json splits
+the content extracted by the indexer, and reports the distribution of chunks per file, the chunks
+dropped by maximumPagesToTake, the projected embedding calls and the projected index size, before
+anything is provisioned. With an embedding cache, the chunks whose vectors it already holds are
+reported too. Files are split by parallel worker processes and only their chunk
+statistics are kept, so memory does not grow with the corpus.
+
+The split is a local approximation of the service: pages end at the last sentence boundary that
+fits in maximumPageLength, then at the last whitespace, and are cut hard otherwise. Plain text,
+Markdown, HTML, JSON, CSV and XML files are read directly; PDF files need pypdf; other formats are
+skipped and reported.
+
+Usage:
+    python chunk_preview.py --data_path ../../data --file_pattern "*.md,*.pdf"
+"""
+
+import argparse
+import html
+import logging
+import os
+import re
+import statistics
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Iterator, List, Optional
+
+from common_utils import non_negative_int, positive_int
+from embedding_cache import DEFAULT_EMBEDDING_DEPLOYMENT, EmbeddingCache, content_hash
+from json_template import load_template
+from upload_data import is_data_file, matches_pattern
+from vector_storage import (
+    DEFAULT_VECTOR_PROFILE,
+    estimate_from_index_file,
+    get_vector_profile,
+    load_vector_profiles,
+    vector_dimensions,
+)
+
+try:
+    from pypdf import PdfReader
+except ImportError:  # PDF files are skipped without pypdf
+    PdfReader = None
+
+# Configure logging
+logging.basicConfig(
+    level=logging.INFO, format="%(asctime)s - %(name)s - %(levelname)s - %(message)s"
+)
+logger = logging.getLogger(__name__)
+
+SKILLSET_SCHEMA_PATH = os.path.join(
+    os.path.dirname(__file__), "index_config/documentSkillSet.json"
+)
+SPLIT_SKILL_TYPE = "#Microsoft.Skills.Text.SplitSkill"
+# Defaults of the service for the properties the skillset does not set
+DEFAULT_MAXIMUM_PAGE_LENGTH = 5000
+DEFAULT_PAGE_OVERLAP_LENGTH = 0
+# 0 keeps every page
+DEFAULT_MAXIMUM_PAGES_TO_TAKE = 0
+# Rough ratio for English text and the OpenAI tokenizers
+DEFAULT_CHARACTERS_PER_TOKEN = 4.0
+# Files queued per worker process by preview_corpus
+PREVIEW_FILES_PER_WORKER = 4
+
+TEXT_EXTENSIONS = {".txt", ".md", ".markdown", ".json", ".csv", ".xml", ".log"}
+HTML_EXTENSIONS = {".html", ".htm"}
+# End of a sentence: punctuation followed by whitespace, or a line break
+_SENTENCE_END = re.compile(r"[.!?。](?=\s)|\n")
+_HTML_TAG = re.compile(r"<(script|style)\b.*?</\1>|<[^>]+>", re.DOTALL | re.IGNORECASE)
+
+
+@dataclass
+class SplitSettings:
+    """Properties of the SplitSkill that decide how content is chunked."""
+
+    text_split_mode: str = "pages"
+    maximum_page_length: int = DEFAULT_MAXIMUM_PAGE_LENGTH
+    page_overlap_length: int = DEFAULT_PAGE_OVERLAP_LENGTH
+    maximum_pages_to_take: int = DEFAULT_MAXIMUM_PAGES_TO_TAKE
+
+    @classmethod
+    def from_skillset(cls, skillset_definition: dict) -> "SplitSettings":
+        """
+        Read the settings of the SplitSkill of a skillset, with the service defaults.
+
+        Args:
+            skillset_definition: The rendered skillset definition.
+
+        Returns:
+            The settings
+
+        Raises:
+            ValueError: If the skillset has no SplitSkill
+        """
+        for skill in skillset_definition.get("skills", []):
+            if skill.get("@odata.type") != SPLIT_SKILL_TYPE:
+                continue
+
+            def setting(name, default):
+                value = skill.get(name)
+                return default if value is None else value
+
+            return cls(
+                text_split_mode=setting("textSplitMode", "pages"),
+                maximum_page_length=setting(
+                    "maximumPageLength", DEFAULT_MAXIMUM_PAGE_LENGTH
+                ),
+                page_overlap_length=setting(
+                    "pageOverlapLength", DEFAULT_PAGE_OVERLAP_LENGTH
+                ),
+                maximum_pages_to_take=setting(
+                    "maximumPagesToTake", DEFAULT_MAXIMUM_PAGES_TO_TAKE
+                ),
+            )
+        raise ValueError("The skillset has no SplitSkill")
+
+
+def load_split_settings(skillset_file: str = SKILLSET_SCHEMA_PATH) -> SplitSettings:
+    """
+    Read the SplitSkill settings of a skillset file.
+
+    Args:
+        skillset_file: The path to the skillset definition file.
+
+    Returns:
+        The settings
+    """
+    template = load_template(skillset_file)
+    # The placeholders do not affect the split settings
+    definition = template.render({name: name for name in template.placeholders})
+    return SplitSettings.from_skillset(definition)
+
+
+def _page_end(text: str, start: int, limit: int) -> int:
+    """Find where the page starting at start ends, preferring sentence and word boundaries."""
+    end = start + limit
+    if end >= len(text):
+        return len(text)
+    window = text[start:end]
+    boundaries = [match.end() for match in _SENTENCE_END.finditer(window)]
+    if boundaries:
+        return start + boundaries[-1]
+    space = max(window.rfind(" "), window.rfind("\t"))
+    if space > 0:
+        return start + space + 1
+    return end
+
+
+def split_text(text: str, settings: SplitSettings) -> List[str]:
+    """
+    Split text into chunks like the SplitSkill, before maximumPagesToTake is applied.
+
+    Args:
+        text: The extracted content of a document.
+        settings: The SplitSkill settings.
+
+    Returns:
+        The chunks, without surrounding whitespace
+    """
+    if settings.text_split_mode == "sentences":
+        chunks, start = [], 0
+        for match in _SENTENCE_END.finditer(text):
+            chunks.append(text[start : match.end()].strip())
+            start = match.end()
+        chunks.append(text[start:].strip())
+        return [chunk for chunk in chunks if chunk]
+
+    chunks, start = [], 0
+    while start < len(text):
+        end = _page_end(text, start, settings.maximum_page_length)
+        chunk = text[start:end].strip()
+        if chunk:
+            chunks.append(chunk)
+        if end >= len(text):
+            break
+        # The next page repeats the end of this one, but always moves forward
+        start = max(start + 1, end - settings.page_overlap_length)
+    return chunks
+
+
+def extract_text(path: Path) -> Optional[str]:
+    """
+    Extract the text content of a file, like the indexer does with dataToExtract contentAndMetadata.
+
+    Args:
+        path: The file.
+
+    Returns:
+        The text, or None if the format is not supported
+    """
+    extension = path.suffix.lower()
+    if extension in TEXT_EXTENSIONS:
+        return path.read_text(encoding="utf-8", errors="replace")
+    if extension in HTML_EXTENSIONS:
+        content = path.read_text(encoding="utf-8", errors="replace")
+        return html.unescape(_HTML_TAG.sub(" ", content))
+    if extension == ".pdf" and PdfReader is not None:
+        reader = PdfReader(str(path))
+        return "\n".join(page.extract_text() or "" for page in reader.pages)
+    return None
+
+
+@dataclass
+class FileChunks:
+    """Chunk statistics of one file."""
+
+    path: str
+    supported: bool
+    characters: int = 0
+    chunks: int = 0
+    # Chunks beyond maximumPagesToTake, which are never embedded nor indexed
+    dropped_chunks: int = 0
+    chunk_characters: int = 0
+    # Content hashes of the kept chunks, when requested for an embedding cache lookup
+    chunk_hashes: List[bytes] = field(default_factory=list)
+
+
+def preview_file(
+    path: Path, settings: SplitSettings, hash_chunks: bool = False
+) -> FileChunks:
+    """
+    Split one file and collect its chunk statistics.
+
+    Args:
+        path: The file.
+        settings: The SplitSkill settings.
+        hash_chunks: Whether to collect the content hashes of the chunks.
+
+    Returns:
+        The statistics of the file
+    """
+    try:
+        text = extract_text(path)
+    except Exception as e:
+        logger.warning(f"Could not extract the text of {path}: {e}")
+        text = None
+    if text is None:
+        return FileChunks(str(path), supported=False)
+    chunks = split_text(text, settings)
+    dropped = 0
+    if settings.maximum_pages_to_take > 0 and (
+        len(chunks) > settings.maximum_pages_to_take
+    ):
+        dropped = len(chunks) - settings.maximum_pages_to_take
+        chunks = chunks[: settings.maximum_pages_to_take]
+    return FileChunks(
+        str(path),
+        supported=True,
+        characters=len(text),
+        chunks=len(chunks),
+        dropped_chunks=dropped,
+        chunk_characters=sum(len(chunk) for chunk in chunks),
+        chunk_hashes=[content_hash(chunk) for chunk in chunks] if hash_chunks else [],
+    )
+
+
+def _preview_file(task):
+    return preview_file(*task)
+
+
+@dataclass
+class ChunkPreview:
+    """Chunk statistics of a corpus."""
+
+    files: int = 0
+    skipped_files: List[str] = field(default_factory=list)
+    characters: int = 0
+    chunks: int = 0
+    chunk_characters: int = 0
+    dropped_chunks: int = 0
+    truncated_files: int = 0
+    # Number of chunks of every supported file, for the distribution
+    chunks_per_file: List[int] = field(default_factory=list)
+    # Chunks whose vectors are in the embedding cache; None without a cache
+    cached_chunks: Optional[int] = None
+
+    def add(self, result: FileChunks):
+        """Add the statistics of one file."""
+        if not result.supported:
+            self.skipped_files.append(result.path)
+            return
+        self.files += 1
+        self.characters += result.characters
+        self.chunks += result.chunks
+        self.chunk_characters += result.chunk_characters
+        self.dropped_chunks += result.dropped_chunks
+        self.truncated_files += 1 if result.dropped_chunks else 0
+        self.chunks_per_file.append(result.chunks)
+
+    @property
+    def average_chunk_characters(self) -> float:
+        """Average length of a chunk."""
+        return self.chunk_characters / self.chunks if self.chunks else 0.0
+
+    def describe(
+        self,
+        characters_per_token: float = DEFAULT_CHARACTERS_PER_TOKEN,
+        vector_profile: str = DEFAULT_VECTOR_PROFILE,
+    ) -> str:
+        """
+        Build the preview report.
+
+        Args:
+            characters_per_token: Characters per embedding token, for the token estimate.
+            vector_profile: The vector storage profile of the index size estimate.
+
+        Returns:
+            The report, one statistic per line
+        """
+        lines = [
+            f"Files: {self.files} previewed, {len(self.skipped_files)} skipped "
+            "(unsupported format)",
+            f"Characters: {self.characters:,}",
+        ]
+        if self.chunks_per_file:
+            counts = sorted(self.chunks_per_file)
+            p95 = counts[min(len(counts) - 1, int(len(counts) * 0.95))]
+            lines.append(
+                f"Chunks: {self.chunks:,} (per file: min {counts[0]}, "
+                f"median {statistics.median(counts):g}, p95 {p95}, max {counts[-1]}; "
+                f"{self.average_chunk_characters:,.0f} characters per chunk on average)"
+            )
+        else:
+            lines.append("Chunks: 0")
+        lines.append(
+            f"Dropped by maximumPagesToTake: {self.dropped_chunks:,} chunks "
+            f"in {self.truncated_files} files"
+        )
+        tokens = self.chunk_characters / characters_per_token
+        lines.append(f"Embedding calls: {self.chunks:,} (~{tokens:,.0f} tokens)")
+        if self.cached_chunks is not None:
+            share = self.cached_chunks / self.chunks if self.chunks else 0.0
+            lines.append(
+                f"Embedding cache: {self.cached_chunks:,} chunks cached ({share:.1%}), "
+                f"{self.chunks - self.cached_chunks:,} left to embed"
+            )
+        sizing = estimate_from_index_file(
+            get_vector_profile(vector_profile),
+            text_bytes=round(self.average_chunk_characters),
+        )
+        lines.append(
+            f"Index size with vector profile '{vector_profile}': "
+            f"{sizing.total_bytes * self.chunks / 1e6:,.1f} MB "
+            f"({sizing.vector_index_bytes * self.chunks / 1e6:,.1f} MB vector index)"
+        )
+        return "\n".join(lines)
+
+
+def iter_files(data_path: str, file_patterns: List[str]) -> Iterator[Path]:
+    """
+    List the data files of a directory tree that match the patterns.
+
+    Files that upload_data.py would not upload, such as the fetch manifest or a .git directory,
+    are left out.
+
+    Args:
+        data_path: The directory.
+        file_patterns: Filename patterns, e.g. ["*.md", "*.pdf"].
+
+    Returns:
+        The matching files, lazily
+    """
+    for root, _, files in os.walk(data_path):
+        for name in sorted(files):
+            path = Path(root) / name
+            if is_data_file(path, data_path) and matches_pattern(name, file_patterns):
+                yield path
+
+
+def preview_corpus(
+    data_path: str,
+    file_patterns: Optional[List[str]] = None,
+    settings: Optional[SplitSettings] = None,
+    workers: Optional[int] = None,
+    embedding_cache: Optional[EmbeddingCache] = None,
+) -> ChunkPreview:
+    """
+    Split every file of a directory tree and aggregate the chunk statistics.
+
+    Args:
+        data_path: The directory.
+        file_patterns: Filename patterns; every file when omitted.
+        settings: The SplitSkill settings; those of documentSkillSet.json when omitted.
+        workers: Number of worker processes; one per core when omitted.
+        embedding_cache: Cache whose vectors for the chunks are counted.
+
+    Returns:
+        The statistics of the corpus
+    """
+    settings = settings or load_split_settings()
+    hash_chunks = embedding_cache is not None
+    preview = ChunkPreview(cached_chunks=0 if hash_chunks else None)
+
+    def collect(finished):
+        for future in finished:
+            result = future.result()
+            preview.add(result)
+            if hash_chunks:
+                preview.cached_chunks += embedding_cache.count_cached(
+                    result.chunk_hashes
+                )
+
+    # Files submitted but not collected yet, so a large tree is not queued all at once
+    window = (workers or os.cpu_count() or 1) * PREVIEW_FILES_PER_WORKER
+    running = set()
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        for path in iter_files(data_path, file_patterns or ["*"]):
+            if len(running) >= window:
+                finished, running = wait(running, return_when=FIRST_COMPLETED)
+                collect(finished)
+            running.add(executor.submit(_preview_file, (path, settings, hash_chunks)))
+        collect(wait(running)[0])
+    return preview
+
+
+def main():
+    """Preview the chunking of a local data directory."""
+    parser = argparse.ArgumentParser(
+        description="Preview the chunks the skillset produces for a local data directory"
+    )
+    parser.add_argument(
+        "--data_path", required=True, help="Local directory of the documents"
+    )
+    parser.add_argument(
+        "--file_pattern",
+        default="*",
+        help="Comma separated filename patterns, e.g. '*.md,*.pdf'. Default: *",
+    )
+    parser.add_argument(
+        "--workers",
+        type=positive_int,
+        default=os.cpu_count(),
+        help="Number of worker processes. Default: number of cores",
+    )
+    parser.add_argument(
+        "--maximum_page_length",
+        type=positive_int,
+        help="Override the maximumPageLength of the SplitSkill, to compare chunk sizes",
+    )
+    parser.add_argument(
+        "--page_overlap_length",
+        type=non_negative_int,
+        help="Override the pageOverlapLength of the SplitSkill",
+    )
+    parser.add_argument(
+        "--maximum_pages_to_take",
+        type=non_negative_int,
+        help="Override the maximumPagesToTake of the SplitSkill; 0 keeps every page",
+    )
+    parser.add_argument(
+        "--characters_per_token",
+        type=float,
+        default=DEFAULT_CHARACTERS_PER_TOKEN,
+        help=f"Characters per embedding token. Default: {DEFAULT_CHARACTERS_PER_TOKEN}",
+    )
+    parser.add_argument(
+        "--vector_profile",
+        choices=list(load_vector_profiles()),
+        default=DEFAULT_VECTOR_PROFILE,
+        help=f"Vector storage profile of the index size estimate. Default: {DEFAULT_VECTOR_PROFILE}",
+    )
+    parser.add_argument(
+        "--embedding_cache",
+        help="Embedding cache file of push_index.py, to count the chunks it already holds",
+    )
+    parser.add_argument(
+        "--embedding_deployment",
+        default=DEFAULT_EMBEDDING_DEPLOYMENT,
+        help=f"Embedding deployment of the cached vectors. Default: {DEFAULT_EMBEDDING_DEPLOYMENT}",
+    )
+    args = parser.parse_args()
+
+    settings = load_split_settings()
+    if args.maximum_page_length is not None:
+        settings.maximum_page_length = args.maximum_page_length
+    if args.page_overlap_length is not None:
+        settings.page_overlap_length = args.page_overlap_length
+    if args.maximum_pages_to_take is not None:
+        settings.maximum_pages_to_take = args.maximum_pages_to_take
+    logger.info(f"Split settings: {settings}")
+
+    file_patterns = [
+        pattern.strip() for pattern in args.file_pattern.split(",") if pattern.strip()
+    ]
+    embedding_cache = None
+    if args.embedding_cache:
+        embedding_cache = EmbeddingCache(
+            args.embedding_cache,
+            args.embedding_deployment,
+            vector_dimensions(get_vector_profile(args.vector_profile)),
+        )
+    try:
+        preview = preview_corpus(
+            args.data_path, file_patterns, settings, args.workers, embedding_cache
+        )
+    finally:
+        if embedding_cache is not None:
+            embedding_cache.close()
+    for path in preview.skipped_files:
+        logger.warning(f"Skipped {path}: unsupported format")
+    logger.info(
+        "Chunking preview:\n"
+        + preview.describe(args.characters_per_token, args.vector_profile)
+    )
+
+
+if __name__ == "__main__":
+    main()
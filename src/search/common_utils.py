@@ -6,6 +6,11 @@
 import argparse
 from urllib.parse import urlparse
 
+# Blob metadata flagging a blob as deleted, so the indexer removes its documents
+# (soft delete detection of the data source, see index_utils.DetectionPolicies)
+SOFT_DELETE_METADATA_KEY = "IsDeleted"
+SOFT_DELETE_MARKER_VALUE = "true"
+
 
 def absolute_url(value):
     """
@@ -45,3 +50,63 @@ def valid_name(value):
             f"'{value}' contains invalid characters. Look at the documentation for naming conventions."
         )
     return value
+
+
+def positive_int(value):
+    """
+    Validate that the input is a strictly positive integer.
+
+    Args:
+        value (str): The value to validate.
+    Raises:
+        argparse.ArgumentTypeError: If the value is not an integer greater than zero.
+    Returns:
+        int: The validated integer.
+    """
+    try:
+        number = int(value)
+    except (TypeError, ValueError):
+        raise argparse.ArgumentTypeError(f"'{value}' is not a valid integer")
+    if number <= 0:
+        raise argparse.ArgumentTypeError(f"'{value}' must be greater than zero")
+    return number
+
+
+def non_negative_int(value):
+    """
+    Validate that the input is an integer greater than or equal to zero.
+
+    Args:
+        value (str): The value to validate.
+    Raises:
+        argparse.ArgumentTypeError: If the value is not an integer or is negative.
+    Returns:
+        int: The validated integer.
+    """
+    try:
+        number = int(value)
+    except (TypeError, ValueError):
+        raise argparse.ArgumentTypeError(f"'{value}' is not a valid integer")
+    if number < 0:
+        raise argparse.ArgumentTypeError(f"'{value}' must not be negative")
+    return number
+
+
+def format_throughput(file_count: int, byte_count: int, elapsed: float) -> str:
+    """
+    Build a human readable throughput summary for a transfer.
+
+    Args:
+        file_count (int): Number of files transferred.
+        byte_count (int): Number of bytes transferred.
+        elapsed (float): Wall-clock duration of the transfer in seconds.
+    Returns:
+        str: A summary such as "12 files, 3.50 MB in 2.00s (6.00 files/s, 1.75 MB/s)".
+    """
+    megabytes = byte_count / (1024 * 1024)
+    # Avoid division by zero for empty or instantaneous transfers
+    seconds = max(elapsed, 1e-6)
+    return (
+        f"{file_count} files, {megabytes:.2f} MB in {elapsed:.2f}s "
+        f"({file_count / seconds:.2f} files/s, {megabytes / seconds:.2f} MB/s)"
+    )
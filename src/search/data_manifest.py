@@ -0,0 +1,288 @@
+# Copyright (c) Microsoft Corporation.
+# Licensed under the MIT license.
+
+"""
+Persistent digest manifest and fetch checkpoint shared by fetch_data.py and upload_data.py.
+
+The manifest is a JSON lines file stored in the data directory. Each line caches the size,
+modification time and MD5 digest of a file, so a file that did not change since the previous run
+is never read or hashed again. New entries are appended and flushed as soon as they are known,
+which keeps the work of an interrupted run; the file is compacted atomically when it is closed.
+
+The fetch checkpoint uses the same journal format to remember which source files were completely
+fetched (name, ETag or git object id, size) and how far a partially downloaded blob got.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import tempfile
+import threading
+from pathlib import Path
+from typing import Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+MANIFEST_FILE_NAME = ".data_manifest.jsonl"
+CHECKPOINT_FILE_NAME = ".fetch_checkpoint.jsonl"
+# Suffix of files that are still being downloaded
+PARTIAL_SUFFIX = ".partial"
+# Files maintained by the data scripts themselves, never treated as data
+RESERVED_FILE_NAMES = {MANIFEST_FILE_NAME, CHECKPOINT_FILE_NAME}
+HASH_CHUNK_SIZE = 4 * 1024 * 1024
+
+
+def compute_md5(file: Path) -> bytes:
+    """
+    Compute the MD5 digest of a file without loading it in memory.
+
+    Args:
+        file: Path of the file to hash
+
+    Returns:
+        The raw 16-byte digest, comparable with the blob "content_md5" property
+    """
+    digest = hashlib.md5(usedforsecurity=False)
+    with open(file, "rb") as data:
+        for chunk in iter(lambda: data.read(HASH_CHUNK_SIZE), b""):
+            digest.update(chunk)
+    return digest.digest()
+
+
+class JsonLinesJournal:
+    """
+    Append-only journal of JSON entries indexed by a key field.
+
+    The latest entry of a key wins. Lines left incomplete by an interrupted run are ignored
+    when the journal is loaded.
+    """
+
+    def __init__(self, path: str, key_field: str):
+        """
+        Load the journal if it exists.
+
+        Args:
+            path: Path of the journal file
+            key_field: Name of the entry field used as the key
+        """
+        self.path = path
+        self.key_field = key_field
+        self.entries: Dict[str, dict] = {}
+        self._lock = threading.Lock()
+        self._file = None
+        self._load()
+
+    def _load(self):
+        if not os.path.exists(self.path):
+            return
+        with open(self.path, encoding="utf-8") as journal:
+            for line in journal:
+                try:
+                    entry = json.loads(line)
+                    self.entries[entry[self.key_field]] = entry
+                except (ValueError, KeyError, TypeError):
+                    logger.debug(f"Ignoring incomplete journal line in {self.path}")
+
+    def get(self, key: str) -> Optional[dict]:
+        """Return the entry of a key, or None if it is not known."""
+        with self._lock:
+            return self.entries.get(key)
+
+    def record(self, entry: dict):
+        """
+        Store an entry and append it to the journal file right away.
+
+        Args:
+            entry: Entry to store; it must contain the key field
+        """
+        line = json.dumps(entry, separators=(",", ":")) + "\n"
+        with self._lock:
+            self.entries[entry[self.key_field]] = entry
+            if self._file is None:
+                os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+                self._file = open(self.path, "a", encoding="utf-8")
+            self._file.write(line)
+            self._file.flush()
+
+    def remove(self, key: str):
+        """Forget an entry; the removal is persisted by the next compaction."""
+        with self._lock:
+            self.entries.pop(key, None)
+
+    def compact(self):
+        """Rewrite the journal with one line per entry, replacing the file atomically."""
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+            directory = os.path.dirname(self.path) or "."
+            os.makedirs(directory, exist_ok=True)
+            fd, temp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+            try:
+                with os.fdopen(fd, "w", encoding="utf-8") as journal:
+                    for entry in self.entries.values():
+                        journal.write(json.dumps(entry, separators=(",", ":")) + "\n")
+                    journal.flush()
+                    os.fsync(journal.fileno())
+                os.replace(temp_path, self.path)
+            except BaseException:
+                os.unlink(temp_path)
+                raise
+
+    def close(self):
+        """Compact the journal and release the file handle."""
+        self.compact()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+class DigestManifest(JsonLinesJournal):
+    """Cache of file digests for a data directory, keyed by the relative file path."""
+
+    def __init__(self, root: str):
+        """
+        Open the manifest of a data directory.
+
+        Args:
+            root: Data directory holding the files and the manifest
+        """
+        self.root = root
+        super().__init__(os.path.join(root, MANIFEST_FILE_NAME), "path")
+
+    def _key(self, file: Path) -> str:
+        return Path(os.path.relpath(file, self.root)).as_posix()
+
+    def get_md5(self, file: Path) -> bytes:
+        """
+        Return the MD5 digest of a file, hashing it only when size or mtime changed.
+
+        Args:
+            file: Path of a file inside the data directory
+
+        Returns:
+            The raw 16-byte digest
+        """
+        stat = os.stat(file)
+        entry = self.get(self._key(file))
+        if (
+            entry
+            and entry["size"] == stat.st_size
+            and entry["mtime_ns"] == stat.st_mtime_ns
+        ):
+            return bytes.fromhex(entry["md5"])
+        md5 = compute_md5(file)
+        self.record_md5(file, md5, **self._source_fields(entry))
+        return md5
+
+    @staticmethod
+    def _source_fields(entry: Optional[dict]) -> dict:
+        # Keep the source identity written by the fetch step when a file is rehashed
+        return {"source_id": entry.get("source_id")} if entry else {}
+
+    def record_md5(self, file: Path, md5: bytes, source_id: Optional[str] = None):
+        """
+        Record the digest of a file that was just written, so it is never hashed again.
+
+        Args:
+            file: Path of a file inside the data directory
+            md5: Raw MD5 digest of the file content
+            source_id: Identity of the file at its source (e.g. blob ETag), if known
+        """
+        stat = os.stat(file)
+        entry = {
+            "path": self._key(file),
+            "size": stat.st_size,
+            "mtime_ns": stat.st_mtime_ns,
+            "md5": md5.hex(),
+        }
+        if source_id:
+            entry["source_id"] = source_id
+        self.record(entry)
+
+    def compact(self):
+        """Drop entries of files that no longer exist, then rewrite the manifest."""
+        with self._lock:
+            missing = [
+                key
+                for key in self.entries
+                if not os.path.exists(os.path.join(self.root, key))
+            ]
+            for key in missing:
+                del self.entries[key]
+        super().compact()
+
+
+class FetchCheckpoint(JsonLinesJournal):
+    """Journal of the source files fetched into an output directory, keyed by source name."""
+
+    def __init__(self, output_dir: str):
+        """
+        Open the checkpoint of an output directory.
+
+        Args:
+            output_dir: Directory receiving the fetched files and the checkpoint
+        """
+        super().__init__(os.path.join(output_dir, CHECKPOINT_FILE_NAME), "name")
+
+    def is_complete(self, name: str, etag: str, size: int, local_path: str) -> bool:
+        """
+        Check whether a source file was already fetched and is still intact on disk.
+
+        Args:
+            name: Name of the file at the source
+            etag: Current ETag or object id of the file at the source
+            size: Current size of the file at the source
+            local_path: Destination path of the file
+
+        Returns:
+            True if the same version was completely fetched before, False otherwise
+        """
+        entry = self.get(name)
+        return bool(
+            entry
+            and entry.get("complete")
+            and entry["etag"] == etag
+            and entry["size"] == size
+            and os.path.isfile(local_path)
+            and os.path.getsize(local_path) == size
+        )
+
+    def resume_offset(self, name: str, etag: str, partial_path: str) -> int:
+        """
+        Return how many bytes of a partial download can be kept.
+
+        Args:
+            name: Name of the file at the source
+            etag: Current ETag of the file at the source
+            partial_path: Path of the partial download
+
+        Returns:
+            The number of bytes already committed for the same version, 0 to start over
+        """
+        entry = self.get(name)
+        if not entry or entry["etag"] != etag or not os.path.isfile(partial_path):
+            return 0
+        return min(entry.get("offset", 0), os.path.getsize(partial_path))
+
+    def mark_progress(self, name: str, etag: str, size: int, offset: int):
+        """Record the number of bytes durably written for a partial download."""
+        self.record(
+            {
+                "name": name,
+                "etag": etag,
+                "size": size,
+                "offset": offset,
+                "complete": False,
+            }
+        )
+
+    def mark_complete(self, name: str, etag: str, size: int):
+        """Record that a source file was completely fetched."""
+        self.record(
+            {"name": name, "etag": etag, "size": size, "offset": size, "complete": True}
+        )
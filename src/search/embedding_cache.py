@@ -0,0 +1,311 @@
+# Copyright (c) Microsoft Corporation.
+# Licensed under the MIT license.
+
+"""
+Embedding cache for Copilot Studio Azure AI Search Project
+
+Chunk vectors are stored in a SQLite file keyed by the SHA-256 of the chunk text, the embedding
+model and the dimensions, so a re-run over a mostly unchanged corpus only embeds the new or changed
+chunks. Vectors are packed as float32, or as float16 to halve the file; the least recently used
+entries are evicted beyond max_entries. push_index.py consults the cache before calling the model
+and chunk_preview.py reports how many chunks it already holds.
+
+Usage:
+    python embedding_cache.py --path embeddings.sqlite
+"""
+
+import argparse
+import hashlib
+import logging
+import sqlite3
+import struct
+import threading
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, Sequence
+
+from common_utils import positive_int
+
+# Configure logging
+logging.basicConfig(
+    level=logging.INFO, format="%(asctime)s - %(name)s - %(levelname)s - %(message)s"
+)
+logger = logging.getLogger(__name__)
+
+# struct format characters of the supported precisions
+PRECISIONS = {"float16": "e", "float32": "f"}
+DEFAULT_PRECISION = "float32"
+DEFAULT_EMBEDDING_DEPLOYMENT = "text-embedding-3-large"
+# About 1.2 GB of 3072 dimension float32 vectors
+DEFAULT_MAX_ENTRIES = 100_000
+# SQLite limits the number of parameters of a statement
+_QUERY_BATCH = 500
+
+
+def content_hash(text: str) -> bytes:
+    """
+    Hash the text of a chunk.
+
+    Args:
+        text: The chunk text.
+
+    Returns:
+        The SHA-256 digest of the UTF-8 text
+    """
+    return hashlib.sha256(text.encode("utf-8")).digest()
+
+
+def pack_vector(vector: Sequence[float], precision: str) -> bytes:
+    """Pack a vector as little-endian values of the precision."""
+    return struct.pack(f"<{len(vector)}{PRECISIONS[precision]}", *vector)
+
+
+def unpack_vector(data: bytes, precision: str) -> List[float]:
+    """Unpack a vector packed by pack_vector."""
+    code = PRECISIONS[precision]
+    return list(struct.unpack(f"<{len(data) // struct.calcsize(code)}{code}", data))
+
+
+@dataclass
+class CacheStats:
+    """Lookups and evictions of an embedding cache."""
+
+    hits: int = 0
+    misses: int = 0
+    evictions: int = 0
+
+    @property
+    def hit_rate(self) -> float:
+        """Share of the lookups found in the cache."""
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+    def describe(self) -> str:
+        """
+        Build a one line summary.
+
+        Returns:
+            The summary
+        """
+        return (
+            f"{self.hits} hits, {self.misses} misses ({self.hit_rate:.1%} hit rate), "
+            f"{self.evictions} evicted"
+        )
+
+
+class EmbeddingCache:
+    """
+    Vectors of one embedding model and dimension count, keyed by the hash of the chunk text.
+
+    The connection is shared by the threads of the caller, so every access holds a lock.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        model: str,
+        dimensions: int,
+        precision: str = DEFAULT_PRECISION,
+        max_entries: int = DEFAULT_MAX_ENTRIES,
+    ):
+        """
+        Open or create the cache file.
+
+        Args:
+            path: The SQLite file; ":memory:" for a cache that is not persisted.
+            model: The embedding model or deployment name.
+            dimensions: The dimensions of the vectors.
+            precision: Precision of the stored vectors, float16 or float32.
+            max_entries: Number of vectors kept, across models, before evicting the least recently used.
+
+        Raises:
+            ValueError: If the precision is not supported.
+        """
+        if precision not in PRECISIONS:
+            raise ValueError(
+                f"Unsupported precision '{precision}', expected one of {', '.join(PRECISIONS)}"
+            )
+        self.path = path
+        self.model = model
+        self.dimensions = dimensions
+        self.precision = precision
+        self.max_entries = max_entries
+        self.stats = CacheStats()
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(path, check_same_thread=False)
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.execute(
+            "CREATE TABLE IF NOT EXISTS embeddings ("
+            "content_hash BLOB NOT NULL, model TEXT NOT NULL, dimensions INTEGER NOT NULL, "
+            "precision TEXT NOT NULL, vector BLOB NOT NULL, last_used INTEGER NOT NULL, "
+            "PRIMARY KEY (content_hash, model, dimensions)) WITHOUT ROWID"
+        )
+        self._connection.execute(
+            "CREATE INDEX IF NOT EXISTS embeddings_last_used ON embeddings (last_used)"
+        )
+        self._connection.commit()
+        self._entries, last_used = self._connection.execute(
+            "SELECT COUNT(*), COALESCE(MAX(last_used), 0) FROM embeddings"
+        ).fetchone()
+        # Logical clock of the accesses, for the LRU order
+        self._clock = last_used
+
+    def _tick(self) -> int:
+        self._clock += 1
+        return self._clock
+
+    def _select(self, columns: str, hashes: List[bytes]) -> List[tuple]:
+        rows = []
+        for start in range(0, len(hashes), _QUERY_BATCH):
+            batch = hashes[start : start + _QUERY_BATCH]
+            rows.extend(
+                self._connection.execute(
+                    f"SELECT {columns} FROM embeddings WHERE model = ? AND dimensions = ? "
+                    f"AND content_hash IN ({', '.join('?' * len(batch))})",
+                    [self.model, self.dimensions, *batch],
+                )
+            )
+        return rows
+
+    def get_many(self, hashes: Iterable[bytes]) -> Dict[bytes, List[float]]:
+        """
+        Look up vectors, marking the found ones as recently used.
+
+        Args:
+            hashes: Content hashes of the chunks.
+
+        Returns:
+            The vectors found, by content hash
+        """
+        hashes = list(dict.fromkeys(hashes))
+        with self._lock:
+            rows = self._select("content_hash, precision, vector", hashes)
+            found = {
+                key: unpack_vector(vector, precision) for key, precision, vector in rows
+            }
+            self._connection.executemany(
+                "UPDATE embeddings SET last_used = ? "
+                "WHERE content_hash = ? AND model = ? AND dimensions = ?",
+                [(self._tick(), key, self.model, self.dimensions) for key in found],
+            )
+            self._connection.commit()
+            self.stats.hits += len(found)
+            self.stats.misses += len(hashes) - len(found)
+        return found
+
+    def count_cached(self, hashes: Iterable[bytes]) -> int:
+        """
+        Count the chunks whose vectors are cached, without using them.
+
+        Args:
+            hashes: Content hashes of the chunks.
+
+        Returns:
+            The number of hashes found, duplicates included
+        """
+        hashes = list(hashes)
+        with self._lock:
+            found = {row[0] for row in self._select("content_hash", list(set(hashes)))}
+        return sum(1 for key in hashes if key in found)
+
+    def put_many(self, vectors: Dict[bytes, Sequence[float]]):
+        """
+        Store vectors, evicting the least recently used entries beyond max_entries.
+
+        Args:
+            vectors: The vectors by content hash.
+
+        Raises:
+            ValueError: If a vector does not have the dimensions of the cache.
+        """
+        for vector in vectors.values():
+            if len(vector) != self.dimensions:
+                raise ValueError(
+                    f"Vector of {len(vector)} dimensions in a cache of {self.dimensions}"
+                )
+        with self._lock:
+            before = self._connection.total_changes
+            self._connection.executemany(
+                "INSERT OR IGNORE INTO embeddings "
+                "(content_hash, model, dimensions, precision, vector, last_used) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                [
+                    (
+                        key,
+                        self.model,
+                        self.dimensions,
+                        self.precision,
+                        pack_vector(vector, self.precision),
+                        self._tick(),
+                    )
+                    for key, vector in vectors.items()
+                ],
+            )
+            self._entries += self._connection.total_changes - before
+            excess = self._entries - self.max_entries
+            if excess > 0:
+                self._connection.execute(
+                    "DELETE FROM embeddings WHERE last_used <= "
+                    "(SELECT last_used FROM embeddings ORDER BY last_used LIMIT 1 OFFSET ?)",
+                    (excess - 1,),
+                )
+                self._entries -= excess
+                self.stats.evictions += excess
+            self._connection.commit()
+
+    def __len__(self) -> int:
+        return self._entries
+
+    def close(self):
+        """Close the cache file."""
+        with self._lock:
+            self._connection.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def main():
+    """Report the content of a cache file."""
+    parser = argparse.ArgumentParser(description="Embedding cache statistics")
+    parser.add_argument("--path", required=True, help="The SQLite cache file")
+    parser.add_argument(
+        "--max_entries",
+        type=positive_int,
+        help="Evict the least recently used vectors down to this number of entries",
+    )
+    args = parser.parse_args()
+
+    connection = sqlite3.connect(args.path)
+    try:
+        rows = connection.execute(
+            "SELECT model, dimensions, precision, COUNT(*), SUM(LENGTH(vector)) "
+            "FROM embeddings GROUP BY model, dimensions, precision"
+        ).fetchall()
+    except sqlite3.OperationalError:
+        rows = []
+    finally:
+        connection.close()
+    for model, dimensions, precision, count, size in rows:
+        logger.info(
+            f"{model} ({dimensions} dimensions, {precision}): {count} vectors, "
+            f"{size / 1e6:,.1f} MB"
+        )
+    if not rows:
+        logger.info("The cache is empty")
+    elif args.max_entries:
+        # Eviction is global: the least recently used vectors of every model and dimension count
+        # are evicted, so the cache can be opened as any of them
+        model, dimensions = rows[0][0], rows[0][1]
+        with EmbeddingCache(
+            args.path, model, dimensions, max_entries=args.max_entries
+        ) as cache:
+            # Storing nothing still applies the eviction
+            cache.put_many({})
+            logger.info(f"Evicted {cache.stats.evictions} vectors")
+
+
+if __name__ == "__main__":
+    main()
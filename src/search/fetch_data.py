@@ -18,6 +18,9 @@ File filtering:
 - Use --file_pattern to filter by specific patterns (e.g., "*.pdf", "*.docx", "*.txt")
 - Supports multiple patterns separated by commas
 
+Blob downloads run in parallel (--max_workers) and large blobs are fetched in ranges
+(--max_concurrency, --chunk_size_mb) that are streamed straight to disk.
+
 Usage:
     python fetch_data.py --source_type github --source_url <repo_url> --source_path data --output_dir ./local_data
     python fetch_data.py --source_type blob --source_url <blob_url> --source_path files --output_dir ./local_data
@@ -26,16 +29,28 @@ Usage:
 
 import argparse
 import fnmatch
+import hashlib
 import logging
 import os
 import shutil
 import subprocess
 import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from typing import List, Optional
+from typing import Dict, List, Optional
 
+from azure.core import MatchConditions
 from azure.identity import DefaultAzureCredential, ManagedIdentityCredential
 from azure.storage.blob import BlobServiceClient
+from common_utils import format_throughput, positive_int
+from data_manifest import (
+    HASH_CHUNK_SIZE,
+    PARTIAL_SUFFIX,
+    DigestManifest,
+    FetchCheckpoint,
+)
 
 # Configure logging
 logging.basicConfig(
@@ -43,6 +58,18 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+DEFAULT_MAX_WORKERS = 8
+DEFAULT_MAX_CONCURRENCY = 4
+DEFAULT_CHUNK_SIZE_MB = 4
+# Amount of data committed to disk and to the checkpoint at once when downloading a blob
+RESUME_SEGMENT_SIZE = 64 * 1024 * 1024
+CLONE_MODES = ["sparse", "full"]
+DEFAULT_CLONE_MODE = "sparse"
+TRANSFER_MODES = ["move", "hardlink", "reflink", "copy", "none"]
+DEFAULT_TRANSFER_MODE = "move"
+# ioctl request cloning a file on copy-on-write file systems (Btrfs, XFS)
+FICLONE = 0x40049409
+
 
 class DataFetcher:
     """
@@ -50,16 +77,53 @@ class DataFetcher:
     retry logic, and security best practices.
     """
 
-    def __init__(self, credential=None, file_patterns: Optional[List[str]] = None):
+    def __init__(
+        self,
+        credential=None,
+        file_patterns: Optional[List[str]] = None,
+        max_workers: int = DEFAULT_MAX_WORKERS,
+        max_concurrency: int = DEFAULT_MAX_CONCURRENCY,
+        chunk_size: int = DEFAULT_CHUNK_SIZE_MB * 1024 * 1024,
+        clone_mode: str = DEFAULT_CLONE_MODE,
+        transfer_mode: str = DEFAULT_TRANSFER_MODE,
+        checkout_dir: Optional[str] = None,
+    ):
         """
         Initialize with Azure credential for blob operations and file patterns.
 
         Args:
             credential: Azure credential for blob operations
             file_patterns: List of file patterns to match (e.g., ['*.pdf', '*.docx'])
+            max_workers: Number of blobs downloaded in parallel
+            max_concurrency: Number of parallel range requests per blob
+            chunk_size: Size in bytes of each range request and of each write to disk
+            clone_mode: "sparse" for a partial clone restricted to the matching files,
+                "full" for a shallow clone of the whole repository
+            transfer_mode: How checked-out files reach the output directory: "move", "hardlink",
+                "reflink", "copy", or "none" to leave them in the checkout
+            checkout_dir: Persistent checkout location, updated in place on later runs;
+                required by the "none" transfer mode and incompatible with "move". A temporary
+                directory is used by default
+
+        Raises:
+            ValueError: If the transfer mode does not fit the checkout directory.
         """
+        if transfer_mode == "none" and not checkout_dir:
+            raise ValueError("The 'none' transfer mode requires a checkout directory")
+        if transfer_mode == "move" and checkout_dir:
+            # Moving files out of a reused checkout would show them as deleted on the next run
+            raise ValueError(
+                "The 'move' transfer mode cannot be used with a persistent checkout directory"
+            )
         self.credential = credential or self._get_azure_credential()
         self.file_patterns = file_patterns or ["*"]  # Default to all files
+        self.max_workers = max_workers
+        self.max_concurrency = max_concurrency
+        self.chunk_size = chunk_size
+        self.resume_segment_size = RESUME_SEGMENT_SIZE
+        self.clone_mode = clone_mode
+        self.transfer_mode = transfer_mode
+        self.checkout_dir = checkout_dir
 
     def _matches_pattern(self, filename: str) -> bool:
         """
@@ -87,6 +151,349 @@ class DataFetcher:
             logger.info("Using default Azure credentials")
             return DefaultAzureCredential()
 
+    @staticmethod
+    def _copy_with_md5(source_file: Path, output_file: str) -> bytes:
+        """
+        Copy a file with its metadata and hash it in the same pass.
+
+        Args:
+            source_file: File to copy
+            output_file: Destination path
+
+        Returns:
+            The raw MD5 digest of the copied content
+        """
+        digest = hashlib.md5(usedforsecurity=False)
+        with open(source_file, "rb") as source, open(output_file, "wb") as target:
+            for chunk in iter(lambda: source.read(HASH_CHUNK_SIZE), b""):
+                digest.update(chunk)
+                target.write(chunk)
+        shutil.copystat(source_file, output_file)
+        return digest.digest()
+
+    @staticmethod
+    def _run_git(
+        args: List[str], input: Optional[str] = None
+    ) -> subprocess.CompletedProcess:
+        """Run a git command, raising CalledProcessError with captured output on failure."""
+        return subprocess.run(
+            ["git"] + args,
+            input=input,
+            check=True,
+            capture_output=True,
+            text=True,
+            timeout=300,
+        )
+
+    @staticmethod
+    def _reflink(source_file: Path, output_file: str):
+        """
+        Clone a file with a copy-on-write reflink, sharing the data blocks with the source.
+
+        Raises:
+            OSError: If the platform or the file system does not support reflinks
+        """
+        try:
+            import fcntl
+        except ImportError:
+            raise OSError("Reflinks are not supported on this platform")
+        with open(source_file, "rb") as source, open(output_file, "wb") as target:
+            fcntl.ioctl(target.fileno(), FICLONE, source.fileno())
+        shutil.copystat(source_file, output_file)
+
+    def _place_file(self, source_file: Path, output_file: str) -> Optional[bytes]:
+        """
+        Place a checked-out file in the output directory according to the transfer mode.
+
+        "move" renames the file out of the throw-away checkout, "hardlink" and "reflink" share
+        the data with the checkout; all of them fall back to a copy when the source and the
+        output directory are on different file systems or the file system lacks support.
+
+        Args:
+            source_file: File in the checkout
+            output_file: Destination path
+
+        Returns:
+            The raw MD5 digest of the content when the file was copied, None otherwise
+        """
+        if os.path.lexists(output_file):
+            os.remove(output_file)
+        try:
+            if self.transfer_mode == "move":
+                os.rename(source_file, output_file)
+                return None
+            if self.transfer_mode == "hardlink":
+                os.link(source_file, output_file)
+                return None
+            if self.transfer_mode == "reflink":
+                self._reflink(source_file, output_file)
+                return None
+        except OSError as e:
+            logger.debug(f"Falling back to copy for {source_file}: {e}")
+            if os.path.lexists(output_file):
+                os.remove(output_file)
+        return self._copy_with_md5(source_file, output_file)
+
+    def _git_object_ids(self, repo_path: str) -> Dict[str, str]:
+        """
+        List the git object id of every tracked file of a checkout.
+
+        Args:
+            repo_path: Path of the git checkout
+
+        Returns:
+            Dictionary of repository-relative POSIX path to git object id
+        """
+        result = self._run_git(["-C", repo_path, "ls-files", "--stage", "-z"])
+        object_ids = {}
+        for record in result.stdout.split("\0"):
+            if record:
+                # Format: "<mode> <object id> <stage>\t<path>"
+                info, path = record.split("\t", 1)
+                object_ids[path] = info.split()[1]
+        return object_ids
+
+    @staticmethod
+    def _case_insensitive_glob(pattern: str) -> str:
+        """
+        Turn a file pattern into a case-insensitive gitignore-style pattern.
+
+        File patterns are matched case-insensitively by _matches_pattern, while sparse-checkout
+        patterns are case-sensitive, so "*.pdf" becomes "*.[pP][dD][fF]". Existing bracket
+        expressions and escaped characters are kept as written.
+        """
+        result = []
+        index = 0
+        while index < len(pattern):
+            char = pattern[index]
+            if char == "\\":
+                result.append(pattern[index : index + 2])
+                index += 2
+                continue
+            if char == "[":
+                # A "]" right after "[" or "[!" is part of the class, not its end
+                end = index + 1
+                if end < len(pattern) and pattern[end] in "!^":
+                    end += 1
+                if end < len(pattern) and pattern[end] == "]":
+                    end += 1
+                end = pattern.find("]", end)
+                if end != -1:
+                    result.append(pattern[index : end + 1])
+                    index = end + 1
+                    continue
+            result.append(f"[{char.lower()}{char.upper()}]" if char.isalpha() else char)
+            index += 1
+        return "".join(result)
+
+    def _sparse_checkout_patterns(self, source_path: str) -> List[str]:
+        """
+        Build the sparse-checkout patterns selecting the matching files under the source path.
+
+        Args:
+            source_path: Path within repository containing data files
+
+        Returns:
+            List of non-cone sparse-checkout patterns
+        """
+        root = "/" + source_path.strip("/") if source_path.strip("/") else ""
+        return [
+            f"{root}/**/{self._case_insensitive_glob(pattern)}"
+            for pattern in self.file_patterns
+        ]
+
+    def _set_sparse_checkout(self, repo_path: str, source_path: str):
+        """Restrict the working tree of a checkout to the matching files under the source path."""
+        self._run_git(
+            ["-C", repo_path, "sparse-checkout", "set", "--no-cone"]
+            + self._sparse_checkout_patterns(source_path)
+        )
+
+    def _is_checkout_of(self, repo_path: str, repo_url: str) -> bool:
+        """
+        Check whether a directory is an existing checkout of a repository.
+
+        Args:
+            repo_path: Directory to check
+            repo_url: Expected URL of the "origin" remote
+
+        Returns:
+            True if the directory is a git checkout whose origin is repo_url, False otherwise
+        """
+        if not os.path.isdir(os.path.join(repo_path, ".git")):
+            return False
+        try:
+            origin = self._run_git(["-C", repo_path, "remote", "get-url", "origin"])
+        except subprocess.CalledProcessError:
+            return False
+        return origin.stdout.strip() == repo_url
+
+    def _exists_in_head(self, repo_path: str, source_path: str) -> bool:
+        """
+        Check whether a path exists in the cloned commit, even if the sparse checkout skipped it.
+
+        Args:
+            repo_path: Path of the git checkout
+            source_path: Path within repository
+
+        Returns:
+            True if the path exists in HEAD, False otherwise
+        """
+        try:
+            self._run_git(
+                ["-C", repo_path, "cat-file", "-e", f"HEAD:{source_path.strip('/')}"]
+            )
+            return True
+        except subprocess.CalledProcessError:
+            return False
+
+    def _clone_stats(self, repo_path: str) -> Dict[str, int]:
+        """
+        Measure what a clone transferred.
+
+        Args:
+            repo_path: Path of the git checkout
+
+        Returns:
+            Dictionary with the number and size of the objects stored locally, and the number
+            of objects left on the server by a partial clone
+        """
+        counts = {}
+        for line in self._run_git(
+            ["-C", repo_path, "count-objects", "-v"]
+        ).stdout.splitlines():
+            key, _, value = line.partition(":")
+            counts[key.strip()] = int(value.strip() or 0)
+
+        # Objects filtered out by a partial clone are listed with a "?" prefix
+        missing = self._run_git(
+            ["-C", repo_path, "rev-list", "--objects", "--missing=print", "HEAD"]
+        ).stdout.splitlines()
+        return {
+            "objects": counts.get("count", 0) + counts.get("in-pack", 0),
+            "bytes": (counts.get("size", 0) + counts.get("size-pack", 0)) * 1024,
+            "skipped_objects": sum(1 for line in missing if line.startswith("?")),
+        }
+
+    def _clone_repository(
+        self, repo_url: str, repo_path: str, source_path: str
+    ) -> Dict[str, int]:
+        """
+        Clone a repository, transferring only what the fetch needs.
+
+        In sparse mode the clone is shallow and partial (--filter=blob:none): only commits and
+        trees are transferred up front, then the sparse checkout downloads the blobs of the files
+        under source_path that match the file patterns. Full mode is a plain shallow clone.
+
+        Args:
+            repo_url: Repository URL
+            repo_path: Destination of the checkout
+            source_path: Path within repository containing data files
+
+        Returns:
+            Transfer statistics, see _clone_stats
+        """
+        if self._is_checkout_of(repo_path, repo_url):
+            # Update a persistent checkout in place; unchanged files keep their mtime,
+            # so the digest manifest does not rehash them
+            logger.info(f"Updating existing checkout of {repo_url} at {repo_path}")
+            self._run_git(["-C", repo_path, "fetch", "--depth", "1", "--no-tags"])
+            if self.clone_mode == "sparse":
+                self._set_sparse_checkout(repo_path, source_path)
+            self._run_git(["-C", repo_path, "reset", "--hard", "FETCH_HEAD"])
+        else:
+            if os.path.exists(repo_path) and os.listdir(repo_path):
+                raise ValueError(
+                    f"Checkout directory '{repo_path}' is not empty and is not a checkout of '{repo_url}'"
+                )
+
+            # Clone repository (shallow clone for efficiency)
+            logger.info(f"Cloning repository from: {repo_url} ({self.clone_mode} mode)")
+
+            # For public repositories, we can clone without credentials
+            # First, try without any special authentication setup
+            clone_args = ["clone", "--depth", "1", "--single-branch", "--no-tags"]
+            if self.clone_mode == "sparse":
+                clone_args += ["--filter=blob:none", "--no-checkout"]
+            self._run_git(clone_args + [repo_url, repo_path])
+
+            if self.clone_mode == "sparse":
+                self._set_sparse_checkout(repo_path, source_path)
+                self._run_git(["-C", repo_path, "checkout"])
+
+        stats = self._clone_stats(repo_path)
+        logger.info(
+            f"Repository cloned successfully: {stats['objects']} objects "
+            f"({stats['bytes'] / (1024 * 1024):.2f} MB) transferred, "
+            f"{stats['skipped_objects']} objects outside the sparse checkout left on the server"
+        )
+        return stats
+
+    def clone_without_checkout(
+        self, repo_url: str, repo_path: str, source_path: str
+    ) -> List[str]:
+        """
+        Clone a repository without checking out any file and list the matching files.
+
+        In sparse mode only commits and trees are transferred; file contents are fetched later,
+        batch by batch, by checkout_files().
+
+        Args:
+            repo_url: Repository URL
+            repo_path: Destination of the clone
+            source_path: Path within repository containing data files
+
+        Returns:
+            Repository-relative POSIX paths of the matching files under source_path
+        """
+        logger.info(f"Cloning repository from: {repo_url} ({self.clone_mode} mode)")
+        clone_args = [
+            "clone",
+            "--depth",
+            "1",
+            "--single-branch",
+            "--no-tags",
+            "--no-checkout",
+        ]
+        if self.clone_mode == "sparse":
+            clone_args += ["--filter=blob:none"]
+        self._run_git(clone_args + [repo_url, repo_path])
+
+        if source_path and not self._exists_in_head(repo_path, source_path):
+            raise ValueError(f"Source path '{source_path}' not found in repository")
+        listing = self._run_git(
+            ["-C", repo_path, "ls-tree", "-r", "-z", "--name-only", "HEAD", "--"]
+            + ([source_path.strip("/")] if source_path.strip("/") else [])
+        ).stdout
+        return [
+            path
+            for path in listing.split("\0")
+            if path and self._matches_pattern(os.path.basename(path))
+        ]
+
+    def checkout_files(self, repo_path: str, paths: List[str]):
+        """
+        Check out a batch of files of a clone created by clone_without_checkout().
+
+        Git fetches the missing contents of the whole batch at once.
+
+        Args:
+            repo_path: Path of the clone
+            paths: Repository-relative POSIX paths to check out
+        """
+        self._run_git(
+            [
+                "--literal-pathspecs",
+                "-C",
+                repo_path,
+                "checkout",
+                "HEAD",
+                "--pathspec-from-file=-",
+                "--pathspec-file-nul",
+            ],
+            input="\0".join(paths),
+        )
+
     def fetch_from_github(
         self, repo_url: str, source_path: str, output_dir: str
     ) -> str:
@@ -109,60 +516,76 @@ class DataFetcher:
             repo_url = repo_url + ".git"
 
         with tempfile.TemporaryDirectory() as temp_dir:
-            repo_path = os.path.join(temp_dir, "repo")
+            # A persistent checkout is updated in place on the next run
+            repo_path = self.checkout_dir or os.path.join(temp_dir, "repo")
 
             try:
-                # Clone repository (shallow clone for efficiency)
-                logger.info(f"Cloning repository from: {repo_url}")
-
-                # For public repositories, we can clone without credentials
-                # First, try without any special authentication setup
-                subprocess.run(
-                    [
-                        "git",
-                        "clone",
-                        "--depth",
-                        "1",
-                        "--single-branch",
-                        "--no-tags",
-                        repo_url,
-                        repo_path,
-                    ],
-                    check=True,
-                    capture_output=True,
-                    text=True,
-                    timeout=300,
-                )
-
-                logger.info("Repository cloned successfully")
+                self._clone_repository(repo_url, repo_path, source_path)
 
                 # Verify source path exists
                 if source_path:
                     data_path = os.path.join(repo_path, source_path)
-                    if not os.path.exists(data_path):
+                    if not os.path.exists(data_path) and not self._exists_in_head(
+                        repo_path, source_path
+                    ):
                         raise ValueError(
                             f"Source path '{source_path}' not found in repository"
                         )
                 else:
                     data_path = repo_path
 
-                # Copy matching files to output directory
+                if self.transfer_mode == "none":
+                    # The upload step reads the checkout directly, nothing is copied
+                    os.makedirs(data_path, exist_ok=True)
+                    logger.info(f"Data files left in the checkout at: {data_path}")
+                    return data_path
+
+                # Place matching files in the output directory
                 os.makedirs(output_dir, exist_ok=True)
+                manifest = DigestManifest(output_dir)
+                checkpoint = FetchCheckpoint(output_dir)
+                object_ids = self._git_object_ids(repo_path)
                 file_count = 0
+                skipped_count = 0
 
                 for file_path in Path(data_path).rglob("*"):
+                    if ".git" in file_path.relative_to(repo_path).parts:
+                        continue
                     if file_path.is_file() and self._matches_pattern(file_path.name):
                         relative_path = os.path.relpath(file_path, data_path)
                         output_file = os.path.join(output_dir, relative_path)
+                        object_id = object_ids.get(
+                            Path(os.path.relpath(file_path, repo_path)).as_posix()
+                        )
+                        size = file_path.stat().st_size
+
+                        # Skip files whose git object was already fetched by a previous run
+                        if object_id and checkpoint.is_complete(
+                            relative_path, object_id, size, output_file
+                        ):
+                            skipped_count += 1
+                            file_count += 1
+                            continue
 
                         # Create subdirectories if needed
                         os.makedirs(os.path.dirname(output_file), exist_ok=True)
 
-                        # Copy file
-                        shutil.copy2(file_path, output_file)
-                        logger.info(f"Copied {relative_path}")
+                        # Place file and cache its digest for the upload step when it was read
+                        md5 = self._place_file(file_path, output_file)
+                        if md5:
+                            manifest.record_md5(Path(output_file), md5, object_id)
+                        if object_id:
+                            checkpoint.mark_complete(relative_path, object_id, size)
+                        logger.info(f"Placed {relative_path} ({self.transfer_mode})")
                         file_count += 1
 
+                checkpoint.close()
+                manifest.close()
+                if skipped_count:
+                    logger.info(
+                        f"Skipped {skipped_count} files completed by a previous run"
+                    )
+
                 if file_count == 0:
                     logger.warning(
                         f"No files matching patterns {self.file_patterns} found in path '{source_path}'"
@@ -207,51 +630,135 @@ class DataFetcher:
                 logger.error(f"Error fetching from GitHub: {e}")
                 raise
 
-    def fetch_from_blob_storage(
-        self, blob_url: str, source_path: str, output_dir: str
-    ) -> str:
+    def _download_blob(
+        self,
+        container_client,
+        blob,
+        local_file_path: str,
+        manifest: DigestManifest,
+        checkpoint: FetchCheckpoint,
+    ) -> bool:
         """
-        Download files from Azure Blob Storage.
+        Stream a blob to disk, resuming a previous partial download of the same version.
+
+        The blob is written to a ".partial" file in segments. Each segment is flushed to disk and
+        journaled in the checkpoint before the next one starts, so an interrupted run resumes from
+        the last committed segment with a ranged read instead of starting over.
 
         Args:
-            blob_url: Azure Blob Storage container URL
-            source_path: Path prefix within container (optional)
-            output_dir: Local directory to place downloaded files
+            container_client: Client of the source container
+            blob: Properties of the blob to download
+            local_file_path: Destination path
+            manifest: Digest manifest of the output directory
+            checkpoint: Fetch checkpoint of the output directory
 
         Returns:
-            Path to output directory containing downloaded files
+            True if the blob was downloaded, False if the same version was already complete
         """
-        logger.info(f"Fetching data from Azure Blob Storage: {blob_url}")
-        logger.info(f"File patterns: {self.file_patterns}")
+        if checkpoint.is_complete(blob.name, blob.etag, blob.size, local_file_path):
+            return False
 
-        try:
-            # Parse blob URL to extract account and container
-            url_parts = blob_url.rstrip("/").split("/")
-            if len(url_parts) < 4:
-                raise ValueError(f"Invalid blob URL format: {blob_url}")
-
-            account_url = "/".join(
-                url_parts[:3]
-            )  # https://account.blob.core.windows.net
-            container_name = url_parts[3]
-
-            logger.info(f"Connecting to storage account: {account_url}")
-            logger.info(f"Container: {container_name}")
-
-            # Initialize blob service client
-            blob_service_client = BlobServiceClient(
-                account_url=account_url, credential=self.credential
-            )
-            container_client = blob_service_client.get_container_client(container_name)
+        blob_client = container_client.get_blob_client(blob.name)
+        content_md5 = (
+            blob.content_settings.content_md5 if blob.content_settings else None
+        )
+        # Without a stored MD5 the content is hashed while streaming, which needs ordered writes
+        digest = None if content_md5 else hashlib.md5(usedforsecurity=False)
+        partial_path = local_file_path + PARTIAL_SUFFIX
+        offset = checkpoint.resume_offset(blob.name, blob.etag, partial_path)
+        if offset:
+            logger.info(f"Resuming {blob.name} at byte {offset} of {blob.size}")
+
+        with open(partial_path, "r+b" if offset else "wb") as download_file:
+            # Drop anything written after the last committed segment
+            download_file.truncate(offset)
+            if digest and offset:
+                # Hash the committed prefix once before appending to it
+                for chunk in iter(lambda: download_file.read(HASH_CHUNK_SIZE), b""):
+                    digest.update(chunk)
+            download_file.seek(offset)
+
+            while offset < blob.size:
+                length = min(self.resume_segment_size, blob.size - offset)
+                # Fail fast if the blob changed since it was listed; the next run starts over
+                downloader = blob_client.download_blob(
+                    offset=offset,
+                    length=length,
+                    etag=blob.etag,
+                    match_condition=MatchConditions.IfNotModified,
+                    max_concurrency=1 if digest else self.max_concurrency,
+                )
+                if digest:
+                    for chunk in downloader.chunks():
+                        digest.update(chunk)
+                        download_file.write(chunk)
+                else:
+                    # The digest is known: let the SDK fetch ranges in parallel into the file
+                    downloader.readinto(download_file)
+                download_file.flush()
+                os.fsync(download_file.fileno())
+                offset += length
+                checkpoint.mark_progress(blob.name, blob.etag, blob.size, offset)
+
+        os.replace(partial_path, local_file_path)
+
+        # Cache the digest for the upload step
+        md5 = bytes(content_md5) if content_md5 else digest.digest()
+        manifest.record_md5(Path(local_file_path), md5, blob.etag)
+        checkpoint.mark_complete(blob.name, blob.etag, blob.size)
+        return True
+
+    def download_blobs(self, container_client, prefix: str, output_dir: str) -> int:
+        """
+        Download the matching blobs of a container with a pool of workers.
 
-            # List and download matching files
-            prefix = source_path + "/" if source_path else ""
-            blobs = container_client.list_blobs(name_starts_with=prefix)
+        Args:
+            container_client: Client of the source container
+            prefix: Blob name prefix to download, stripped from the local paths
+            output_dir: Local directory to place downloaded files
 
-            os.makedirs(output_dir, exist_ok=True)
-            file_count = 0
+        Returns:
+            Number of files available in the output directory, including those completed by a
+            previous run
 
-            for blob in blobs:
+        Raises:
+            RuntimeError: If any blob failed to download
+        """
+        os.makedirs(output_dir, exist_ok=True)
+        manifest = DigestManifest(output_dir)
+        checkpoint = FetchCheckpoint(output_dir)
+        file_count = 0
+        byte_count = 0
+        skipped_count = 0
+        failed = {}
+        lock = threading.Lock()
+        # Keep the number of queued blobs bounded so huge containers are listed lazily
+        pending = threading.BoundedSemaphore(self.max_workers * 2)
+        started = time.monotonic()
+
+        def download(blob, relative_path: str, local_file_path: str):
+            nonlocal file_count, byte_count, skipped_count
+            try:
+                if not self._download_blob(
+                    container_client, blob, local_file_path, manifest, checkpoint
+                ):
+                    logger.info(f"Skipping {relative_path}, already fetched")
+                    with lock:
+                        skipped_count += 1
+                    return
+                logger.info(f"Downloaded {relative_path}")
+                with lock:
+                    file_count += 1
+                    byte_count += blob.size or 0
+            except Exception as e:
+                logger.error(f"Exception downloading blob {blob.name}: {e}")
+                with lock:
+                    failed[blob.name] = str(e)
+            finally:
+                pending.release()
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            for blob in container_client.list_blobs(name_starts_with=prefix):
                 blob_filename = os.path.basename(blob.name)
                 if self._matches_pattern(blob_filename):
                     # Calculate local file path
@@ -265,13 +772,75 @@ class DataFetcher:
                     if local_dir:
                         os.makedirs(local_dir, exist_ok=True)
 
-                    # Download blob
-                    blob_client = container_client.get_blob_client(blob.name)
-                    with open(local_file_path, "wb") as download_file:
-                        download_file.write(blob_client.download_blob().readall())
+                    pending.acquire()
+                    executor.submit(download, blob, relative_path, local_file_path)
 
-                    logger.info(f"Downloaded {relative_path}")
-                    file_count += 1
+        checkpoint.close()
+        manifest.close()
+        logger.info(
+            f"Download throughput: {format_throughput(file_count, byte_count, time.monotonic() - started)}"
+        )
+        if skipped_count:
+            logger.info(f"Skipped {skipped_count} blobs completed by a previous run")
+        if failed:
+            raise RuntimeError(
+                f"{len(failed)} blobs failed to download: {', '.join(sorted(failed))}"
+            )
+        return file_count + skipped_count
+
+    def get_source_container_client(self, blob_url: str):
+        """
+        Create a client for the container referenced by a blob container URL.
+
+        Args:
+            blob_url: Azure Blob Storage container URL
+
+        Returns:
+            The container client
+        """
+        # Parse blob URL to extract account and container
+        url_parts = blob_url.rstrip("/").split("/")
+        if len(url_parts) < 4:
+            raise ValueError(f"Invalid blob URL format: {blob_url}")
+
+        account_url = "/".join(url_parts[:3])  # https://account.blob.core.windows.net
+        container_name = url_parts[3]
+
+        logger.info(f"Connecting to storage account: {account_url}")
+        logger.info(f"Container: {container_name}")
+
+        # Initialize blob service client; the chunk size bounds the memory used per range
+        blob_service_client = BlobServiceClient(
+            account_url=account_url,
+            credential=self.credential,
+            max_single_get_size=self.chunk_size,
+            max_chunk_get_size=self.chunk_size,
+        )
+        return blob_service_client.get_container_client(container_name)
+
+    def fetch_from_blob_storage(
+        self, blob_url: str, source_path: str, output_dir: str
+    ) -> str:
+        """
+        Download files from Azure Blob Storage.
+
+        Args:
+            blob_url: Azure Blob Storage container URL
+            source_path: Path prefix within container (optional)
+            output_dir: Local directory to place downloaded files
+
+        Returns:
+            Path to output directory containing downloaded files
+        """
+        logger.info(f"Fetching data from Azure Blob Storage: {blob_url}")
+        logger.info(f"File patterns: {self.file_patterns}")
+
+        try:
+            container_client = self.get_source_container_client(blob_url)
+
+            # List and download matching files
+            prefix = source_path + "/" if source_path else ""
+            file_count = self.download_blobs(container_client, prefix, output_dir)
 
             if file_count == 0:
                 logger.warning(
@@ -341,11 +910,64 @@ Examples:
         help="File patterns to match, comma-separated (e.g., '*.pdf,*.docx,*.txt'). Default: '*' (all files)",
     )
 
+    parser.add_argument(
+        "--max_workers",
+        type=positive_int,
+        default=DEFAULT_MAX_WORKERS,
+        help=f"Number of blobs downloaded in parallel. Default: {DEFAULT_MAX_WORKERS}",
+    )
+
+    parser.add_argument(
+        "--max_concurrency",
+        type=positive_int,
+        default=DEFAULT_MAX_CONCURRENCY,
+        help=f"Number of parallel range requests per large blob. Default: {DEFAULT_MAX_CONCURRENCY}",
+    )
+
+    parser.add_argument(
+        "--chunk_size_mb",
+        type=positive_int,
+        default=DEFAULT_CHUNK_SIZE_MB,
+        help=f"Size of each blob range request in megabytes. Default: {DEFAULT_CHUNK_SIZE_MB}",
+    )
+
+    parser.add_argument(
+        "--clone_mode",
+        choices=CLONE_MODES,
+        default=DEFAULT_CLONE_MODE,
+        help="'sparse' transfers only the matching files under --source_path (partial clone with "
+        "sparse checkout), 'full' clones the whole repository. Default: sparse",
+    )
+
+    parser.add_argument(
+        "--transfer_mode",
+        choices=TRANSFER_MODES,
+        help="How files fetched from GitHub reach --output_dir: 'move' them out of the checkout, "
+        "'hardlink' or 'reflink' them (falling back to a copy across file systems), 'copy' them, "
+        "or 'none' to leave them in --checkout_dir for the upload step. 'move' cannot be used "
+        "with --checkout_dir. Default: move, or hardlink with --checkout_dir",
+    )
+
+    parser.add_argument(
+        "--checkout_dir",
+        help="Persistent location of the GitHub checkout, updated in place on later runs "
+        "(default: a temporary directory). Required by --transfer_mode none",
+    )
+
     args = parser.parse_args()
 
     # Validate arguments
     if args.source_type in ["github", "blob"] and not args.source_url:
         parser.error(f"--source_url is required for source_type '{args.source_type}'")
+    if args.transfer_mode is None:
+        args.transfer_mode = "hardlink" if args.checkout_dir else DEFAULT_TRANSFER_MODE
+    if args.transfer_mode == "none" and not args.checkout_dir:
+        parser.error("--checkout_dir is required for --transfer_mode none")
+    if args.transfer_mode == "move" and args.checkout_dir:
+        parser.error(
+            "--transfer_mode move would empty the persistent --checkout_dir; "
+            "use hardlink, reflink, copy or none"
+        )
 
     # Parse file patterns
     file_patterns = [
@@ -356,7 +978,15 @@ Examples:
 
     try:
         # Initialize data fetcher with file patterns
-        fetcher = DataFetcher(file_patterns=file_patterns)
+        fetcher = DataFetcher(
+            file_patterns=file_patterns,
+            max_workers=args.max_workers,
+            max_concurrency=args.max_concurrency,
+            chunk_size=args.chunk_size_mb * 1024 * 1024,
+            clone_mode=args.clone_mode,
+            transfer_mode=args.transfer_mode,
+            checkout_dir=args.checkout_dir,
+        )
 
         # Fetch data based on source type
         if args.source_type == "github":
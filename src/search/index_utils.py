@@ -10,8 +10,19 @@ It serves as the primary endpoint for experiments with the AI Search service.
 
 import os
 import argparse
+import contextlib
+import csv
+import json
 import logging
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from dataclasses import dataclass, field
+from typing import Callable, Dict, List, Optional
+import requests
+from azure.core.pipeline.transport import RequestsTransport
 from azure.identity import DefaultAzureCredential, ManagedIdentityCredential
+from azure.search.documents import SearchClient
 from azure.search.documents.indexes import SearchIndexClient, SearchIndexerClient
 from azure.search.documents.indexes.models import (
     SearchIndex,
@@ -19,7 +30,36 @@ from azure.search.documents.indexes.models import (
     SearchIndexer,
     SearchIndexerSkillset,
 )
-from common_utils import absolute_url, valid_name
+from common_utils import (
+    SOFT_DELETE_MARKER_VALUE,
+    SOFT_DELETE_METADATA_KEY,
+    absolute_url,
+    positive_int,
+    valid_name,
+)
+from indexer_run import DEFAULT_WAIT_TIMEOUT, IndexerRunMetrics, run_indexer
+from json_template import load_template
+from reconcile import (
+    CREATE,
+    IMPACT_INDEX_REBUILD,
+    NO_OP,
+    ResourcePlan,
+    format_drift_report,
+    plan_resource,
+)
+from vector_storage import (
+    DEFAULT_VECTOR_PROFILE,
+    apply_to_index,
+    apply_to_skillset,
+    check_dimensions,
+    get_vector_profile,
+    load_vector_profiles,
+)
+
+try:
+    import yaml
+except ImportError:  # YAML tenant manifests are optional
+    yaml = None
 
 logger = logging.getLogger(__name__)
 
@@ -37,7 +77,6 @@ console_handler.setFormatter(formatter)
 # Add the console handler to the logger
 logger.addHandler(console_handler)
 
-APPLICATION_JSON_CONTENT_TYPE = "application/json"
 AI_SEARCH_API_VERSION = "2024-07-01"
 INDEX_SCHEMA_PATH = os.path.join(
     os.path.dirname(__file__), "index_config/documentIndex.json"
@@ -51,26 +90,448 @@ SKILLSET_SCHEMA_PATH = os.path.join(
 INDEXER_SCHEMA_PATH = os.path.join(
     os.path.dirname(__file__), "index_config/documentIndexer.json"
 )
+INDEXER_PROFILES_PATH = os.path.join(
+    os.path.dirname(__file__), "index_config/indexerProfiles.json"
+)
+# The default profile keeps the batch size, failure thresholds and schedule of the indexer file
+DEFAULT_INDEXER_PROFILE = "default"
+# Change and deletion detection modes of the data source
+CHANGE_DETECTION_MODES = ["none", "high_water_mark"]
+DELETION_DETECTION_MODES = ["none", "metadata", "native"]
+DEFAULT_HIGH_WATER_MARK_COLUMN = "metadata_storage_last_modified"
+# Connections kept open to the search service, shared by all concurrent operations
+DEFAULT_CONNECTION_POOL_SIZE = 16
+# Number of tenants provisioned at the same time in batch mode
+DEFAULT_MAX_PARALLEL_TENANTS = 8
+
+
+class SearchClients:
+    """
+    One SearchIndexClient and one SearchIndexerClient sharing a single HTTP transport.
+
+    Both clients, and the document clients created by search_client, send their requests
+    through the same requests session, so TLS connections to the search service are pooled and
+    reused across operations and across base index names provisioned in the same process.
+    Bearer tokens are cached by each client pipeline and, for managed identities, by the
+    credential itself.
+    """
+
+    def __init__(
+        self,
+        ai_search_uri: str,
+        credential,
+        pool_size: int = DEFAULT_CONNECTION_POOL_SIZE,
+        session: Optional[requests.Session] = None,
+    ):
+        """
+        Initialize the clients.
+
+        Args:
+            ai_search_uri: The URI of the AI Search service.
+            credential: The Azure credentials to use for authentication.
+            pool_size: Number of connections kept open to the search service.
+            session: Session to send the requests through, closed with the clients;
+                a session with a pool of pool_size connections is created when omitted.
+        """
+        self.ai_search_uri = ai_search_uri
+        self.credential = credential
+        if session is None:
+            session = requests.Session()
+            session.mount(
+                "https://",
+                requests.adapters.HTTPAdapter(
+                    pool_connections=1, pool_maxsize=pool_size
+                ),
+            )
+        self._session = session
+        # The clients must not close the session they share
+        self.transport = RequestsTransport(session=self._session, session_owner=False)
+        self.index_client = SearchIndexClient(
+            ai_search_uri,
+            credential=credential,
+            api_version=AI_SEARCH_API_VERSION,
+            transport=self.transport,
+        )
+        self.indexer_client = SearchIndexerClient(
+            ai_search_uri,
+            credential=credential,
+            api_version=AI_SEARCH_API_VERSION,
+            transport=self.transport,
+        )
+
+    def search_client(self, index_name: str, **kwargs) -> SearchClient:
+        """
+        Create a client for the documents of an index, on the shared transport.
+
+        Args:
+            index_name: The name of the index.
+            **kwargs: Further client options, e.g. retry_total.
+
+        Returns:
+            The client
+        """
+        return SearchClient(
+            self.ai_search_uri,
+            index_name,
+            credential=self.credential,
+            api_version=AI_SEARCH_API_VERSION,
+            transport=self.transport,
+            **kwargs,
+        )
+
+    def close(self):
+        """Close the shared connection pool."""
+        self._session.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def _search_clients(ai_search_uri: str, credential, clients: Optional[SearchClients]):
+    """Return a context yielding the shared clients, or dedicated ones closed on exit."""
+    if clients:
+        return contextlib.nullcontext(clients)
+    return SearchClients(ai_search_uri, credential, pool_size=1)
+
+
+def _rebuild_required_error(plan: ResourcePlan) -> RuntimeError:
+    return RuntimeError(
+        f"The changes to the {plan.kind} '{plan.name}' cannot be applied in place and require "
+        "an index rebuild. Review them with --plan, then run with --rebuild_index to delete and "
+        "recreate the index and re-index every document."
+    )
+
+
+def reconcile_resource(
+    clients: SearchClients,
+    kind: str,
+    definition: dict,
+    apply: Callable[[], None],
+    rebuild: Optional[Callable[[], None]] = None,
+) -> ResourcePlan:
+    """
+    Plan the reconciliation of one resource, log the plan and apply it if anything changed.
+
+    Args:
+        clients: The search clients.
+        kind: The resource kind, one of reconcile.RESOURCE_COLLECTIONS.
+        definition: The rendered definition of the resource.
+        apply: Function creating or updating the resource on the service.
+        rebuild: Function deleting and recreating the resource, used instead of apply when
+            the changes cannot be applied in place.
+
+    Returns:
+        The plan that was applied
+
+    Raises:
+        RuntimeError: If the changes require an index rebuild and no rebuild function is given
+    """
+    plan = plan_resource(clients.index_client, kind, definition, AI_SEARCH_API_VERSION)
+    logger.info(f"Plan:\n{plan.describe()}")
+    if plan.action == NO_OP:
+        logger.info(f"The {kind} '{plan.name}' is up to date. Not updating it.")
+    elif plan.impact == IMPACT_INDEX_REBUILD:
+        if rebuild is None:
+            raise _rebuild_required_error(plan)
+        logger.warning(f"Deleting and recreating the {kind} '{plan.name}'")
+        rebuild()
+    else:
+        apply()
+    return plan
+
+
+@dataclass
+class ProvisioningStep:
+    """A provisioning operation and the names of the steps it has to wait for."""
+
+    name: str
+    action: Callable[[], None]
+    depends_on: List[str] = field(default_factory=list)
 
 
-def _prepare_json_schema(file_name: str, values_to_assign: dict) -> str:
+def run_provisioning_steps(
+    steps: List[ProvisioningStep], max_workers: int = 4
+) -> Dict[str, float]:
     """
-    Create a string object that represent a json with replaced values based on the dictionary.
+    Run provisioning steps concurrently, starting each step as soon as its dependencies succeeded.
+
+    Steps that depend on a failed step are skipped. Every step is still attempted when another
+    branch fails, and the failures are raised together at the end.
+
+    Args:
+        steps: Steps to run; dependencies must refer to names of other steps in the list
+        max_workers: Maximum number of steps running at the same time
+
+    Returns:
+        Dictionary of step name to its duration in seconds
+
+    Raises:
+        ValueError: If a dependency is unknown or the dependencies form a cycle
+        RuntimeError: If any step failed or was skipped
+    """
+    by_name = {step.name: step for step in steps}
+    for step in steps:
+        unknown = [name for name in step.depends_on if name not in by_name]
+        if unknown:
+            raise ValueError(f"Step '{step.name}' depends on unknown steps {unknown}")
+
+    timings = {}
+    failed = {}
+    done = set()
+    remaining = {step.name: set(step.depends_on) for step in steps}
+    started = time.monotonic()
+
+    def run(step: ProvisioningStep) -> float:
+        step_started = time.monotonic()
+        step.action()
+        return time.monotonic() - step_started
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        running = {}
+        while remaining or running:
+            for name in [name for name, deps in remaining.items() if deps <= done]:
+                del remaining[name]
+                logger.info(f"Starting step '{name}'.")
+                running[executor.submit(run, by_name[name])] = name
+
+            # Skip the steps that can no longer run because a dependency failed,
+            # including the ones that depend on a skipped step
+            blocked = [name for name, deps in remaining.items() if deps & failed.keys()]
+            while blocked:
+                for name in blocked:
+                    del remaining[name]
+                    failed[name] = "skipped because a dependency failed"
+                    logger.error(f"Skipping step '{name}': a dependency failed.")
+                blocked = [
+                    name for name, deps in remaining.items() if deps & failed.keys()
+                ]
+
+            if not running:
+                if remaining:
+                    raise ValueError(
+                        f"Dependency cycle between steps {sorted(remaining)}"
+                    )
+                break
+
+            finished, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in finished:
+                name = running.pop(future)
+                try:
+                    timings[name] = future.result()
+                    done.add(name)
+                    logger.info(f"Step '{name}' completed in {timings[name]:.2f}s.")
+                except Exception as e:
+                    failed[name] = str(e)
+                    logger.error(f"Step '{name}' failed: {e}")
+
+    logger.info(
+        f"Provisioning finished in {time.monotonic() - started:.2f}s "
+        f"(sum of steps: {sum(timings.values()):.2f}s)."
+    )
+    if failed:
+        raise RuntimeError(
+            "Provisioning failed: "
+            + "; ".join(f"{name}: {error}" for name, error in sorted(failed.items()))
+        )
+    return timings
+
+
+def _prepare_json_schema(file_name: str, values_to_assign: dict) -> dict:
+    """
+    Render a definition from index_config, replacing the placeholders with the given values.
+
+    The file is parsed once and cached, and the values are substituted in the parsed tree.
+
+    Args:
+        file_name: The path to the json file
+        values_to_assign: a dictionary with the value of each placeholder name, without the
+            angle brackets
+
+    Returns:
+        dict: The rendered definition
+
+    Raises:
+        ValueError: If a placeholder of the file has no value
+    """
+    return load_template(file_name).render(values_to_assign)
+
+
+def _index_set_names(base_index_name: str) -> Dict[str, str]:
+    """Form the names of the resources of an index set from its base name."""
+    return {
+        "index": f"{base_index_name}-index",
+        "datasource": f"{base_index_name}-ds",
+        "skillset": f"{base_index_name}-skills",
+        "indexer": f"{base_index_name}-indexer",
+    }
+
+
+def _render_skillset(
+    skillset_name: str,
+    index_name: str,
+    skillset_file: str,
+    open_ai_uri: str,
+    vector_profile: str = DEFAULT_VECTOR_PROFILE,
+) -> dict:
+    definition = _prepare_json_schema(
+        skillset_file,
+        {
+            "search_index_name": index_name,
+            "skillset_name": skillset_name,
+            "open_ai_uri": open_ai_uri,
+        },
+    )
+    return apply_to_skillset(definition, get_vector_profile(vector_profile))
+
+
+def load_indexer_profiles(
+    profiles_file: str = INDEXER_PROFILES_PATH,
+) -> Dict[str, dict]:
+    """
+    Read the indexer tuning profiles.
+
+    A profile holds the indexer properties it overrides, typically the batch size and failure
+    thresholds in "parameters" and the "schedule".
 
     Args:
-        file: The path to the json file
-        values_to_assign: a dictionary with key/value pair to change in the json file
+        profiles_file: The path to the profiles file.
 
     Returns:
-        str: The json string with replaced values
+        Dictionary of profile name to the properties it sets
     """
-    with open(file_name) as indexer_file:
-        indexer_def = indexer_file.read()
+    return _prepare_json_schema(profiles_file, {})
 
-    for key in values_to_assign.keys():
-        indexer_def = indexer_def.replace(f"{key}", values_to_assign[key])
 
-    return indexer_def
+def _apply_indexer_profile(definition: dict, profile: dict) -> dict:
+    """Override the properties of an indexer definition with the ones of a profile."""
+    for key, value in profile.items():
+        if isinstance(value, dict) and isinstance(definition.get(key), dict):
+            _apply_indexer_profile(definition[key], value)
+        else:
+            definition[key] = value
+    return definition
+
+
+def _render_indexer(
+    indexer_name: str,
+    index_name: str,
+    skillset_name: str,
+    datasource_name: str,
+    indexer_file: str,
+    indexer_profile: str = DEFAULT_INDEXER_PROFILE,
+) -> dict:
+    profiles = load_indexer_profiles()
+    if indexer_profile not in profiles:
+        raise ValueError(
+            f"Unknown indexer profile '{indexer_profile}', expected one of {sorted(profiles)}"
+        )
+    definition = _prepare_json_schema(
+        indexer_file,
+        {
+            "search_indexer_name": indexer_name,
+            "search_index_name": index_name,
+            "skillset_name": skillset_name,
+            "data_source_name": datasource_name,
+        },
+    )
+    return _apply_indexer_profile(definition, profiles[indexer_profile])
+
+
+@dataclass
+class DetectionPolicies:
+    """
+    Change and deletion detection of the data source, for incremental indexer runs.
+
+    With change detection, an indexer run only processes the documents whose high water mark
+    column increased since the previous run. With deletion detection, the documents of deleted
+    blobs are removed from the index: "metadata" looks for blobs flagged with the soft delete
+    metadata (see upload_data.py --soft_delete), "native" for blobs deleted while blob soft
+    delete is enabled on the storage account.
+    """
+
+    # One of CHANGE_DETECTION_MODES; "none" keeps the policy of the data source file
+    change_detection: str = "none"
+    high_water_mark_column: str = DEFAULT_HIGH_WATER_MARK_COLUMN
+    # One of DELETION_DETECTION_MODES; "none" keeps the policy of the data source file
+    deletion_detection: str = "none"
+
+    def apply(self, definition: dict) -> dict:
+        """
+        Set the detection policies of a data source definition.
+
+        Args:
+            definition: The rendered data source definition, modified in place.
+
+        Returns:
+            The definition
+        """
+        if self.change_detection == "high_water_mark":
+            definition["dataChangeDetectionPolicy"] = {
+                "@odata.type": "#Microsoft.Azure.Search.HighWaterMarkChangeDetectionPolicy",
+                "highWaterMarkColumnName": self.high_water_mark_column,
+            }
+        if self.deletion_detection == "metadata":
+            definition["dataDeletionDetectionPolicy"] = {
+                "@odata.type": "#Microsoft.Azure.Search.SoftDeleteColumnDeletionDetectionPolicy",
+                "softDeleteColumnName": SOFT_DELETE_METADATA_KEY,
+                "softDeleteMarkerValue": SOFT_DELETE_MARKER_VALUE,
+            }
+        elif self.deletion_detection == "native":
+            definition["dataDeletionDetectionPolicy"] = {
+                "@odata.type": "#Microsoft.Azure.Search.NativeBlobSoftDeleteDeletionDetectionPolicy"
+            }
+        return definition
+
+
+def _render_datasource(
+    datasource_name: str,
+    datasource_file: str,
+    conn_string: str,
+    container_name: str,
+    detection: Optional[DetectionPolicies] = None,
+) -> dict:
+    definition = _prepare_json_schema(
+        datasource_file,
+        {
+            "connection_string": conn_string,
+            "container_name": container_name,
+            "data_source_name": datasource_name,
+        },
+    )
+    return (detection or DetectionPolicies()).apply(definition)
+
+
+def _render_index(
+    index_name: str,
+    index_file: str,
+    open_ai_uri: str,
+    vector_profile: str = DEFAULT_VECTOR_PROFILE,
+) -> dict:
+    definition = _prepare_json_schema(
+        index_file,
+        {
+            "search_index_name": index_name,
+            "open_ai_uri": open_ai_uri,
+        },
+    )
+    return apply_to_index(definition, get_vector_profile(vector_profile))
+
+
+def _check_vector_profile(names: Dict[str, str], open_ai_uri: str, vector_profile: str):
+    """Check that the index set has the same vector dimensions in the index and the skillset."""
+    check_dimensions(
+        _render_index(names["index"], INDEX_SCHEMA_PATH, open_ai_uri, vector_profile),
+        _render_skillset(
+            names["skillset"],
+            names["index"],
+            SKILLSET_SCHEMA_PATH,
+            open_ai_uri,
+            vector_profile,
+        ),
+    )
 
 
 def create_or_update_skillset(
@@ -80,9 +541,12 @@ def create_or_update_skillset(
     ai_search_uri: str,
     open_ai_uri: str,
     credentials,
-):
+    clients: Optional[SearchClients] = None,
+    vector_profile: str = DEFAULT_VECTOR_PROFILE,
+) -> ResourcePlan:
     """
-    Create or update the skillset in the AI Search service. If the skillset already exists, no change.
+    Create or update the skillset in the AI Search service. An existing skillset is only updated
+    when its definition differs from the file.
 
     Args:
         skillset_name: The name of the skillset to create or update.
@@ -91,35 +555,29 @@ def create_or_update_skillset(
         ai_search_uri: The URI of the AI Search service.
         open_ai_uri: The base URI of the OpenAI API.
         credentials: The Azure credentials to use for authentication.
+        clients: Shared search clients; a dedicated client is created when omitted.
+        vector_profile: The vector storage profile, from vectorProfiles.json; sets the
+            dimensions requested from the embedding model.
 
     Returns:
-        None
+        The plan that was applied (create, update or no-op)
     """
     try:
-        # Create a search indexer client
-        indexer_client = SearchIndexerClient(
-            ai_search_uri, credential=credentials, api_version=AI_SEARCH_API_VERSION
-        )
-
         # read definition from the file and replace placeholders with actual values
-        definition = _prepare_json_schema(
-            skillset_file,
-            {
-                "<search_index_name>": index_name,
-                "<skillset_name>": skillset_name,
-                "<open_ai_uri>": open_ai_uri,
-            },
+        definition = _render_skillset(
+            skillset_name, index_name, skillset_file, open_ai_uri, vector_profile
         )
 
-        # create an object of the skillset and initiate index creation process
-        skillset = SearchIndexerSkillset.deserialize(
-            definition, APPLICATION_JSON_CONTENT_TYPE
-        )
-        if skillset_name not in indexer_client.get_skillset_names():
-            indexer_client.create_or_update_skillset(skillset=skillset)
-        else:
-            logger.info(
-                f"Skillset with name '{skillset_name}' already exists. Not recreating the skillset"
+        # create an object of the skillset and update it only if its definition changed
+        skillset = SearchIndexerSkillset.deserialize(definition)
+        with _search_clients(ai_search_uri, credentials, clients) as search_clients:
+            return reconcile_resource(
+                search_clients,
+                "skillset",
+                definition,
+                lambda: search_clients.indexer_client.create_or_update_skillset(
+                    skillset=skillset
+                ),
             )
     except Exception as e:
         logger.error(f"Failed to create or update the skillset '{skillset_name}': {e}")
@@ -134,9 +592,12 @@ def create_or_update_indexer(
     indexer_file: str,
     ai_search_uri: str,
     credential,
-):
+    clients: Optional[SearchClients] = None,
+    indexer_profile: str = DEFAULT_INDEXER_PROFILE,
+) -> ResourcePlan:
     """
-    Create or update the indexer in the AI Search service. If the indexer already exists, no change.
+    Create or update the indexer in the AI Search service. An existing indexer is only updated
+    when its definition differs from the file.
 
     Args:
         indexer_name: The name of the indexer to create or update.
@@ -146,34 +607,33 @@ def create_or_update_indexer(
         indexer_file: The path to the indexer definition file.
         ai_search_uri: The URI of the AI Search service.
         credential: The Azure credentials to use for authentication.
+        clients: Shared search clients; a dedicated client is created when omitted.
+        indexer_profile: The tuning profile applied to the definition, from indexerProfiles.json.
 
     Returns:
-        None
+        The plan that was applied (create, update or no-op)
     """
-    # Create a search indexer client
     try:
-        indexer_client = SearchIndexerClient(
-            ai_search_uri, credential=credential, api_version=AI_SEARCH_API_VERSION
-        )
-
         # read definition from the file and replace placeholders with actual values
-        definition = _prepare_json_schema(
+        definition = _render_indexer(
+            indexer_name,
+            index_name,
+            skillset_name,
+            datasource_name,
             indexer_file,
-            {
-                "<search_indexer_name>": indexer_name,
-                "<search_index_name>": index_name,
-                "<skillset_name>": skillset_name,
-                "<data_source_name>": datasource_name,
-            },
+            indexer_profile,
         )
 
-        # create an object of the indexer and initiate index creation process
-        indexer = SearchIndexer.deserialize(definition, APPLICATION_JSON_CONTENT_TYPE)
-        if indexer_name not in indexer_client.get_indexer_names():
-            indexer_client.create_or_update_indexer(indexer=indexer)
-        else:
-            logger.info(
-                f"Indexer with name '{indexer_name}' already exists. Not recreating the indexer"
+        # create an object of the indexer and update it only if its definition changed
+        indexer = SearchIndexer.deserialize(definition)
+        with _search_clients(ai_search_uri, credential, clients) as search_clients:
+            return reconcile_resource(
+                search_clients,
+                "indexer",
+                definition,
+                lambda: search_clients.indexer_client.create_or_update_indexer(
+                    indexer=indexer
+                ),
             )
     except Exception as e:
         logger.error(f"Failed to create or update the indexer '{indexer_name}': {e}")
@@ -189,9 +649,12 @@ def create_or_update_datasource(
     storage_account_name: str,
     container_name: str,
     credential,
-):
+    clients: Optional[SearchClients] = None,
+    detection: Optional[DetectionPolicies] = None,
+) -> ResourcePlan:
     """
-    Create or update the data source in the AI Search service. If the data source already exists, no change.
+    Create or update the data source in the AI Search service. An existing data source is only updated
+    when its definition differs from the file.
 
     Args:
         datasource_name: The name of the data source to create or update.
@@ -202,9 +665,11 @@ def create_or_update_datasource(
         container_name: The name of the Azure storage container.
         ai_search_uri: The URI of the AI Search service.
         credential: The Azure credentials to use for authentication.
+        clients: Shared search clients; a dedicated client is created when omitted.
+        detection: The change and deletion detection policies; those of the file when omitted.
 
     Returns:
-        None
+        The plan that was applied (create, update or no-op)
     """
     try:
         # Create the connection string for the storage account applying Entra ID approach
@@ -213,38 +678,35 @@ def create_or_update_datasource(
             subscription_id, storage_account_name, resource_group_name
         )
 
-        # Create a search indexer client
-        indexer_client = SearchIndexerClient(
-            ai_search_uri, credential=credential, api_version=AI_SEARCH_API_VERSION
-        )
-
         # read definition from the file and replace placeholders with actual values
-        definition = _prepare_json_schema(
-            datasource_file,
-            {
-                "<connection_string>": conn_string,
-                "<container_name>": container_name,
-                "<data_source_name>": datasource_name,
-            },
+        definition = _render_datasource(
+            datasource_name, datasource_file, conn_string, container_name, detection
         )
 
         # create an object of the data source connection and initiate data source creation process
         data_source_connection = SearchIndexerDataSourceConnection.deserialize(
-            definition, APPLICATION_JSON_CONTENT_TYPE
+            definition
         )
+        # SDK versions that do not know a policy type deserialize it without its type
+        deletion_policy = data_source_connection.data_deletion_detection_policy
+        if deletion_policy is not None and deletion_policy.odata_type is None:
+            deletion_policy.odata_type = definition["dataDeletionDetectionPolicy"][
+                "@odata.type"
+            ]
 
         # Explicitly setting the connection string as it is required by the SearchIndexerDataSourceConnection object
         # to properly establish the connection, even though credentials are provided.
         data_source_connection.connection_string = conn_string
 
-        # Create the data source only if it doesn't already exist to avoid LONG WAIT TIMES
-        if datasource_name not in indexer_client.get_data_source_connection_names():
-            indexer_client.create_or_update_data_source_connection(
-                data_source_connection
-            )
-        else:
-            logger.info(
-                f"Data source with name '{datasource_name}' already exists in this resource. Not recreating the data source"
+        # Update the data source only if its definition changed to avoid LONG WAIT TIMES
+        with _search_clients(ai_search_uri, credential, clients) as search_clients:
+            return reconcile_resource(
+                search_clients,
+                "datasource",
+                definition,
+                lambda: search_clients.indexer_client.create_or_update_data_source_connection(
+                    data_source_connection
+                ),
             )
     except Exception as e:
         logger.error(
@@ -273,9 +735,16 @@ def create_or_update_index(
     ai_search_uri: str,
     open_ai_uri: str,
     credential,
-):
+    clients: Optional[SearchClients] = None,
+    vector_profile: str = DEFAULT_VECTOR_PROFILE,
+    rebuild_index: bool = False,
+) -> ResourcePlan:
     """
-    Create or update the index in the AI Search service. If the index already exists, then no change.
+    Create or update the index in the AI Search service. An existing index is only updated
+    when its definition differs from the file.
+
+    Changes that cannot be applied to an existing index, such as other vector dimensions, fail
+    unless rebuild_index is set, in which case the index is deleted and recreated empty.
 
     Args:
         index_name: The name of the index to create or update.
@@ -283,30 +752,36 @@ def create_or_update_index(
         open_ai_uri: The base URI of the OpenAI API.
         ai_search_uri: The URI of the AI Search service.
         credential: The Azure credentials to use for authentication.
+        clients: Shared search clients; a dedicated client is created when omitted.
+        vector_profile: The vector storage profile, from vectorProfiles.json.
+        rebuild_index: Delete and recreate the index when it cannot be updated in place.
 
     Returns:
-        None
+        The plan that was applied (create, update or no-op)
     """
     try:
-        index_client = SearchIndexClient(
-            ai_search_uri, credential=credential, api_version=AI_SEARCH_API_VERSION
-        )
-
-        definition = _prepare_json_schema(
-            index_file,
-            {
-                "<search_index_name>": index_name,
-                "<open_ai_uri>": open_ai_uri,
-            },
-        )
+        definition = _render_index(index_name, index_file, open_ai_uri, vector_profile)
 
-        # create an object of the index and initiate index creation process if it does not already exist
-        index = SearchIndex.deserialize(definition, APPLICATION_JSON_CONTENT_TYPE)
+        # create an object of the index and push it only if its definition changed
+        index = SearchIndex.deserialize(definition)
         logger.info(
             f"Attempting to create/update index '{index_name}' on AI Search service at {ai_search_uri}"
         )
-        index_client.create_or_update_index(index=index)
-        logger.info(f"Successfully created/updated index '{index_name}'")
+        with _search_clients(ai_search_uri, credential, clients) as search_clients:
+
+            def rebuild():
+                search_clients.index_client.delete_index(index_name)
+                search_clients.index_client.create_index(index)
+
+            plan = reconcile_resource(
+                search_clients,
+                "index",
+                definition,
+                lambda: search_clients.index_client.create_or_update_index(index=index),
+                rebuild if rebuild_index else None,
+            )
+        logger.info(f"Successfully reconciled index '{index_name}'")
+        return plan
     except Exception as e:
         logger.error(f"Failed to create or update the index '{index_name}': {e}")
         logger.error(f"AI Search URI: {ai_search_uri}")
@@ -330,6 +805,424 @@ def create_or_update_index(
         raise
 
 
+def provision_index_set(
+    ai_search_uri: str,
+    base_index_name: str,
+    open_ai_uri: str,
+    subscription_id: str,
+    resource_group_name: str,
+    storage_account_name: str,
+    container_name: str,
+    credential,
+    clients: Optional[SearchClients] = None,
+    indexer_profile: str = DEFAULT_INDEXER_PROFILE,
+    detection: Optional[DetectionPolicies] = None,
+    vector_profile: str = DEFAULT_VECTOR_PROFILE,
+    rebuild_index: bool = False,
+) -> Dict[str, float]:
+    """
+    Create or update the index, data source, skillset and indexer of one base index name.
+
+    The index, data source and skillset do not depend on each other and are provisioned
+    concurrently; the indexer starts as soon as all three exist. When the index cannot be
+    updated in place, nothing is changed unless rebuild_index is set: the index is then deleted
+    and recreated, and the indexer reset and run to re-index every document.
+
+    Args:
+        ai_search_uri: The URI of the AI Search service.
+        base_index_name: The base name used to form the names of the four resources.
+        open_ai_uri: The base URI of the OpenAI API.
+        subscription_id: The Azure subscription ID.
+        resource_group_name: The name of the Azure resource group.
+        storage_account_name: The name of the Azure storage account.
+        container_name: The name of the Azure storage container.
+        credential: The Azure credentials to use for authentication.
+        clients: Shared search clients; created for this call and closed when omitted.
+        indexer_profile: The tuning profile of the indexer, from indexerProfiles.json.
+        detection: The change and deletion detection policies of the data source.
+        vector_profile: The vector storage profile of the index and skillset, from
+            vectorProfiles.json.
+        rebuild_index: Delete and recreate the index when it cannot be updated in place.
+
+    Returns:
+        Dictionary of step name to its duration in seconds
+
+    Raises:
+        RuntimeError: If the index requires a rebuild and rebuild_index is not set
+    """
+    # forming entity names based on the base name
+    names = _index_set_names(base_index_name)
+    index_name = names["index"]
+    datasource_name = names["datasource"]
+    skillset_name = names["skillset"]
+    indexer_name = names["indexer"]
+
+    # Fail before changing anything if the index and the skillset disagree
+    _check_vector_profile(names, open_ai_uri, vector_profile)
+
+    if clients is None:
+        with SearchClients(ai_search_uri, credential) as own_clients:
+            return provision_index_set(
+                ai_search_uri,
+                base_index_name,
+                open_ai_uri,
+                subscription_id,
+                resource_group_name,
+                storage_account_name,
+                container_name,
+                credential,
+                own_clients,
+                indexer_profile,
+                detection,
+                vector_profile,
+                rebuild_index,
+            )
+
+    # Fail before changing anything if the index cannot be updated in place
+    index_plan = plan_resource(
+        clients.index_client,
+        "index",
+        _render_index(index_name, INDEX_SCHEMA_PATH, open_ai_uri, vector_profile),
+        AI_SEARCH_API_VERSION,
+    )
+    rebuilding = index_plan.impact == IMPACT_INDEX_REBUILD
+    if rebuilding and not rebuild_index:
+        raise _rebuild_required_error(index_plan)
+
+    def provision_indexer():
+        plan = create_or_update_indexer(
+            indexer_name,
+            index_name,
+            skillset_name,
+            datasource_name,
+            INDEXER_SCHEMA_PATH,
+            ai_search_uri,
+            credential,
+            clients,
+            indexer_profile,
+        )
+        # A new indexer runs on its own; an existing one has already indexed the deleted index
+        if rebuilding and plan.action != CREATE:
+            logger.info(f"Resetting and running the indexer '{indexer_name}'")
+            clients.indexer_client.reset_indexer(indexer_name)
+            clients.indexer_client.run_indexer(indexer_name)
+
+    steps = [
+        ProvisioningStep(
+            "index",
+            lambda: create_or_update_index(
+                index_name,
+                INDEX_SCHEMA_PATH,
+                ai_search_uri,
+                open_ai_uri,
+                credential,
+                clients,
+                vector_profile,
+                rebuild_index,
+            ),
+        ),
+        ProvisioningStep(
+            "datasource",
+            lambda: create_or_update_datasource(
+                datasource_name,
+                DATASOURCE_SCHEMA_PATH,
+                ai_search_uri,
+                subscription_id,
+                resource_group_name,
+                storage_account_name,
+                container_name,
+                credential,
+                clients,
+                detection,
+            ),
+        ),
+        ProvisioningStep(
+            "skillset",
+            lambda: create_or_update_skillset(
+                skillset_name,
+                index_name,
+                SKILLSET_SCHEMA_PATH,
+                ai_search_uri,
+                open_ai_uri,
+                credential,
+                clients,
+                vector_profile,
+            ),
+        ),
+        ProvisioningStep(
+            "indexer",
+            provision_indexer,
+            depends_on=["index", "datasource", "skillset"],
+        ),
+    ]
+    return run_provisioning_steps(steps)
+
+
+def plan_index_set(
+    ai_search_uri: str,
+    base_index_name: str,
+    open_ai_uri: str,
+    subscription_id: str,
+    resource_group_name: str,
+    storage_account_name: str,
+    container_name: str,
+    credential,
+    clients: Optional[SearchClients] = None,
+    indexer_profile: str = DEFAULT_INDEXER_PROFILE,
+    detection: Optional[DetectionPolicies] = None,
+    vector_profile: str = DEFAULT_VECTOR_PROFILE,
+) -> List[ResourcePlan]:
+    """
+    Compare the rendered definitions of one base index name with the service, without changing it.
+
+    Args:
+        ai_search_uri: The URI of the AI Search service.
+        base_index_name: The base name used to form the names of the four resources.
+        open_ai_uri: The base URI of the OpenAI API.
+        subscription_id: The Azure subscription ID.
+        resource_group_name: The name of the Azure resource group.
+        storage_account_name: The name of the Azure storage account.
+        container_name: The name of the Azure storage container.
+        credential: The Azure credentials to use for authentication.
+        clients: Shared search clients; a dedicated client is created when omitted.
+        indexer_profile: The tuning profile of the indexer, from indexerProfiles.json.
+        detection: The change and deletion detection policies of the data source.
+        vector_profile: The vector storage profile of the index and skillset, from
+            vectorProfiles.json.
+
+    Returns:
+        The plans of the index, data source, skillset and indexer
+    """
+    names = _index_set_names(base_index_name)
+    conn_string = _get_storage_conn_string(
+        subscription_id, storage_account_name, resource_group_name
+    )
+    definitions = {
+        "index": _render_index(
+            names["index"], INDEX_SCHEMA_PATH, open_ai_uri, vector_profile
+        ),
+        "datasource": _render_datasource(
+            names["datasource"],
+            DATASOURCE_SCHEMA_PATH,
+            conn_string,
+            container_name,
+            detection,
+        ),
+        "skillset": _render_skillset(
+            names["skillset"],
+            names["index"],
+            SKILLSET_SCHEMA_PATH,
+            open_ai_uri,
+            vector_profile,
+        ),
+        "indexer": _render_indexer(
+            names["indexer"],
+            names["index"],
+            names["skillset"],
+            names["datasource"],
+            INDEXER_SCHEMA_PATH,
+            indexer_profile,
+        ),
+    }
+    with _search_clients(ai_search_uri, credential, clients) as search_clients:
+        return [
+            plan_resource(
+                search_clients.index_client, kind, definition, AI_SEARCH_API_VERSION
+            )
+            for kind, definition in definitions.items()
+        ]
+
+
+@dataclass
+class TenantSpec:
+    """One index set of a tenant manifest."""
+
+    base_index_name: str
+    container_name: str
+    # Storage account of the tenant data; the --storage_name account when omitted
+    storage_name: Optional[str] = None
+
+
+@dataclass
+class TenantResult:
+    """Outcome of the provisioning of one tenant."""
+
+    base_index_name: str
+    succeeded: bool
+    elapsed: float
+    error: str = ""
+
+
+def load_tenants(manifest_file: str) -> List[TenantSpec]:
+    """
+    Read a tenant manifest in JSON, YAML or CSV format, selected by the file extension.
+
+    JSON and YAML manifests hold a list of objects, or an object with a "tenants" list; CSV
+    manifests have a header row. Every tenant needs a base_index_name and a container_name and
+    may set a storage_name.
+
+    Args:
+        manifest_file: The path to the manifest file.
+
+    Returns:
+        The tenants, in manifest order
+
+    Raises:
+        ValueError: If the manifest is malformed or a name is invalid or duplicated
+    """
+    extension = os.path.splitext(manifest_file)[1].lower()
+    with open(manifest_file, newline="") as manifest:
+        if extension == ".csv":
+            entries = list(csv.DictReader(manifest))
+        elif extension in (".yaml", ".yml"):
+            if yaml is None:
+                raise ValueError("YAML manifests require PyYAML (pip install pyyaml)")
+            entries = yaml.safe_load(manifest)
+        elif extension == ".json":
+            entries = json.load(manifest)
+        else:
+            raise ValueError(f"Unsupported tenant manifest format: {manifest_file}")
+
+    if isinstance(entries, dict):
+        entries = entries.get("tenants")
+    if not isinstance(entries, list) or not entries:
+        raise ValueError(f"Tenant manifest {manifest_file} contains no tenants")
+
+    tenants = []
+    seen = set()
+    for position, entry in enumerate(entries, start=1):
+        try:
+            tenant = TenantSpec(
+                base_index_name=valid_name(entry.get("base_index_name")),
+                container_name=valid_name(entry.get("container_name")),
+                storage_name=entry.get("storage_name") or None,
+            )
+        except (AttributeError, argparse.ArgumentTypeError) as e:
+            raise ValueError(f"Invalid tenant #{position} in {manifest_file}: {e}")
+        if tenant.base_index_name in seen:
+            raise ValueError(
+                f"Duplicate base_index_name '{tenant.base_index_name}' in {manifest_file}"
+            )
+        seen.add(tenant.base_index_name)
+        tenants.append(tenant)
+    return tenants
+
+
+def provision_tenants(
+    tenants: List[TenantSpec],
+    ai_search_uri: str,
+    open_ai_uri: str,
+    subscription_id: str,
+    resource_group_name: str,
+    storage_account_name: str,
+    credential,
+    clients: SearchClients,
+    max_parallel: int = DEFAULT_MAX_PARALLEL_TENANTS,
+    indexer_profile: str = DEFAULT_INDEXER_PROFILE,
+    detection: Optional[DetectionPolicies] = None,
+    vector_profile: str = DEFAULT_VECTOR_PROFILE,
+    rebuild_index: bool = False,
+) -> List[TenantResult]:
+    """
+    Provision the index sets of many tenants with bounded concurrency and shared clients.
+
+    A failing tenant does not stop the others.
+
+    Args:
+        tenants: The tenants to provision.
+        ai_search_uri: The URI of the AI Search service.
+        open_ai_uri: The base URI of the OpenAI API.
+        subscription_id: The Azure subscription ID.
+        resource_group_name: The name of the Azure resource group.
+        storage_account_name: The storage account of the tenants that do not set their own.
+        credential: The Azure credentials to use for authentication.
+        clients: Search clients shared by all tenants.
+        max_parallel: Number of tenants provisioned at the same time.
+        indexer_profile: The tuning profile of the indexers, from indexerProfiles.json.
+        detection: The change and deletion detection policies of the data sources.
+        vector_profile: The vector storage profile of the indexes and skillsets, from
+            vectorProfiles.json.
+        rebuild_index: Delete and recreate the indexes that cannot be updated in place.
+
+    Returns:
+        One result per tenant, in manifest order
+    """
+
+    def provision(tenant: TenantSpec) -> TenantResult:
+        started = time.monotonic()
+        try:
+            provision_index_set(
+                ai_search_uri,
+                tenant.base_index_name,
+                open_ai_uri,
+                subscription_id,
+                resource_group_name,
+                tenant.storage_name or storage_account_name,
+                tenant.container_name,
+                credential,
+                clients,
+                indexer_profile,
+                detection,
+                vector_profile,
+                rebuild_index,
+            )
+            return TenantResult(
+                tenant.base_index_name, True, time.monotonic() - started
+            )
+        except Exception as e:
+            logger.error(f"Failed to provision tenant '{tenant.base_index_name}': {e}")
+            return TenantResult(
+                tenant.base_index_name, False, time.monotonic() - started, str(e)
+            )
+
+    with ThreadPoolExecutor(max_workers=max_parallel) as executor:
+        return list(executor.map(provision, tenants))
+
+
+def format_tenant_results(results: List[TenantResult]) -> str:
+    """
+    Build a plain text table of tenant results.
+
+    Args:
+        results: The results returned by provision_tenants.
+
+    Returns:
+        The table, one line per tenant after a header line
+    """
+    width = max([len("tenant")] + [len(result.base_index_name) for result in results])
+    lines = [f"{'tenant':<{width}}  status   seconds  error"]
+    for result in results:
+        status = "ok" if result.succeeded else "failed"
+        lines.append(
+            f"{result.base_index_name:<{width}}  {status:<7}  {result.elapsed:7.2f}  "
+            f"{result.error}".rstrip()
+        )
+    return "\n".join(lines)
+
+
+def progress_reporter(
+    metrics_file: Optional[str] = None,
+) -> Callable[[IndexerRunMetrics], None]:
+    """
+    Build the progress callback of indexer runs, logging every poll.
+
+    Args:
+        metrics_file: A JSON lines file that receives the metrics of every poll, if given.
+
+    Returns:
+        The callback, safe to share between concurrent runs
+    """
+    lock = threading.Lock()
+
+    def report(metrics: IndexerRunMetrics):
+        logger.info(f"Indexer progress: {metrics.describe()}")
+        if metrics_file:
+            with lock, open(metrics_file, "a") as metrics_output:
+                metrics_output.write(metrics.to_json() + "\n")
+
+    return report
+
+
 def main():
     """
     Create an indexer and related entities based on the configuration parameters.
@@ -352,6 +1245,11 @@ def main():
     - --resource_group_name: The name of the Azure resource group.
     - --storage_name: The name of the Azure storage account.
     - --container_name: The name of the Azure storage container.
+    - --tenants_manifest: Instead of --base_index_name and --container_name, a manifest of many
+      tenants provisioned in one run with shared credentials and clients.
+    - --plan: Only log a drift report of the changes, without applying them.
+    - --rebuild_index: Delete and recreate an index whose changes cannot be applied in place.
+    - --wait: Run the indexer after provisioning and wait until the data is searchable.
 
     The function uses these parameters to construct the necessary components and logs the progress
     of each operation.
@@ -367,7 +1265,6 @@ def main():
     )
     parser.add_argument(
         "--base_index_name",
-        required=True,
         type=valid_name,
         help="base name to form the index, data source, skillset and indexer names",
     )
@@ -398,17 +1295,109 @@ def main():
     parser.add_argument(
         "--container_name",
         type=valid_name,
-        required=True,
         help="Azure storage container name",
     )
+    parser.add_argument(
+        "--tenants_manifest",
+        help="JSON, YAML or CSV manifest of tenants (base_index_name, container_name and optional "
+        "storage_name) to provision in one run instead of --base_index_name and --container_name",
+    )
+    parser.add_argument(
+        "--max_parallel_tenants",
+        type=positive_int,
+        default=DEFAULT_MAX_PARALLEL_TENANTS,
+        help=f"Number of tenants provisioned at the same time. Default: {DEFAULT_MAX_PARALLEL_TENANTS}",
+    )
     parser.add_argument(
         "--client_id",
         type=str,
         required=False,
         help="Azure client ID for user-assigned managed identity (if not provided, will try system-assigned managed identity)",
     )
+    parser.add_argument(
+        "--indexer_profile",
+        choices=sorted(load_indexer_profiles()),
+        default=DEFAULT_INDEXER_PROFILE,
+        help="Tuning profile of the indexer batch size, failure thresholds and schedule, "
+        f"defined in index_config/indexerProfiles.json. Default: {DEFAULT_INDEXER_PROFILE}",
+    )
+    parser.add_argument(
+        "--vector_profile",
+        choices=list(load_vector_profiles()),
+        default=DEFAULT_VECTOR_PROFILE,
+        help="Storage profile of the vectors: dimensions, element type, compression and whether "
+        f"they are retrievable, defined in index_config/vectorProfiles.json. Default: {DEFAULT_VECTOR_PROFILE}",
+    )
+    parser.add_argument(
+        "--change_detection",
+        choices=CHANGE_DETECTION_MODES,
+        default="none",
+        help="Change detection policy of the data source; high_water_mark tracks "
+        "--high_water_mark_column. Default: none (policy of documentDataSource.json)",
+    )
+    parser.add_argument(
+        "--high_water_mark_column",
+        default=DEFAULT_HIGH_WATER_MARK_COLUMN,
+        help=f"Column of the high water mark change detection. Default: {DEFAULT_HIGH_WATER_MARK_COLUMN}",
+    )
+    parser.add_argument(
+        "--deletion_detection",
+        choices=DELETION_DETECTION_MODES,
+        default="none",
+        help="Deletion detection policy of the data source: metadata for blobs flagged with "
+        f"{SOFT_DELETE_METADATA_KEY}={SOFT_DELETE_MARKER_VALUE} (upload_data.py --soft_delete), native for "
+        "blob soft delete. Default: none (policy of documentDataSource.json)",
+    )
+    parser.add_argument(
+        "--plan",
+        action="store_true",
+        help="Only report the differences between the configuration and the service, "
+        "and whether they require an index rebuild or an indexer reset, without changing anything",
+    )
+    parser.add_argument(
+        "--rebuild_index",
+        action="store_true",
+        help="Delete and recreate the index, then reset and run the indexer, when the changes "
+        "cannot be applied in place (e.g. another --vector_profile); without it, provisioning "
+        "stops before changing anything",
+    )
+    parser.add_argument(
+        "--wait",
+        action="store_true",
+        help="Run the indexer after provisioning and wait for the run to complete; "
+        "exit with an error if it fails",
+    )
+    parser.add_argument(
+        "--wait_timeout",
+        type=positive_int,
+        default=DEFAULT_WAIT_TIMEOUT,
+        help=f"With --wait, maximum number of seconds to wait for the indexer. Default: {DEFAULT_WAIT_TIMEOUT}",
+    )
+    parser.add_argument(
+        "--metrics_file",
+        help="With --wait, JSON lines file receiving the indexer progress metrics of every poll",
+    )
+    parser.add_argument(
+        "--log_connections",
+        action="store_true",
+        help="Log every new HTTP connection to the search service, to check that connections are reused",
+    )
     args = parser.parse_args()
 
+    if args.tenants_manifest:
+        if args.base_index_name or args.container_name:
+            parser.error(
+                "--tenants_manifest cannot be combined with --base_index_name or --container_name"
+            )
+    elif not (args.base_index_name and args.container_name):
+        parser.error(
+            "--base_index_name and --container_name are required without --tenants_manifest"
+        )
+
+    detection = DetectionPolicies(
+        args.change_detection, args.high_water_mark_column, args.deletion_detection
+    )
+
     # Choose authentication method with explicit user-assigned managed identity priority
     credential = None
 
@@ -453,59 +1442,126 @@ def main():
 
     ai_search_uri = f"https://{args.aisearch_name}.search.windows.net"
 
-    # forming entity names based on the base name
-    index_name = f"{args.base_index_name}-index"
-    datasource_name = f"{args.base_index_name}-ds"
-    skillset_name = f"{args.base_index_name}-skills"
-    indexer_name = f"{args.base_index_name}-indexer"
-
-    # Create the full document index
-    logger.info("Initiate index creation method.")
-    create_or_update_index(
-        index_name,
-        INDEX_SCHEMA_PATH,
-        ai_search_uri,
-        args.openai_api_base,
-        credential,
-    )
-    logger.info("Index creation completed.")
-
-    logger.info("Initiate data source creation method.")
-    create_or_update_datasource(
-        datasource_name,
-        DATASOURCE_SCHEMA_PATH,
-        ai_search_uri,
-        args.subscription_id,
-        args.resource_group_name,
-        args.storage_name,
-        args.container_name,
-        credential,
-    )
-    logger.info("Data source creation completed.")
-
-    logger.info("Initiate skillset creation method.")
-    create_or_update_skillset(
-        skillset_name,
-        index_name,
-        SKILLSET_SCHEMA_PATH,
-        ai_search_uri,
-        args.openai_api_base,
-        credential,
-    )
-    logger.info("Skillset creation completed.")
-
-    logger.info("Initiate indexer creation method.")
-
-    create_or_update_indexer(
-        indexer_name,
-        index_name,
-        skillset_name,
-        datasource_name,
-        INDEXER_SCHEMA_PATH,
-        ai_search_uri,
-        credential,
-    )
-    logger.info("Indexer creation completed.")
+    if args.log_connections:
+        # urllib3 logs every new connection, which makes connection reuse visible
+        urllib3_logger = logging.getLogger("urllib3.connectionpool")
+        urllib3_logger.setLevel(logging.DEBUG)
+        urllib3_logger.addHandler(console_handler)
+
+    if args.wait:
+        # The indexer runs log their outcome and item-level errors with their own logger
+        indexer_run_logger = logging.getLogger("indexer_run")
+        indexer_run_logger.setLevel(logging.INFO)
+        indexer_run_logger.addHandler(console_handler)
+
+    if args.plan:
+        if args.tenants_manifest:
+            tenants = load_tenants(args.tenants_manifest)
+        else:
+            tenants = [TenantSpec(args.base_index_name, args.container_name)]
+        with SearchClients(ai_search_uri, credential) as clients:
+            for tenant in tenants:
+                plans = plan_index_set(
+                    ai_search_uri,
+                    tenant.base_index_name,
+                    args.openai_api_base,
+                    args.subscription_id,
+                    args.resource_group_name,
+                    tenant.storage_name or args.storage_name,
+                    tenant.container_name,
+                    credential,
+                    clients,
+                    args.indexer_profile,
+                    detection,
+                    args.vector_profile,
+                )
+                logger.info(
+                    f"Drift report for '{tenant.base_index_name}':\n"
+                    + format_drift_report(plans)
+                )
+        return
+
+    if args.tenants_manifest:
+        tenants = load_tenants(args.tenants_manifest)
+        logger.info(
+            f"Provisioning {len(tenants)} tenants from {args.tenants_manifest}."
+        )
+        # Each tenant runs up to three steps concurrently
+        pool_size = max(DEFAULT_CONNECTION_POOL_SIZE, args.max_parallel_tenants * 3)
+        with SearchClients(ai_search_uri, credential, pool_size=pool_size) as clients:
+            results = provision_tenants(
+                tenants,
+                ai_search_uri,
+                args.openai_api_base,
+                args.subscription_id,
+                args.resource_group_name,
+                args.storage_name,
+                credential,
+                clients,
+                args.max_parallel_tenants,
+                args.indexer_profile,
+                detection,
+                args.vector_profile,
+                args.rebuild_index,
+            )
+            logger.info("Tenant results:\n" + format_tenant_results(results))
+            failed = [
+                result.base_index_name for result in results if not result.succeeded
+            ]
+            if args.wait:
+                report = progress_reporter(args.metrics_file)
+
+                def wait_for(base_index_name: str) -> Optional[str]:
+                    try:
+                        run_indexer(
+                            clients.indexer_client,
+                            _index_set_names(base_index_name)["indexer"],
+                            timeout=args.wait_timeout,
+                            on_progress=report,
+                        )
+                    except Exception as e:
+                        logger.error(
+                            f"Indexer of tenant '{base_index_name}' failed: {e}"
+                        )
+                        return base_index_name
+                    return None
+
+                provisioned = [
+                    result.base_index_name for result in results if result.succeeded
+                ]
+                with ThreadPoolExecutor(max_workers=args.max_parallel_tenants) as pool:
+                    failed.extend(
+                        name for name in pool.map(wait_for, provisioned) if name
+                    )
+        if failed:
+            raise RuntimeError(
+                f"{len(failed)} of {len(results)} tenants failed: {', '.join(failed)}"
+            )
+        return
+
+    with SearchClients(ai_search_uri, credential) as clients:
+        provision_index_set(
+            ai_search_uri,
+            args.base_index_name,
+            args.openai_api_base,
+            args.subscription_id,
+            args.resource_group_name,
+            args.storage_name,
+            args.container_name,
+            credential,
+            clients,
+            args.indexer_profile,
+            detection,
+            args.vector_profile,
+            args.rebuild_index,
+        )
+        if args.wait:
+            run_indexer(
+                clients.indexer_client,
+                _index_set_names(args.base_index_name)["indexer"],
+                timeout=args.wait_timeout,
+                on_progress=progress_reporter(args.metrics_file),
+            )
 
 
 # This block ensures that the script runs the main function only when executed directly,
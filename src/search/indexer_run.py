@@ -0,0 +1,219 @@
+# Copyright (c) Microsoft Corporation.
+# Licensed under the MIT license.
+
+"""
+Indexer runs for Copilot Studio Azure AI Search Project
+
+Triggers an indexer and waits until its run completes, so the caller knows when the data is
+searchable. The indexer status is polled with an adaptive interval: short while documents are
+being processed, growing while nothing changes. Every poll produces a progress snapshot that can be
+logged or written as JSON for dashboards.
+"""
+
+import json
+import logging
+import time
+from dataclasses import asdict, dataclass, field
+from typing import Callable, List, Optional
+
+from azure.core.exceptions import HttpResponseError
+from azure.search.documents.indexes import SearchIndexerClient
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MIN_POLL_INTERVAL = 2.0
+DEFAULT_MAX_POLL_INTERVAL = 30.0
+DEFAULT_WAIT_TIMEOUT = 7200
+# Item-level errors included in the metrics and in the failure message
+MAX_REPORTED_ERRORS = 20
+
+# Status of an execution that is still running
+IN_PROGRESS = "inProgress"
+SUCCESS = "success"
+# Final status of an execution; "reset" is reported after a reset, before the next run starts
+TERMINAL_STATUSES = {SUCCESS, "transientFailure"}
+
+
+@dataclass
+class IndexerRunMetrics:
+    """Progress of one indexer run, as of the last status poll."""
+
+    indexer_name: str
+    status: str
+    items_processed: int = 0
+    items_failed: int = 0
+    elapsed: float = 0.0
+    polls: int = 0
+    errors: List[str] = field(default_factory=list)
+
+    @property
+    def docs_per_second(self) -> float:
+        """Processed items per second since the run was triggered."""
+        return self.items_processed / self.elapsed if self.elapsed > 0 else 0.0
+
+    @property
+    def finished(self) -> bool:
+        """Whether the run reached a final status."""
+        return self.status in TERMINAL_STATUSES
+
+    @property
+    def succeeded(self) -> bool:
+        """Whether the run completed successfully."""
+        return self.status == SUCCESS
+
+    def to_json(self) -> str:
+        """
+        Serialize the metrics for dashboards.
+
+        Returns:
+            One line of JSON, including the derived docs_per_second
+        """
+        metrics = asdict(self)
+        metrics["elapsed"] = round(self.elapsed, 3)
+        metrics["docs_per_second"] = round(self.docs_per_second, 3)
+        return json.dumps(metrics)
+
+    def describe(self) -> str:
+        """
+        Build a one line progress summary.
+
+        Returns:
+            The summary, e.g. "'docs-indexer' inProgress: 120 processed, 0 failed, 60s, 2.0 docs/s"
+        """
+        return (
+            f"'{self.indexer_name}' {self.status}: {self.items_processed} processed, "
+            f"{self.items_failed} failed, {self.elapsed:.0f}s, "
+            f"{self.docs_per_second:.1f} docs/s"
+        )
+
+
+class AdaptiveBackoff:
+    """Poll interval that shrinks while the run makes progress and grows while it does not."""
+
+    def __init__(
+        self,
+        minimum: float = DEFAULT_MIN_POLL_INTERVAL,
+        maximum: float = DEFAULT_MAX_POLL_INTERVAL,
+        factor: float = 2.0,
+    ):
+        self.minimum = minimum
+        self.maximum = maximum
+        self.factor = factor
+        self.interval = minimum
+
+    def next(self, progressed: bool) -> float:
+        """
+        Compute the delay before the next poll.
+
+        Args:
+            progressed: Whether the last poll saw more processed items than the previous one
+
+        Returns:
+            The delay in seconds
+        """
+        if progressed:
+            self.interval = max(self.minimum, self.interval / self.factor)
+        else:
+            self.interval = min(self.maximum, self.interval * self.factor)
+        return self.interval
+
+
+def _format_error(error) -> str:
+    return f"{error.key or '-'}: {error.error_message}"
+
+
+def run_indexer(
+    indexer_client: SearchIndexerClient,
+    indexer_name: str,
+    timeout: float = DEFAULT_WAIT_TIMEOUT,
+    min_interval: float = DEFAULT_MIN_POLL_INTERVAL,
+    max_interval: float = DEFAULT_MAX_POLL_INTERVAL,
+    on_progress: Optional[Callable[[IndexerRunMetrics], None]] = None,
+    sleep: Callable[[float], None] = time.sleep,
+) -> IndexerRunMetrics:
+    """
+    Trigger an indexer and wait for the run to complete.
+
+    An indexer runs on its own when it is created. If a run is already in progress, that run is
+    awaited instead of triggering a new one.
+
+    Args:
+        indexer_client: Client of the search service
+        indexer_name: Name of the indexer
+        timeout: Maximum number of seconds to wait for the run
+        min_interval: Shortest delay between two status polls, in seconds
+        max_interval: Longest delay between two status polls, in seconds
+        on_progress: Called with the metrics after every poll
+        sleep: Function used to wait between polls
+
+    Returns:
+        The metrics of the completed run
+
+    Raises:
+        RuntimeError: If the run failed, with the item-level errors
+        TimeoutError: If the run did not complete within the timeout
+    """
+    started = time.monotonic()
+    status = indexer_client.get_indexer_status(indexer_name)
+    last_result = status.last_result
+    if last_result is not None and last_result.status == IN_PROGRESS:
+        logger.info(f"Indexer '{indexer_name}' is already running, waiting for it.")
+        previous_start = None
+    else:
+        previous_start = last_result.start_time if last_result else None
+        try:
+            indexer_client.run_indexer(indexer_name)
+            logger.info(f"Triggered indexer '{indexer_name}'.")
+        except HttpResponseError as e:
+            if e.status_code != 409:
+                raise
+            # A run started between the status check and the trigger
+            logger.info(f"Indexer '{indexer_name}' is already running, waiting for it.")
+            previous_start = None
+
+    backoff = AdaptiveBackoff(min_interval, max_interval)
+    metrics = IndexerRunMetrics(indexer_name, "pending")
+    while True:
+        status = indexer_client.get_indexer_status(indexer_name)
+        last_result = status.last_result
+        processed_before = metrics.items_processed
+        metrics.polls += 1
+        metrics.elapsed = time.monotonic() - started
+        # Until the triggered run shows up, the status still describes the previous one
+        if last_result is not None and (
+            previous_start is None or last_result.start_time != previous_start
+        ):
+            metrics.status = last_result.status
+            metrics.items_processed = last_result.item_count or 0
+            metrics.items_failed = last_result.failed_item_count or 0
+            metrics.errors = [
+                _format_error(error)
+                for error in (last_result.errors or [])[:MAX_REPORTED_ERRORS]
+            ]
+            if last_result.error_message and metrics.status != SUCCESS:
+                metrics.errors.insert(0, last_result.error_message)
+        if status.status == "error":
+            metrics.status = "error"
+            metrics.errors.insert(0, "The indexer is in an error state")
+
+        if on_progress:
+            on_progress(metrics)
+        if metrics.finished or metrics.status == "error":
+            break
+        if metrics.elapsed >= timeout:
+            raise TimeoutError(
+                f"Indexer '{indexer_name}' did not complete within {timeout:.0f}s "
+                f"({metrics.items_processed} items processed)"
+            )
+        sleep(backoff.next(metrics.items_processed > processed_before))
+
+    for error in metrics.errors:
+        logger.error(f"Indexer '{indexer_name}' error: {error}")
+    if not metrics.succeeded:
+        raise RuntimeError(
+            f"Indexer '{indexer_name}' run ended with status '{metrics.status}' "
+            f"after {metrics.items_processed} items ({metrics.items_failed} failed): "
+            + "; ".join(metrics.errors)
+        )
+    logger.info(f"Indexer run completed: {metrics.describe()}")
+    return metrics
@@ -0,0 +1,146 @@
+# Copyright (c) Microsoft Corporation.
+# Licensed under the MIT license.
+
+"""
+JSON templates with <placeholder> values, used for the definitions in index_config.
+
+A template file is parsed once per process and cached. Placeholders are substituted in the parsed
+tree, so values never need JSON escaping and the rendered definition can be handed to the SDK
+models as a dictionary.
+"""
+
+import json
+import os
+import re
+from typing import Any, Dict, FrozenSet, Tuple, Union
+
+PLACEHOLDER = re.compile(r"<([a-z][a-z0-9_]*)>")
+
+# Scalar values allowed in place of a string that consists of a single placeholder
+JsonScalar = Union[str, int, float, bool, None]
+
+
+class _TemplateString:
+    """A string of the template containing placeholders, split into literal and placeholder parts."""
+
+    def __init__(self, text: str):
+        self.text = text
+        self.parts = PLACEHOLDER.split(text)
+        # split() alternates literals and placeholder names: literal, name, literal, ...
+        self.names = frozenset(self.parts[1::2])
+
+    def render(self, values: Dict[str, JsonScalar]) -> JsonScalar:
+        if len(self.parts) == 3 and not self.parts[0] and not self.parts[2]:
+            # The whole string is one placeholder; any scalar can replace it
+            return values[self.parts[1]]
+        rendered = []
+        for position, part in enumerate(self.parts):
+            if position % 2 == 0:
+                rendered.append(part)
+                continue
+            value = values[part]
+            if not isinstance(value, str):
+                raise TypeError(
+                    f"Placeholder <{part}> is part of the string '{self.text}' "
+                    f"and needs a str value, got {type(value).__name__}"
+                )
+            rendered.append(value)
+        return "".join(rendered)
+
+
+def _compile(node: Any, names: set) -> Any:
+    """Replace the strings containing placeholders by _TemplateString objects."""
+    if isinstance(node, dict):
+        return {key: _compile(value, names) for key, value in node.items()}
+    if isinstance(node, list):
+        return [_compile(item, names) for item in node]
+    if isinstance(node, str) and PLACEHOLDER.search(node):
+        template_string = _TemplateString(node)
+        names.update(template_string.names)
+        return template_string
+    return node
+
+
+def _render(node: Any, values: Dict[str, JsonScalar]) -> Any:
+    if isinstance(node, dict):
+        return {key: _render(value, values) for key, value in node.items()}
+    if isinstance(node, list):
+        return [_render(item, values) for item in node]
+    if isinstance(node, _TemplateString):
+        return node.render(values)
+    return node
+
+
+class JsonTemplate:
+    """A parsed JSON template."""
+
+    def __init__(self, tree: Any, source: str = "<string>"):
+        """
+        Initialize the template.
+
+        Args:
+            tree: The parsed JSON document.
+            source: Where the template comes from, used in error messages.
+        """
+        self.source = source
+        names = set()
+        self._tree = _compile(tree, names)
+        self.placeholders: FrozenSet[str] = frozenset(names)
+
+    def render(self, values: Dict[str, JsonScalar]) -> Any:
+        """
+        Substitute the placeholders of the template.
+
+        Every call returns a new tree, so the result can be modified freely.
+
+        Args:
+            values: Value of each placeholder, keyed by the name between the angle brackets;
+                values of placeholders the template does not use are ignored.
+
+        Returns:
+            The rendered JSON document
+
+        Raises:
+            ValueError: If a placeholder of the template has no value
+            TypeError: If a value is not a JSON scalar, or not a str where the placeholder is
+                part of a longer string
+        """
+        missing = sorted(self.placeholders - values.keys())
+        if missing:
+            raise ValueError(
+                f"Missing values for placeholders {missing} in {self.source}"
+            )
+        for name in self.placeholders:
+            if not isinstance(values[name], (str, int, float, bool, type(None))):
+                raise TypeError(
+                    f"Value of placeholder <{name}> must be a JSON scalar, "
+                    f"got {type(values[name]).__name__}"
+                )
+        return _render(self._tree, values)
+
+
+# Parsed templates by absolute path, with the modification time and size they were parsed at.
+# Concurrent loads of the same file may both parse it; the last one is kept.
+_templates: Dict[str, Tuple[Tuple[int, int], JsonTemplate]] = {}
+
+
+def load_template(file_name: str) -> JsonTemplate:
+    """
+    Load a JSON template file, parsing it only once as long as it does not change.
+
+    Args:
+        file_name: The path to the template file.
+
+    Returns:
+        The parsed template
+    """
+    path = os.path.abspath(file_name)
+    stat = os.stat(path)
+    version = (stat.st_mtime_ns, stat.st_size)
+    cached = _templates.get(path)
+    if cached and cached[0] == version:
+        return cached[1]
+    with open(path) as template_file:
+        template = JsonTemplate(json.load(template_file), file_name)
+    _templates[path] = (version, template)
+    return template
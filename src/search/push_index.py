@@ -0,0 +1,708 @@
+# Copyright (c) Microsoft Corporation.
+# Licensed under the MIT license.
+
+"""
+Push-mode indexing for Copilot Studio Azure AI Search Project
+
+An alternative to the blob indexer: the files of a local directory are chunked like the SplitSkill
+of the skillset (see chunk_preview.py), the chunks are embedded in batches and the documents are
+uploaded to the index directly, so ingestion is bound by the embedding deployment and the upload
+concurrency instead of the indexer throughput. The documents have the fields the index projections
+of the skillset produce: chunk_id, parent_id, chunk, title and text_vector.
+
+The embedding function is pluggable; --fake_embeddings uses deterministic vectors derived from the
+chunk text, for tests and dry runs without an embedding deployment. The index must exist, see
+index_utils.py.
+
+Usage:
+    python push_index.py --aisearch_name <service> --base_index_name <name> --data_path ../../data \\
+        --openai_api_base https://<openai>.openai.azure.com --vector_profile scalar-1024
+"""
+
+import argparse
+import base64
+import hashlib
+import json
+import logging
+import math
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Callable, Dict, Iterable, List, Optional
+
+import requests
+from azure.core.exceptions import HttpResponseError
+from azure.identity import DefaultAzureCredential, ManagedIdentityCredential
+from azure.search.documents import SearchClient
+
+from chunk_preview import (
+    DEFAULT_CHARACTERS_PER_TOKEN,
+    SplitSettings,
+    extract_text,
+    iter_files,
+    load_split_settings,
+    split_text,
+)
+from common_utils import absolute_url, positive_int, valid_name
+from embedding_cache import (
+    DEFAULT_EMBEDDING_DEPLOYMENT,
+    DEFAULT_MAX_ENTRIES,
+    PRECISIONS,
+    EmbeddingCache,
+    content_hash,
+)
+from index_utils import SearchClients, _index_set_names
+from rate_limit import AdaptiveRateLimiter, retry_after_seconds
+from upload_data import get_blob_name
+from vector_storage import (
+    DEFAULT_VECTOR_PROFILE,
+    get_vector_profile,
+    load_vector_profiles,
+    vector_dimensions,
+)
+
+# Configure logging
+logging.basicConfig(
+    level=logging.INFO, format="%(asctime)s - %(name)s - %(levelname)s - %(message)s"
+)
+logger = logging.getLogger(__name__)
+
+KEY_FIELD = "chunk_id"
+# The service accepts up to 1000 documents and 16 MB per indexing request
+MAX_BATCH_DOCUMENTS = 1000
+DEFAULT_MAX_BATCH_MB = 8
+DEFAULT_UPLOAD_WORKERS = 4
+DEFAULT_EMBEDDING_BATCH_SIZE = 16
+DEFAULT_EMBEDDING_WORKERS = 4
+DEFAULT_UPLOAD_RETRIES = 5
+UPLOAD_RETRY_DELAY = 1.0
+# Status codes of a request or of a single document that are worth retrying
+RETRYABLE_STATUS_CODES = {409, 422, 429, 503}
+# Status codes of a service throttling its callers, which slow down the rate limiters
+THROTTLING_STATUS_CODES = {429, 503}
+DEFAULT_EMBEDDING_RETRIES = 5
+EMBEDDING_RETRY_DELAY = 1.0
+OPENAI_API_VERSION = "2024-06-01"
+OPENAI_SCOPE = "https://cognitiveservices.azure.com/.default"
+
+# Embeds a batch of texts, returning one vector per text
+Embedder = Callable[[List[str]], List[List[float]]]
+
+
+class FakeEmbedder:
+    """Deterministic unit vectors derived from the text, for tests and dry runs."""
+
+    def __init__(self, dimensions: int):
+        self.dimensions = dimensions
+        self.calls = 0
+
+    def __call__(self, texts: List[str]) -> List[List[float]]:
+        self.calls += 1
+        vectors = []
+        for text in texts:
+            seed = hashlib.sha256(text.encode("utf-8")).digest()
+            generator = random.Random(seed)
+            vector = [generator.gauss(0.0, 1.0) for _ in range(self.dimensions)]
+            norm = math.sqrt(sum(value * value for value in vector))
+            vectors.append([value / norm for value in vector])
+        return vectors
+
+
+class AzureOpenAIEmbedder:
+    """Embeddings of an Azure OpenAI deployment, authenticated with Entra ID."""
+
+    def __init__(
+        self,
+        open_ai_uri: str,
+        deployment: str,
+        credential,
+        dimensions: Optional[int] = None,
+        session: Optional[requests.Session] = None,
+        rate_limiter: Optional[AdaptiveRateLimiter] = None,
+        max_retries: int = DEFAULT_EMBEDDING_RETRIES,
+        retry_delay: float = EMBEDDING_RETRY_DELAY,
+        sleep: Callable[[float], None] = time.sleep,
+    ):
+        """
+        Initialize the embedder.
+
+        Args:
+            open_ai_uri: The base URI of the OpenAI API.
+            deployment: The name of the embedding deployment.
+            credential: The Azure credentials to use for authentication.
+            dimensions: Dimensions requested from text-embedding-3 models; the model default when omitted.
+            session: Session to send the requests through.
+            rate_limiter: Limiter pacing the calls of every thread, on requests and estimated tokens.
+            max_retries: Attempts after the first one for throttled calls.
+            retry_delay: Delay before the first retry without Retry-After, doubled on every attempt.
+            sleep: Function used to wait between attempts without a rate limiter.
+        """
+        self.url = (
+            f"{open_ai_uri.rstrip('/')}/openai/deployments/{deployment}/embeddings"
+            f"?api-version={OPENAI_API_VERSION}"
+        )
+        self.credential = credential
+        self.dimensions = dimensions
+        self.session = session or requests.Session()
+        self.rate_limiter = rate_limiter
+        self.max_retries = max_retries
+        self.retry_delay = retry_delay
+        self.sleep = sleep
+        self.calls = 0
+
+    def __call__(self, texts: List[str]) -> List[List[float]]:
+        self.calls += 1
+        body = {"input": texts}
+        if self.dimensions is not None:
+            body["dimensions"] = self.dimensions
+        tokens = sum(len(text) for text in texts) / DEFAULT_CHARACTERS_PER_TOKEN
+        for attempt in range(self.max_retries + 1):
+            if self.rate_limiter:
+                self.rate_limiter.acquire(tokens)
+            token = self.credential.get_token(OPENAI_SCOPE).token
+            response = self.session.post(
+                self.url, json=body, headers={"Authorization": f"Bearer {token}"}
+            )
+            if (
+                response.status_code not in THROTTLING_STATUS_CODES
+                or attempt == self.max_retries
+            ):
+                break
+            delay = retry_after_seconds(response.headers) or (
+                self.retry_delay * 2**attempt
+            )
+            logger.warning(
+                f"Embedding call throttled with {response.status_code}, retrying in {delay:.1f}s."
+            )
+            if self.rate_limiter:
+                # Pauses the calls of every thread
+                self.rate_limiter.on_throttled(delay)
+            else:
+                self.sleep(delay)
+        response.raise_for_status()
+        if self.rate_limiter:
+            self.rate_limiter.on_success()
+        data = sorted(response.json()["data"], key=lambda item: item["index"])
+        return [item["embedding"] for item in data]
+
+
+@dataclass
+class UploadStats:
+    """Outcome of the document uploads."""
+
+    uploaded: int = 0
+    batches: int = 0
+    retries: int = 0
+    # "key: message" of the documents that could not be uploaded
+    failed: List[str] = field(default_factory=list)
+
+
+class DocumentUploader:
+    """
+    Upload documents in batches limited by count and payload size, with concurrent requests.
+
+    Documents whose upload fails with a retryable status, alone in a 207 response or for the
+    whole batch, are sent again with an exponential backoff.
+    """
+
+    def __init__(
+        self,
+        search_client: SearchClient,
+        max_batch_documents: int = MAX_BATCH_DOCUMENTS,
+        max_batch_bytes: int = DEFAULT_MAX_BATCH_MB * 1024 * 1024,
+        max_workers: int = DEFAULT_UPLOAD_WORKERS,
+        max_retries: int = DEFAULT_UPLOAD_RETRIES,
+        retry_delay: float = UPLOAD_RETRY_DELAY,
+        sleep: Callable[[float], None] = time.sleep,
+        rate_limiter: Optional[AdaptiveRateLimiter] = None,
+    ):
+        """
+        Initialize the uploader.
+
+        Args:
+            search_client: Client of the target index.
+            max_batch_documents: Maximum number of documents per request.
+            max_batch_bytes: Maximum JSON payload of the documents of a request.
+            max_workers: Number of concurrent requests.
+            max_retries: Attempts after the first one for retryable failures.
+            retry_delay: Delay before the first retry, doubled on every attempt.
+            sleep: Function used to wait between attempts.
+            rate_limiter: Limiter pacing the requests of every worker; a throttled request
+                pauses them all instead of only the worker that sent it.
+        """
+        self.search_client = search_client
+        self.max_batch_documents = max_batch_documents
+        self.max_batch_bytes = max_batch_bytes
+        self.max_retries = max_retries
+        self.retry_delay = retry_delay
+        self.sleep = sleep
+        self.rate_limiter = rate_limiter
+        self.stats = UploadStats()
+        self._batch: List[dict] = []
+        self._batch_bytes = 0
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=max_workers)
+        # Bounds the batches waiting for a worker, so memory stays bounded
+        self._slots = threading.BoundedSemaphore(max_workers * 2)
+        self._futures = []
+
+    def add(self, documents: Iterable[dict]):
+        """
+        Queue documents, sending a batch whenever one is full.
+
+        Args:
+            documents: The documents, with all fields of the index.
+        """
+        for document in documents:
+            size = len(json.dumps(document))
+            with self._lock:
+                if self._batch and (
+                    len(self._batch) >= self.max_batch_documents
+                    or self._batch_bytes + size > self.max_batch_bytes
+                ):
+                    batch, self._batch, self._batch_bytes = self._batch, [], 0
+                else:
+                    batch = None
+                self._batch.append(document)
+                self._batch_bytes += size
+            if batch:
+                self._submit(batch)
+
+    def _submit(self, batch: List[dict]):
+        self._slots.acquire()
+        future = self._executor.submit(self._upload, batch)
+        future.add_done_callback(lambda _: self._slots.release())
+        with self._lock:
+            self._futures.append(future)
+
+    def _backoff(
+        self,
+        attempt: int,
+        error: Optional[HttpResponseError] = None,
+        throttled: bool = False,
+    ):
+        delay = self.retry_delay * 2**attempt
+        retry_after = retry_after_seconds(
+            error.response.headers
+            if error is not None and error.response is not None
+            else None
+        )
+        if retry_after:
+            delay = max(delay, retry_after)
+        with self._lock:
+            self.stats.retries += 1
+        if self.rate_limiter and throttled:
+            # Pauses the requests of every worker
+            self.rate_limiter.on_throttled(delay)
+        else:
+            self.sleep(delay)
+
+    def _upload(self, batch: List[dict]):
+        pending = batch
+        for attempt in range(self.max_retries + 1):
+            last_attempt = attempt == self.max_retries
+            with self._lock:
+                self.stats.batches += 1
+            if self.rate_limiter:
+                self.rate_limiter.acquire()
+            try:
+                results = self.search_client.upload_documents(documents=pending)
+            except HttpResponseError as e:
+                if e.status_code in RETRYABLE_STATUS_CODES and not last_attempt:
+                    logger.warning(
+                        f"Upload of {len(pending)} documents failed with {e.status_code}, retrying."
+                    )
+                    self._backoff(attempt, e, e.status_code in THROTTLING_STATUS_CODES)
+                    continue
+                with self._lock:
+                    self.stats.failed.extend(
+                        f"{document[KEY_FIELD]}: {e.message}" for document in pending
+                    )
+                return
+
+            documents = {document[KEY_FIELD]: document for document in pending}
+            retry = []
+            throttled = False
+            with self._lock:
+                for result in results:
+                    if result.succeeded:
+                        self.stats.uploaded += 1
+                    elif (
+                        result.status_code in RETRYABLE_STATUS_CODES
+                        and not last_attempt
+                    ):
+                        retry.append(documents[result.key])
+                        throttled |= result.status_code in THROTTLING_STATUS_CODES
+                    else:
+                        self.stats.failed.append(
+                            f"{result.key}: {result.error_message} ({result.status_code})"
+                        )
+            if self.rate_limiter and not throttled:
+                self.rate_limiter.on_success()
+            if not retry:
+                return
+            logger.warning(f"{len(retry)} documents were not accepted, retrying.")
+            pending = retry
+            self._backoff(attempt, throttled=throttled)
+
+    def close(self) -> UploadStats:
+        """
+        Send the last batch and wait for every upload.
+
+        Returns:
+            The outcome of the uploads
+        """
+        with self._lock:
+            batch, self._batch, self._batch_bytes = self._batch, [], 0
+        if batch:
+            self._submit(batch)
+        self._executor.shutdown(wait=True)
+        for future in self._futures:
+            # Surface unexpected errors of the workers
+            future.result()
+        return self.stats
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def parent_key(blob_name: str) -> str:
+    """
+    Build the parent_id of the chunks of a file; keys only allow letters, digits, "_", "-" and "=".
+
+    Args:
+        blob_name: The name the file has in the storage container.
+
+    Returns:
+        The URL-safe base64 encoding of the name
+    """
+    return base64.urlsafe_b64encode(blob_name.encode("utf-8")).decode("ascii")
+
+
+@dataclass
+class PushSummary:
+    """Outcome of a push run."""
+
+    files: int = 0
+    skipped_files: int = 0
+    chunks: int = 0
+    # Chunks whose vector came from the embedding cache
+    cached_chunks: int = 0
+    embedding_calls: int = 0
+    upload: UploadStats = field(default_factory=UploadStats)
+    elapsed: float = 0.0
+
+    def describe(self) -> str:
+        """
+        Build a one line summary.
+
+        Returns:
+            The summary
+        """
+        seconds = max(self.elapsed, 1e-6)
+        return (
+            f"{self.files} files ({self.skipped_files} skipped), {self.chunks} chunks "
+            f"({self.cached_chunks} cached), {self.embedding_calls} embedding calls, {self.upload.uploaded} documents uploaded "
+            f"in {self.upload.batches} requests ({self.upload.retries} retries, "
+            f"{len(self.upload.failed)} failed) in {self.elapsed:.2f}s "
+            f"({self.upload.uploaded / seconds:.1f} docs/s)"
+        )
+
+
+def push_files(
+    data_path: str,
+    uploader: DocumentUploader,
+    embedder: Embedder,
+    file_patterns: Optional[List[str]] = None,
+    settings: Optional[SplitSettings] = None,
+    embedding_batch_size: int = DEFAULT_EMBEDDING_BATCH_SIZE,
+    embedding_workers: int = DEFAULT_EMBEDDING_WORKERS,
+    embedding_cache: Optional[EmbeddingCache] = None,
+) -> PushSummary:
+    """
+    Chunk the files of a directory tree, embed the chunks and upload them as documents.
+
+    Args:
+        data_path: The directory of the documents.
+        uploader: The uploader of the documents; closed when the push completes.
+        embedder: The embedding function.
+        file_patterns: Filename patterns; every file when omitted.
+        settings: The SplitSkill settings; those of documentSkillSet.json when omitted.
+        embedding_batch_size: Number of chunks per embedding call.
+        embedding_workers: Number of concurrent embedding calls.
+        embedding_cache: Cache consulted before embedding the chunks of each file, and filled
+            with the new vectors; every chunk is embedded when omitted.
+
+    Returns:
+        The outcome of the push
+    """
+    settings = settings or load_split_settings()
+    summary = PushSummary()
+    started = time.monotonic()
+    lock = threading.Lock()
+    # Bounds the embedding batches waiting for a worker
+    slots = threading.BoundedSemaphore(embedding_workers * 2)
+
+    def embed_and_upload(chunks: List[Dict[str, str]], hashes: List[Optional[bytes]]):
+        try:
+            vectors = embedder([chunk["chunk"] for chunk in chunks])
+            with lock:
+                summary.embedding_calls += 1
+            if embedding_cache is not None:
+                embedding_cache.put_many(dict(zip(hashes, vectors)))
+            uploader.add(
+                dict(chunk, text_vector=vector)
+                for chunk, vector in zip(chunks, vectors)
+            )
+        finally:
+            slots.release()
+
+    futures = []
+    try:
+        with ThreadPoolExecutor(max_workers=embedding_workers) as executor:
+
+            def submit(chunks, hashes):
+                slots.acquire()
+                futures.append(executor.submit(embed_and_upload, chunks, hashes))
+
+            pending: List[Dict[str, str]] = []
+            # Content hashes of the pending chunks, to store their vectors in the cache
+            pending_hashes: List[Optional[bytes]] = []
+            for path in iter_files(data_path, file_patterns or ["*"]):
+                text = extract_text(path)
+                if text is None:
+                    summary.skipped_files += 1
+                    continue
+                summary.files += 1
+                blob_name = get_blob_name(Path(path), data_path)
+                parent_id = parent_key(blob_name)
+                chunks = split_text(text, settings)
+                if settings.maximum_pages_to_take:
+                    chunks = chunks[: settings.maximum_pages_to_take]
+                summary.chunks += len(chunks)
+                if embedding_cache is not None:
+                    # Each chunk is hashed once, for the lookup and to store its vector
+                    hashes = [content_hash(chunk) for chunk in chunks]
+                    cached = embedding_cache.get_many(hashes)
+                else:
+                    hashes, cached = [None] * len(chunks), {}
+                for number, (chunk, key) in enumerate(zip(chunks, hashes)):
+                    document = {
+                        KEY_FIELD: f"{parent_id}_pages_{number}",
+                        "parent_id": parent_id,
+                        "chunk": chunk,
+                        "title": blob_name,
+                    }
+                    vector = cached.get(key)
+                    if vector is not None:
+                        summary.cached_chunks += 1
+                        uploader.add([dict(document, text_vector=vector)])
+                        continue
+                    # Only the chunks missing from the cache fill the embedding batches
+                    pending.append(document)
+                    pending_hashes.append(key)
+                    if len(pending) == embedding_batch_size:
+                        submit(pending, pending_hashes)
+                        pending, pending_hashes = [], []
+            if pending:
+                submit(pending, pending_hashes)
+        for future in futures:
+            future.result()
+    finally:
+        # Send the chunks already embedded and stop the upload workers, even after a failure
+        summary.upload = uploader.close()
+
+    summary.elapsed = time.monotonic() - started
+    return summary
+
+
+def main():
+    """Push the documents of a local directory to the index of a base index name."""
+    parser = argparse.ArgumentParser(description="Push-mode indexing of local files")
+    parser.add_argument(
+        "--aisearch_name", required=True, help="Azure AI Search service name"
+    )
+    parser.add_argument(
+        "--base_index_name",
+        type=valid_name,
+        required=True,
+        help="Base name of the index set; documents go to <base_index_name>-index",
+    )
+    parser.add_argument(
+        "--data_path", required=True, help="Local directory of the documents"
+    )
+    parser.add_argument(
+        "--file_pattern",
+        default="*",
+        help="Comma separated filename patterns, e.g. '*.md,*.pdf'. Default: *",
+    )
+    parser.add_argument(
+        "--openai_api_base",
+        type=absolute_url,
+        help="Azure OpenAI API base URL; required without --fake_embeddings",
+    )
+    parser.add_argument(
+        "--embedding_deployment",
+        default=DEFAULT_EMBEDDING_DEPLOYMENT,
+        help=f"Embedding deployment name. Default: {DEFAULT_EMBEDDING_DEPLOYMENT}",
+    )
+    parser.add_argument(
+        "--fake_embeddings",
+        action="store_true",
+        help="Use deterministic fake embeddings instead of the embedding deployment",
+    )
+    parser.add_argument(
+        "--vector_profile",
+        choices=list(load_vector_profiles()),
+        default=DEFAULT_VECTOR_PROFILE,
+        help="Vector storage profile the index was provisioned with; sets the embedding "
+        f"dimensions. Default: {DEFAULT_VECTOR_PROFILE}",
+    )
+    parser.add_argument(
+        "--embedding_batch_size",
+        type=positive_int,
+        default=DEFAULT_EMBEDDING_BATCH_SIZE,
+        help=f"Chunks per embedding call. Default: {DEFAULT_EMBEDDING_BATCH_SIZE}",
+    )
+    parser.add_argument(
+        "--embedding_workers",
+        type=positive_int,
+        default=DEFAULT_EMBEDDING_WORKERS,
+        help=f"Concurrent embedding calls. Default: {DEFAULT_EMBEDDING_WORKERS}",
+    )
+    parser.add_argument(
+        "--upload_workers",
+        type=positive_int,
+        default=DEFAULT_UPLOAD_WORKERS,
+        help=f"Concurrent upload requests. Default: {DEFAULT_UPLOAD_WORKERS}",
+    )
+    parser.add_argument(
+        "--max_batch_mb",
+        type=positive_int,
+        default=DEFAULT_MAX_BATCH_MB,
+        help=f"Maximum payload of an upload request, in MB. Default: {DEFAULT_MAX_BATCH_MB}",
+    )
+    parser.add_argument(
+        "--embedding_rpm",
+        type=positive_int,
+        help="Request quota of the embedding deployment, per minute; when omitted, calls are "
+        "not paced until the first throttled call, then paced from the rate observed until then",
+    )
+    parser.add_argument(
+        "--embedding_tpm",
+        type=positive_int,
+        help="Token quota of the embedding deployment, per minute; tokens are not paced when omitted",
+    )
+    parser.add_argument(
+        "--upload_rpm",
+        type=positive_int,
+        help="Indexing requests per minute sent to the search service; when omitted, requests "
+        "are not paced until the first throttled request, then paced from the rate observed "
+        "until then",
+    )
+    parser.add_argument(
+        "--embedding_cache",
+        help="SQLite file caching the vectors by chunk content, so unchanged chunks are "
+        "not embedded again",
+    )
+    parser.add_argument(
+        "--cache_precision",
+        choices=list(PRECISIONS),
+        help="Precision of the cached vectors. Default: float16 for vector profiles "
+        "storing Edm.Half vectors, float32 otherwise",
+    )
+    parser.add_argument(
+        "--cache_max_entries",
+        type=positive_int,
+        default=DEFAULT_MAX_ENTRIES,
+        help="Cached vectors kept before evicting the least recently used. "
+        f"Default: {DEFAULT_MAX_ENTRIES}",
+    )
+    parser.add_argument(
+        "--client_id",
+        help="Azure client ID for user-assigned managed identity",
+    )
+    args = parser.parse_args()
+    if not args.fake_embeddings and not args.openai_api_base:
+        parser.error("--openai_api_base is required without --fake_embeddings")
+
+    credential = (
+        ManagedIdentityCredential(client_id=args.client_id)
+        if args.client_id
+        else DefaultAzureCredential()
+    )
+    profile = get_vector_profile(args.vector_profile)
+    embedding_limiter = AdaptiveRateLimiter(args.embedding_rpm, args.embedding_tpm)
+    upload_limiter = AdaptiveRateLimiter(args.upload_rpm)
+    if args.fake_embeddings:
+        embedder = FakeEmbedder(vector_dimensions(profile))
+    else:
+        embedder = AzureOpenAIEmbedder(
+            args.openai_api_base,
+            args.embedding_deployment,
+            credential,
+            profile.dimensions,
+            rate_limiter=embedding_limiter,
+        )
+
+    ai_search_uri = f"https://{args.aisearch_name}.search.windows.net"
+    index_name = _index_set_names(args.base_index_name)["index"]
+    file_patterns = [
+        pattern.strip() for pattern in args.file_pattern.split(",") if pattern.strip()
+    ]
+    pool_size = max(args.upload_workers, 1) + 1
+    embedding_cache = None
+    if args.embedding_cache:
+        precision = args.cache_precision or (
+            "float16" if profile.vector_type == "Edm.Half" else "float32"
+        )
+        embedding_cache = EmbeddingCache(
+            args.embedding_cache,
+            # Fake vectors must never be served as vectors of the deployment
+            "fake" if args.fake_embeddings else args.embedding_deployment,
+            vector_dimensions(profile),
+            precision,
+            args.cache_max_entries,
+        )
+    try:
+        with SearchClients(ai_search_uri, credential, pool_size=pool_size) as clients:
+            # The uploader retries with its own backoff
+            search_client = clients.search_client(index_name, retry_total=0)
+            uploader = DocumentUploader(
+                search_client,
+                max_batch_bytes=args.max_batch_mb * 1024 * 1024,
+                max_workers=args.upload_workers,
+                rate_limiter=upload_limiter,
+            )
+            summary = push_files(
+                args.data_path,
+                uploader,
+                embedder,
+                file_patterns,
+                embedding_batch_size=args.embedding_batch_size,
+                embedding_workers=args.embedding_workers,
+                embedding_cache=embedding_cache,
+            )
+    finally:
+        # Also on failure, so the cache connection is not left open
+        if embedding_cache is not None:
+            logger.info(f"Embedding cache: {embedding_cache.stats.describe()}")
+            embedding_cache.close()
+    logger.info(f"Push completed: {summary.describe()}")
+    if not args.fake_embeddings:
+        logger.info(f"Embedding rate limiter: {embedding_limiter.describe()}")
+    logger.info(f"Upload rate limiter: {upload_limiter.describe()}")
+    for failure in summary.upload.failed[:20]:
+        logger.error(f"Failed document {failure}")
+    if summary.upload.failed:
+        raise RuntimeError(f"{len(summary.upload.failed)} documents failed")
+
+
+if __name__ == "__main__":
+    main()
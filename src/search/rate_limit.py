@@ -0,0 +1,280 @@
+# Copyright (c) Microsoft Corporation.
+# Licensed under the MIT license.
+
+"""
+Adaptive rate limiting for Copilot Studio Azure AI Search Project
+
+A limiter paces the calls of all threads sharing it with token buckets on requests and tokens per
+minute, and adapts the rate to the throttling of the service (AIMD): a 429 cuts the rate by
+decrease_factor, pauses every caller until its Retry-After, and records the rate that was too high;
+successful calls then raise the rate additively back to just under that rate, which is probed again
+ten times slower. Throughput settles just under the quota instead of alternating between bursts and
+throttling. Without a request quota, calls are not paced until the first throttled call; the
+request rate observed until then becomes the rate the limiter adapts. push_index.py wraps its
+embedding and document upload calls with one limiter each.
+"""
+
+import email.utils
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass
+from typing import Callable, Mapping, Optional
+
+# The buckets hold at most this many seconds of calls, to bound bursts
+BURST_SECONDS = 1.0
+# Lowest share of the configured rate the limiter slows down to
+MINIMUM_FRACTION = 0.05
+DECREASE_FACTOR = 0.5
+# Share of the configured rate regained per minute of successful calls
+RECOVERY_PER_MINUTE = 0.1
+# Margin kept under the rate that was throttled
+CEILING_MARGIN = 0.95
+# Throttled calls within this delay of a decrease were sent at the old rate and are not counted again
+MINIMUM_DECREASE_INTERVAL = 1.0
+# Seconds of calls over which the request rate is observed when no request quota is given
+OBSERVATION_SECONDS = 60.0
+
+
+def retry_after_seconds(headers: Optional[Mapping[str, str]]) -> Optional[float]:
+    """
+    Read the delay a throttled response asks for.
+
+    Args:
+        headers: The response headers, with case insensitive names.
+
+    Returns:
+        The delay in seconds, or None when the response does not ask for one
+    """
+    if not headers:
+        return None
+    for name in ("retry-after-ms", "x-ms-retry-after-ms"):
+        value = headers.get(name)
+        if value:
+            try:
+                return float(value) / 1000
+            except ValueError:
+                pass
+    value = headers.get("retry-after")
+    if not value:
+        return None
+    try:
+        return float(value)
+    except ValueError:
+        pass
+    try:
+        retry_at = email.utils.parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    return max(0.0, retry_at.timestamp() - time.time())
+
+
+class TokenBucket:
+    """
+    Tokens refilled at a rate per minute, up to BURST_SECONDS of refill.
+
+    A reservation larger than the bucket is granted once the bucket is not in debt, and delays
+    the next reservations until the debt is refilled.
+    """
+
+    def __init__(self, rate_per_minute: float, clock: Callable[[], float]):
+        self.clock = clock
+        self.rate_per_minute = rate_per_minute
+        self.level = self.capacity
+        self.updated = clock()
+
+    @property
+    def capacity(self) -> float:
+        """Most tokens the bucket holds."""
+        return max(1.0, self.rate_per_minute / 60 * BURST_SECONDS)
+
+    def _refill(self):
+        now = self.clock()
+        self.level = min(
+            self.capacity,
+            self.level + (now - self.updated) * self.rate_per_minute / 60,
+        )
+        self.updated = now
+
+    def set_rate(self, rate_per_minute: float):
+        """Change the refill rate, keeping the tokens accumulated so far."""
+        self._refill()
+        self.rate_per_minute = rate_per_minute
+        self.level = min(self.level, self.capacity)
+
+    def reserve(self, amount: float) -> float:
+        """
+        Take tokens, going into debt when the bucket is short of them.
+
+        Args:
+            amount: Number of tokens.
+
+        Returns:
+            Seconds to wait before the call the tokens are for
+        """
+        self._refill()
+        wait = max(0.0, -self.level) * 60 / self.rate_per_minute
+        self.level -= amount
+        return wait
+
+
+@dataclass
+class RateLimitStats:
+    """Calls, throttling and waits of a rate limiter."""
+
+    requests: int = 0
+    throttled: int = 0
+    decreases: int = 0
+    waited_seconds: float = 0.0
+
+
+class AdaptiveRateLimiter:
+    """Pace calls under request and token quotas, slowing down when the service throttles."""
+
+    def __init__(
+        self,
+        requests_per_minute: Optional[float] = None,
+        tokens_per_minute: Optional[float] = None,
+        decrease_factor: float = DECREASE_FACTOR,
+        recovery_per_minute: float = RECOVERY_PER_MINUTE,
+        clock: Callable[[], float] = time.monotonic,
+        sleep: Callable[[float], None] = time.sleep,
+    ):
+        """
+        Initialize the limiter.
+
+        Args:
+            requests_per_minute: Request quota; when omitted, requests are not paced until the
+                first throttled call, then paced from the request rate observed until then.
+            tokens_per_minute: Token quota; tokens are not paced when omitted.
+            decrease_factor: Factor applied to the rate when the service throttles.
+            recovery_per_minute: Share of the quotas regained per minute without throttling.
+            clock: Monotonic clock in seconds.
+            sleep: Function used to wait.
+        """
+        self.requests_per_minute = requests_per_minute
+        self.tokens_per_minute = tokens_per_minute
+        self.decrease_factor = decrease_factor
+        self.recovery_per_minute = recovery_per_minute
+        self.clock = clock
+        self.sleep = sleep
+        self.stats = RateLimitStats()
+        # Share of the quotas currently allowed, and the share it recovers up to
+        self.fraction = 1.0
+        self.ceiling = 1.0
+        self._lock = threading.Lock()
+        now = clock()
+        self._adjusted = now
+        self._decreased = None
+        self._paused_until = now
+        self._request_bucket = (
+            TokenBucket(requests_per_minute, clock) if requests_per_minute else None
+        )
+        self._token_bucket = (
+            TokenBucket(tokens_per_minute, clock) if tokens_per_minute else None
+        )
+        # Times of the recent calls, to observe the request rate when there is no quota
+        self._recent_calls = None if requests_per_minute else deque()
+
+    @property
+    def current_requests_per_minute(self) -> Optional[float]:
+        """Request rate currently allowed."""
+        if not self.requests_per_minute:
+            return None
+        return self.requests_per_minute * self.fraction
+
+    def _set_fraction(self, fraction: float):
+        self.fraction = fraction
+        if self._request_bucket:
+            self._request_bucket.set_rate(self.requests_per_minute * fraction)
+        if self._token_bucket:
+            self._token_bucket.set_rate(self.tokens_per_minute * fraction)
+
+    def acquire(self, tokens: float = 0):
+        """
+        Wait until a call may be sent.
+
+        Args:
+            tokens: Tokens the call consumes, e.g. the estimated input tokens of an embedding call.
+        """
+        with self._lock:
+            self.stats.requests += 1
+            wait = self._paused_until - self.clock()
+            if self._request_bucket:
+                wait = max(wait, self._request_bucket.reserve(1))
+            else:
+                self._observe_call()
+            if self._token_bucket and tokens:
+                wait = max(wait, self._token_bucket.reserve(tokens))
+            if wait > 0:
+                self.stats.waited_seconds += wait
+        if wait > 0:
+            self.sleep(wait)
+
+    def _observe_call(self):
+        now = self.clock()
+        self._recent_calls.append(now)
+        while now - self._recent_calls[0] > OBSERVATION_SECONDS:
+            self._recent_calls.popleft()
+
+    def _start_from_observed_rate(self):
+        """Take the request rate observed so far as the rate to adapt."""
+        now = self.clock()
+        elapsed = max(MINIMUM_DECREASE_INTERVAL, now - self._recent_calls[0])
+        self.requests_per_minute = max(1.0, len(self._recent_calls) * 60 / elapsed)
+        self._request_bucket = TokenBucket(self.requests_per_minute, self.clock)
+        self._recent_calls = None
+
+    def on_success(self):
+        """Raise the rate after a call the service accepted."""
+        with self._lock:
+            now = self.clock()
+            gained = self.recovery_per_minute * (now - self._adjusted) / 60
+            self._adjusted = now
+            if self.fraction < self.ceiling:
+                fraction = min(self.ceiling, self.fraction + gained)
+            else:
+                # Probe above the rate that was throttled, in case the quota was raised
+                self.ceiling = min(1.0, self.ceiling + gained / 10)
+                fraction = self.ceiling
+            if fraction != self.fraction:
+                self._set_fraction(fraction)
+
+    def on_throttled(self, retry_after: Optional[float] = None):
+        """
+        Slow down after a call the service throttled.
+
+        Args:
+            retry_after: Seconds the service asked to wait; every caller pauses that long.
+        """
+        with self._lock:
+            now = self.clock()
+            self.stats.throttled += 1
+            if retry_after:
+                self._paused_until = max(self._paused_until, now + retry_after)
+            interval = max(MINIMUM_DECREASE_INTERVAL, retry_after or 0.0)
+            if self._decreased is not None and now - self._decreased < interval:
+                return
+            if self._request_bucket is None and self._recent_calls:
+                self._start_from_observed_rate()
+            self._decreased = now
+            self._adjusted = now
+            self.stats.decreases += 1
+            self.ceiling = max(MINIMUM_FRACTION, self.fraction * CEILING_MARGIN)
+            self._set_fraction(
+                max(MINIMUM_FRACTION, self.fraction * self.decrease_factor)
+            )
+
+    def describe(self) -> str:
+        """
+        Build a one line summary.
+
+        Returns:
+            The summary
+        """
+        rate = self.current_requests_per_minute
+        return (
+            f"{self.stats.requests} calls, {self.stats.throttled} throttled, "
+            f"{self.stats.decreases} rate decreases, {self.stats.waited_seconds:.1f}s waited"
+            + (f", {rate:.0f} requests per minute allowed" if rate else "")
+        )
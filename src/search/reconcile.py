@@ -0,0 +1,361 @@
+# Copyright (c) Microsoft Corporation.
+# Licensed under the MIT license.
+
+"""
+Diff-based reconciliation of AI Search service resources.
+
+The current definition of a single named resource is fetched from the service and compared
+structurally with the rendered definition from index_config, so a resource is only created or
+updated when something actually changed.
+"""
+
+import json
+import re
+from dataclasses import dataclass, field
+from typing import Any, List, Optional
+
+from azure.core.rest import HttpRequest
+from azure.search.documents.indexes import SearchIndexClient
+
+# REST collection of each resource kind
+RESOURCE_COLLECTIONS = {
+    "index": "indexes",
+    "datasource": "datasources",
+    "skillset": "skillsets",
+    "indexer": "indexers",
+}
+# Response metadata that is not part of a definition
+IGNORED_KEYS = {"@odata.context", "@odata.etag"}
+# Secrets are never returned by the service, so they cannot be compared
+UNCOMPARABLE_KEYS = {"datasource": {"credentials"}}
+
+CREATE = "create"
+UPDATE = "update"
+NO_OP = "no-op"
+
+# Impact of applying a plan, from the least to the most disruptive
+IMPACT_NONE = "none"
+IMPACT_IN_PLACE = "in-place"
+IMPACT_INDEXER_RESET = "indexer reset"
+IMPACT_INDEX_REBUILD = "index rebuild"
+IMPACT_ORDER = [
+    IMPACT_NONE,
+    IMPACT_IN_PLACE,
+    IMPACT_INDEXER_RESET,
+    IMPACT_INDEX_REBUILD,
+]
+
+# Field attributes that cannot be changed on an existing index field
+REBUILD_FIELD_ATTRIBUTES = {
+    "type",
+    "key",
+    "searchable",
+    "filterable",
+    "sortable",
+    "facetable",
+    "stored",
+    "analyzer",
+    "indexAnalyzer",
+    "normalizer",
+    "dimensions",
+    "vectorEncoding",
+    "vectorSearchProfile",
+}
+# HNSW parameters baked into the vector graph; efSearch only applies at query time
+REBUILD_HNSW_PARAMETERS = {"m", "efConstruction", "metric"}
+# Properties whose change leaves the already indexed documents stale; batch sizes, failure
+# thresholds and schedules of the indexer only affect how the next runs are executed
+RESET_PROPERTIES = {
+    "skillset": {"skills", "cognitiveServices", "knowledgeStore", "indexProjections"},
+    "indexer": {"fieldMappings", "outputFieldMappings", "parameters.configuration"},
+    "datasource": {"container", "type"},
+}
+
+_FIELD_PATH = re.compile(r"^fields\[[^\]]+\](?:\.fields\[[^\]]+\])*")
+_HNSW_PATH = re.compile(r"^vectorSearch\.algorithms\[[^\]]+\]\.hnswParameters\.(\w+)$")
+
+
+@dataclass
+class Change:
+    """A single difference between the current and the desired definition."""
+
+    path: str
+    # "added", "removed" or "changed"
+    kind: str
+    current: Any = None
+    desired: Any = None
+
+    def __str__(self) -> str:
+        if self.kind == "added":
+            return f"+ {self.path}"
+        if self.kind == "removed":
+            return f"- {self.path}"
+        return (
+            f"~ {self.path}: {json.dumps(self.current)} -> {json.dumps(self.desired)}"
+        )
+
+
+@dataclass
+class ResourcePlan:
+    """What reconciling one resource will do."""
+
+    kind: str
+    name: str
+    action: str
+    changes: List[Change] = field(default_factory=list)
+
+    @property
+    def impact(self) -> str:
+        """The most disruptive impact of the changes, one of IMPACT_ORDER."""
+        if self.action == NO_OP:
+            return IMPACT_NONE
+        if self.action == CREATE:
+            return IMPACT_IN_PLACE
+        return max(
+            (change_impact(self.kind, change) for change in self.changes),
+            key=IMPACT_ORDER.index,
+            default=IMPACT_IN_PLACE,
+        )
+
+    def describe(self) -> str:
+        """
+        Build a human readable description of the plan.
+
+        Returns:
+            One line with the action, followed by one line per change with its impact
+        """
+        lines = [f"{self.action:<7} {self.kind} '{self.name}'"]
+        lines.extend(
+            f"    {change}  [{change_impact(self.kind, change)}]"
+            for change in self.changes
+        )
+        return "\n".join(lines)
+
+
+def change_impact(kind: str, change: Change) -> str:
+    """
+    Classify what applying a single change requires from the service.
+
+    Removing an index field or changing how an existing field or the vector graph is stored
+    cannot be done in place: the index has to be deleted and rebuilt. Changes to what the
+    indexer extracts or enriches are applied in place, but only to documents processed
+    afterwards, so the indexer has to be reset to bring the existing documents up to date.
+
+    Args:
+        kind: Resource kind of the change, one of RESOURCE_COLLECTIONS
+        change: The change
+
+    Returns:
+        One of IMPACT_IN_PLACE, IMPACT_INDEXER_RESET or IMPACT_INDEX_REBUILD
+    """
+    if kind == "index":
+        field_path = _FIELD_PATH.match(change.path)
+        if field_path:
+            attribute = change.path[field_path.end() :].lstrip(".")
+            if not attribute:
+                # A new field is added in place; an existing one cannot be dropped
+                return (
+                    IMPACT_INDEX_REBUILD
+                    if change.kind == "removed"
+                    else IMPACT_IN_PLACE
+                )
+            if attribute in REBUILD_FIELD_ATTRIBUTES:
+                return IMPACT_INDEX_REBUILD
+            return IMPACT_IN_PLACE
+        hnsw_path = _HNSW_PATH.match(change.path)
+        if hnsw_path and hnsw_path.group(1) in REBUILD_HNSW_PARAMETERS:
+            return IMPACT_INDEX_REBUILD
+        if change.path.startswith("vectorSearch.") and change.kind == "removed":
+            return IMPACT_INDEX_REBUILD
+        if change.path.startswith("vectorSearch.compressions"):
+            return IMPACT_INDEX_REBUILD
+        return IMPACT_IN_PLACE
+
+    for prefix in RESET_PROPERTIES.get(kind, set()):
+        if change.path == prefix or change.path.startswith(
+            (f"{prefix}.", f"{prefix}[")
+        ):
+            return IMPACT_INDEXER_RESET
+    return IMPACT_IN_PLACE
+
+
+def overall_impact(plans: List[ResourcePlan]) -> str:
+    """
+    Combine the impact of the plans of one index set.
+
+    Rebuilding the index empties it, so it also requires a full indexer reset to refill it.
+
+    Args:
+        plans: The plans of the index, data source, skillset and indexer
+
+    Returns:
+        The most disruptive impact, one of IMPACT_ORDER
+    """
+    return max(
+        (plan.impact for plan in plans), key=IMPACT_ORDER.index, default=IMPACT_NONE
+    )
+
+
+def format_drift_report(plans: List[ResourcePlan]) -> str:
+    """
+    Build a drift report of the plans of one index set.
+
+    Args:
+        plans: The plans of the index, data source, skillset and indexer
+
+    Returns:
+        The plan of every resource followed by the required follow-up actions
+    """
+    lines = [plan.describe() for plan in plans]
+    impact = overall_impact(plans)
+    lines.append(f"Impact: {impact}")
+    if impact == IMPACT_INDEX_REBUILD:
+        lines.append(
+            "    The index must be deleted and recreated, then the indexer reset and run "
+            "to re-index every document."
+        )
+    elif impact == IMPACT_INDEXER_RESET:
+        lines.append(
+            "    Existing documents are only updated after the indexer is reset and run "
+            "over the whole data source."
+        )
+    return "\n".join(lines)
+
+
+def _is_named_list(value: Any) -> bool:
+    """Check whether a list holds named objects, e.g. index fields or skills."""
+    return (
+        isinstance(value, list)
+        and bool(value)
+        and all(isinstance(item, dict) and "name" in item for item in value)
+    )
+
+
+def _is_empty(value: Any) -> bool:
+    return value is None or value == [] or value == {}
+
+
+def diff_definitions(current: Any, desired: Any, path: str = "") -> List[Change]:
+    """
+    Compute the structural differences between a current and a desired definition.
+
+    The comparison is driven by the desired definition: properties that only exist in the
+    current definition are defaults filled in by the service and are ignored. Lists of named
+    objects (fields, skills, vector profiles...) are matched by name, so reordering them is
+    not a change, while a named object missing from the desired list is reported as removed.
+
+    Args:
+        current: Definition returned by the service
+        desired: Definition rendered from the configuration
+        path: Path of the compared values, used in the reported changes
+
+    Returns:
+        The changes, empty when the current definition already matches
+    """
+    if isinstance(desired, dict) and isinstance(current, dict):
+        changes = []
+        for key, value in desired.items():
+            if key in IGNORED_KEYS:
+                continue
+            child_path = f"{path}.{key}" if path else key
+            if key not in current:
+                if not _is_empty(value):
+                    changes.append(Change(child_path, "added", None, value))
+                continue
+            changes.extend(diff_definitions(current[key], value, child_path))
+        return changes
+
+    if _is_named_list(desired) and (_is_named_list(current) or current == []):
+        current_items = {item["name"]: item for item in current}
+        desired_items = {item["name"]: item for item in desired}
+        changes = []
+        for name, item in desired_items.items():
+            child_path = f"{path}[{name}]"
+            if name not in current_items:
+                changes.append(Change(child_path, "added", None, item))
+            else:
+                changes.extend(diff_definitions(current_items[name], item, child_path))
+        for name, item in current_items.items():
+            if name not in desired_items:
+                changes.append(Change(f"{path}[{name}]", "removed", item, None))
+        return changes
+
+    if (
+        isinstance(desired, list)
+        and isinstance(current, list)
+        and len(desired) == len(current)
+    ):
+        changes = []
+        for position, (current_item, desired_item) in enumerate(zip(current, desired)):
+            changes.extend(
+                diff_definitions(current_item, desired_item, f"{path}[{position}]")
+            )
+        return changes
+
+    if _is_empty(desired) and _is_empty(current):
+        return []
+    if current != desired:
+        return [Change(path, "changed", current, desired)]
+    return []
+
+
+def fetch_definition(
+    index_client: SearchIndexClient, kind: str, name: str, api_version: str
+) -> Optional[dict]:
+    """
+    Fetch the raw definition of a single named resource.
+
+    The REST payload is used as is, so the comparison does not depend on SDK model round trips.
+
+    Args:
+        index_client: Client whose pipeline sends the request to the search service
+        kind: Resource kind, one of RESOURCE_COLLECTIONS
+        name: Name of the resource
+        api_version: Search REST API version
+
+    Returns:
+        The definition, or None if the resource does not exist
+
+    Raises:
+        azure.core.exceptions.HttpResponseError: If the service returns another error
+    """
+    response = index_client.send_request(
+        HttpRequest(
+            "GET",
+            f"/{RESOURCE_COLLECTIONS[kind]}('{name}')",
+            params={"api-version": api_version},
+            headers={"Accept": "application/json"},
+        )
+    )
+    if response.status_code == 404:
+        return None
+    response.raise_for_status()
+    return response.json()
+
+
+def plan_resource(
+    index_client: SearchIndexClient, kind: str, desired: dict, api_version: str
+) -> ResourcePlan:
+    """
+    Decide whether a resource has to be created, updated or left unchanged.
+
+    Args:
+        index_client: Client whose pipeline sends the request to the search service
+        kind: Resource kind, one of RESOURCE_COLLECTIONS
+        desired: Definition rendered from the configuration
+        api_version: Search REST API version
+
+    Returns:
+        The plan for the resource
+    """
+    name = desired["name"]
+    current = fetch_definition(index_client, kind, name, api_version)
+    if current is None:
+        return ResourcePlan(kind, name, CREATE)
+
+    uncomparable = UNCOMPARABLE_KEYS.get(kind, set())
+    comparable = {
+        key: value for key, value in desired.items() if key not in uncomparable
+    }
+    changes = diff_definitions(current, comparable)
+    return ResourcePlan(kind, name, UPDATE if changes else NO_OP, changes)
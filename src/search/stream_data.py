@@ -0,0 +1,644 @@
+#!/usr/bin/env python3
+# Copyright (c) Microsoft Corporation.
+# Licensed under the MIT license.
+
+"""
+Streaming fetch-to-upload pipeline for Copilot Studio Azure AI Search Project
+
+This script combines fetch_data.py and upload_data.py: every fetched file is handed to the
+upload workers through a bounded queue as soon as it is available, so the download and the
+upload overlap and the local disk only holds the files that are in the queue or in flight,
+not the whole corpus. For GitHub sources, the object store of the partial clone still keeps the
+compressed content of every checked-out file until the run ends, so it grows with the corpus.
+
+Supported sources:
+1. GitHub repository (partial clone; files are checked out in batches and removed once uploaded)
+2. Azure Blob Storage (blobs are spooled to temporary files, or copied account-to-account by the
+   storage service with --server_side_copy, see blob_copy.py)
+
+Usage:
+    python stream_data.py --source_type github --source_url <repo_url> --source_path data \\
+        --storage_account_name <account> --container_name <container>
+    python stream_data.py --source_type blob --source_url <blob_url> --source_path files \\
+        --storage_account_name <account> --container_name <container> --server_side_copy
+    python stream_data.py --source_type github --source_url <repo_url> --source_path data \\
+        --storage_account_name <account> --container_name <container> --sync --delete_extraneous
+"""
+
+import argparse
+import logging
+import os
+import queue
+import shutil
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Callable, Dict, Iterable, List, Optional, Set, Tuple
+
+from azure.storage.blob import ContainerClient
+from blob_copy import (
+    DEFAULT_COPY_BATCH_SIZE,
+    DEFAULT_COPY_CONCURRENCY,
+    BlobCopier,
+    CopyRequest,
+    user_delegation_signer,
+)
+from common_utils import (
+    SOFT_DELETE_MARKER_VALUE,
+    SOFT_DELETE_METADATA_KEY,
+    format_throughput,
+    positive_int,
+)
+from data_manifest import compute_md5
+from fetch_data import CLONE_MODES, DEFAULT_CLONE_MODE, DataFetcher
+from upload_data import (
+    UploadSummary,
+    delete_extraneous_blobs,
+    get_container_client,
+    is_blob_up_to_date,
+    list_remote_blobs,
+    matches_pattern,
+    upload_file,
+)
+
+# Configure logging
+logging.basicConfig(
+    level=logging.INFO, format="%(asctime)s - %(name)s - %(levelname)s - %(message)s"
+)
+logger = logging.getLogger(__name__)
+
+DEFAULT_QUEUE_SIZE = 16
+DEFAULT_FETCH_WORKERS = 4
+DEFAULT_UPLOAD_WORKERS = 8
+# Number of files checked out from git at once
+DEFAULT_CHECKOUT_BATCH_SIZE = 8
+
+
+@dataclass
+class PipelineItem:
+    """A fetched file waiting in the queue to be uploaded."""
+
+    blob_name: str
+    # None when the source already delivered the data to the destination (server-side copy)
+    path: Optional[str]
+    size: int
+    # MD5 digest of the file when the source provides it; computed before the upload otherwise
+    md5: Optional[bytes] = None
+
+
+class DestinationSync:
+    """
+    Listing of the destination container for a sync run, like upload_data.py --sync.
+
+    The container is listed once; source files whose blob already has the same size and MD5 are
+    skipped, and the names of every source file are kept to find the extraneous blobs.
+    """
+
+    def __init__(self, destination: ContainerClient):
+        """
+        List the destination container.
+
+        Args:
+            destination: Client of the destination container
+        """
+        self.remote_blobs: Dict[str, object] = list_remote_blobs(destination)
+        # Blob names of the source files, up to date or not
+        self.source_names: Set[str] = set()
+        self.skipped = 0
+        self.skipped_bytes = 0
+        self._lock = threading.Lock()
+
+    def add_source(self, blob_name: str):
+        """Record the blob name of a source file."""
+        with self._lock:
+            self.source_names.add(blob_name)
+
+    def might_be_up_to_date(self, blob_name: str, size: int) -> bool:
+        """Check the size only, before computing the MD5 of a file."""
+        blob = self.remote_blobs.get(blob_name)
+        return blob is not None and blob.size == size
+
+    def skip_if_up_to_date(self, blob_name: str, size: int, md5: bytes) -> bool:
+        """
+        Check whether the destination already holds a source file, counting it as skipped.
+
+        Args:
+            blob_name: Destination blob name of the file
+            size: Size of the file
+            md5: MD5 digest of the file
+
+        Returns:
+            True if the file does not need to be uploaded
+        """
+        if not is_blob_up_to_date(self.remote_blobs.get(blob_name), size, md5):
+            return False
+        logger.debug(f"Skipping unchanged file {blob_name}.")
+        with self._lock:
+            self.skipped += 1
+            self.skipped_bytes += size
+        return True
+
+
+class StreamingPipeline:
+    """
+    Two-stage pipeline: fetch workers produce local files, upload workers consume them.
+
+    The queue between the stages is bounded, so fetch workers block when uploads fall behind.
+    Each item is deleted from disk as soon as it is uploaded.
+    """
+
+    def __init__(
+        self,
+        destination: ContainerClient,
+        queue_size: int = DEFAULT_QUEUE_SIZE,
+        fetch_workers: int = DEFAULT_FETCH_WORKERS,
+        upload_workers: int = DEFAULT_UPLOAD_WORKERS,
+        sync: Optional[DestinationSync] = None,
+    ):
+        """
+        Initialize the pipeline.
+
+        Args:
+            destination: Client of the destination container
+            queue_size: Maximum number of fetched files waiting to be uploaded
+            fetch_workers: Number of fetch tasks run in parallel
+            upload_workers: Number of files uploaded in parallel
+            sync: Listing of the destination; fetched files it already holds are not queued
+        """
+        self.destination = destination
+        self.queue_size = queue_size
+        self.fetch_workers = fetch_workers
+        self.upload_workers = upload_workers
+        self.sync = sync
+
+    def run(
+        self, fetch_tasks: Iterable[Callable[[], List[PipelineItem]]]
+    ) -> UploadSummary:
+        """
+        Run fetch tasks and upload what they produce.
+
+        Args:
+            fetch_tasks: Callables that fetch one or more files to disk and return them as
+                pipeline items
+
+        Returns:
+            Summary with the uploaded and skipped files, the failures and the elapsed time
+        """
+        summary = UploadSummary()
+        items = queue.Queue(maxsize=self.queue_size)
+        lock = threading.Lock()
+        started = time.monotonic()
+
+        def is_up_to_date(item: PipelineItem) -> bool:
+            if item.path is None or not self.sync.might_be_up_to_date(
+                item.blob_name, item.size
+            ):
+                return False
+            item.md5 = item.md5 or compute_md5(Path(item.path))
+            return self.sync.skip_if_up_to_date(item.blob_name, item.size, item.md5)
+
+        def fetch(task):
+            try:
+                for item in task():
+                    if self.sync is not None and is_up_to_date(item):
+                        os.remove(item.path)
+                        continue
+                    items.put(item)
+            except Exception as e:
+                logger.error(f"Exception fetching data: {e}")
+                with lock:
+                    summary.failed[getattr(task, "name", repr(task))] = str(e)
+
+        def upload():
+            while True:
+                item = items.get()
+                if item is None:
+                    return
+                try:
+                    if item.path is not None:
+                        # Stored on the blob so later syncs of upload_data.py skip it
+                        md5 = item.md5 or compute_md5(Path(item.path))
+                        upload_file(
+                            self.destination, Path(item.path), item.blob_name, md5
+                        )
+                    with lock:
+                        summary.uploaded += 1
+                        summary.uploaded_bytes += item.size
+                except Exception as e:
+                    logger.error(f"Exception uploading file name {item.blob_name}: {e}")
+                    with lock:
+                        summary.failed[item.blob_name] = str(e)
+                finally:
+                    if item.path is not None:
+                        # A failed removal must not stop the worker, or fetches would block
+                        try:
+                            os.remove(item.path)
+                        except OSError as e:
+                            logger.warning(f"Could not remove {item.path}: {e}")
+
+        uploaders = [
+            threading.Thread(target=upload, daemon=True)
+            for _ in range(self.upload_workers)
+        ]
+        for uploader in uploaders:
+            uploader.start()
+        try:
+            with ThreadPoolExecutor(max_workers=self.fetch_workers) as executor:
+                # Drain the results lazily so huge listings are not submitted up front
+                pending = threading.BoundedSemaphore(self.fetch_workers * 2)
+                for task in fetch_tasks:
+                    pending.acquire()
+                    future = executor.submit(fetch, task)
+                    future.add_done_callback(lambda _: pending.release())
+        finally:
+            for _ in uploaders:
+                items.put(None)
+            for uploader in uploaders:
+                uploader.join()
+
+        if self.sync is not None:
+            summary.skipped = self.sync.skipped
+            summary.skipped_bytes = self.sync.skipped_bytes
+        summary.elapsed = time.monotonic() - started
+        return summary
+
+
+class _Task:
+    """Named fetch task, so failures can be reported by source name."""
+
+    def __init__(self, name: str, function: Callable[[], List[PipelineItem]]):
+        self.name = name
+        self.function = function
+
+    def __call__(self) -> List[PipelineItem]:
+        return self.function()
+
+
+def flat_blob_name(relative_path: str) -> str:
+    """Build the destination blob name like upload_data.py does for local files."""
+    return relative_path.replace("/", "_").replace(os.sep, "_")
+
+
+def github_tasks(
+    fetcher: DataFetcher,
+    repo_url: str,
+    source_path: str,
+    work_dir: str,
+    batch_size: int = DEFAULT_CHECKOUT_BATCH_SIZE,
+    sync: Optional[DestinationSync] = None,
+) -> Iterable[_Task]:
+    """
+    Yield fetch tasks that check out the matching files of a repository batch by batch.
+
+    Git checkouts of the same clone cannot run concurrently, so the tasks must be run by a
+    single fetch worker; the overlap comes from the upload workers.
+
+    Args:
+        fetcher: Data fetcher holding the file patterns and the clone mode
+        repo_url: Repository URL
+        source_path: Path within repository containing data files
+        work_dir: Directory receiving the clone
+        batch_size: Number of files checked out per task
+        sync: Listing of the destination, receiving the blob names of the files
+
+    Yields:
+        Fetch tasks
+    """
+    repo_path = os.path.join(work_dir, "repo")
+    paths = fetcher.clone_without_checkout(repo_url, repo_path, source_path)
+    logger.info(f"Found {len(paths)} files matching patterns {fetcher.file_patterns}")
+    root = source_path.strip("/")
+
+    def blob_name(path: str) -> str:
+        return flat_blob_name(path[len(root) + 1 :] if root else path)
+
+    def checkout(batch: List[str]) -> List[PipelineItem]:
+        fetcher.checkout_files(repo_path, batch)
+        items = []
+        for path in batch:
+            local_path = os.path.join(repo_path, *path.split("/"))
+            items.append(
+                PipelineItem(blob_name(path), local_path, os.path.getsize(local_path))
+            )
+        return items
+
+    if sync is not None:
+        # Every listed file is a source file, even if its checkout fails
+        for path in paths:
+            sync.add_source(blob_name(path))
+    for start in range(0, len(paths), batch_size):
+        batch = paths[start : start + batch_size]
+        yield _Task(batch[0], lambda batch=batch: checkout(batch))
+
+
+def _blob_md5(blob) -> Optional[bytes]:
+    md5 = blob.content_settings.content_md5 if blob.content_settings else None
+    return bytes(md5) if md5 else None
+
+
+def matching_blobs(
+    fetcher: DataFetcher,
+    source: ContainerClient,
+    source_path: str,
+    sync: Optional[DestinationSync] = None,
+) -> Iterable[Tuple[object, str]]:
+    """
+    List the blobs of a source container that match the file patterns.
+
+    Args:
+        fetcher: Data fetcher holding the file patterns
+        source: Client of the source container
+        source_path: Path prefix within the source container
+        sync: Listing of the destination; receives the blob names, and the blobs it already
+            holds are not yielded
+
+    Yields:
+        The properties of each matching blob and its destination blob name
+    """
+    prefix = source_path + "/" if source_path else ""
+    for blob in source.list_blobs(name_starts_with=prefix):
+        if not matches_pattern(os.path.basename(blob.name), fetcher.file_patterns):
+            continue
+        blob_name = flat_blob_name(blob.name[len(prefix) :])
+        if sync is not None:
+            sync.add_source(blob_name)
+            md5 = _blob_md5(blob)
+            # Skipped before the download, using the MD5 of the source listing
+            if md5 and sync.skip_if_up_to_date(blob_name, blob.size, md5):
+                continue
+        yield blob, blob_name
+
+
+def blob_tasks(
+    fetcher: DataFetcher,
+    source: ContainerClient,
+    source_path: str,
+    spool_dir: str,
+    sync: Optional[DestinationSync] = None,
+) -> Iterable[_Task]:
+    """
+    Yield fetch tasks spooling the matching blobs of a source container to temporary files.
+
+    Args:
+        fetcher: Data fetcher holding the file patterns and the download settings
+        source: Client of the source container
+        source_path: Path prefix within the source container
+        spool_dir: Directory receiving the blobs waiting to be uploaded
+        sync: Listing of the destination; the blobs it already holds are not downloaded
+
+    Yields:
+        Fetch tasks
+    """
+
+    def spool(blob, blob_name: str) -> List[PipelineItem]:
+        with tempfile.NamedTemporaryFile(dir=spool_dir, delete=False) as spool_file:
+            source.get_blob_client(blob.name).download_blob(
+                max_concurrency=fetcher.max_concurrency
+            ).readinto(spool_file)
+        return [PipelineItem(blob_name, spool_file.name, blob.size, _blob_md5(blob))]
+
+    for blob, blob_name in matching_blobs(fetcher, source, source_path, sync):
+        yield _Task(blob.name, lambda blob=blob, name=blob_name: spool(blob, name))
+
+
+def blob_copy_requests(
+    fetcher: DataFetcher,
+    source: ContainerClient,
+    source_path: str,
+    sync: Optional[DestinationSync] = None,
+) -> Iterable[CopyRequest]:
+    """
+    Yield server-side copy requests for the matching blobs of a source container.
+
+    Args:
+        fetcher: Data fetcher holding the file patterns
+        source: Client of the source container
+        source_path: Path prefix within the source container
+        sync: Listing of the destination; the blobs it already holds are not copied
+
+    Yields:
+        Copy requests
+    """
+    for blob, blob_name in matching_blobs(fetcher, source, source_path, sync):
+        yield CopyRequest(blob.name, blob_name, blob.size, _blob_md5(blob))
+
+
+def stream_files(
+    args: argparse.Namespace,
+    fetcher: DataFetcher,
+    destination: ContainerClient,
+    sync: Optional[DestinationSync] = None,
+) -> UploadSummary:
+    """
+    Fetch the source files and upload them through the streaming pipeline.
+
+    Args:
+        args: Parsed command line arguments
+        fetcher: Data fetcher holding the file patterns and the download settings
+        destination: Client of the destination container
+        sync: Listing of the destination; the files it already holds are not uploaded
+
+    Returns:
+        Summary of the upload
+    """
+    work_dir = tempfile.mkdtemp(dir=args.spool_dir)
+    try:
+        if args.source_type == "github":
+            pipeline = StreamingPipeline(
+                destination, args.queue_size, 1, args.upload_workers, sync
+            )
+            tasks = github_tasks(
+                fetcher, args.source_url, args.source_path, work_dir, sync=sync
+            )
+        else:
+            pipeline = StreamingPipeline(
+                destination,
+                args.queue_size,
+                args.fetch_workers,
+                args.upload_workers,
+                sync,
+            )
+            tasks = blob_tasks(
+                fetcher,
+                fetcher.get_source_container_client(args.source_url),
+                args.source_path,
+                work_dir,
+                sync,
+            )
+        return pipeline.run(tasks)
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+
+def main():
+    """
+    Main function to handle command line arguments and run the streaming pipeline.
+    """
+    parser = argparse.ArgumentParser(
+        description="Stream data files from a source into Azure Blob Storage"
+    )
+    parser.add_argument(
+        "--source_type",
+        required=True,
+        choices=["github", "blob"],
+        help="Type of data source",
+    )
+    parser.add_argument("--source_url", required=True, help="Source URL")
+    parser.add_argument(
+        "--source_path",
+        default="",
+        help="Path within source containing data files (default: root)",
+    )
+    parser.add_argument(
+        "--file_pattern",
+        default="*",
+        help="File patterns to match, comma-separated (e.g., '*.pdf,*.docx,*.txt'). Default: '*' (all files)",
+    )
+    parser.add_argument(
+        "--storage_account_name",
+        required=True,
+        help="Destination Azure storage account name",
+    )
+    parser.add_argument(
+        "--container_name",
+        required=True,
+        help="Destination Azure storage container name",
+    )
+    parser.add_argument(
+        "--clone_mode",
+        choices=CLONE_MODES,
+        default=DEFAULT_CLONE_MODE,
+        help="Git clone mode for GitHub sources. Default: sparse",
+    )
+    parser.add_argument(
+        "--queue_size",
+        type=positive_int,
+        default=DEFAULT_QUEUE_SIZE,
+        help=f"Maximum number of fetched files waiting to be uploaded. Default: {DEFAULT_QUEUE_SIZE}",
+    )
+    parser.add_argument(
+        "--fetch_workers",
+        type=positive_int,
+        default=DEFAULT_FETCH_WORKERS,
+        help=f"Number of blobs fetched in parallel (GitHub sources use one). Default: {DEFAULT_FETCH_WORKERS}",
+    )
+    parser.add_argument(
+        "--upload_workers",
+        type=positive_int,
+        default=DEFAULT_UPLOAD_WORKERS,
+        help=f"Number of files uploaded in parallel. Default: {DEFAULT_UPLOAD_WORKERS}",
+    )
+    parser.add_argument(
+        "--server_side_copy",
+        action="store_true",
+        help="For blob sources, let the storage service copy blobs account-to-account instead of routing them through this machine",
+    )
+    parser.add_argument(
+        "--copy_concurrency",
+        type=positive_int,
+        default=DEFAULT_COPY_CONCURRENCY,
+        help=f"Number of server-side copy requests sent in parallel. Default: {DEFAULT_COPY_CONCURRENCY}",
+    )
+    parser.add_argument(
+        "--copy_batch_size",
+        type=positive_int,
+        default=DEFAULT_COPY_BATCH_SIZE,
+        help=f"Maximum number of server-side copies in flight; a new copy starts as soon as one completes. Default: {DEFAULT_COPY_BATCH_SIZE}",
+    )
+    parser.add_argument(
+        "--sync",
+        action="store_true",
+        help="Upload only new or changed files, comparing size and MD5 with the blobs already in the container",
+    )
+    parser.add_argument(
+        "--delete_extraneous",
+        action="store_true",
+        help="With --sync, delete blobs matching the file patterns that no longer exist in the source",
+    )
+    parser.add_argument(
+        "--soft_delete",
+        action="store_true",
+        help=f"With --delete_extraneous, flag the extraneous blobs with the metadata "
+        f"{SOFT_DELETE_METADATA_KEY}={SOFT_DELETE_MARKER_VALUE} instead of deleting them",
+    )
+    parser.add_argument(
+        "--spool_dir",
+        help="Directory receiving the files waiting to be uploaded (default: system temporary directory)",
+    )
+    args = parser.parse_args()
+    if args.server_side_copy and args.source_type != "blob":
+        parser.error("--server_side_copy requires --source_type blob")
+    if args.delete_extraneous and not args.sync:
+        parser.error("--delete_extraneous requires --sync")
+    if args.soft_delete and not args.delete_extraneous:
+        parser.error("--soft_delete requires --delete_extraneous")
+
+    # Parse file patterns
+    file_patterns = [
+        pattern.strip() for pattern in args.file_pattern.split(",") if pattern.strip()
+    ]
+    if not file_patterns:
+        file_patterns = ["*"]
+
+    fetcher = DataFetcher(file_patterns=file_patterns, clone_mode=args.clone_mode)
+    destination = get_container_client(
+        fetcher.credential, args.storage_account_name, args.container_name
+    )
+    sync = DestinationSync(destination) if args.sync else None
+
+    if args.server_side_copy:
+        source = fetcher.get_source_container_client(args.source_url)
+        copier = BlobCopier(
+            source,
+            destination,
+            user_delegation_signer(source),
+            max_concurrency=args.copy_concurrency,
+            batch_size=args.copy_batch_size,
+        )
+        summary = copier.copy_blobs(
+            blob_copy_requests(fetcher, source, args.source_path, sync),
+            sync.remote_blobs if sync else None,
+        )
+        if sync is not None:
+            summary.skipped += sync.skipped
+            summary.skipped_bytes += sync.skipped_bytes
+    else:
+        summary = stream_files(args, fetcher, destination, sync)
+    logger.info(
+        f"Skipped {summary.skipped} files already up to date "
+        f"({summary.skipped_bytes / (1024 * 1024):.1f} MB)"
+    )
+
+    if args.delete_extraneous:
+        if summary.failed:
+            # A file that failed to fetch is still a source file; keep its blob
+            logger.warning("Not deleting extraneous blobs after failures")
+        else:
+            delete_extraneous_blobs(
+                destination,
+                sync.remote_blobs,
+                sync.source_names,
+                file_patterns,
+                summary,
+                args.soft_delete,
+            )
+            logger.info(
+                f"Sync report: {summary.deleted} deleted, "
+                f"{summary.marked_deleted} marked as deleted"
+            )
+
+    logger.info(
+        f"Streamed files into {args.container_name}: "
+        f"{format_throughput(summary.uploaded, summary.uploaded_bytes, summary.elapsed)}"
+    )
+    if summary.failed:
+        raise RuntimeError(
+            f"{len(summary.failed)} files failed: {', '.join(sorted(summary.failed))}"
+        )
+
+
+if __name__ == "__main__":
+    main()
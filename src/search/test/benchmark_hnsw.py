@@ -0,0 +1,450 @@
+# Copyright (c) Microsoft Corporation.
+# Licensed under the MIT license.
+
+"""
+Sweep of the HNSW parameters of the vector index, run offline over a sample of embeddings.
+
+For every m and efConstruction of the grid a local HNSW index is built, then queried with every
+efSearch; recall@k is measured against exact cosine search, along with the build time, the memory
+of the vectors and neighbor lists and the query latency. The recommended hnswParameters are the
+cheapest combination reaching the target recall: the smallest m (memory), then the smallest
+efSearch (query latency), then the smallest efConstruction (indexing time).
+
+The embeddings are either synthetic clustered vectors or cached embeddings saved with numpy.save.
+hnswlib is used when installed; otherwise a pure numpy HNSW implementation is used, which is slower
+but builds the same graph structure.
+
+    python benchmark_hnsw.py --sample 2000 --dimensions 1024
+    python benchmark_hnsw.py --embeddings chunks.npy --save_profile tuned
+
+--save_profile stores the recommendation in a profile of index_config/vectorProfiles.json, to be
+applied with index_utils.py --vector_profile.
+"""
+
+import argparse
+import heapq
+import json
+import math
+import os
+import sys
+import time
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+
+try:
+    import hnswlib
+except ImportError:  # the numpy implementation is used instead
+    hnswlib = None
+
+# Make the search scripts importable when run as a script
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from vector_storage import (  # noqa: E402
+    HNSW_PARAMETER_RANGES,
+    VECTOR_PROFILES_PATH,
+)
+
+DEFAULT_M = [4, 6, 8, 10]
+DEFAULT_EF_CONSTRUCTION = [100, 200, 400]
+DEFAULT_EF_SEARCH = [100, 200, 500]
+DEFAULT_TARGET_RECALL = 0.95
+
+
+class NumpyHnsw:
+    """
+    HNSW index over normalized vectors with cosine distance.
+
+    Each layer keeps up to m neighbors per node, the base layer up to 2 * m, selected with the
+    diversity heuristic of the HNSW paper like hnswlib and the search service.
+    """
+
+    def __init__(self, vectors: np.ndarray, m: int, ef_construction: int, seed=0):
+        self.vectors = vectors
+        self.m = m
+        self.ef_construction = ef_construction
+        self.level_multiplier = 1 / math.log(m)
+        self.random = np.random.default_rng(seed)
+        # Neighbor lists per layer: layers[level][node] -> list of nodes
+        self.layers: List[Dict[int, List[int]]] = []
+        self.entry_point: Optional[int] = None
+        for node in range(len(vectors)):
+            self._insert(node)
+
+    def _distances(self, query: np.ndarray, nodes: Sequence[int]) -> np.ndarray:
+        return 1.0 - self.vectors[list(nodes)] @ query
+
+    def _search_layer(
+        self, query: np.ndarray, entry_points: List[int], ef: int, level: int
+    ) -> List[tuple]:
+        """Return up to ef (distance, node) pairs closest to the query, nearest first."""
+        graph = self.layers[level]
+        visited = set(entry_points)
+        distances = self._distances(query, entry_points)
+        candidates = list(zip(distances.tolist(), entry_points))
+        heapq.heapify(candidates)
+        # Max-heap of the results, by negated distance
+        results = [(-distance, node) for distance, node in candidates]
+        heapq.heapify(results)
+        while len(results) > ef:
+            heapq.heappop(results)
+        while candidates:
+            distance, node = heapq.heappop(candidates)
+            if distance > -results[0][0] and len(results) >= ef:
+                break
+            neighbors = [n for n in graph.get(node, []) if n not in visited]
+            if not neighbors:
+                continue
+            visited.update(neighbors)
+            for neighbor_distance, neighbor in zip(
+                self._distances(query, neighbors).tolist(), neighbors
+            ):
+                if len(results) < ef or neighbor_distance < -results[0][0]:
+                    heapq.heappush(candidates, (neighbor_distance, neighbor))
+                    heapq.heappush(results, (-neighbor_distance, neighbor))
+                    if len(results) > ef:
+                        heapq.heappop(results)
+        return sorted((-distance, node) for distance, node in results)
+
+    def _select_neighbors(self, candidates: List[tuple], limit: int) -> List[int]:
+        """Keep the candidates closer to the query than to any neighbor already selected."""
+        selected: List[int] = []
+        for distance, node in candidates:
+            if len(selected) == limit:
+                break
+            if not selected or np.all(
+                self._distances(self.vectors[node], selected) > distance
+            ):
+                selected.append(node)
+        return selected
+
+    def _insert(self, node: int):
+        query = self.vectors[node]
+        level = int(-math.log(1.0 - self.random.random()) * self.level_multiplier)
+        # The entry point is the node of the top layer
+        top = len(self.layers) - 1
+        while len(self.layers) <= level:
+            self.layers.append({node: []})
+        if self.entry_point is None:
+            self.entry_point = node
+            return
+
+        entry_points = [self.entry_point]
+        for layer in range(top, level, -1):
+            entry_points = [self._search_layer(query, entry_points, 1, layer)[0][1]]
+        for layer in range(min(level, top), -1, -1):
+            found = self._search_layer(query, entry_points, self.ef_construction, layer)
+            limit = self.m * 2 if layer == 0 else self.m
+            neighbors = self._select_neighbors(found, self.m)
+            graph = self.layers[layer]
+            graph[node] = neighbors
+            for neighbor in neighbors:
+                links = graph[neighbor]
+                links.append(node)
+                if len(links) > limit:
+                    distances = self._distances(self.vectors[neighbor], links)
+                    ranked = sorted(zip(distances.tolist(), links))
+                    graph[neighbor] = self._select_neighbors(ranked, limit)
+            entry_points = [node for _, node in found]
+        if level > top:
+            self.entry_point = node
+
+    def search(self, query: np.ndarray, k: int, ef_search: int) -> List[int]:
+        """
+        Find the approximate nearest neighbors of a query.
+
+        Args:
+            query: The normalized query vector.
+            k: Number of neighbors to return.
+            ef_search: Size of the candidate list of the base layer search.
+
+        Returns:
+            The nodes of the neighbors, nearest first
+        """
+        entry_points = [self.entry_point]
+        for layer in range(len(self.layers) - 1, 0, -1):
+            entry_points = [self._search_layer(query, entry_points, 1, layer)[0][1]]
+        found = self._search_layer(query, entry_points, max(ef_search, k), 0)
+        return [node for _, node in found[:k]]
+
+    def link_count(self) -> int:
+        """Number of neighbor references of all layers."""
+        return sum(len(links) for graph in self.layers for links in graph.values())
+
+
+@dataclass
+class SweepResult:
+    """Measurements of one HNSW parameter combination."""
+
+    m: int
+    ef_construction: int
+    ef_search: int
+    recall: float
+    build_seconds: float
+    memory_bytes: int
+    query_ms: float
+
+    def hnsw_parameters(self) -> Dict[str, int]:
+        """The parameters in the format of the index definition."""
+        return {
+            "m": self.m,
+            "efConstruction": self.ef_construction,
+            "efSearch": self.ef_search,
+        }
+
+
+def normalize(vectors: np.ndarray) -> np.ndarray:
+    """Scale the vectors to unit length, so cosine similarity is a dot product."""
+    vectors = np.asarray(vectors, dtype=np.float32)
+    return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+
+def synthetic_embeddings(
+    count: int, dimensions: int, clusters: int = 50, spread: float = 1.0, seed=0
+) -> np.ndarray:
+    """
+    Generate clustered unit vectors, a stand-in for embeddings of documents on a few topics.
+
+    Args:
+        count: Number of vectors.
+        dimensions: Dimensions of the vectors.
+        clusters: Number of topics.
+        spread: Standard deviation of the vectors around their topic, relative to its norm.
+        seed: Seed of the random generator.
+
+    Returns:
+        The vectors, normalized
+    """
+    random = np.random.default_rng(seed)
+    centers = random.standard_normal((clusters, dimensions))
+    assignments = random.integers(0, clusters, count)
+    noise = random.standard_normal((count, dimensions)) * spread
+    return normalize(centers[assignments] + noise)
+
+
+def exact_neighbors(vectors: np.ndarray, queries: np.ndarray, k: int) -> np.ndarray:
+    """Return the indices of the k most similar vectors of every query, by exact cosine."""
+    similarities = queries @ vectors.T
+    top = np.argpartition(-similarities, k - 1, axis=1)[:, :k]
+    return top
+
+
+def _build(vectors: np.ndarray, m: int, ef_construction: int):
+    if hnswlib is None:
+        index = NumpyHnsw(vectors, m, ef_construction)
+        memory = vectors.nbytes + index.link_count() * 4
+        return index, memory
+    index = hnswlib.Index(space="cosine", dim=vectors.shape[1])
+    index.init_index(max_elements=len(vectors), ef_construction=ef_construction, M=m)
+    index.add_items(vectors, num_threads=1)
+    # hnswlib keeps 2 * m links per node in the base layer, and few nodes in the upper ones
+    memory = vectors.nbytes + len(vectors) * 2 * m * 4
+    return index, memory
+
+
+def _query(index, queries: np.ndarray, k: int, ef_search: int) -> List[List[int]]:
+    if hnswlib is None:
+        return [index.search(query, k, ef_search) for query in queries]
+    index.set_ef(max(ef_search, k))
+    return [list(labels) for labels in index.knn_query(queries, k, num_threads=1)[0]]
+
+
+def sweep(
+    vectors: np.ndarray,
+    queries: np.ndarray,
+    k: int = 10,
+    m_values: Sequence[int] = DEFAULT_M,
+    ef_construction_values: Sequence[int] = DEFAULT_EF_CONSTRUCTION,
+    ef_search_values: Sequence[int] = DEFAULT_EF_SEARCH,
+) -> List[SweepResult]:
+    """
+    Measure every combination of the parameter grid.
+
+    Args:
+        vectors: The normalized vectors to index.
+        queries: The normalized query vectors.
+        k: Number of neighbors of the recall measure.
+        m_values: Values of m.
+        ef_construction_values: Values of efConstruction.
+        ef_search_values: Values of efSearch.
+
+    Returns:
+        One result per combination
+    """
+    truth = exact_neighbors(vectors, queries, k)
+    results = []
+    for m in m_values:
+        for ef_construction in ef_construction_values:
+            started = time.perf_counter()
+            index, memory = _build(vectors, m, ef_construction)
+            build_seconds = time.perf_counter() - started
+            for ef_search in ef_search_values:
+                started = time.perf_counter()
+                found = _query(index, queries, k, ef_search)
+                query_ms = (time.perf_counter() - started) * 1000 / len(queries)
+                hits = sum(
+                    len(set(neighbors) & set(expected.tolist()))
+                    for neighbors, expected in zip(found, truth)
+                )
+                results.append(
+                    SweepResult(
+                        m,
+                        ef_construction,
+                        ef_search,
+                        hits / (k * len(queries)),
+                        build_seconds,
+                        memory,
+                        query_ms,
+                    )
+                )
+    return results
+
+
+def recommend(
+    results: List[SweepResult], target_recall: float = DEFAULT_TARGET_RECALL
+) -> SweepResult:
+    """
+    Pick the cheapest combination that reaches the target recall.
+
+    Combinations are ranked by m, which sets the memory, then efSearch, which sets the query
+    latency, then efConstruction, which sets the indexing time; the measured timings are not used
+    because the local index does not predict the latency of the service. When no combination
+    reaches the target, the one with the best recall is returned.
+
+    Args:
+        results: The sweep results.
+        target_recall: The minimum recall@k.
+
+    Returns:
+        The recommended result
+    """
+    passing = [result for result in results if result.recall >= target_recall]
+    if not passing:
+        return max(results, key=lambda result: result.recall)
+    return min(
+        passing,
+        key=lambda result: (result.m, result.ef_search, result.ef_construction),
+    )
+
+
+def save_profile(
+    name: str, parameters: Dict[str, int], profiles_file: str = VECTOR_PROFILES_PATH
+):
+    """
+    Store HNSW parameters in a vector storage profile, creating the profile if needed.
+
+    Args:
+        name: The name of the profile.
+        parameters: The hnswParameters to store.
+        profiles_file: The path to the profiles file.
+    """
+    with open(profiles_file) as profiles:
+        content = json.load(profiles)
+    content.setdefault(name, {})["hnswParameters"] = parameters
+    with open(profiles_file, "w") as profiles:
+        json.dump(content, profiles, indent=4)
+        profiles.write("\n")
+
+
+def format_results(results: List[SweepResult]) -> str:
+    """
+    Build a plain text table of sweep results.
+
+    Args:
+        results: The sweep results.
+
+    Returns:
+        The table
+    """
+    lines = [
+        f"{'m':>3} {'efC':>5} {'efS':>5} {'recall':>7} {'build s':>8} "
+        f"{'memory MB':>10} {'query ms':>9}"
+    ]
+    for result in results:
+        lines.append(
+            f"{result.m:>3} {result.ef_construction:>5} {result.ef_search:>5} "
+            f"{result.recall:>7.3f} {result.build_seconds:>8.2f} "
+            f"{result.memory_bytes / 1e6:>10.1f} {result.query_ms:>9.2f}"
+        )
+    return "\n".join(lines)
+
+
+def _grid_values(name: str):
+    low, high = HNSW_PARAMETER_RANGES[name]
+
+    def parse(value: str) -> List[int]:
+        values = [int(item) for item in value.split(",")]
+        if any(not low <= item <= high for item in values):
+            raise argparse.ArgumentTypeError(
+                f"{name} values must be between {low} and {high}"
+            )
+        return values
+
+    return parse
+
+
+def main():
+    """Run the sweep and print the results and the recommended hnswParameters."""
+    parser = argparse.ArgumentParser(description="HNSW parameter sweep")
+    parser.add_argument(
+        "--embeddings",
+        help="numpy .npy file of cached embeddings, one row per chunk; synthetic when omitted",
+    )
+    parser.add_argument("--sample", type=int, default=2000)
+    parser.add_argument("--queries", type=int, default=100)
+    parser.add_argument("--dimensions", type=int, default=1024)
+    parser.add_argument(
+        "--spread",
+        type=float,
+        default=1.0,
+        help="spread of the synthetic vectors around their topics; higher is harder to search",
+    )
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--m", type=_grid_values("m"), default=DEFAULT_M)
+    parser.add_argument(
+        "--ef_construction",
+        type=_grid_values("efConstruction"),
+        default=DEFAULT_EF_CONSTRUCTION,
+    )
+    parser.add_argument(
+        "--ef_search", type=_grid_values("efSearch"), default=DEFAULT_EF_SEARCH
+    )
+    parser.add_argument("--target_recall", type=float, default=DEFAULT_TARGET_RECALL)
+    parser.add_argument(
+        "--save_profile",
+        help="store the recommended hnswParameters in this profile of vectorProfiles.json",
+    )
+    args = parser.parse_args()
+
+    if args.embeddings:
+        embeddings = normalize(np.load(args.embeddings))
+        random = np.random.default_rng(0)
+        embeddings = embeddings[random.permutation(len(embeddings))]
+    else:
+        embeddings = synthetic_embeddings(
+            args.sample + args.queries, args.dimensions, spread=args.spread
+        )
+    vectors = embeddings[: args.sample]
+    queries = embeddings[args.sample : args.sample + args.queries]
+
+    implementation = "hnswlib" if hnswlib else "numpy"
+    print(
+        f"{len(vectors)} vectors of {vectors.shape[1]} dimensions, "
+        f"{len(queries)} queries, recall@{args.k}, {implementation} HNSW"
+    )
+    results = sweep(
+        vectors, queries, args.k, args.m, args.ef_construction, args.ef_search
+    )
+    print(format_results(results))
+    best = recommend(results, args.target_recall)
+    if best.recall < args.target_recall:
+        print(f"No combination reaches a recall of {args.target_recall}")
+    print(json.dumps({"hnswParameters": best.hnsw_parameters()}, indent=4))
+    if args.save_profile:
+        save_profile(args.save_profile, best.hnsw_parameters())
+        print(f"Saved to the vector profile '{args.save_profile}'")
+
+
+if __name__ == "__main__":
+    main()
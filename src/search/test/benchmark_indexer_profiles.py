@@ -0,0 +1,113 @@
+# Copyright (c) Microsoft Corporation.
+# Licensed under the MIT license.
+
+"""
+Benchmark of the indexer tuning profiles of index_config/indexerProfiles.json.
+
+Every profile provisions an index set on the local search service stand-in and the indexer run is
+awaited, so the throughput includes provisioning and polling. The stand-in processes one batch at a
+time with a fixed cost per batch and a cost per document, which makes the effect of the batch size
+visible; the absolute numbers do not predict the throughput of a real service. Without a batch
+overhead, the stand-in processes one batch per status poll instead, so the number of polls of a run
+counts its batches independently of the wall clock.
+
+    python benchmark_indexer_profiles.py --documents 2000 --batch_overhead 0.02
+"""
+
+import argparse
+import logging
+import os
+import sys
+import time
+from typing import Optional
+
+from azure.core.credentials import AzureKeyCredential
+
+# Make the search scripts importable when run as a script
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import index_utils  # noqa: E402
+from indexer_run import IndexerRunMetrics, run_indexer  # noqa: E402
+from search_stub import SearchServiceStub  # noqa: E402
+
+
+def benchmark_profile(
+    profile: str,
+    documents: int = 2000,
+    batch_overhead: Optional[float] = 0.02,
+    document_time: float = 0.0005,
+) -> IndexerRunMetrics:
+    """
+    Provision an index set with an indexer profile and wait for its indexer run.
+
+    Args:
+        profile: Name of the indexer profile
+        documents: Number of documents in the simulated data source
+        batch_overhead: Simulated seconds spent per batch; None processes one batch per poll
+        document_time: Simulated seconds spent per document
+
+    Returns:
+        The metrics of the run, with the elapsed time measured from the start of the provisioning
+    """
+    credential = AzureKeyCredential("key")
+    with SearchServiceStub() as stub:
+        stub.indexer_documents = documents
+        stub.batch_overhead = batch_overhead
+        if batch_overhead is None:
+            stub.documents_per_poll = None
+        stub.document_time = document_time
+        with index_utils.SearchClients(
+            stub.endpoint, credential, session=stub.session()
+        ) as clients:
+            started = time.monotonic()
+            index_utils.provision_index_set(
+                stub.endpoint,
+                "bench",
+                "https://openai.example.com",
+                "sub",
+                "rg",
+                "storage",
+                "data",
+                credential,
+                clients,
+                profile,
+            )
+            metrics = run_indexer(
+                clients.indexer_client,
+                "bench-indexer",
+                min_interval=0.01,
+                max_interval=0.05,
+            )
+            metrics.indexer_name = profile
+            metrics.elapsed = time.monotonic() - started
+            return metrics
+
+
+def main():
+    """Benchmark every indexer profile and print the throughput of each one."""
+    parser = argparse.ArgumentParser(description="Indexer profile benchmark")
+    parser.add_argument("--documents", type=int, default=2000)
+    parser.add_argument("--batch_overhead", type=float, default=0.02)
+    parser.add_argument("--document_time", type=float, default=0.0005)
+    parser.add_argument(
+        "--json", action="store_true", help="print the metrics as JSON lines"
+    )
+    args = parser.parse_args()
+    # Only print the results
+    logging.getLogger("index_utils").setLevel(logging.WARNING)
+
+    print(f"{'profile':<12} {'seconds':>8} {'docs/s':>9}")
+    for profile in index_utils.load_indexer_profiles():
+        metrics = benchmark_profile(
+            profile, args.documents, args.batch_overhead, args.document_time
+        )
+        if args.json:
+            print(metrics.to_json())
+        else:
+            print(
+                f"{profile:<12} {metrics.elapsed:8.2f} {metrics.docs_per_second:9.1f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
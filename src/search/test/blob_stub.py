@@ -0,0 +1,239 @@
+# Copyright (c) Microsoft Corporation.
+# Licensed under the MIT license.
+
+"""
+In-memory stand-in for the parts of the Azure Blob Storage SDK used by the data scripts.
+"""
+
+import hashlib
+import threading
+from types import SimpleNamespace
+
+STUB_ACCOUNT_URL = "https://stub.blob.core.windows.net"
+# Containers by name, so server-side copies can resolve their source URL
+_CONTAINERS = {}
+
+
+class InMemoryDownloader:
+    """Minimal replacement of azure.storage.blob.StorageStreamDownloader."""
+
+    def __init__(self, payload: bytes, chunk_size: int):
+        self.payload = payload
+        self.size = len(payload)
+        self.chunk_size = chunk_size
+
+    def chunks(self):
+        for start in range(0, len(self.payload), self.chunk_size):
+            yield self.payload[start : start + self.chunk_size]
+
+    def readall(self):
+        return self.payload
+
+    def readinto(self, stream):
+        for chunk in self.chunks():
+            stream.write(chunk)
+        return len(self.payload)
+
+
+class InMemoryBlobClient:
+    """Minimal replacement of azure.storage.blob.BlobClient bound to a container stub."""
+
+    def __init__(self, container, blob_name: str):
+        self.container = container
+        self.blob_name = blob_name
+        self.url = f"{STUB_ACCOUNT_URL}/{container.container_name}/{blob_name}"
+
+    def start_copy_from_url(self, source_url, **kwargs):
+        container_name, blob_name = (
+            source_url[len(STUB_ACCOUNT_URL) + 1 :].split("?")[0].split("/", 1)
+        )
+        source = _CONTAINERS[container_name]
+        container = self.container
+        with container._lock:
+            container.copy_calls.append((source_url, kwargs))
+            copy = SimpleNamespace(
+                id=f"copy-{len(container.copy_calls)}",
+                status="pending",
+                status_description=None,
+                polls_left=container.copy_polls_of.get(
+                    self.blob_name, container.copy_polls
+                ),
+                payload=source.blobs[blob_name],
+                with_md5=source.content_md5[blob_name] is not None,
+                fails=blob_name in container.fail_copy_of,
+            )
+            container.copies[self.blob_name] = copy
+        self._advance_copy(copy)
+        return {"copy_id": copy.id, "copy_status": copy.status}
+
+    def _advance_copy(self, copy):
+        """Complete a pending copy once it has been polled often enough."""
+        if copy.status != "pending":
+            return
+        if copy.polls_left > 0:
+            copy.polls_left -= 1
+            return
+        if copy.fails:
+            copy.status, copy.status_description = "failed", "Simulated copy failure"
+        else:
+            self.container.put(self.blob_name, copy.payload, with_md5=copy.with_md5)
+            copy.status = "success"
+
+    def get_blob_properties(self, **kwargs):
+        copy = self.container.copies.get(self.blob_name)
+        if copy is not None:
+            self._advance_copy(copy)
+        return SimpleNamespace(
+            size=len(self.container.blobs.get(self.blob_name, b"")), copy=copy
+        )
+
+    def abort_copy(self, copy_id, **kwargs):
+        copy = self.container.copies[self.blob_name]
+        assert copy.id == copy_id
+        if copy.status == "pending":
+            copy.status, copy.status_description = "aborted", "Aborted by client"
+
+    def set_blob_metadata(self, metadata=None, **kwargs):
+        with self.container._lock:
+            if self.blob_name not in self.container.blobs:
+                raise KeyError(f"Blob {self.blob_name} does not exist")
+            self.container.metadata[self.blob_name] = dict(metadata or {})
+            self.container._touch(self.blob_name)
+            self.container.metadata_calls += 1
+
+    def stage_block(self, block_id, data, length=None, **kwargs):
+        container = self.container
+        with container._lock:
+            if container.fail_stage_block.get(block_id, 0) > 0:
+                container.fail_stage_block[block_id] -= 1
+                raise ConnectionError(f"Simulated failure staging {block_id}")
+            container.staged_blocks.setdefault(self.blob_name, {})[block_id] = data
+            container.stage_calls += 1
+
+    def commit_block_list(self, block_list, content_settings=None, **kwargs):
+        container = self.container
+        with container._lock:
+            staged = container.staged_blocks.pop(self.blob_name)
+            container.blobs[self.blob_name] = b"".join(
+                staged[block_id] for block_id in block_list
+            )
+            container._touch(self.blob_name)
+            container.content_md5[self.blob_name] = (
+                content_settings.content_md5 if content_settings else None
+            )
+            container.metadata[self.blob_name] = dict(kwargs.get("metadata") or {})
+
+    def download_blob(self, offset=None, length=None, **kwargs):
+        payload = self.container.blobs[self.blob_name]
+        self.container.download_calls += 1
+        if self.container.download_calls == self.container.fail_on_download_call:
+            raise ConnectionError("Simulated network drop")
+        if "etag" in kwargs and kwargs["etag"] != self.container.etags[self.blob_name]:
+            raise ValueError(
+                "The condition specified using HTTP conditional header(s) is not met."
+            )
+        start = offset or 0
+        end = start + length if length is not None else len(payload)
+        return InMemoryDownloader(payload[start:end], self.container.chunk_size)
+
+
+class InMemoryContainerClient:
+    """Minimal thread-safe replacement of azure.storage.blob.ContainerClient."""
+
+    def __init__(self, container_name: str = "data", fail_on=None):
+        """
+        Initialize an empty container.
+
+        Args:
+            container_name: Name reported by the container
+            fail_on: Blob names whose upload raises an error
+        """
+        self.container_name = container_name
+        _CONTAINERS[container_name] = self
+        self.copy_calls = []
+        # Blob name -> block id -> data of the blocks staged but not committed yet
+        self.staged_blocks = {}
+        self.stage_calls = 0
+        # Block id -> number of times staging it fails before succeeding
+        self.fail_stage_block = {}
+        # Destination blob name -> state of its last copy
+        self.copies = {}
+        # Number of status polls a copy stays pending before completing
+        self.copy_polls = 0
+        # Destination blob name -> number of status polls overriding copy_polls for that blob
+        self.copy_polls_of = {}
+        # Source blob names whose copy ends with the "failed" status
+        self.fail_copy_of = set()
+        self.blobs = {}
+        self.content_md5 = {}
+        # User-defined metadata of each blob, replaced by every upload
+        self.metadata = {}
+        self.metadata_calls = 0
+        self.fail_on = set(fail_on or [])
+        self.upload_calls = 0
+        self.download_calls = 0
+        self.fail_on_download_call = None
+        self.chunk_size = 4
+        self.etags = {}
+        self._lock = threading.Lock()
+
+    def exists(self):
+        return True
+
+    def create_container(self):
+        pass
+
+    def upload_blob(self, name, data, overwrite=False, **kwargs):
+        if name in self.fail_on:
+            raise IOError(f"Simulated failure for {name}")
+        payload = data if isinstance(data, bytes) else data.read()
+        with self._lock:
+            if name in self.blobs and not overwrite:
+                raise ValueError(f"Blob {name} already exists")
+            self.blobs[name] = payload
+            self._touch(name)
+            content_settings = kwargs.get("content_settings")
+            self.content_md5[name] = (
+                content_settings.content_md5 if content_settings else None
+            )
+            self.metadata[name] = dict(kwargs.get("metadata") or {})
+            self.upload_calls += 1
+
+    def put(self, name, payload, with_md5=True):
+        """Seed a blob directly, as if another tool had uploaded it."""
+        with self._lock:
+            self.blobs[name] = payload
+            self._touch(name)
+            self.content_md5[name] = (
+                bytearray(hashlib.md5(payload).digest()) if with_md5 else None
+            )
+            self.metadata[name] = {}
+
+    def _touch(self, name):
+        self.etags[name] = f'"0x{len(self.etags) + 1:X}"'
+
+    def get_blob_client(self, blob):
+        return InMemoryBlobClient(self, blob)
+
+    def list_blobs(self, name_starts_with=None, include=None, **kwargs):
+        with self._lock:
+            names = sorted(self.blobs)
+        with_metadata = "metadata" in (include or [])
+        return [
+            SimpleNamespace(
+                name=name,
+                size=len(self.blobs[name]),
+                etag=self.etags[name],
+                content_settings=SimpleNamespace(content_md5=self.content_md5[name]),
+                metadata=dict(self.metadata.get(name, {})) if with_metadata else None,
+            )
+            for name in names
+            if not name_starts_with or name.startswith(name_starts_with)
+        ]
+
+    def delete_blob(self, blob, **kwargs):
+        with self._lock:
+            del self.blobs[blob]
+            del self.content_md5[blob]
+            del self.etags[blob]
+            self.metadata.pop(blob, None)
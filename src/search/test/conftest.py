@@ -6,9 +6,16 @@ Pytest configuration and fixtures for Azure AI Search E2E tests.
 """
 
 import os
+import subprocess
+import sys
+
 import pytest
 from azure.identity import DefaultAzureCredential, ManagedIdentityCredential
-from test_e2e_search_resources import SearchResourceTester
+
+# Make the search scripts importable from the unit tests
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from test_e2e_search_resources import SearchResourceTester  # noqa: E402
 
 try:
     from dotenv import load_dotenv
@@ -48,6 +55,33 @@ def pytest_addoption(parser):
     )
 
 
+def _git(*args, cwd=None):
+    subprocess.run(["git", *args], cwd=cwd, check=True, capture_output=True)
+
+
+@pytest.fixture
+def bare_repo(tmp_path):
+    """Local bare repository with a small data folder and a large unrelated folder."""
+    work = tmp_path / "work"
+    (work / "data" / "manuals").mkdir(parents=True)
+    (work / "data" / "manuals" / "guide.md").write_text("# Guide")
+    (work / "data" / "Intro.MD").write_text("# Intro")
+    (work / "data" / "image.png").write_bytes(b"png")
+    (work / "assets").mkdir()
+    for index in range(5):
+        (work / "assets" / f"blob{index}.bin").write_bytes(os.urandom(64 * 1024))
+    _git("init", "-q", "-b", "main", cwd=work)
+    _git("add", ".", cwd=work)
+    _git("config", "user.name", "test", cwd=work)
+    _git("config", "user.email", "test@example.com", cwd=work)
+    _git("commit", "-q", "-m", "data", cwd=work)
+    bare = tmp_path / "repo.git"
+    _git("clone", "-q", "--bare", str(work), str(bare))
+    # Partial clone requires the server to accept object filters
+    _git("config", "uploadpack.allowFilter", "true", cwd=bare)
+    return f"file://{bare}"
+
+
 @pytest.fixture(scope="session")
 def azure_credential(request):
     """
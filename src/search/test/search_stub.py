@@ -0,0 +1,298 @@
+# Copyright (c) Microsoft Corporation.
+# Licensed under the MIT license.
+
+"""
+Local HTTP stand-in for the parts of the Azure AI Search REST API used by the provisioning scripts.
+
+Resources are kept in memory and echoed back as sent. Indexer runs are simulated: a run starts when
+an indexer is created or run, and every status request advances it by documents_per_poll documents,
+or by one batch of the indexer batchSize when documents_per_poll is None, until indexer_documents
+are processed. When batch_overhead is set, runs progress with the wall clock instead, one batch at a
+time, to compare indexer settings. Documents pushed to an index are kept in documents;
+unavailable_responses and document_failures inject request and per-document failures. The SDK
+clients only accept https endpoints, so they are pointed at STUB_ENDPOINT and the session returned
+by SearchServiceStub.session() forwards those requests to the local plain HTTP server.
+"""
+
+import json
+import re
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import unquote, urlparse
+
+import requests
+
+STUB_ENDPOINT = "https://stub.search.windows.net"
+
+RESOURCE_PATH = re.compile(
+    r"^/(?P<kind>indexes|datasources|skillsets|indexers)"
+    r"(?:\('(?P<name>[^']*)'\))?(?:/search\.(?P<action>\w+))?$"
+)
+DOCUMENTS_PATH = re.compile(r"^/indexes\('(?P<index>[^']*)'\)/docs/search\.index$")
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, *args):
+        pass
+
+    def _send(self, status, body=None):
+        payload = json.dumps(body).encode() if body is not None else b""
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; odata.metadata=minimal")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def _route(self):
+        self.server.requests.append((self.command, self.path))
+        match = RESOURCE_PATH.match(unquote(urlparse(self.path).path))
+        if not match:
+            self._send(404, {"error": {"code": "NotFound", "message": self.path}})
+            return None
+        return match
+
+    def do_GET(self):
+        match = self._route()
+        if match is None:
+            return
+        resources = self.server.resources[match["kind"]]
+        if match["action"] == "status":
+            self._send(200, self.server.indexer_status(match["name"]))
+        elif match["name"] is None:
+            self._send(200, {"value": list(resources.values())})
+        elif match["name"] in resources:
+            self._send(200, resources[match["name"]])
+        else:
+            self._send(
+                404,
+                {"error": {"code": "ResourceNotFound", "message": match["name"]}},
+            )
+
+    def do_PUT(self):
+        match = self._route()
+        if match is None:
+            return
+        body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        resources = self.server.resources[match["kind"]]
+        status = 200 if match["name"] in resources else 201
+        resources[match["name"]] = body
+        if match["kind"] == "indexers" and status == 201:
+            # The service runs a new indexer right away
+            self.server.start_run(match["name"])
+        self._send(status, body)
+
+    def _index_documents(self, index_name):
+        length = int(self.headers.get("Content-Length") or 0)
+        actions = json.loads(self.rfile.read(length))["value"]
+        with self.server._documents_lock:
+            self.server.requests.append((self.command, self.path))
+            self.server.index_requests.append(len(actions))
+            if self.server.unavailable_responses > 0:
+                self.server.unavailable_responses -= 1
+                unavailable = True
+            else:
+                unavailable = False
+                documents = self.server.documents.setdefault(index_name, {})
+                results = []
+                for action in actions:
+                    key = action["chunk_id"]
+                    failures = self.server.document_failures.get(key)
+                    status = failures.pop(0) if failures else 200
+                    if status == 200:
+                        action = dict(action)
+                        del action["@search.action"]
+                        documents[key] = action
+                    results.append(
+                        {
+                            "key": key,
+                            "status": status == 200,
+                            "errorMessage": None if status == 200 else "Throttled",
+                            "statusCode": status,
+                        }
+                    )
+        if unavailable:
+            self._send(
+                503, {"error": {"code": "ServiceUnavailable", "message": "Busy"}}
+            )
+        else:
+            succeeded = all(result["status"] for result in results)
+            self._send(200 if succeeded else 207, {"value": results})
+
+    def do_POST(self):
+        documents = DOCUMENTS_PATH.match(unquote(urlparse(self.path).path))
+        if documents:
+            self._index_documents(documents["index"])
+            return
+        match = self._route()
+        if match is None:
+            return
+        length = int(self.headers.get("Content-Length") or 0)
+        body = json.loads(self.rfile.read(length)) if length else None
+        if match["name"] is None:
+            # Creation of a resource named in the body
+            self.server.resources[match["kind"]][body["name"]] = body
+            self._send(201, body)
+            return
+        self.server.actions.append((match["kind"], match["name"], match["action"]))
+        if match["action"] != "run":
+            self._send(204)
+        elif self.server.start_run(match["name"]):
+            self._send(202)
+        else:
+            self._send(
+                409,
+                {"error": {"code": "Conflict", "message": "A run is in progress"}},
+            )
+
+    def do_DELETE(self):
+        match = self._route()
+        if match is None:
+            return
+        self.server.resources[match["kind"]].pop(match["name"], None)
+        self._send(204)
+
+
+class _ForwardingAdapter(requests.adapters.HTTPAdapter):
+    """Send the requests for STUB_ENDPOINT to the local server instead."""
+
+    def __init__(self, local_url, **kwargs):
+        super().__init__(**kwargs)
+        self.local_url = local_url
+
+    def send(self, request, **kwargs):
+        request.url = request.url.replace(STUB_ENDPOINT, self.local_url, 1)
+        return super().send(request, **kwargs)
+
+
+class SearchServiceStub(ThreadingHTTPServer):
+    """In-memory search service listening on a free local port."""
+
+    daemon_threads = True
+    endpoint = STUB_ENDPOINT
+
+    def __init__(self):
+        super().__init__(("127.0.0.1", 0), _Handler)
+        self.resources = {
+            "indexes": {},
+            "datasources": {},
+            "skillsets": {},
+            "indexers": {},
+        }
+        self.requests = []
+        self.actions = []
+        # Number of TCP connections accepted, to observe connection reuse
+        self.connections = 0
+        # Simulated indexer runs
+        self.indexer_documents = 0
+        # None advances runs by one batch of the indexer batchSize per status request
+        self.documents_per_poll = 10
+        self.failed_keys = []
+        # Time-based runs: seconds per batch, plus seconds per document of the batch
+        self.batch_overhead = None
+        self.document_time = 0.0
+        self.runs = {}
+        self._runs_lock = threading.Lock()
+        # Pushed documents by index name and key, and the size of every indexing request
+        self.documents = {}
+        self.index_requests = []
+        # Number of indexing requests to fail with 503, and status codes by document key
+        # returned to its next indexing attempts
+        self.unavailable_responses = 0
+        self.document_failures = {}
+        self._documents_lock = threading.Lock()
+        self._thread = threading.Thread(target=self.serve_forever, daemon=True)
+
+    def session(self, pool_size=16):
+        """Create a requests session whose search service requests reach this server."""
+        session = requests.Session()
+        session.mount(
+            STUB_ENDPOINT,
+            _ForwardingAdapter(
+                f"http://127.0.0.1:{self.server_port}",
+                pool_connections=1,
+                pool_maxsize=pool_size,
+            ),
+        )
+        return session
+
+    def start_run(self, name):
+        """Start a run of an indexer, unless one is in progress."""
+        with self._runs_lock:
+            run = self.runs.get(name)
+            if run and run["processed"] < self.indexer_documents:
+                return False
+            count = run["count"] + 1 if run else 1
+            start = datetime(2024, 1, 1, tzinfo=timezone.utc) + timedelta(minutes=count)
+            self.runs[name] = {
+                "count": count,
+                "startTime": start.isoformat().replace("+00:00", "Z"),
+                "processed": 0,
+                "started": time.monotonic(),
+            }
+            return True
+
+    def indexer_status(self, name):
+        """Build the status of an indexer and advance its current run."""
+        with self._runs_lock:
+            run = self.runs.get(name)
+            if run is None:
+                return {"name": name, "status": "running", "executionHistory": []}
+            parameters = (
+                self.resources["indexers"].get(name, {}).get("parameters") or {}
+            )
+            # The service processes blobs in batches of 10 by default
+            batch_size = parameters.get("batchSize") or 10
+            if self.batch_overhead is None:
+                processed = min(run["processed"], self.indexer_documents)
+                run["processed"] += (
+                    batch_size
+                    if self.documents_per_poll is None
+                    else self.documents_per_poll
+                )
+            else:
+                batch_time = self.batch_overhead + self.document_time * batch_size
+                batches = int((time.monotonic() - run["started"]) / batch_time)
+                processed = min(batches * batch_size, self.indexer_documents)
+                run["processed"] = processed
+            done = processed >= self.indexer_documents
+            if not done:
+                status = "inProgress"
+            else:
+                status = "transientFailure" if self.failed_keys else "success"
+            result = {
+                "status": status,
+                "startTime": run["startTime"],
+                "itemsProcessed": processed,
+                "itemsFailed": len(self.failed_keys) if done else 0,
+                "errors": [
+                    {
+                        "key": key,
+                        "errorMessage": "Could not parse document",
+                        "statusCode": 400,
+                    }
+                    for key in (self.failed_keys if done else [])
+                ],
+                "warnings": [],
+            }
+            return {
+                "name": name,
+                "status": "running",
+                "lastResult": result,
+                "executionHistory": [result],
+            }
+
+    def process_request(self, request, client_address):
+        self.connections += 1
+        super().process_request(request, client_address)
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.shutdown()
+        self.server_close()
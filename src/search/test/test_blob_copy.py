@@ -0,0 +1,137 @@
+# Copyright (c) Microsoft Corporation.
+# Licensed under the MIT license.
+
+"""
+Unit tests for the server-side blob copy in blob_copy.py.
+"""
+
+import hashlib
+
+import pytest
+
+import blob_copy
+from blob_copy import BlobCopier, CopyRequest
+from blob_stub import InMemoryContainerClient
+
+pytestmark = pytest.mark.unit
+
+
+def _request(source, name, destination_name=None):
+    payload = source.blobs[name]
+    return CopyRequest(
+        name, destination_name or name, len(payload), hashlib.md5(payload).digest()
+    )
+
+
+def _copier(source, destination, **kwargs):
+    kwargs.setdefault("poll_interval", 0)
+    return BlobCopier(
+        source,
+        destination,
+        lambda blob_name: f"{source.get_blob_client(blob_name).url}?sig=test",
+        **kwargs,
+    )
+
+
+class TestServerSideCopy:
+    """Tests for windowed copies with status polling."""
+
+    def test_pending_copies_are_polled_until_complete(self):
+        source = InMemoryContainerClient("copy-src-poll")
+        for index in range(5):
+            source.put(f"doc{index}.md", b"x" * (index + 1))
+        destination = InMemoryContainerClient("copy-dest-poll")
+        destination.copy_polls = 2
+
+        summary = _copier(source, destination, batch_size=2).copy_blobs(
+            _request(source, f"doc{index}.md") for index in range(5)
+        )
+
+        assert summary.uploaded == 5
+        assert summary.uploaded_bytes == 15
+        assert summary.failed == {}
+        assert destination.blobs == source.blobs
+        assert destination.upload_calls == 0
+        assert all(url.endswith("?sig=test") for url, _ in destination.copy_calls)
+
+    def test_unchanged_blobs_are_skipped(self):
+        source = InMemoryContainerClient("copy-src-skip")
+        source.put("docs/a.md", b"alpha")
+        source.put("docs/b.md", b"beta")
+        destination = InMemoryContainerClient("copy-dest-skip")
+        destination.put("a.md", b"alpha")
+        destination.put("b.md", b"stale")
+
+        summary = _copier(source, destination).copy_blobs(
+            [
+                _request(source, "docs/a.md", "a.md"),
+                _request(source, "docs/b.md", "b.md"),
+            ]
+        )
+
+        assert (summary.uploaded, summary.skipped) == (1, 1)
+        assert summary.skipped_bytes == 5
+        assert destination.blobs["b.md"] == b"beta"
+        assert len(destination.copy_calls) == 1
+
+    def test_failed_and_timed_out_copies_are_reported(self):
+        source = InMemoryContainerClient("copy-src-fail")
+        source.put("good.md", b"good")
+        source.put("bad.md", b"bad")
+        destination = InMemoryContainerClient("copy-dest-fail")
+        destination.fail_copy_of = {"bad.md"}
+
+        summary = _copier(source, destination).copy_blobs(
+            [_request(source, "good.md"), _request(source, "bad.md")]
+        )
+
+        assert summary.uploaded == 1
+        assert summary.failed == {"bad.md": "failed: Simulated copy failure"}
+
+        slow = InMemoryContainerClient("copy-dest-slow")
+        slow.copy_polls = 1000
+        summary = _copier(source, slow, copy_timeout=0).copy_blobs(
+            [_request(source, "good.md")]
+        )
+
+        assert summary.failed == {"good.md": "aborted: copy timed out"}
+        assert slow.copies["good.md"].status == "aborted"
+
+    def test_a_slow_copy_does_not_hold_back_the_others(self, monkeypatch):
+        source = InMemoryContainerClient("copy-src-window")
+        for index in range(5):
+            source.put(f"doc{index}.md", b"x")
+        destination = InMemoryContainerClient("copy-dest-window")
+        destination.copy_polls = 1
+        destination.copy_polls_of = {"doc0.md": 20}
+        rounds = []
+        monkeypatch.setattr(blob_copy.time, "sleep", rounds.append)
+
+        summary = _copier(source, destination, batch_size=2).copy_blobs(
+            _request(source, f"doc{index}.md") for index in range(5)
+        )
+
+        assert summary.uploaded == 5
+        # The fast copies take turns in the second slot while the slow one is pending;
+        # batches of two would wait for the slow copy, then poll two more batches
+        assert len(rounds) == 20
+
+    def test_sources_mapping_to_the_same_destination_are_reported(self):
+        source = InMemoryContainerClient("copy-src-collide")
+        source.put("a/readme.md", b"first")
+        source.put("b/readme.md", b"second")
+        destination = InMemoryContainerClient("copy-dest-collide")
+
+        summary = _copier(source, destination).copy_blobs(
+            [
+                _request(source, "a/readme.md", "readme.md"),
+                _request(source, "b/readme.md", "readme.md"),
+            ]
+        )
+
+        assert summary.uploaded == 1
+        assert summary.failed == {
+            "readme.md": "b/readme.md and a/readme.md both map to destination blob readme.md"
+        }
+        assert destination.blobs["readme.md"] == b"first"
+        assert len(destination.copy_calls) == 1
@@ -0,0 +1,131 @@
+# Copyright (c) Microsoft Corporation.
+# Licensed under the MIT license.
+
+"""
+Unit tests for the chunking preview in chunk_preview.py.
+"""
+
+import pytest
+
+from chunk_preview import (
+    PREVIEW_FILES_PER_WORKER,
+    SplitSettings,
+    load_split_settings,
+    preview_corpus,
+    split_text,
+)
+from data_manifest import MANIFEST_FILE_NAME
+
+pytestmark = pytest.mark.unit
+
+SENTENCE = "The indexer splits every document into pages. "
+
+
+class TestSplitText:
+    """Tests for the local SplitSkill approximation."""
+
+    def test_skillset_settings_fall_back_to_the_service_defaults(self):
+        settings = load_split_settings()
+
+        assert settings == SplitSettings("pages", 5000, 0, 0)
+
+    def test_pages_end_at_sentence_boundaries(self):
+        text = SENTENCE * 10
+
+        chunks = split_text(text, SplitSettings(maximum_page_length=100))
+
+        # Two sentences of 46 characters fit in a page of 100
+        assert len(chunks) == 5
+        assert all(chunk == (SENTENCE * 2).strip() for chunk in chunks)
+
+    def test_long_sentences_are_cut_at_words_then_hard(self):
+        words = "word " * 50
+        letters = "x" * 250
+
+        word_chunks = split_text(words, SplitSettings(maximum_page_length=32))
+        letter_chunks = split_text(letters, SplitSettings(maximum_page_length=100))
+
+        assert all(len(chunk) <= 32 for chunk in word_chunks)
+        assert all(chunk.endswith("word") for chunk in word_chunks)
+        assert [len(chunk) for chunk in letter_chunks] == [100, 100, 50]
+
+    def test_overlap_repeats_the_end_of_the_previous_page(self):
+        text = "x" * 250
+
+        chunks = split_text(
+            text, SplitSettings(maximum_page_length=100, page_overlap_length=20)
+        )
+
+        assert [len(chunk) for chunk in chunks] == [100, 100, 90]
+        assert "".join(chunk[:80] for chunk in chunks[:-1]) + chunks[-1] == text
+
+    def test_sentences_mode_returns_one_chunk_per_sentence(self):
+        chunks = split_text(
+            "First one. Second one!\nThird", SplitSettings(text_split_mode="sentences")
+        )
+
+        assert chunks == ["First one.", "Second one!", "Third"]
+
+
+class TestPreviewCorpus:
+    """Tests for the corpus statistics."""
+
+    def test_statistics_cover_truncation_and_skipped_files(self, tmp_path):
+        (tmp_path / "short.md").write_text(SENTENCE)
+        (tmp_path / "nested").mkdir()
+        (tmp_path / "nested" / "long.txt").write_text(SENTENCE * 40)
+        (tmp_path / "page.html").write_text(
+            "<html><script>ignored()</script><p>Fish &amp; chips.</p></html>"
+        )
+        (tmp_path / "image.png").write_bytes(b"\x89PNG")
+
+        preview = preview_corpus(
+            str(tmp_path),
+            settings=SplitSettings(maximum_page_length=100, maximum_pages_to_take=5),
+            workers=2,
+        )
+
+        assert preview.files == 3
+        assert [path.endswith("image.png") for path in preview.skipped_files] == [True]
+        # 40 sentences make 20 pages, of which 5 are kept
+        assert sorted(preview.chunks_per_file) == [1, 1, 5]
+        assert preview.dropped_chunks == 15 and preview.truncated_files == 1
+        report = preview.describe()
+        assert "Chunks: 7 (per file: min 1, median 1, p95 5, max 5" in report
+        assert "Dropped by maximumPagesToTake: 15 chunks in 1 files" in report
+        assert "Embedding calls: 7" in report
+        assert "Index size with vector profile 'default'" in report
+
+    def test_trees_larger_than_the_submission_window_are_fully_previewed(
+        self, tmp_path
+    ):
+        for number in range(3 * PREVIEW_FILES_PER_WORKER):
+            (tmp_path / f"doc{number}.md").write_text(SENTENCE * (number + 1))
+
+        preview = preview_corpus(
+            str(tmp_path), settings=SplitSettings(maximum_page_length=100), workers=1
+        )
+
+        assert preview.files == 3 * PREVIEW_FILES_PER_WORKER
+        assert sorted(preview.chunks_per_file) == [
+            (number + 2) // 2 for number in range(3 * PREVIEW_FILES_PER_WORKER)
+        ]
+
+    def test_file_patterns_select_the_previewed_files(self, tmp_path):
+        (tmp_path / "a.md").write_text(SENTENCE)
+        (tmp_path / "b.txt").write_text(SENTENCE)
+
+        preview = preview_corpus(str(tmp_path), ["*.md"], workers=1)
+
+        assert preview.files == 1 and preview.skipped_files == []
+
+    def test_files_upload_data_skips_are_not_previewed(self, tmp_path):
+        (tmp_path / "a.md").write_text(SENTENCE)
+        (tmp_path / ".git").mkdir()
+        (tmp_path / ".git" / "README.md").write_text(SENTENCE)
+        (tmp_path / "b.md.partial").write_text(SENTENCE)
+        (tmp_path / MANIFEST_FILE_NAME).write_text("{}")
+
+        preview = preview_corpus(str(tmp_path), workers=1)
+
+        assert preview.files == 1 and preview.skipped_files == []
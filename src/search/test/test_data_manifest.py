@@ -0,0 +1,96 @@
+# Copyright (c) Microsoft Corporation.
+# Licensed under the MIT license.
+
+"""
+Unit tests for the persistent digest manifest in data_manifest.py.
+"""
+
+import hashlib
+
+import pytest
+
+import data_manifest
+from data_manifest import MANIFEST_FILE_NAME, DigestManifest
+
+pytestmark = pytest.mark.unit
+
+
+@pytest.fixture
+def hash_calls(monkeypatch):
+    """Count the files that are actually read and hashed."""
+    calls = []
+    original = data_manifest.compute_md5
+
+    def counting_md5(file):
+        calls.append(file)
+        return original(file)
+
+    monkeypatch.setattr(data_manifest, "compute_md5", counting_md5)
+    return calls
+
+
+class TestDigestManifest:
+    """Tests for digest caching across runs."""
+
+    def test_unchanged_file_is_not_rehashed_across_runs(self, tmp_path, hash_calls):
+        file = tmp_path / "doc.md"
+        file.write_bytes(b"content")
+
+        with DigestManifest(str(tmp_path)) as manifest:
+            first = manifest.get_md5(file)
+        with DigestManifest(str(tmp_path)) as manifest:
+            second = manifest.get_md5(file)
+
+        assert first == second == hashlib.md5(b"content").digest()
+        assert len(hash_calls) == 1
+
+    def test_modified_file_is_rehashed(self, tmp_path, hash_calls):
+        file = tmp_path / "doc.md"
+        file.write_bytes(b"v1")
+        with DigestManifest(str(tmp_path)) as manifest:
+            manifest.get_md5(file)
+
+        file.write_bytes(b"version 2")
+        with DigestManifest(str(tmp_path)) as manifest:
+            assert manifest.get_md5(file) == hashlib.md5(b"version 2").digest()
+        assert len(hash_calls) == 2
+
+    def test_recorded_digest_is_reused(self, tmp_path, hash_calls):
+        file = tmp_path / "sub" / "doc.md"
+        file.parent.mkdir()
+        file.write_bytes(b"fetched")
+        with DigestManifest(str(tmp_path)) as manifest:
+            manifest.record_md5(file, hashlib.md5(b"fetched").digest(), "etag-1")
+
+        with DigestManifest(str(tmp_path)) as manifest:
+            assert manifest.get_md5(file) == hashlib.md5(b"fetched").digest()
+            assert manifest.get("sub/doc.md")["source_id"] == "etag-1"
+        assert hash_calls == []
+
+    def test_interrupted_run_keeps_flushed_entries(self, tmp_path, hash_calls):
+        file = tmp_path / "doc.md"
+        file.write_bytes(b"content")
+        manifest = DigestManifest(str(tmp_path))
+        manifest.get_md5(file)
+        # Simulate a crash in the middle of the next append
+        with open(tmp_path / MANIFEST_FILE_NAME, "a") as journal:
+            journal.write('{"path": "other.md", "si')
+
+        with DigestManifest(str(tmp_path)) as reloaded:
+            reloaded.get_md5(file)
+        assert len(hash_calls) == 1
+
+    def test_compaction_drops_deleted_files(self, tmp_path):
+        kept, removed = tmp_path / "kept.md", tmp_path / "removed.md"
+        kept.write_bytes(b"kept")
+        removed.write_bytes(b"removed")
+        with DigestManifest(str(tmp_path)) as manifest:
+            manifest.get_md5(kept)
+            manifest.get_md5(removed)
+
+        removed.unlink()
+        with DigestManifest(str(tmp_path)):
+            pass
+
+        lines = (tmp_path / MANIFEST_FILE_NAME).read_text().splitlines()
+        assert len(lines) == 1 and '"kept.md"' in lines[0]
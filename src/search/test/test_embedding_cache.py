@@ -0,0 +1,146 @@
+# Copyright (c) Microsoft Corporation.
+# Licensed under the MIT license.
+
+"""
+Unit tests for the embedding cache in embedding_cache.py.
+"""
+
+import pytest
+from azure.core.credentials import AzureKeyCredential
+
+from chunk_preview import SplitSettings, preview_corpus
+from embedding_cache import EmbeddingCache, content_hash
+from index_utils import SearchClients
+from push_index import DocumentUploader, FakeEmbedder, push_files
+from search_stub import SearchServiceStub
+
+pytestmark = pytest.mark.unit
+
+SENTENCE = "The indexer splits every document into pages. "
+SETTINGS = SplitSettings(maximum_page_length=100)
+# Ten distinct sentences of about 30 characters, three to a page
+GUIDE = "".join(f"Sentence number {number} of the guide. " for number in range(10))
+
+
+def keys(*texts):
+    return [content_hash(text) for text in texts]
+
+
+class TestEmbeddingCache:
+    """Tests for storing, finding and evicting vectors."""
+
+    @pytest.mark.parametrize("precision", ["float16", "float32"])
+    def test_vectors_survive_a_reopen_at_the_stored_precision(
+        self, tmp_path, precision
+    ):
+        path = str(tmp_path / "cache.sqlite")
+        vector = [0.1, -0.25, 0.5, 1 / 3]
+
+        with EmbeddingCache(path, "model", 4, precision) as cache:
+            cache.put_many({content_hash("a"): vector})
+        with EmbeddingCache(path, "model", 4) as cache:
+            found = cache.get_many(keys("a", "b"))
+
+        tolerance = 1e-3 if precision == "float16" else 1e-7
+        assert found[content_hash("a")] == pytest.approx(vector, abs=tolerance)
+        assert len(found) == 1 and len(cache) == 1
+        assert cache.stats.hit_rate == 0.5
+
+    def test_vectors_are_separated_by_model_and_dimensions(self, tmp_path):
+        path = str(tmp_path / "cache.sqlite")
+        with EmbeddingCache(path, "large", 2) as cache:
+            cache.put_many({content_hash("a"): [1.0, 0.0]})
+            with pytest.raises(ValueError, match="3 dimensions in a cache of 2"):
+                cache.put_many({content_hash("b"): [1.0, 0.0, 0.0]})
+
+        with EmbeddingCache(path, "small", 2) as other_model:
+            assert other_model.get_many(keys("a")) == {}
+        with EmbeddingCache(path, "large", 3) as other_dimensions:
+            assert other_dimensions.count_cached(keys("a")) == 0
+        with pytest.raises(ValueError, match="Unsupported precision"):
+            EmbeddingCache(path, "large", 2, "int8")
+
+    def test_least_recently_used_vectors_are_evicted(self):
+        with EmbeddingCache(":memory:", "model", 1, max_entries=2) as cache:
+            cache.put_many({content_hash("a"): [1.0], content_hash("b"): [2.0]})
+            # Reading "a" makes "b" the least recently used
+            cache.get_many(keys("a"))
+            cache.put_many({content_hash("c"): [3.0]})
+
+            assert set(cache.get_many(keys("a", "b", "c"))) == set(keys("a", "c"))
+            assert len(cache) == 2 and cache.stats.evictions == 1
+
+    def test_eviction_spans_every_model(self, tmp_path):
+        path = str(tmp_path / "cache.sqlite")
+        with EmbeddingCache(path, "large", 2) as cache:
+            cache.put_many({content_hash("a"): [1.0, 0.0]})
+        with EmbeddingCache(path, "small", 1) as cache:
+            cache.put_many({content_hash("b"): [1.0]})
+
+        with EmbeddingCache(path, "small", 1, max_entries=1) as cache:
+            cache.put_many({})
+        with EmbeddingCache(path, "large", 2) as cache:
+            # The oldest vector was evicted although it belongs to another model
+            assert cache.count_cached(keys("a")) == 0 and len(cache) == 1
+
+
+class TestCachedPipelines:
+    """Tests for the cache in the push and preview pipelines."""
+
+    def test_unchanged_chunks_are_not_embedded_again(self, tmp_path):
+        data = tmp_path / "data"
+        data.mkdir()
+        (data / "guide.md").write_text(GUIDE)
+        path = str(tmp_path / "cache.sqlite")
+
+        def push(stub):
+            embedder = FakeEmbedder(8)
+            with SearchClients(
+                stub.endpoint, AzureKeyCredential("key"), session=stub.session()
+            ) as clients, EmbeddingCache(path, "fake", 8) as cache:
+                uploader = DocumentUploader(clients.search_client("docs-index"))
+                summary = push_files(
+                    str(data),
+                    uploader,
+                    embedder,
+                    settings=SETTINGS,
+                    embedding_batch_size=2,
+                    embedding_cache=cache,
+                )
+            return summary, embedder
+
+        with SearchServiceStub() as stub:
+            first, _ = push(stub)
+            vectors = {
+                key: document["text_vector"]
+                for key, document in stub.documents["docs-index"].items()
+            }
+            (data / "guide.md").write_text(GUIDE + "A new closing sentence.")
+            second, embedder = push(stub)
+
+        assert first.chunks == 4 and first.cached_chunks == 0
+        assert first.embedding_calls == 2
+        # Only the changed last page is embedded again
+        assert second.chunks == 4 and second.cached_chunks == 3
+        assert second.embedding_calls == embedder.calls == 1
+        assert second.upload.uploaded == 4
+        for key in sorted(vectors)[:3]:
+            assert stub.documents["docs-index"][key]["text_vector"] == pytest.approx(
+                vectors[key], abs=1e-7
+            )
+
+    def test_preview_counts_the_cached_chunks(self, tmp_path):
+        (tmp_path / "guide.md").write_text(SENTENCE * 10)
+        cache = EmbeddingCache(":memory:", "model", 1)
+        cache.put_many({content_hash((SENTENCE * 2).strip()): [1.0]})
+
+        preview = preview_corpus(
+            str(tmp_path), settings=SETTINGS, workers=1, embedding_cache=cache
+        )
+
+        # The five pages are identical
+        assert preview.cached_chunks == 5
+        assert "Embedding cache: 5 chunks cached (100.0%), 0 left to embed" in (
+            preview.describe()
+        )
+        assert preview_corpus(str(tmp_path), workers=1).cached_chunks is None
@@ -0,0 +1,222 @@
+# Copyright (c) Microsoft Corporation.
+# Licensed under the MIT license.
+
+"""
+Unit tests for the blob download engine in fetch_data.py.
+"""
+
+import hashlib
+import os
+
+import pytest
+
+from blob_stub import InMemoryContainerClient
+from data_manifest import DigestManifest
+from fetch_data import CLONE_MODES, DataFetcher
+
+pytestmark = pytest.mark.unit
+
+
+@pytest.fixture
+def fetcher():
+    return DataFetcher(credential=object(), file_patterns=["*.md"], max_workers=4)
+
+
+class TestBlobDownload:
+    """Tests for the parallel, streaming blob download."""
+
+    def test_downloads_matching_blobs_under_prefix(self, tmp_path, fetcher):
+        container = InMemoryContainerClient()
+        container.put("docs/a.md", b"alpha" * 10)
+        container.put("docs/sub/b.md", b"beta", with_md5=False)
+        container.put("docs/c.pdf", b"pdf")
+        container.put("other/d.md", b"other")
+
+        count = fetcher.download_blobs(container, "docs/", str(tmp_path))
+
+        assert count == 2
+        assert (tmp_path / "a.md").read_bytes() == b"alpha" * 10
+        assert (tmp_path / "sub" / "b.md").read_bytes() == b"beta"
+        assert not (tmp_path / "c.pdf").exists()
+
+    def test_records_digests_for_the_upload_step(self, tmp_path, fetcher):
+        container = InMemoryContainerClient()
+        container.put("a.md", b"with md5")
+        container.put("b.md", b"without md5", with_md5=False)
+
+        fetcher.download_blobs(container, "", str(tmp_path))
+
+        with DigestManifest(str(tmp_path)) as manifest:
+            assert manifest.get("a.md")["md5"] == hashlib.md5(b"with md5").hexdigest()
+            assert (
+                manifest.get("b.md")["md5"] == hashlib.md5(b"without md5").hexdigest()
+            )
+
+    def test_reports_failed_blobs(self, tmp_path, fetcher, monkeypatch):
+        container = InMemoryContainerClient()
+        container.put("a.md", b"alpha")
+        container.put("b.md", b"beta")
+        original = fetcher._download_blob
+
+        def failing_download(container_client, blob, *args):
+            if blob.name == "b.md":
+                raise IOError("connection reset")
+            return original(container_client, blob, *args)
+
+        monkeypatch.setattr(fetcher, "_download_blob", failing_download)
+
+        with pytest.raises(RuntimeError, match="b.md"):
+            fetcher.download_blobs(container, "", str(tmp_path))
+        assert (tmp_path / "a.md").read_bytes() == b"alpha"
+
+
+class TestResumableFetch:
+    """Tests for the checkpointed, resumable blob fetch."""
+
+    def test_rerun_skips_completed_blobs(self, tmp_path, fetcher):
+        container = InMemoryContainerClient()
+        container.put("a.md", b"alpha")
+        container.put("b.md", b"beta")
+        fetcher.download_blobs(container, "", str(tmp_path))
+        calls = container.download_calls
+
+        count = fetcher.download_blobs(container, "", str(tmp_path))
+
+        assert count == 2
+        assert container.download_calls == calls
+
+    def test_changed_blob_is_fetched_again(self, tmp_path, fetcher):
+        container = InMemoryContainerClient()
+        container.put("a.md", b"v1")
+        fetcher.download_blobs(container, "", str(tmp_path))
+
+        container.put("a.md", b"version 2")
+        fetcher.download_blobs(container, "", str(tmp_path))
+
+        assert (tmp_path / "a.md").read_bytes() == b"version 2"
+
+    @pytest.mark.parametrize("with_md5", [True, False])
+    def test_interrupted_blob_resumes_from_last_segment(
+        self, tmp_path, fetcher, with_md5
+    ):
+        payload = b"0123456789abcdef"
+        container = InMemoryContainerClient()
+        container.put("big.md", payload, with_md5=with_md5)
+        fetcher.resume_segment_size = 4
+        container.fail_on_download_call = 3
+
+        with pytest.raises(RuntimeError):
+            fetcher.download_blobs(container, "", str(tmp_path))
+        assert (tmp_path / "big.md.partial").read_bytes() == payload[:8]
+
+        container.download_calls = 0
+        fetcher.download_blobs(container, "", str(tmp_path))
+
+        # Only the two missing segments are requested on the second run
+        assert container.download_calls == 2
+        assert (tmp_path / "big.md").read_bytes() == payload
+        assert not (tmp_path / "big.md.partial").exists()
+        with DigestManifest(str(tmp_path)) as manifest:
+            assert manifest.get("big.md")["md5"] == hashlib.md5(payload).hexdigest()
+
+
+class TestGithubFetch:
+    """Tests for the git fetch against a local bare repository."""
+
+    def test_sparse_clone_fetches_only_matching_files(self, tmp_path, bare_repo):
+        fetcher = DataFetcher(credential=object(), file_patterns=["*.md"])
+        output_dir = tmp_path / "out"
+
+        fetcher.fetch_from_github(bare_repo, "data", str(output_dir))
+
+        fetched = sorted(
+            path.relative_to(output_dir).as_posix()
+            for path in output_dir.rglob("*")
+            if path.is_file() and not path.name.startswith(".")
+        )
+        assert fetched == ["Intro.MD", "manuals/guide.md"]
+
+    def test_bracket_patterns_are_kept_in_sparse_checkout(self, tmp_path, bare_repo):
+        fetcher = DataFetcher(credential=object(), file_patterns=["*.[mM][dD]"])
+        output_dir = tmp_path / "out"
+
+        fetcher.fetch_from_github(bare_repo, "data", str(output_dir))
+
+        assert fetcher._case_insensitive_glob("*.[mM][dD]") == "*.[mM][dD]"
+        assert fetcher._case_insensitive_glob("[!a]b\\*") == "[!a][bB]\\*"
+        assert fetcher._case_insensitive_glob("a[b") == "[aA][[bB]"
+        assert (output_dir / "Intro.MD").is_file()
+        assert (output_dir / "manuals" / "guide.md").is_file()
+
+    def test_sparse_clone_transfers_less_than_full_clone(self, tmp_path, bare_repo):
+        stats = {}
+        for mode in CLONE_MODES:
+            fetcher = DataFetcher(
+                credential=object(), file_patterns=["*.md"], clone_mode=mode
+            )
+            stats[mode] = fetcher._clone_repository(
+                bare_repo, str(tmp_path / mode), "data"
+            )
+
+        assert stats["sparse"]["skipped_objects"] >= 6
+        assert stats["full"]["skipped_objects"] == 0
+        assert stats["sparse"]["objects"] < stats["full"]["objects"]
+        assert stats["sparse"]["bytes"] < stats["full"]["bytes"]
+
+    def test_rerun_skips_files_already_fetched(self, tmp_path, bare_repo, monkeypatch):
+        fetcher = DataFetcher(credential=object(), file_patterns=["*.md"])
+        output_dir = tmp_path / "out"
+        fetcher.fetch_from_github(bare_repo, "data", str(output_dir))
+        copies = []
+        monkeypatch.setattr(
+            DataFetcher, "_copy_with_md5", lambda *args: copies.append(args)
+        )
+
+        fetcher.fetch_from_github(bare_repo, "data", str(output_dir))
+
+        assert copies == []
+
+    def test_hardlink_mode_shares_data_with_checkout(self, tmp_path, bare_repo):
+        checkout = tmp_path / "checkout"
+        fetcher = DataFetcher(
+            credential=object(),
+            file_patterns=["*.md"],
+            transfer_mode="hardlink",
+            checkout_dir=str(checkout),
+        )
+        output_dir = tmp_path / "out"
+
+        fetcher.fetch_from_github(bare_repo, "data", str(output_dir))
+
+        placed = output_dir / "manuals" / "guide.md"
+        assert (
+            placed.stat().st_ino == (checkout / "data/manuals/guide.md").stat().st_ino
+        )
+
+    def test_none_mode_updates_checkout_in_place(self, tmp_path, bare_repo):
+        checkout = tmp_path / "checkout"
+        fetcher = DataFetcher(
+            credential=object(),
+            file_patterns=["*.md"],
+            transfer_mode="none",
+            checkout_dir=str(checkout),
+        )
+
+        data_path = fetcher.fetch_from_github(bare_repo, "data", str(tmp_path / "out"))
+        guide = checkout / "data" / "manuals" / "guide.md"
+        mtime = guide.stat().st_mtime_ns
+        second_path = fetcher.fetch_from_github(
+            bare_repo, "data", str(tmp_path / "out")
+        )
+
+        assert data_path == second_path == os.path.join(str(checkout), "data")
+        assert guide.stat().st_mtime_ns == mtime
+        assert not (tmp_path / "out").exists()
+
+    def test_move_mode_is_rejected_for_a_persistent_checkout(self, tmp_path):
+        with pytest.raises(ValueError, match="persistent checkout"):
+            DataFetcher(
+                credential=object(),
+                transfer_mode="move",
+                checkout_dir=str(tmp_path / "checkout"),
+            )
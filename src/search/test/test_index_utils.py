@@ -0,0 +1,381 @@
+# Copyright (c) Microsoft Corporation.
+# Licensed under the MIT license.
+
+"""
+Unit tests for the provisioning helpers in index_utils.py.
+"""
+
+import json
+import threading
+import time
+
+import pytest
+from azure.core.credentials import AzureKeyCredential
+
+import index_utils
+from benchmark_indexer_profiles import benchmark_profile
+from index_utils import ProvisioningStep, run_provisioning_steps
+from reconcile import NO_OP, ResourcePlan
+from search_stub import SearchServiceStub
+
+pytestmark = pytest.mark.unit
+
+
+class TestProvisioningSteps:
+    """Tests for the dependency-aware step executor."""
+
+    def test_independent_steps_overlap_and_dependents_wait(self):
+        events = []
+        lock = threading.Lock()
+
+        def step(name, delay):
+            def action():
+                with lock:
+                    events.append(("start", name))
+                time.sleep(delay)
+                with lock:
+                    events.append(("end", name))
+
+            return action
+
+        started = time.monotonic()
+        timings = run_provisioning_steps(
+            [
+                ProvisioningStep("index", step("index", 0.2)),
+                ProvisioningStep("datasource", step("datasource", 0.2)),
+                ProvisioningStep("skillset", step("skillset", 0.2)),
+                ProvisioningStep(
+                    "indexer",
+                    step("indexer", 0),
+                    depends_on=["index", "datasource", "skillset"],
+                ),
+            ]
+        )
+
+        assert time.monotonic() - started < 0.5
+        assert set(timings) == {"index", "datasource", "skillset", "indexer"}
+        indexer_start = events.index(("start", "indexer"))
+        assert all(
+            events.index(("end", name)) < indexer_start
+            for name in ["index", "datasource", "skillset"]
+        )
+
+    def test_failure_skips_dependents_but_not_other_branches(self):
+        ran = []
+
+        def fail():
+            raise ValueError("boom")
+
+        with pytest.raises(RuntimeError) as error:
+            run_provisioning_steps(
+                [
+                    ProvisioningStep("index", fail),
+                    ProvisioningStep("skillset", lambda: ran.append("skillset")),
+                    ProvisioningStep(
+                        "indexer", lambda: ran.append("indexer"), ["index", "skillset"]
+                    ),
+                    ProvisioningStep(
+                        "report", lambda: ran.append("report"), ["indexer"]
+                    ),
+                ]
+            )
+
+        assert ran == ["skillset"]
+        message = str(error.value)
+        assert "index: boom" in message
+        assert "indexer: skipped" in message and "report: skipped" in message
+
+    def test_invalid_dependencies_are_rejected(self):
+        with pytest.raises(ValueError, match="unknown"):
+            run_provisioning_steps([ProvisioningStep("a", lambda: None, ["missing"])])
+        with pytest.raises(ValueError, match="cycle"):
+            run_provisioning_steps(
+                [
+                    ProvisioningStep("a", lambda: None, ["b"]),
+                    ProvisioningStep("b", lambda: None, ["a"]),
+                ]
+            )
+
+    def test_index_set_provisions_indexer_last(self, monkeypatch):
+        calls = []
+        for function in [
+            "create_or_update_index",
+            "create_or_update_datasource",
+            "create_or_update_skillset",
+            "create_or_update_indexer",
+        ]:
+            monkeypatch.setattr(
+                index_utils,
+                function,
+                lambda *args, function=function: calls.append((function, args[0])),
+            )
+        # The index is up to date, so it does not need a rebuild
+        monkeypatch.setattr(
+            index_utils,
+            "plan_resource",
+            lambda client, kind, definition, version: ResourcePlan(
+                kind, definition["name"], NO_OP
+            ),
+        )
+
+        index_utils.provision_index_set(
+            "https://search", "docs", "https://openai", "sub", "rg", "st", "data", None
+        )
+
+        assert calls[-1] == ("create_or_update_indexer", "docs-indexer")
+        assert sorted(name for _, name in calls[:-1]) == [
+            "docs-ds",
+            "docs-index",
+            "docs-skills",
+        ]
+
+
+class TestSharedClients:
+    """Tests for the search clients shared across provisioning operations."""
+
+    def test_index_sets_share_pooled_connections(self):
+        credential = AzureKeyCredential("key")
+        with SearchServiceStub() as stub:
+            with index_utils.SearchClients(
+                stub.endpoint, credential, session=stub.session()
+            ) as clients:
+                for base_name in ["alpha", "beta", "gamma"]:
+                    index_utils.provision_index_set(
+                        stub.endpoint,
+                        base_name,
+                        "https://openai.example.com",
+                        "sub",
+                        "rg",
+                        "storage",
+                        "data",
+                        credential,
+                        clients,
+                    )
+
+        assert sorted(stub.resources["indexers"]) == [
+            "alpha-indexer",
+            "beta-indexer",
+            "gamma-indexer",
+        ]
+        # Every request reuses the pooled connections; only the concurrent steps open new ones
+        assert len(stub.requests) >= 12
+        assert stub.connections <= 4
+
+
+class TestTenantBatch:
+    """Tests for the multi-tenant batch mode."""
+
+    def test_manifest_formats_load_the_same_tenants(self, tmp_path):
+        json_file = tmp_path / "tenants.json"
+        json_file.write_text(
+            json.dumps(
+                {
+                    "tenants": [
+                        {
+                            "base_index_name": "contoso",
+                            "container_name": "contoso-data",
+                        },
+                        {
+                            "base_index_name": "fabrikam",
+                            "container_name": "fabrikam-data",
+                            "storage_name": "fabrikamstorage",
+                        },
+                    ]
+                }
+            )
+        )
+        csv_file = tmp_path / "tenants.csv"
+        csv_file.write_text(
+            "base_index_name,container_name,storage_name\n"
+            "contoso,contoso-data,\n"
+            "fabrikam,fabrikam-data,fabrikamstorage\n"
+        )
+
+        assert index_utils.load_tenants(str(json_file)) == index_utils.load_tenants(
+            str(csv_file)
+        )
+        assert index_utils.load_tenants(str(csv_file))[1].storage_name == (
+            "fabrikamstorage"
+        )
+
+    def test_invalid_manifests_are_rejected(self, tmp_path):
+        manifest = tmp_path / "tenants.csv"
+        manifest.write_text("base_index_name,container_name\nbad name!,data\n")
+        with pytest.raises(ValueError, match="Invalid tenant #1"):
+            index_utils.load_tenants(str(manifest))
+
+        manifest.write_text("base_index_name,container_name\na,data\na,other\n")
+        with pytest.raises(ValueError, match="Duplicate"):
+            index_utils.load_tenants(str(manifest))
+
+    def test_tenants_share_clients_and_failures_are_isolated(self):
+        tenants = [
+            index_utils.TenantSpec(f"tenant{index}", f"data{index}")
+            for index in range(12)
+        ]
+        tenants[3].storage_name = "fail"
+        credential = AzureKeyCredential("key")
+
+        original = index_utils.create_or_update_datasource
+
+        def datasource(name, file, uri, sub, rg, storage, *args):
+            if storage == "fail":
+                raise ValueError("storage account not found")
+            return original(name, file, uri, sub, rg, storage, *args)
+
+        with SearchServiceStub() as stub:
+            with pytest.MonkeyPatch.context() as patch:
+                patch.setattr(index_utils, "create_or_update_datasource", datasource)
+                with index_utils.SearchClients(
+                    stub.endpoint, credential, session=stub.session(pool_size=24)
+                ) as clients:
+                    results = index_utils.provision_tenants(
+                        tenants,
+                        stub.endpoint,
+                        "https://openai.example.com",
+                        "sub",
+                        "rg",
+                        "storage",
+                        credential,
+                        clients,
+                        max_parallel=6,
+                    )
+
+        assert [result.base_index_name for result in results] == [
+            tenant.base_index_name for tenant in tenants
+        ]
+        assert [
+            result.base_index_name for result in results if not result.succeeded
+        ] == ["tenant3"]
+        assert len(stub.resources["indexers"]) == 11
+        assert stub.connections <= 24
+        table = index_utils.format_tenant_results(results)
+        assert "tenant3   failed" in table
+        assert len(table.splitlines()) == 13
+
+
+class TestIndexerProfiles:
+    """Tests for the indexer tuning profiles."""
+
+    def test_profile_sets_batching_and_schedule(self):
+        credential = AzureKeyCredential("key")
+        args = (
+            "docs",
+            "https://openai.example.com",
+            "sub",
+            "rg",
+            "storage",
+            "data",
+            credential,
+        )
+        with SearchServiceStub() as stub:
+            with index_utils.SearchClients(
+                stub.endpoint, credential, session=stub.session()
+            ) as clients:
+                index_utils.provision_index_set(
+                    stub.endpoint, *args, clients, "continuous"
+                )
+                plans = index_utils.plan_index_set(
+                    stub.endpoint, *args, clients, "bulk"
+                )
+
+        indexer = stub.resources["indexers"]["docs-indexer"]
+        assert indexer["parameters"]["batchSize"] == 50
+        assert indexer["parameters"]["configuration"]["parsingMode"] == "default"
+        assert indexer["schedule"] == {"interval": "PT15M"}
+        indexer_plan = plans[-1]
+        assert indexer_plan.action == "update"
+        # Switching profiles does not require re-processing the documents
+        assert indexer_plan.impact == "in-place"
+        assert "- schedule" not in indexer_plan.describe()
+
+    def test_unknown_profile_is_rejected(self):
+        with pytest.raises(ValueError, match="Unknown indexer profile 'huge'"):
+            index_utils.create_or_update_indexer(
+                "docs-indexer",
+                "docs-index",
+                "docs-skills",
+                "docs-ds",
+                index_utils.INDEXER_SCHEMA_PATH,
+                "https://search",
+                None,
+                indexer_profile="huge",
+            )
+
+    def test_bulk_profile_needs_fewer_batches_than_small(self):
+        # One batch per status poll, so the polls count the batches of the run
+        small = benchmark_profile("small", 200, batch_overhead=None)
+        bulk = benchmark_profile("bulk", 200, batch_overhead=None)
+
+        assert small.succeeded and bulk.succeeded
+        assert bulk.items_processed == small.items_processed == 200
+        # 200 documents in batches of 10 and of 100
+        assert (small.polls, bulk.polls) == (20, 2)
+
+
+class TestDetectionPolicies:
+    """Tests for the change and deletion detection of the data source."""
+
+    @pytest.mark.parametrize(
+        "deletion_detection,policy",
+        [
+            (
+                "metadata",
+                {
+                    "@odata.type": "#Microsoft.Azure.Search."
+                    "SoftDeleteColumnDeletionDetectionPolicy",
+                    "softDeleteColumnName": "IsDeleted",
+                    "softDeleteMarkerValue": "true",
+                },
+            ),
+            (
+                "native",
+                {
+                    "@odata.type": "#Microsoft.Azure.Search."
+                    "NativeBlobSoftDeleteDeletionDetectionPolicy"
+                },
+            ),
+        ],
+    )
+    def test_policies_are_sent_and_reconciled(self, deletion_detection, policy):
+        credential = AzureKeyCredential("key")
+        detection = index_utils.DetectionPolicies(
+            "high_water_mark", deletion_detection=deletion_detection
+        )
+        args = (
+            "docs-ds",
+            index_utils.DATASOURCE_SCHEMA_PATH,
+            None,
+            "sub",
+            "rg",
+            "storage",
+            "data",
+            credential,
+        )
+
+        with SearchServiceStub() as stub:
+            args = args[:2] + (stub.endpoint,) + args[3:]
+            with index_utils.SearchClients(
+                stub.endpoint, credential, session=stub.session()
+            ) as clients:
+                created = index_utils.create_or_update_datasource(
+                    *args, clients, detection
+                )
+                unchanged = index_utils.create_or_update_datasource(
+                    *args, clients, detection
+                )
+                removed = index_utils.create_or_update_datasource(*args, clients)
+
+        assert (created.action, unchanged.action) == ("create", "no-op")
+        datasource = stub.resources["datasources"]["docs-ds"]
+        assert datasource.get("dataDeletionDetectionPolicy") is None
+        assert removed.action == "update"
+        assert [str(change).split(":")[0] for change in removed.changes] == [
+            "~ dataChangeDetectionPolicy",
+            "~ dataDeletionDetectionPolicy",
+        ]
+        assert removed.changes[0].current == {
+            "@odata.type": "#Microsoft.Azure.Search.HighWaterMarkChangeDetectionPolicy",
+            "highWaterMarkColumnName": "metadata_storage_last_modified",
+        }
+        assert removed.changes[1].current == policy
@@ -0,0 +1,124 @@
+# Copyright (c) Microsoft Corporation.
+# Licensed under the MIT license.
+
+"""
+Unit tests for the indexer runs in indexer_run.py.
+"""
+
+import json
+
+import pytest
+from azure.core.credentials import AzureKeyCredential
+from azure.search.documents.indexes.models import SearchIndexer
+
+import index_utils
+from indexer_run import AdaptiveBackoff, run_indexer
+from search_stub import SearchServiceStub
+
+pytestmark = pytest.mark.unit
+
+
+@pytest.fixture
+def stub():
+    with SearchServiceStub() as service:
+        yield service
+
+
+@pytest.fixture
+def indexer_client(stub):
+    with index_utils.SearchClients(
+        stub.endpoint, AzureKeyCredential("key"), session=stub.session()
+    ) as clients:
+        yield clients.indexer_client
+
+
+def create_indexer(indexer_client, name="docs-indexer"):
+    indexer_client.create_or_update_indexer(
+        SearchIndexer(
+            name=name, data_source_name="docs-ds", target_index_name="docs-index"
+        )
+    )
+
+
+class TestAdaptiveBackoff:
+    """Tests for the poll interval."""
+
+    def test_interval_grows_when_idle_and_shrinks_on_progress(self):
+        backoff = AdaptiveBackoff(minimum=1, maximum=8)
+
+        idle = [backoff.next(False) for _ in range(5)]
+        busy = [backoff.next(True) for _ in range(4)]
+
+        assert idle == [2, 4, 8, 8, 8]
+        assert busy == [4, 2, 1, 1]
+
+
+class TestRunIndexer:
+    """Tests for triggering and waiting for indexer runs."""
+
+    def test_waits_for_the_run_started_on_creation(self, stub, indexer_client):
+        stub.indexer_documents = 35
+        create_indexer(indexer_client)
+        snapshots = []
+
+        metrics = run_indexer(
+            indexer_client,
+            "docs-indexer",
+            min_interval=0.001,
+            max_interval=0.01,
+            on_progress=lambda progress: snapshots.append(progress.to_json()),
+        )
+
+        assert metrics.succeeded
+        assert metrics.items_processed == 35
+        # The run was already in progress, so it is not triggered again
+        assert stub.actions == []
+        progress = [json.loads(snapshot) for snapshot in snapshots]
+        assert [item["items_processed"] for item in progress] == [10, 20, 30, 35]
+        assert progress[-1]["status"] == "success"
+        assert progress[-1]["docs_per_second"] > 0
+
+    def test_triggers_a_new_run_and_ignores_the_previous_one(
+        self, stub, indexer_client
+    ):
+        stub.indexer_documents = 5
+        create_indexer(indexer_client)
+        run_indexer(indexer_client, "docs-indexer", min_interval=0.001)
+
+        metrics = run_indexer(indexer_client, "docs-indexer", min_interval=0.001)
+
+        assert stub.actions == [("indexers", "docs-indexer", "run")]
+        assert stub.runs["docs-indexer"]["count"] == 2
+        assert metrics.succeeded and metrics.polls == 2
+
+    def test_failed_run_raises_with_item_errors(self, stub, indexer_client):
+        stub.indexer_documents = 10
+        stub.failed_keys = ["doc-7", "doc-9"]
+        create_indexer(indexer_client)
+        snapshots = []
+
+        with pytest.raises(RuntimeError) as error:
+            run_indexer(
+                indexer_client,
+                "docs-indexer",
+                min_interval=0.001,
+                on_progress=snapshots.append,
+            )
+
+        assert "transientFailure" in str(error.value)
+        assert "doc-7: Could not parse document" in str(error.value)
+        assert snapshots[-1].items_failed == 2
+
+    def test_run_that_does_not_complete_times_out(self, stub, indexer_client):
+        stub.indexer_documents = 10
+        stub.documents_per_poll = 0
+        create_indexer(indexer_client)
+
+        with pytest.raises(TimeoutError):
+            run_indexer(
+                indexer_client,
+                "docs-indexer",
+                timeout=0.05,
+                min_interval=0.001,
+                max_interval=0.01,
+            )
@@ -0,0 +1,95 @@
+# Copyright (c) Microsoft Corporation.
+# Licensed under the MIT license.
+
+"""
+Unit tests for the JSON templates in json_template.py.
+"""
+
+import glob
+import json
+import os
+
+import pytest
+
+import index_utils
+import json_template
+from json_template import JsonTemplate, load_template
+
+pytestmark = pytest.mark.unit
+
+CONFIG_DIR = os.path.dirname(index_utils.INDEX_SCHEMA_PATH)
+
+
+class TestJsonTemplate:
+    """Tests for parsing, caching and rendering templates."""
+
+    def test_values_are_substituted_without_escaping_issues(self):
+        template = JsonTemplate(
+            {
+                "name": "<index_name>",
+                "profile": "vector-<index_name>-profile",
+                "dimensions": "<dimensions>",
+                "credentials": {"connectionString": "<connection_string>"},
+            }
+        )
+        connection_string = 'ResourceId=/a/"quoted"\\path;\nnext'
+
+        rendered = template.render(
+            {
+                "index_name": "docs",
+                "dimensions": 1536,
+                "connection_string": connection_string,
+                "unused": "ignored",
+            }
+        )
+
+        assert template.placeholders == {
+            "index_name",
+            "dimensions",
+            "connection_string",
+        }
+        assert rendered == {
+            "name": "docs",
+            "profile": "vector-docs-profile",
+            "dimensions": 1536,
+            "credentials": {"connectionString": connection_string},
+        }
+        assert json.loads(json.dumps(rendered)) == rendered
+
+    def test_invalid_values_are_rejected(self):
+        template = JsonTemplate({"name": "<a>", "profile": "vector-<b>"})
+
+        with pytest.raises(ValueError, match=r"\['b'\]"):
+            template.render({"a": "x"})
+        with pytest.raises(TypeError, match="<b>"):
+            template.render({"a": "x", "b": 5})
+        with pytest.raises(TypeError, match="JSON scalar"):
+            template.render({"a": ["x"], "b": "y"})
+
+    def test_files_are_parsed_once_and_reloaded_when_changed(self, tmp_path):
+        template_file = tmp_path / "index.json"
+        template_file.write_text(json.dumps({"name": "<name>"}))
+
+        first = load_template(str(template_file))
+        rendered = first.render({"name": "one"})
+        rendered["name"] = "modified"
+
+        assert load_template(str(template_file)) is first
+        assert first.render({"name": "two"}) == {"name": "two"}
+
+        template_file.write_text(json.dumps({"name": "<name>", "extra": True}))
+        os.utime(template_file, ns=(0, 0))
+        assert load_template(str(template_file)).render({"name": "x"})["extra"]
+        json_template._templates.clear()
+
+    @pytest.mark.parametrize(
+        "config_file", sorted(glob.glob(os.path.join(CONFIG_DIR, "*.json")))
+    )
+    def test_index_config_renders_completely(self, config_file):
+        values = {
+            name: f"value-{name}" for name in load_template(config_file).placeholders
+        }
+
+        rendered = json.dumps(load_template(config_file).render(values))
+
+        assert json_template.PLACEHOLDER.search(rendered) is None
@@ -0,0 +1,150 @@
+# Copyright (c) Microsoft Corporation.
+# Licensed under the MIT license.
+
+"""
+Unit tests for the push-mode indexing in push_index.py.
+"""
+
+import base64
+
+import pytest
+from azure.core.credentials import AzureKeyCredential
+
+from chunk_preview import SplitSettings
+from index_utils import SearchClients
+from push_index import DocumentUploader, FakeEmbedder, parent_key, push_files
+from search_stub import SearchServiceStub
+from vector_storage import get_vector_profile, vector_dimensions
+
+pytestmark = pytest.mark.unit
+
+SENTENCE = "The indexer splits every document into pages. "
+SETTINGS = SplitSettings(maximum_page_length=100)
+
+
+def push(stub, data_path, embedder=None, **uploader_args):
+    with SearchClients(
+        stub.endpoint, AzureKeyCredential("key"), session=stub.session()
+    ) as clients:
+        uploader = DocumentUploader(
+            clients.search_client("docs-index", retry_total=0),
+            sleep=lambda _: None,
+            **uploader_args,
+        )
+        return push_files(
+            data_path,
+            uploader,
+            embedder or FakeEmbedder(8),
+            settings=SETTINGS,
+            embedding_batch_size=4,
+            embedding_workers=2,
+        )
+
+
+class TestPushFiles:
+    """Tests for chunking, embedding and uploading local files."""
+
+    def test_chunks_are_uploaded_with_the_projection_fields(self, tmp_path):
+        (tmp_path / "nested").mkdir()
+        (tmp_path / "nested" / "guide.md").write_text(SENTENCE * 10)
+        (tmp_path / "notes.txt").write_text(SENTENCE)
+        (tmp_path / "image.png").write_bytes(b"\x89PNG")
+        embedder = FakeEmbedder(8)
+
+        with SearchServiceStub() as stub:
+            summary = push(stub, str(tmp_path), embedder, max_batch_documents=2)
+
+        documents = stub.documents["docs-index"]
+        parent_id = parent_key("nested_guide.md")
+        assert base64.urlsafe_b64decode(parent_id).decode() == "nested_guide.md"
+        assert summary.files == 2 and summary.skipped_files == 1
+        assert summary.chunks == len(documents) == 6
+        assert summary.upload.uploaded == 6 and summary.upload.failed == []
+        assert stub.index_requests == [2, 2, 2]
+        # Six chunks in batches of four
+        assert summary.embedding_calls == embedder.calls == 2
+        chunk = documents[f"{parent_id}_pages_0"]
+        assert chunk["parent_id"] == parent_id
+        assert chunk["title"] == "nested_guide.md"
+        assert chunk["chunk"] == (SENTENCE * 2).strip()
+        assert chunk["text_vector"] == pytest.approx(embedder([chunk["chunk"]])[0])
+
+    def test_git_directory_of_a_checkout_is_not_pushed(self, tmp_path):
+        (tmp_path / "guide.md").write_text(SENTENCE)
+        (tmp_path / ".git").mkdir()
+        (tmp_path / ".git" / "README.md").write_text(SENTENCE)
+
+        with SearchServiceStub() as stub:
+            summary = push(stub, str(tmp_path))
+
+        assert summary.files == 1
+        assert [
+            document["title"] for document in stub.documents["docs-index"].values()
+        ] == ["guide.md"]
+
+    def test_batches_are_limited_by_payload_size(self, tmp_path):
+        (tmp_path / "guide.md").write_text(SENTENCE * 10)
+
+        with SearchServiceStub() as stub:
+            summary = push(stub, str(tmp_path), max_batch_bytes=600)
+
+        assert summary.upload.uploaded == 5
+        assert max(stub.index_requests) < 5 and sum(stub.index_requests) == 5
+
+    def test_throttled_documents_and_requests_are_retried(self, tmp_path):
+        (tmp_path / "guide.md").write_text(SENTENCE * 10)
+        parent_id = parent_key("guide.md")
+
+        with SearchServiceStub() as stub:
+            stub.unavailable_responses = 1
+            stub.document_failures = {
+                f"{parent_id}_pages_1": [429, 503],
+                f"{parent_id}_pages_3": [400],
+            }
+            summary = push(stub, str(tmp_path))
+
+        assert len(stub.documents["docs-index"]) == 4
+        assert summary.upload.uploaded == 4
+        assert summary.upload.retries == 3
+        assert summary.upload.failed == [f"{parent_id}_pages_3: Throttled (400)"]
+
+    def test_retries_stop_after_the_last_attempt(self, tmp_path):
+        (tmp_path / "guide.md").write_text(SENTENCE)
+
+        with SearchServiceStub() as stub:
+            stub.unavailable_responses = 5
+            summary = push(stub, str(tmp_path), max_retries=2)
+
+        assert summary.upload.batches == 3 and summary.upload.uploaded == 0
+        assert len(summary.upload.failed) == 1
+
+    def test_uploader_is_closed_when_embedding_fails(self, tmp_path):
+        (tmp_path / "guide.md").write_text(SENTENCE * 10)
+
+        class FailingEmbedder:
+            def __call__(self, texts):
+                raise RuntimeError("Embedding deployment not found")
+
+        class RecordingUploader:
+            closed = False
+
+            def add(self, documents):
+                pass
+
+            def close(self):
+                self.closed = True
+
+        uploader = RecordingUploader()
+        with pytest.raises(RuntimeError, match="not found"):
+            push_files(str(tmp_path), uploader, FailingEmbedder(), settings=SETTINGS)
+
+        assert uploader.closed
+
+
+class TestEmbeddingDimensions:
+    """Tests for the embedding dimensions of the vector profiles."""
+
+    def test_dimensions_follow_the_profile(self):
+        assert vector_dimensions(get_vector_profile("default")) == 3072
+        assert vector_dimensions(get_vector_profile("scalar-1024")) == 1024
+        assert len(FakeEmbedder(256)(["text"])[0]) == 256
@@ -0,0 +1,202 @@
+# Copyright (c) Microsoft Corporation.
+# Licensed under the MIT license.
+
+"""
+Unit tests for the adaptive rate limiter in rate_limit.py.
+"""
+
+import json
+
+import pytest
+import requests
+from azure.core.credentials import AccessToken, AzureKeyCredential
+
+from index_utils import SearchClients
+from push_index import AzureOpenAIEmbedder, DocumentUploader
+from rate_limit import AdaptiveRateLimiter, retry_after_seconds
+from search_stub import SearchServiceStub
+
+pytestmark = pytest.mark.unit
+
+
+class FakeClock:
+    """Clock whose sleep advances the time instantly."""
+
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.now += seconds
+
+
+def limiter(clock, *args, **kwargs):
+    return AdaptiveRateLimiter(*args, clock=clock, sleep=clock.sleep, **kwargs)
+
+
+class StaticCredential:
+    """Credential returning a fixed bearer token."""
+
+    def get_token(self, *scopes):
+        return AccessToken("token", 0)
+
+
+def response(status, body=None, headers=None):
+    result = requests.Response()
+    result.status_code = status
+    result.headers.update(headers or {})
+    result._content = json.dumps(body or {}).encode()
+    return result
+
+
+class TestRateLimiter:
+    """Tests for the pacing and the adaptation of the rate."""
+
+    def test_retry_after_headers_are_read_in_seconds(self):
+        assert retry_after_seconds({"retry-after-ms": "1500"}) == 1.5
+        assert (
+            retry_after_seconds(
+                requests.structures.CaseInsensitiveDict({"Retry-After": "3"})
+            )
+            == 3.0
+        )
+        assert (
+            retry_after_seconds({"retry-after": "Wed, 21 Oct 2015 07:28:00 GMT"}) == 0
+        )
+        assert retry_after_seconds({"retry-after": "soon"}) is None
+        assert retry_after_seconds(None) is None
+
+    def test_requests_and_tokens_are_paced_to_the_quota(self):
+        clock = FakeClock()
+        requests_limiter = limiter(clock, requests_per_minute=600)
+
+        for _ in range(30):
+            requests_limiter.acquire()
+
+        # The bucket holds one second of calls, then calls are spaced by 0.1s
+        assert clock.now == pytest.approx(1.9)
+        tokens_limiter = limiter(clock, tokens_per_minute=6000)
+        start = clock.now
+        tokens_limiter.acquire(tokens=500)
+        tokens_limiter.acquire(tokens=100)
+        # The large call goes through and delays the next one until its debt is repaid
+        assert clock.now - start == pytest.approx(4.0)
+
+    def test_throttling_halves_the_rate_once_and_pauses_every_caller(self):
+        clock = FakeClock()
+        rate_limiter = limiter(clock, requests_per_minute=600)
+
+        rate_limiter.on_throttled(retry_after=2.0)
+        # Calls sent at the old rate are throttled too, without another decrease
+        rate_limiter.on_throttled(retry_after=2.0)
+        rate_limiter.acquire()
+
+        assert rate_limiter.current_requests_per_minute == 300
+        assert rate_limiter.stats.throttled == 2 and rate_limiter.stats.decreases == 1
+        assert clock.now == pytest.approx(2.0)
+        # The rate recovers up to just under the rate that was throttled
+        for _ in range(300):
+            clock.now += 1.0
+            rate_limiter.on_success()
+        assert rate_limiter.current_requests_per_minute == pytest.approx(570, abs=10)
+
+    def test_without_quota_the_observed_rate_is_adapted(self):
+        clock = FakeClock()
+        rate_limiter = limiter(clock)
+        # Ten calls per second, not paced
+        for _ in range(100):
+            rate_limiter.acquire()
+            clock.now += 0.1
+        assert clock.now == pytest.approx(10.0)
+        assert rate_limiter.current_requests_per_minute is None
+
+        rate_limiter.on_throttled()
+
+        # The 600 calls per minute observed so far are halved
+        assert rate_limiter.current_requests_per_minute == pytest.approx(300, rel=0.02)
+        start = clock.now
+        for _ in range(20):
+            rate_limiter.acquire()
+        # One second of calls goes through, then calls are spaced by 0.2s
+        assert clock.now - start == pytest.approx(2.8, rel=0.05)
+
+    def test_throughput_converges_under_an_unknown_quota(self):
+        clock = FakeClock()
+        # Configured with twice the quota the service enforces over 10 second windows
+        quota = 600
+        rate_limiter = limiter(clock, requests_per_minute=2 * quota)
+        level, refilled = quota / 6, 0.0
+        accepted = []
+
+        while clock.now < 900:
+            rate_limiter.acquire()
+            level = min(quota / 6, level + (clock.now - refilled) * quota / 60)
+            refilled = clock.now
+            if level >= 1:
+                level -= 1
+                rate_limiter.on_success()
+                accepted.append(clock.now)
+            else:
+                rate_limiter.on_throttled(retry_after=1.0)
+            clock.now += 0.001
+
+        settled = [time for time in accepted if time >= 120]
+        per_minute = len(settled) / 13
+        assert 0.8 * quota < per_minute < 1.05 * quota
+        assert rate_limiter.stats.throttled < 10
+
+
+class TestLimitedCalls:
+    """Tests for the limiter around the embedding and upload calls."""
+
+    def test_throttled_embedding_calls_pause_and_retry(self):
+        clock = FakeClock()
+        rate_limiter = limiter(clock, requests_per_minute=600)
+
+        class Session:
+            def __init__(self):
+                self.responses = [
+                    response(429, headers={"retry-after-ms": "2500"}),
+                    response(200, {"data": [{"index": 0, "embedding": [1.0, 0.0]}]}),
+                ]
+
+            def post(self, url, json, headers):
+                return self.responses.pop(0)
+
+        embedder = AzureOpenAIEmbedder(
+            "https://openai.example.com",
+            "embedding",
+            StaticCredential(),
+            session=Session(),
+            rate_limiter=rate_limiter,
+        )
+
+        assert embedder(["text"]) == [[1.0, 0.0]]
+        assert clock.now == pytest.approx(2.5)
+        assert rate_limiter.stats.throttled == 1 and rate_limiter.stats.requests == 2
+
+    def test_throttled_uploads_slow_down_the_limiter(self):
+        clock = FakeClock()
+        rate_limiter = limiter(clock, requests_per_minute=600)
+
+        with SearchServiceStub() as stub:
+            stub.unavailable_responses = 1
+            with SearchClients(
+                stub.endpoint, AzureKeyCredential("key"), session=stub.session()
+            ) as clients:
+                uploader = DocumentUploader(
+                    clients.search_client("docs-index", retry_total=0),
+                    rate_limiter=rate_limiter,
+                    sleep=pytest.fail,
+                )
+                uploader.add([{"chunk_id": "a", "chunk": "text"}])
+                stats = uploader.close()
+
+        assert stats.uploaded == 1 and stats.retries == 1
+        assert rate_limiter.stats.decreases == 1
+        # The accepted retry already regained a little
+        assert rate_limiter.current_requests_per_minute == pytest.approx(300, abs=2)
+        # The retry waited for the backoff through the limiter
+        assert clock.now == pytest.approx(1.0)
@@ -0,0 +1,220 @@
+# Copyright (c) Microsoft Corporation.
+# Licensed under the MIT license.
+
+"""
+Unit tests for the diff-based reconciliation in reconcile.py.
+"""
+
+import json
+
+import pytest
+from azure.core.credentials import AzureKeyCredential
+
+import index_utils
+from reconcile import (
+    CREATE,
+    IMPACT_INDEX_REBUILD,
+    IMPACT_INDEXER_RESET,
+    IMPACT_IN_PLACE,
+    NO_OP,
+    UPDATE,
+    Change,
+    change_impact,
+    diff_definitions,
+    format_drift_report,
+)
+from search_stub import SearchServiceStub
+
+pytestmark = pytest.mark.unit
+
+
+class TestDiffDefinitions:
+    """Tests for the structural diff."""
+
+    def test_service_defaults_and_reordering_are_not_changes(self):
+        current = {
+            "name": "docs-index",
+            "@odata.etag": '"0x1"',
+            "fields": [
+                {"name": "title", "type": "Edm.String", "normalizer": None},
+                {"name": "id", "type": "Edm.String", "key": True},
+            ],
+            "similarity": {"@odata.type": "#Microsoft.Azure.Search.BM25Similarity"},
+        }
+        desired = {
+            "name": "docs-index",
+            "fields": [
+                {"name": "id", "type": "Edm.String", "key": True},
+                {"name": "title", "type": "Edm.String", "synonymMaps": []},
+            ],
+            "description": None,
+        }
+
+        assert diff_definitions(current, desired) == []
+
+    def test_added_removed_and_changed_values_are_reported(self):
+        current = {
+            "fields": [
+                {"name": "id", "type": "Edm.String"},
+                {"name": "legacy", "type": "Edm.String"},
+            ],
+            "vectorSearch": {
+                "algorithms": [{"name": "hnsw", "hnswParameters": {"m": 4}}]
+            },
+        }
+        desired = {
+            "fields": [
+                {"name": "id", "type": "Edm.String"},
+                {"name": "summary", "type": "Edm.String"},
+            ],
+            "vectorSearch": {
+                "algorithms": [{"name": "hnsw", "hnswParameters": {"m": 8}}]
+            },
+        }
+
+        changes = {str(change) for change in diff_definitions(current, desired)}
+
+        assert changes == {
+            "+ fields[summary]",
+            "- fields[legacy]",
+            "~ vectorSearch.algorithms[hnsw].hnswParameters.m: 4 -> 8",
+        }
+
+
+class TestReconcile:
+    """Tests for planning and applying against the search service stand-in."""
+
+    def test_only_changed_resources_are_updated(self, tmp_path):
+        credential = AzureKeyCredential("key")
+        skillset_file = tmp_path / "skillset.json"
+        skillset_file.write_text(
+            open(index_utils.SKILLSET_SCHEMA_PATH).read().replace("/document", "/doc")
+        )
+
+        def reconcile(clients, skillset_path):
+            return [
+                index_utils.create_or_update_index(
+                    "docs-index",
+                    index_utils.INDEX_SCHEMA_PATH,
+                    stub.endpoint,
+                    "https://openai.example.com",
+                    credential,
+                    clients,
+                ),
+                index_utils.create_or_update_skillset(
+                    "docs-skills",
+                    "docs-index",
+                    skillset_path,
+                    stub.endpoint,
+                    "https://openai.example.com",
+                    credential,
+                    clients,
+                ),
+                index_utils.create_or_update_datasource(
+                    "docs-ds",
+                    index_utils.DATASOURCE_SCHEMA_PATH,
+                    stub.endpoint,
+                    "sub",
+                    "rg",
+                    "storage",
+                    "data",
+                    credential,
+                    clients,
+                ),
+            ]
+
+        with SearchServiceStub() as stub:
+            with index_utils.SearchClients(
+                stub.endpoint, credential, session=stub.session()
+            ) as clients:
+                first = reconcile(clients, index_utils.SKILLSET_SCHEMA_PATH)
+                second = reconcile(clients, index_utils.SKILLSET_SCHEMA_PATH)
+                del stub.requests[:]
+                third = reconcile(clients, str(skillset_file))
+
+        assert [plan.action for plan in first] == [CREATE] * 3
+        assert [plan.action for plan in second] == [NO_OP] * 3
+        assert [plan.action for plan in third] == [NO_OP, UPDATE, NO_OP]
+        assert "~ skills[chunker].context" in str(third[1].changes[0])
+        # Single named GETs only, no listing of whole services, and one PUT for the change
+        methods = [method for method, _ in stub.requests]
+        assert methods.count("PUT") == 1
+        assert all("('" in path for _, path in stub.requests)
+
+
+class TestDriftReport:
+    """Tests for the dry-run plan and its impact classification."""
+
+    @pytest.mark.parametrize(
+        "kind,change,impact",
+        [
+            ("index", Change("fields[summary]", "added"), IMPACT_IN_PLACE),
+            ("index", Change("fields[title]", "removed"), IMPACT_INDEX_REBUILD),
+            ("index", Change("fields[v].dimensions", "changed"), IMPACT_INDEX_REBUILD),
+            ("index", Change("fields[title].retrievable", "changed"), IMPACT_IN_PLACE),
+            (
+                "index",
+                Change("vectorSearch.algorithms[a].hnswParameters.m", "changed"),
+                IMPACT_INDEX_REBUILD,
+            ),
+            (
+                "index",
+                Change("vectorSearch.algorithms[a].hnswParameters.efSearch", "changed"),
+                IMPACT_IN_PLACE,
+            ),
+            (
+                "skillset",
+                Change("skills[chunker].context", "changed"),
+                IMPACT_INDEXER_RESET,
+            ),
+            ("skillset", Change("description", "changed"), IMPACT_IN_PLACE),
+            ("indexer", Change("fieldMappings[0]", "changed"), IMPACT_INDEXER_RESET),
+            ("indexer", Change("schedule", "added"), IMPACT_IN_PLACE),
+        ],
+    )
+    def test_change_impact(self, kind, change, impact):
+        assert change_impact(kind, change) == impact
+
+    def test_plan_reports_drift_without_changing_the_service(
+        self, tmp_path, monkeypatch
+    ):
+        credential = AzureKeyCredential("key")
+        index = json.load(open(index_utils.INDEX_SCHEMA_PATH))
+        index["fields"] = [
+            field for field in index["fields"] if field["name"] != "title"
+        ]
+        index["fields"][-1]["dimensions"] = 1536
+        index["vectorSearch"]["algorithms"][0]["hnswParameters"]["m"] = 8
+        index_file = tmp_path / "index.json"
+        index_file.write_text(json.dumps(index))
+        args = (
+            "docs",
+            "https://openai.example.com",
+            "sub",
+            "rg",
+            "storage",
+            "data",
+            credential,
+        )
+
+        with SearchServiceStub() as stub:
+            with index_utils.SearchClients(
+                stub.endpoint, credential, session=stub.session()
+            ) as clients:
+                index_utils.provision_index_set(stub.endpoint, *args, clients)
+                unchanged = index_utils.plan_index_set(stub.endpoint, *args, clients)
+                monkeypatch.setattr(index_utils, "INDEX_SCHEMA_PATH", str(index_file))
+                del stub.requests[:]
+                drifted = index_utils.plan_index_set(stub.endpoint, *args, clients)
+
+        assert [plan.action for plan in unchanged] == [NO_OP] * 4
+        assert "Impact: none" in format_drift_report(unchanged)
+        assert [method for method, _ in stub.requests] == ["GET"] * 4
+        assert [plan.action for plan in drifted] == [UPDATE, NO_OP, NO_OP, NO_OP]
+        report = format_drift_report(drifted)
+        assert "- fields[title]  [index rebuild]" in report
+        assert (
+            "~ fields[text_vector].dimensions: 3072 -> 1536  [index rebuild]" in report
+        )
+        assert "hnswParameters.m: 4 -> 8  [index rebuild]" in report
+        assert "Impact: index rebuild" in report
@@ -0,0 +1,207 @@
+# Copyright (c) Microsoft Corporation.
+# Licensed under the MIT license.
+
+"""
+Unit tests for the streaming fetch-to-upload pipeline in stream_data.py.
+"""
+
+import hashlib
+import os
+import threading
+
+import pytest
+
+import stream_data
+from blob_copy import BlobCopier
+from blob_stub import InMemoryContainerClient
+from fetch_data import DataFetcher
+from stream_data import DestinationSync, PipelineItem, StreamingPipeline
+from upload_data import delete_extraneous_blobs
+
+pytestmark = pytest.mark.unit
+
+
+@pytest.fixture
+def fetcher():
+    return DataFetcher(credential=object(), file_patterns=["*.md"])
+
+
+class TestStreamingPipeline:
+    """Tests for the bounded two-stage pipeline."""
+
+    def test_queue_bounds_the_files_on_disk(self, tmp_path, monkeypatch):
+        destination = InMemoryContainerClient("dest-bound")
+        on_disk, peak = set(), [0]
+        lock = threading.Lock()
+
+        def produce(index):
+            path = tmp_path / f"{index}.md"
+            path.write_bytes(b"x" * index)
+            with lock:
+                on_disk.add(path)
+                peak[0] = max(peak[0], len(on_disk))
+            return [PipelineItem(f"{index}.md", str(path), index)]
+
+        original_remove = os.remove
+
+        def tracking_remove(path):
+            with lock:
+                on_disk.discard(tmp_path / os.path.basename(path))
+            original_remove(path)
+
+        monkeypatch.setattr(stream_data.os, "remove", tracking_remove)
+        pipeline = StreamingPipeline(
+            destination, queue_size=2, fetch_workers=2, upload_workers=1
+        )
+        summary = pipeline.run(lambda i=i: produce(i) for i in range(1, 31))
+
+        assert summary.uploaded == 30
+        assert summary.uploaded_bytes == sum(range(1, 31))
+        # queue + fetch workers + upload worker + the item being handed over
+        assert peak[0] <= 2 + 2 + 1 + 1
+        assert list(tmp_path.iterdir()) == []
+
+    def test_failed_removals_do_not_stop_the_uploads(self, tmp_path, monkeypatch):
+        destination = InMemoryContainerClient("dest-remove")
+
+        def produce(index):
+            path = tmp_path / f"{index}.md"
+            path.write_bytes(b"x")
+            return [PipelineItem(f"{index}.md", str(path), 1)]
+
+        def failing_remove(path):
+            raise PermissionError(path)
+
+        monkeypatch.setattr(stream_data.os, "remove", failing_remove)
+        pipeline = StreamingPipeline(
+            destination, queue_size=1, fetch_workers=1, upload_workers=1
+        )
+        summary = pipeline.run(lambda i=i: produce(i) for i in range(10))
+
+        assert summary.uploaded == 10 and summary.failed == {}
+
+    def test_blob_source_is_spooled_and_uploaded(self, tmp_path, fetcher):
+        source = InMemoryContainerClient("src-spool")
+        source.put("docs/a.md", b"alpha")
+        source.put("docs/sub/b.md", b"beta")
+        source.put("docs/c.pdf", b"pdf")
+        destination = InMemoryContainerClient("dest-spool")
+
+        summary = StreamingPipeline(destination).run(
+            stream_data.blob_tasks(fetcher, source, "docs", str(tmp_path))
+        )
+
+        assert summary.uploaded == 2
+        assert destination.blobs == {"a.md": b"alpha", "sub_b.md": b"beta"}
+        assert list(tmp_path.iterdir()) == []
+
+    def test_blob_source_server_side_copy(self, fetcher):
+        source = InMemoryContainerClient("src-copy")
+        source.put("docs/a.md", b"alpha")
+        source.put("docs/sub/b.md", b"beta")
+        source.put("docs/c.pdf", b"pdf")
+        destination = InMemoryContainerClient("dest-copy")
+
+        summary = BlobCopier(source, destination, poll_interval=0).copy_blobs(
+            stream_data.blob_copy_requests(fetcher, source, "docs")
+        )
+
+        assert summary.uploaded == 2
+        assert destination.blobs == {"a.md": b"alpha", "sub_b.md": b"beta"}
+        assert destination.upload_calls == 0
+
+    def test_github_source_is_checked_out_in_batches(
+        self, tmp_path, bare_repo, fetcher
+    ):
+        destination = InMemoryContainerClient("dest-github")
+
+        summary = StreamingPipeline(destination, fetch_workers=1).run(
+            stream_data.github_tasks(
+                fetcher, bare_repo, "data", str(tmp_path), batch_size=1
+            )
+        )
+
+        assert summary.uploaded == 2
+        assert sorted(destination.blobs) == ["Intro.MD", "manuals_guide.md"]
+        # The digests let a later upload_data.py --sync skip the streamed files
+        assert bytes(destination.content_md5["Intro.MD"]) == (
+            hashlib.md5(b"# Intro").digest()
+        )
+
+
+class TestDestinationSync:
+    """Tests for the --sync and --delete_extraneous behaviour of the streaming pipeline."""
+
+    def test_blob_source_skips_unchanged_blobs_before_spooling(self, tmp_path, fetcher):
+        source = InMemoryContainerClient("src-sync")
+        source.put("docs/a.md", b"alpha")
+        source.put("docs/b.md", b"beta v2")
+        destination = InMemoryContainerClient("dest-sync")
+        destination.put("a.md", b"alpha")
+        destination.put("b.md", b"beta")
+        destination.put("old.md", b"gone")
+        destination.put("keep.pdf", b"pdf")
+        sync = DestinationSync(destination)
+
+        summary = StreamingPipeline(destination, sync=sync).run(
+            stream_data.blob_tasks(fetcher, source, "docs", str(tmp_path), sync)
+        )
+        delete_extraneous_blobs(
+            destination, sync.remote_blobs, sync.source_names, ["*.md"], summary
+        )
+
+        assert (summary.uploaded, summary.skipped, summary.deleted) == (1, 1, 1)
+        assert summary.skipped_bytes == len(b"alpha")
+        assert source.download_calls == 1
+        assert destination.blobs == {
+            "a.md": b"alpha",
+            "b.md": b"beta v2",
+            "keep.pdf": b"pdf",
+        }
+
+    def test_fetched_files_without_md5_are_hashed_and_skipped(
+        self, tmp_path, bare_repo, fetcher
+    ):
+        destination = InMemoryContainerClient("dest-sync-github")
+        destination.put("Intro.MD", b"# Intro")
+        sync = DestinationSync(destination)
+
+        summary = StreamingPipeline(destination, fetch_workers=1, sync=sync).run(
+            stream_data.github_tasks(
+                fetcher, bare_repo, "data", str(tmp_path), sync=sync
+            )
+        )
+
+        assert (summary.uploaded, summary.skipped) == (1, 1)
+        assert destination.upload_calls == 1
+        assert sync.source_names == {"Intro.MD", "manuals_guide.md"}
+
+    def test_failed_fetches_are_still_source_files(self, tmp_path, fetcher):
+        source = InMemoryContainerClient("src-sync-fail")
+        source.put("docs/a.md", b"alpha")
+        source.fail_on_download_call = 1
+        destination = InMemoryContainerClient("dest-sync-fail")
+        destination.put("a.md", b"old alpha")
+        sync = DestinationSync(destination)
+
+        summary = StreamingPipeline(destination, sync=sync).run(
+            stream_data.blob_tasks(fetcher, source, "docs", str(tmp_path), sync)
+        )
+
+        assert summary.failed and "a.md" in sync.source_names
+
+    def test_server_side_copy_reuses_the_listing(self, fetcher):
+        source = InMemoryContainerClient("src-sync-copy")
+        source.put("docs/a.md", b"alpha")
+        source.put("docs/b.md", b"beta")
+        destination = InMemoryContainerClient("dest-sync-copy")
+        destination.put("a.md", b"alpha")
+        sync = DestinationSync(destination)
+
+        summary = BlobCopier(source, destination, poll_interval=0).copy_blobs(
+            stream_data.blob_copy_requests(fetcher, source, "docs", sync),
+            sync.remote_blobs,
+        )
+
+        assert (summary.uploaded, sync.skipped) == (1, 1)
+        assert len(destination.copy_calls) == 1
@@ -0,0 +1,224 @@
+# Copyright (c) Microsoft Corporation.
+# Licensed under the MIT license.
+
+"""
+Unit tests for the upload engine in upload_data.py.
+"""
+
+import threading
+import time
+
+import pytest
+
+import upload_data
+from blob_stub import InMemoryContainerClient
+
+pytestmark = pytest.mark.unit
+
+
+def _write_files(root, files):
+    for relative_path, content in files.items():
+        path = root / relative_path
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_bytes(content)
+
+
+class TestConcurrentUpload:
+    """Tests for the bounded-worker upload engine."""
+
+    def test_uploads_matching_files_with_flat_names(self, tmp_path):
+        _write_files(
+            tmp_path,
+            {"a.md": b"alpha", "sub/b.md": b"beta", "sub/c.pdf": b"gamma"},
+        )
+        container = InMemoryContainerClient()
+
+        summary = upload_data.upload_files_to_container(
+            container, str(tmp_path), ["*.md"], max_workers=4
+        )
+
+        assert container.blobs == {"a.md": b"alpha", "sub_b.md": b"beta"}
+        assert summary.uploaded == 2
+        assert summary.uploaded_bytes == len(b"alpha") + len(b"beta")
+        assert summary.failed == {}
+
+    def test_collects_per_file_errors(self, tmp_path):
+        _write_files(tmp_path, {"ok.md": b"ok", "bad.md": b"bad"})
+        container = InMemoryContainerClient(fail_on=["bad.md"])
+
+        summary = upload_data.upload_files_to_container(container, str(tmp_path))
+
+        assert summary.uploaded == 1
+        assert list(summary.failed) == ["bad.md"]
+        assert "Simulated failure" in summary.failed["bad.md"]
+
+
+class TestByteBudget:
+    """Tests for the in-flight byte budget."""
+
+    def test_oversized_request_is_capped(self):
+        budget = upload_data.ByteBudget(10)
+        assert budget.acquire(100) == 10
+        budget.release(10)
+
+    def test_blocks_until_bytes_are_released(self):
+        budget = upload_data.ByteBudget(10)
+        reserved = budget.acquire(8)
+        acquired = threading.Event()
+
+        def waiter():
+            budget.release(budget.acquire(5))
+            acquired.set()
+
+        thread = threading.Thread(target=waiter)
+        thread.start()
+        time.sleep(0.05)
+        assert not acquired.is_set()
+
+        budget.release(reserved)
+        thread.join(timeout=1)
+        assert acquired.is_set()
+
+
+class TestDeltaSync:
+    """Tests for the content-hash delta sync mode."""
+
+    def test_skips_identical_blobs_and_uploads_changed_ones(self, tmp_path):
+        _write_files(
+            tmp_path, {"same.md": b"same", "changed.md": b"new", "added.md": b"add"}
+        )
+        container = InMemoryContainerClient()
+        container.put("same.md", b"same")
+        container.put("changed.md", b"old")
+
+        summary = upload_data.upload_files_to_container(
+            container, str(tmp_path), sync=True
+        )
+
+        assert summary.skipped == 1
+        assert summary.skipped_bytes == len(b"same")
+        assert summary.uploaded == 2
+        assert container.blobs["changed.md"] == b"new"
+        assert container.content_md5["added.md"] is not None
+
+    def test_blob_without_md5_is_refreshed_once(self, tmp_path):
+        _write_files(tmp_path, {"doc.md": b"content"})
+        container = InMemoryContainerClient()
+        container.put("doc.md", b"content", with_md5=False)
+
+        first = upload_data.upload_files_to_container(
+            container, str(tmp_path), sync=True
+        )
+        second = upload_data.upload_files_to_container(
+            container, str(tmp_path), sync=True
+        )
+
+        assert (first.uploaded, second.uploaded, second.skipped) == (1, 0, 1)
+
+    def test_delete_extraneous_only_prunes_matching_blobs(self, tmp_path):
+        _write_files(tmp_path, {"keep.md": b"keep"})
+        container = InMemoryContainerClient()
+        container.put("keep.md", b"keep")
+        container.put("gone.md", b"gone")
+        container.put("other.pdf", b"pdf")
+
+        summary = upload_data.upload_files_to_container(
+            container, str(tmp_path), ["*.md"], sync=True, delete_extraneous=True
+        )
+
+        assert summary.deleted == 1
+        assert sorted(container.blobs) == ["keep.md", "other.pdf"]
+
+    def test_soft_delete_flags_extraneous_blobs_until_they_come_back(self, tmp_path):
+        _write_files(tmp_path, {"keep.md": b"keep"})
+        container = InMemoryContainerClient()
+        container.put("keep.md", b"keep")
+        container.put("gone.md", b"gone")
+
+        def sync():
+            return upload_data.upload_files_to_container(
+                container,
+                str(tmp_path),
+                ["*.md"],
+                sync=True,
+                delete_extraneous=True,
+                soft_delete=True,
+            )
+
+        first = sync()
+        second = sync()
+
+        assert (first.deleted, first.marked_deleted) == (0, 1)
+        assert sorted(container.blobs) == ["gone.md", "keep.md"]
+        assert container.metadata["gone.md"] == {"IsDeleted": "true"}
+        # Blobs already flagged are left untouched
+        assert second.marked_deleted == 0 and container.metadata_calls == 1
+
+        # A restored file is uploaded again even with the same content, clearing the flag
+        _write_files(tmp_path, {"gone.md": b"gone"})
+        third = sync()
+
+        assert third.uploaded == 1 and third.skipped == 1
+        assert container.metadata["gone.md"] == {}
+
+    def test_manifest_is_not_uploaded(self, tmp_path):
+        _write_files(tmp_path, {"doc.md": b"content"})
+        container = InMemoryContainerClient()
+
+        upload_data.upload_files_to_container(container, str(tmp_path), sync=True)
+        upload_data.upload_files_to_container(container, str(tmp_path), sync=True)
+
+        assert list(container.blobs) == ["doc.md"]
+
+
+class TestBlockUpload:
+    """Tests for the per-file strategy choosing between single put and staged blocks."""
+
+    SETTINGS = upload_data.BlockSettings(
+        single_put_size=8, block_size=4, block_concurrency=3, block_retries=2
+    )
+
+    def test_small_files_single_put_and_large_files_in_blocks(self, tmp_path):
+        large = bytes(range(30))
+        _write_files(tmp_path, {"small.md": b"tiny", "large.md": large})
+        container = InMemoryContainerClient()
+
+        summary = upload_data.upload_files_to_container(
+            container, str(tmp_path), sync=True, block_settings=self.SETTINGS
+        )
+
+        assert container.blobs == {"small.md": b"tiny", "large.md": large}
+        assert container.upload_calls == 1
+        assert container.stage_calls == 8
+        assert (summary.blocks_staged, summary.blocks_retried) == (8, 0)
+        assert set(summary.file_throughput) == {"small.md", "large.md"}
+        # The MD5 of a block upload is committed too, so the next sync skips the file
+        assert container.content_md5["large.md"] is not None
+
+    def test_failed_block_is_retried_alone(self, tmp_path, monkeypatch):
+        monkeypatch.setattr(upload_data, "BLOCK_RETRY_DELAY", 0)
+        _write_files(tmp_path, {"large.md": b"x" * 20})
+        container = InMemoryContainerClient()
+        container.fail_stage_block = {"block-000002": 2}
+
+        summary = upload_data.upload_files_to_container(
+            container, str(tmp_path), block_settings=self.SETTINGS
+        )
+
+        assert summary.failed == {}
+        assert summary.blocks_retried == 2
+        assert container.stage_calls == 5
+        assert container.blobs["large.md"] == b"x" * 20
+
+    def test_file_fails_once_block_retries_are_exhausted(self, tmp_path, monkeypatch):
+        monkeypatch.setattr(upload_data, "BLOCK_RETRY_DELAY", 0)
+        _write_files(tmp_path, {"large.md": b"x" * 20})
+        container = InMemoryContainerClient()
+        container.fail_stage_block = {"block-000001": 3}
+
+        summary = upload_data.upload_files_to_container(
+            container, str(tmp_path), block_settings=self.SETTINGS
+        )
+
+        assert list(summary.failed) == ["large.md"]
+        assert "large.md" not in container.blobs
@@ -0,0 +1,231 @@
+# Copyright (c) Microsoft Corporation.
+# Licensed under the MIT license.
+
+"""
+Unit tests for the vector storage profiles in vector_storage.py.
+"""
+
+import json
+
+import pytest
+from azure.core.credentials import AzureKeyCredential
+
+import index_utils
+from benchmark_hnsw import (
+    NumpyHnsw,
+    exact_neighbors,
+    recommend,
+    save_profile,
+    sweep,
+    synthetic_embeddings,
+)
+from search_stub import SearchServiceStub
+from vector_storage import (
+    VectorStorageProfile,
+    apply_to_index,
+    apply_to_skillset,
+    check_dimensions,
+    estimate_chunk_bytes,
+    load_vector_profiles,
+)
+
+pytestmark = pytest.mark.unit
+
+ARGS = (
+    "docs",
+    "https://openai.example.com",
+    "sub",
+    "rg",
+    "storage",
+    "data",
+    AzureKeyCredential("key"),
+)
+
+
+def provision(stub, vector_profile):
+    with index_utils.SearchClients(
+        stub.endpoint, AzureKeyCredential("key"), session=stub.session()
+    ) as clients:
+        index_utils.provision_index_set(
+            stub.endpoint, *ARGS, clients, vector_profile=vector_profile
+        )
+        return index_utils.plan_index_set(
+            stub.endpoint, *ARGS, clients, vector_profile="default"
+        )
+
+
+def render(vector_profile):
+    profile = load_vector_profiles()[vector_profile]
+    index = index_utils._render_index(
+        "docs-index", index_utils.INDEX_SCHEMA_PATH, "https://openai", "default"
+    )
+    skillset = index_utils._render_skillset(
+        "docs-skills",
+        "docs-index",
+        index_utils.SKILLSET_SCHEMA_PATH,
+        "https://openai",
+        "default",
+    )
+    return apply_to_index(index, profile), apply_to_skillset(skillset, profile)
+
+
+class TestVectorProfiles:
+    """Tests for applying the storage profiles to the index and the skillset."""
+
+    @pytest.mark.parametrize("vector_profile", list(load_vector_profiles()))
+    def test_index_and_skillset_stay_consistent(self, vector_profile):
+        profile = load_vector_profiles()[vector_profile]
+
+        with SearchServiceStub() as stub:
+            plans = provision(stub, vector_profile)
+
+        field = stub.resources["indexes"]["docs-index"]["fields"][-1]
+        skill = stub.resources["skillsets"]["docs-skills"]["skills"][-1]
+        vector_search = stub.resources["indexes"]["docs-index"]["vectorSearch"]
+        assert field["dimensions"] == (profile.dimensions or 3072)
+        assert skill.get("dimensions") == profile.dimensions
+        assert field["type"] == f"Collection({profile.vector_type or 'Edm.Single'})"
+        assert field["stored"] is profile.stored
+        compressions = vector_search.get("compressions") or []
+        assert [entry["kind"] for entry in compressions] == (
+            [profile.compression] if profile.compression else []
+        )
+        if profile.compression:
+            assert compressions[0]["rerankWithOriginalVectors"] is True
+            assert vector_search["profiles"][0]["compression"] == (
+                compressions[0]["name"]
+            )
+        # Moving to another profile requires an index rebuild
+        if vector_profile != "default":
+            assert plans[0].impact == "index rebuild"
+
+    def test_changing_the_profile_requires_an_explicit_rebuild(self):
+        with SearchServiceStub() as stub:
+            provision(stub, "default")
+            stub.indexer_documents = 0
+            del stub.requests[:]
+            with index_utils.SearchClients(
+                stub.endpoint, AzureKeyCredential("key"), session=stub.session()
+            ) as clients:
+                with pytest.raises(RuntimeError, match="--rebuild_index"):
+                    index_utils.provision_index_set(
+                        stub.endpoint, *ARGS, clients, vector_profile="scalar-1024"
+                    )
+                # Nothing was changed, the skillset included
+                assert {method for method, _ in stub.requests} == {"GET"}
+
+                index_utils.provision_index_set(
+                    stub.endpoint,
+                    *ARGS,
+                    clients,
+                    vector_profile="scalar-1024",
+                    rebuild_index=True,
+                )
+
+        assert ("DELETE", "/indexes('docs-index')") in [
+            (method, path.split("?")[0]) for method, path in stub.requests
+        ]
+        assert (
+            stub.resources["indexes"]["docs-index"]["fields"][-1]["dimensions"] == 1024
+        )
+        assert stub.actions[-2:] == [
+            ("indexers", "docs-indexer", "reset"),
+            ("indexers", "docs-indexer", "run"),
+        ]
+
+    def test_non_stored_vectors_are_not_retrievable(self):
+        index, _ = render("half-256")
+
+        field = index["fields"][-1]
+        assert field["stored"] is False and field["retrievable"] is False
+        assert field["type"] == "Collection(Edm.Half)"
+
+    def test_invalid_profiles_are_rejected(self):
+        index, skillset = render("default")
+
+        with pytest.raises(ValueError, match="only 3072"):
+            apply_to_index(index, VectorStorageProfile("big", dimensions=4096))
+        skillset["skills"][-1]["modelName"] = "text-embedding-ada-002"
+        with pytest.raises(ValueError, match="cannot shorten"):
+            apply_to_skillset(skillset, VectorStorageProfile("short", dimensions=256))
+        with pytest.raises(ValueError, match="compression 'pq'"):
+            VectorStorageProfile.from_dict("pq", {"compression": "pq"})
+        with pytest.raises(ValueError, match="Unknown properties"):
+            VectorStorageProfile.from_dict("typo", {"dimension": 256})
+
+    def test_mismatched_dimensions_are_detected(self):
+        index, skillset = render("scalar-1024")
+        check_dimensions(index, skillset)
+
+        del skillset["skills"][-1]["dimensions"]
+        with pytest.raises(ValueError, match="produces 3072 dimensions"):
+            check_dimensions(index, skillset)
+
+
+class TestSizing:
+    """Tests for the index size estimate."""
+
+    def test_compression_and_truncation_shrink_the_vector_index(self):
+        profiles = load_vector_profiles()
+        sizes = {
+            name: estimate_chunk_bytes(profile, 3072, hnsw_m=4, text_bytes=1000)
+            for name, profile in profiles.items()
+        }
+
+        # 3072 float32 values plus 8 neighbor links of 4 bytes
+        assert sizes["default"].vector_index_bytes == 3072 * 4 + 32
+        assert sizes["scalar"].vector_index_bytes == 3072 + 32
+        assert sizes["binary"].vector_index_bytes == 3072 // 8 + 32
+        assert sizes["scalar-1024"].vector_index_bytes == 1024 + 32
+        # Full precision vectors are still kept for rescoring
+        assert sizes["binary"].original_vector_bytes == 3072 * 4
+        assert sizes["half-256"].stored_vector_bytes == 0
+        assert sizes["half-256"].total_bytes == 256 * 2 + 32 + 512 + 1000
+        assert sizes["compact"].total_bytes < sizes["scalar-1024"].total_bytes
+
+
+class TestHnswSweep:
+    """Tests for the HNSW parameter sweep of benchmark_hnsw.py."""
+
+    def test_numpy_index_finds_the_exact_neighbors_with_a_large_ef(self):
+        vectors = synthetic_embeddings(300, 32)
+        queries = synthetic_embeddings(5, 32, seed=1)
+
+        index = NumpyHnsw(vectors, m=4, ef_construction=100)
+
+        for query, expected in zip(queries, exact_neighbors(vectors, queries, 5)):
+            assert set(index.search(query, 5, ef_search=300)) == set(expected)
+        # The base layer keeps up to 2 * m links per node
+        assert max(len(links) for links in index.layers[0].values()) <= 8
+
+    def test_cheapest_combination_reaching_the_target_is_recommended(self):
+        embeddings = synthetic_embeddings(420, 32)
+
+        results = sweep(embeddings[:400], embeddings[400:], 10, [4, 8], [100], [100])
+        parameters = recommend(results, target_recall=0.9).hnsw_parameters()
+
+        assert len(results) == 2
+        assert all(result.recall > 0.9 for result in results)
+        assert parameters == {"m": 4, "efConstruction": 100, "efSearch": 100}
+        assert results[1].memory_bytes > results[0].memory_bytes
+        unreachable = recommend(results, target_recall=1.1)
+        assert unreachable.recall == max(result.recall for result in results)
+
+    def test_saved_parameters_are_applied_to_the_index(self, tmp_path):
+        profiles_file = tmp_path / "vectorProfiles.json"
+        profiles_file.write_text(json.dumps({"scalar": {"stored": False}}))
+
+        save_profile("scalar", {"m": 8, "efSearch": 200}, str(profiles_file))
+        profile = load_vector_profiles(str(profiles_file))["scalar"]
+        index, _ = render("default")
+        apply_to_index(index, profile)
+
+        assert profile.stored is False
+        assert index["vectorSearch"]["algorithms"][0]["hnswParameters"] == {
+            "metric": "cosine",
+            "m": 8,
+            "efConstruction": 400,
+            "efSearch": 200,
+        }
+        with pytest.raises(ValueError, match="m between 4 and 10"):
+            VectorStorageProfile.from_dict("wide", {"hnswParameters": {"m": 64}})
@@ -5,21 +5,37 @@
 Upload data files from local directory to Azure Blob Storage.
 
 By default, uploads all files in the specified directory. Use --file_pattern to filter specific file types.
+Files are uploaded in parallel; use --max_workers and --max_inflight_mb to bound the concurrency and memory.
 
 Usage:
     python upload_data.py --storage_account_name <account> --container_name <container> --data_path <local_path>
     python upload_data.py --storage_account_name <account> --container_name <container> --data_path <local_path> --file_pattern "*.pdf,*.docx"
+    python upload_data.py --storage_account_name <account> --container_name <container> --data_path <local_path> --max_workers 16
+    python upload_data.py --storage_account_name <account> --container_name <container> --data_path <local_path> --sync --delete_extraneous
+    python upload_data.py --storage_account_name <account> --container_name <container> --data_path <local_path> --sync --delete_extraneous --soft_delete
 """
 
 import argparse
 import fnmatch
 import logging
 import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
 from pathlib import Path
-from typing import List, Optional
+from typing import Dict, List, Optional, Set
 
 from azure.identity import DefaultAzureCredential, ManagedIdentityCredential
-from azure.storage.blob import BlobServiceClient
+from azure.storage.blob import BlobServiceClient, ContainerClient, ContentSettings
+from common_utils import (
+    SOFT_DELETE_MARKER_VALUE,
+    SOFT_DELETE_METADATA_KEY,
+    format_throughput,
+    non_negative_int,
+    positive_int,
+)
+from data_manifest import PARTIAL_SUFFIX, RESERVED_FILE_NAMES, DigestManifest
 
 logger = logging.getLogger(__name__)
 
@@ -38,6 +54,16 @@ console_handler.setFormatter(formatter)
 logger.addHandler(console_handler)
 
 STORAGE_ACCOUNT_URL = "https://{storage_account_name}.blob.core.windows.net"
+DEFAULT_MAX_WORKERS = 8
+DEFAULT_MAX_INFLIGHT_MB = 256
+DEFAULT_MAX_INFLIGHT_BYTES = DEFAULT_MAX_INFLIGHT_MB * 1024 * 1024
+# Files up to this size are sent with a single put, larger ones in staged blocks
+DEFAULT_SINGLE_PUT_MB = 16
+DEFAULT_BLOCK_SIZE_MB = 8
+DEFAULT_BLOCK_CONCURRENCY = 4
+DEFAULT_BLOCK_RETRIES = 3
+# Delay before the first retry of a block, doubled on each further attempt
+BLOCK_RETRY_DELAY = 1.0
 
 
 def matches_pattern(filename: str, file_patterns: List[str]) -> bool:
@@ -57,13 +83,482 @@ def matches_pattern(filename: str, file_patterns: List[str]) -> bool:
     return False
 
 
+def is_data_file(file: Path, local_folder: str) -> bool:
+    """
+    Check if a file found under a local data folder is part of the data.
+
+    The manifest, the checkpoint and the partial downloads of fetch_data.py are not, nor is
+    anything under a .git directory: the folder may be a git checkout left in place by
+    fetch_data.py.
+
+    Args:
+        file: Path of the file
+        local_folder: Data folder the file was found under
+
+    Returns:
+        True if the file is part of the data, False otherwise
+    """
+    if file.name in RESERVED_FILE_NAMES or file.name.endswith(PARTIAL_SUFFIX):
+        return False
+    return ".git" not in file.relative_to(local_folder).parts
+
+
+class ByteBudget:
+    """
+    Bound the number of bytes that are being uploaded at the same time.
+
+    A file larger than the whole budget is still allowed through, but only when
+    nothing else is in flight, so a single huge file never deadlocks the upload.
+    """
+
+    def __init__(self, limit: int):
+        """
+        Initialize the budget.
+
+        Args:
+            limit: Maximum number of bytes allowed in flight
+        """
+        self._limit = limit
+        self._in_use = 0
+        self._condition = threading.Condition()
+
+    def acquire(self, size: int) -> int:
+        """
+        Block until the requested number of bytes fits into the budget.
+
+        Args:
+            size: Number of bytes to reserve
+
+        Returns:
+            The number of bytes actually reserved, to be passed to release()
+        """
+        size = min(size, self._limit)
+        with self._condition:
+            while self._in_use and self._in_use + size > self._limit:
+                self._condition.wait()
+            self._in_use += size
+        return size
+
+    def release(self, size: int):
+        """
+        Return previously reserved bytes to the budget.
+
+        Args:
+            size: Number of bytes returned by acquire()
+        """
+        with self._condition:
+            self._in_use -= size
+            self._condition.notify_all()
+
+
+@dataclass
+class UploadSummary:
+    """Outcome of an upload run."""
+
+    uploaded: int = 0
+    uploaded_bytes: int = 0
+    skipped: int = 0
+    skipped_bytes: int = 0
+    deleted: int = 0
+    # Blobs flagged with the soft delete metadata instead of being deleted
+    marked_deleted: int = 0
+    failed: Dict[str, str] = field(default_factory=dict)
+    elapsed: float = 0.0
+    blocks_staged: int = 0
+    blocks_retried: int = 0
+    # Effective throughput in MB/s of each uploaded file
+    file_throughput: Dict[str, float] = field(default_factory=dict)
+
+
+@dataclass
+class BlockSettings:
+    """Per-file upload strategy: single put for small files, staged blocks for large ones."""
+
+    single_put_size: int = DEFAULT_SINGLE_PUT_MB * 1024 * 1024
+    block_size: int = DEFAULT_BLOCK_SIZE_MB * 1024 * 1024
+    block_concurrency: int = DEFAULT_BLOCK_CONCURRENCY
+    block_retries: int = DEFAULT_BLOCK_RETRIES
+
+
+@dataclass
+class FileUploadStats:
+    """Outcome of the upload of a single file."""
+
+    size: int = 0
+    blocks_staged: int = 0
+    blocks_retried: int = 0
+    elapsed: float = 0.0
+
+    @property
+    def throughput(self) -> float:
+        """Effective throughput in MB/s."""
+        return self.size / (1024 * 1024) / self.elapsed if self.elapsed > 0 else 0.0
+
+
+def list_remote_blobs(blob_container_client: ContainerClient) -> Dict[str, object]:
+    """
+    List the container once and index the blob properties by name.
+
+    Args:
+        blob_container_client: Client of the container to list
+
+    Returns:
+        Dictionary of blob name to blob properties, including the blob metadata
+    """
+    return {
+        blob.name: blob
+        for blob in blob_container_client.list_blobs(include=["metadata"])
+    }
+
+
+def is_marked_deleted(blob) -> bool:
+    """
+    Check whether a blob is flagged as deleted with the soft delete metadata.
+
+    Args:
+        blob: Properties of the blob, listed with its metadata
+
+    Returns:
+        True if the blob carries the soft delete marker
+    """
+    metadata = getattr(blob, "metadata", None) or {}
+    return metadata.get(SOFT_DELETE_METADATA_KEY) == SOFT_DELETE_MARKER_VALUE
+
+
+def is_blob_up_to_date(blob, size: int, md5: bytes) -> bool:
+    """
+    Check whether a remote blob already holds the content of a local file.
+
+    Args:
+        blob: Properties of the remote blob, or None if it does not exist
+        size: Size of the local file
+        md5: MD5 digest of the local file
+
+    Returns:
+        True if the blob has the same size and content MD5 and is not flagged as deleted,
+        False otherwise
+    """
+    # A flagged blob is uploaded again to clear the flag, since uploads replace the metadata
+    if blob is None or blob.size != size or is_marked_deleted(blob):
+        return False
+    remote_md5 = blob.content_settings.content_md5 if blob.content_settings else None
+    # Blobs uploaded in blocks by other tools may have no MD5; they are refreshed once
+    return bool(remote_md5) and bytes(remote_md5) == md5
+
+
+def get_blob_name(file: Path, local_folder: str) -> str:
+    """
+    Build a flat blob name from the path of a file relative to the local folder.
+
+    Args:
+        file: Path of the file to upload
+        local_folder: Root folder of the upload
+
+    Returns:
+        The blob name, with directory separators replaced by "_"
+    """
+    # construct blob name from file path
+    # everything rather than local_folder
+    file_subpath = os.path.relpath(file, start=local_folder)
+
+    # generate a unique name of the file
+    return file_subpath.replace(os.sep, "_")
+
+
+def get_container_client(
+    credential: DefaultAzureCredential,
+    storage_account_name: str,
+    storage_container: str,
+) -> ContainerClient:
+    """
+    Create a container client, creating the container if it does not exist yet.
+
+    Args:
+        credential: Azure credential for authentication
+        storage_account_name: Name of the Azure Storage account
+        storage_container: Name of the container to upload to
+
+    Returns:
+        The container client
+    """
+    account_url = STORAGE_ACCOUNT_URL.format(storage_account_name=storage_account_name)
+    blob_service_client = BlobServiceClient(
+        account_url=account_url, credential=credential
+    )
+    blob_container_client = blob_service_client.get_container_client(storage_container)
+
+    if not blob_container_client.exists():
+        logger.info(f"Creating {storage_container} container.")
+        blob_container_client.create_container()
+        logger.info("Done.")
+
+    return blob_container_client
+
+
+def stage_block_with_retry(
+    blob_client,
+    file: Path,
+    block_id: str,
+    offset: int,
+    length: int,
+    retries: int,
+) -> int:
+    """
+    Read one block of a file and stage it, retrying only this block on failure.
+
+    Args:
+        blob_client: Client of the destination blob
+        file: Path of the file to upload
+        block_id: Id of the block
+        offset: Offset of the block in the file
+        length: Length of the block
+        retries: Number of retries after the first attempt
+
+    Returns:
+        The number of retries that were needed
+    """
+    with open(file=str(file), mode="rb") as data:
+        data.seek(offset)
+        block = data.read(length)
+    for attempt in range(retries + 1):
+        try:
+            blob_client.stage_block(block_id=block_id, data=block, length=length)
+            return attempt
+        except Exception as e:
+            if attempt == retries:
+                raise
+            delay = BLOCK_RETRY_DELAY * 2**attempt
+            logger.warning(
+                f"Retrying block {block_id} of {file} in {delay:.0f}s after error: {e}"
+            )
+            time.sleep(delay)
+
+
+def upload_file(
+    blob_container_client: ContainerClient,
+    file: Path,
+    file_name: str,
+    md5: Optional[bytes] = None,
+    block_settings: Optional[BlockSettings] = None,
+) -> FileUploadStats:
+    """
+    Upload a single file, streaming it from disk.
+
+    Files up to the single put size are sent in one request. Larger files are split into
+    blocks that are staged in parallel and committed at the end, so a failed request only
+    resends one block instead of the whole file.
+
+    Args:
+        blob_container_client: Client of the destination container
+        file: Path of the file to upload
+        file_name: Name of the destination blob
+        md5: MD5 digest of the file, stored on the blob so later syncs can skip it
+        block_settings: Upload strategy (default: BlockSettings())
+
+    Returns:
+        Size, block counters and elapsed time of the upload
+    """
+    settings = block_settings or BlockSettings()
+    logger.info(f"Ready to copy: {str(file)} to {file_name}.")
+    content_settings = ContentSettings(content_md5=bytearray(md5)) if md5 else None
+    stats = FileUploadStats(size=os.path.getsize(file))
+    started = time.monotonic()
+
+    if stats.size <= settings.single_put_size:
+        with open(file=str(file), mode="rb") as data:
+            blob_container_client.upload_blob(
+                name=file_name,
+                data=data,
+                overwrite=True,
+                content_settings=content_settings,
+            )
+    else:
+        blob_client = blob_container_client.get_blob_client(file_name)
+        offsets = range(0, stats.size, settings.block_size)
+        # Block ids must have the same length within a blob
+        block_ids = [f"block-{index:06d}" for index in range(len(offsets))]
+
+        def stage(block_id: str, offset: int) -> int:
+            length = min(settings.block_size, stats.size - offset)
+            return stage_block_with_retry(
+                blob_client, file, block_id, offset, length, settings.block_retries
+            )
+
+        with ThreadPoolExecutor(max_workers=settings.block_concurrency) as executor:
+            stats.blocks_retried = sum(executor.map(stage, block_ids, offsets))
+        blob_client.commit_block_list(block_ids, content_settings=content_settings)
+        stats.blocks_staged = len(block_ids)
+
+    stats.elapsed = time.monotonic() - started
+    details = (
+        f", {stats.blocks_staged} blocks, {stats.blocks_retried} retried"
+        if stats.blocks_staged
+        else ""
+    )
+    logger.info(
+        f"Uploaded {file_name} ({stats.size / (1024 * 1024):.2f} MB "
+        f"at {stats.throughput:.2f} MB/s{details})."
+    )
+    return stats
+
+
+def delete_extraneous_blobs(
+    blob_container_client: ContainerClient,
+    remote_blobs: Dict[str, object],
+    kept_names: Set[str],
+    file_patterns: List[str],
+    summary: UploadSummary,
+    soft_delete: bool = False,
+):
+    """
+    Delete the blobs matching the patterns that no longer have a source file.
+
+    Args:
+        blob_container_client: Client of the container
+        remote_blobs: Blob properties by name, as listed by list_remote_blobs
+        kept_names: Blob names of the source files
+        file_patterns: List of file patterns the deleted blobs must match
+        summary: Summary updated with the deleted blobs and the failures
+        soft_delete: Flag the extraneous blobs with the soft delete metadata instead of
+            deleting them, so the indexer can remove their documents
+    """
+    for blob_name in sorted(remote_blobs):
+        if blob_name in kept_names or not matches_pattern(blob_name, file_patterns):
+            continue
+        try:
+            if not soft_delete:
+                logger.info(f"Deleting extraneous blob {blob_name}.")
+                blob_container_client.delete_blob(blob_name)
+                summary.deleted += 1
+            elif not is_marked_deleted(remote_blobs[blob_name]):
+                logger.info(f"Marking extraneous blob {blob_name} as deleted.")
+                metadata = dict(remote_blobs[blob_name].metadata or {})
+                metadata[SOFT_DELETE_METADATA_KEY] = SOFT_DELETE_MARKER_VALUE
+                blob_container_client.get_blob_client(blob_name).set_blob_metadata(
+                    metadata
+                )
+                summary.marked_deleted += 1
+        except Exception as e:
+            logger.error(f"Exception deleting blob name {blob_name}: {e}")
+            summary.failed[blob_name] = str(e)
+
+
+def upload_files_to_container(
+    blob_container_client: ContainerClient,
+    local_folder: str,
+    file_patterns: Optional[List[str]] = None,
+    max_workers: int = DEFAULT_MAX_WORKERS,
+    max_inflight_bytes: int = DEFAULT_MAX_INFLIGHT_BYTES,
+    sync: bool = False,
+    delete_extraneous: bool = False,
+    block_settings: Optional[BlockSettings] = None,
+    soft_delete: bool = False,
+) -> UploadSummary:
+    """
+    Upload files from local folder to an existing container using a bounded pool of workers.
+
+    Args:
+        blob_container_client: Client of the destination container
+        local_folder: Local directory containing files to upload
+        file_patterns: List of file patterns to match (default: ['*'] for all files)
+        max_workers: Number of files uploaded in parallel
+        max_inflight_bytes: Upper bound of the file bytes being uploaded at the same time
+        sync: Upload only files that are new or differ from the blob in size or MD5;
+            digests are cached in the manifest of the local folder
+        delete_extraneous: Delete blobs matching the patterns that no longer exist locally
+        block_settings: Per-file upload strategy (default: BlockSettings())
+        soft_delete: With delete_extraneous, flag the extraneous blobs with the soft delete
+            metadata instead of deleting them, so the indexer can remove their documents
+
+    Returns:
+        Summary with the uploaded, skipped and deleted files, the failures and the elapsed time
+    """
+    if file_patterns is None:
+        file_patterns = ["*"]  # Default to all files
+
+    manifest = DigestManifest(local_folder) if sync else None
+
+    # The container is listed once so each file is compared without extra round trips
+    remote_blobs = (
+        list_remote_blobs(blob_container_client) if sync or delete_extraneous else {}
+    )
+    local_names = set()
+
+    summary = UploadSummary()
+    budget = ByteBudget(max_inflight_bytes)
+    # Keep the number of queued files bounded so huge folders are not materialized up front
+    pending = threading.BoundedSemaphore(max_workers * 2)
+    lock = threading.Lock()
+    started = time.monotonic()
+
+    def upload(file: Path, file_name: str, size: int, reserved: int):
+        try:
+            md5 = manifest.get_md5(file) if manifest else None
+            if sync and is_blob_up_to_date(remote_blobs.get(file_name), size, md5):
+                logger.debug(f"Skipping unchanged file {file_name}.")
+                with lock:
+                    summary.skipped += 1
+                    summary.skipped_bytes += size
+                return
+            stats = upload_file(
+                blob_container_client, file, file_name, md5, block_settings
+            )
+            with lock:
+                summary.uploaded += 1
+                summary.uploaded_bytes += size
+                summary.blocks_staged += stats.blocks_staged
+                summary.blocks_retried += stats.blocks_retried
+                summary.file_throughput[file_name] = stats.throughput
+        except Exception as e:
+            logger.error(f"Exception uploading file name {file_name}: {e}")
+            with lock:
+                summary.failed[file_name] = str(e)
+        finally:
+            budget.release(reserved)
+            pending.release()
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        for file in Path(local_folder).rglob("*"):
+            if not is_data_file(file, local_folder):
+                continue
+            if file.is_file() and matches_pattern(file.name, file_patterns):
+                file_name = get_blob_name(file, local_folder)
+                local_names.add(file_name)
+                size = file.stat().st_size
+                pending.acquire()
+                reserved = budget.acquire(size)
+                executor.submit(upload, file, file_name, size, reserved)
+
+    if manifest:
+        manifest.close()
+
+    if delete_extraneous:
+        delete_extraneous_blobs(
+            blob_container_client,
+            remote_blobs,
+            local_names,
+            file_patterns,
+            summary,
+            soft_delete,
+        )
+
+    summary.elapsed = time.monotonic() - started
+    return summary
+
+
 def upload_data_files(
     credential: DefaultAzureCredential,
     storage_account_name: str,
     storage_container: str,
     local_folder: str,
     file_patterns: Optional[List[str]] = None,
-):
+    max_workers: int = DEFAULT_MAX_WORKERS,
+    max_inflight_bytes: int = DEFAULT_MAX_INFLIGHT_BYTES,
+    sync: bool = False,
+    delete_extraneous: bool = False,
+    block_settings: Optional[BlockSettings] = None,
+    soft_delete: bool = False,
+) -> UploadSummary:
     """
     Upload files from local folder to Azure Blob Storage.
 
@@ -73,49 +568,61 @@ def upload_data_files(
         storage_container: Name of the container to upload to
         local_folder: Local directory containing files to upload
         file_patterns: List of file patterns to match (default: ['*'] for all files)
+        max_workers: Number of files uploaded in parallel
+        max_inflight_bytes: Upper bound of the file bytes being uploaded at the same time
+        sync: Upload only files that are new or differ from the blob in size or MD5
+        delete_extraneous: Delete blobs matching the patterns that no longer exist locally
+        block_settings: Per-file upload strategy (default: BlockSettings())
+        soft_delete: With delete_extraneous, flag the extraneous blobs as deleted instead
+
+    Returns:
+        Summary with the uploaded, skipped and deleted files, the failures and the elapsed time
     """
     if file_patterns is None:
         file_patterns = ["*"]  # Default to all files
 
     logger.info(f"File patterns: {file_patterns}")
 
-    account_url = STORAGE_ACCOUNT_URL.format(storage_account_name=storage_account_name)
-    blob_service_client = BlobServiceClient(
-        account_url=account_url, credential=credential
+    blob_container_client = get_container_client(
+        credential, storage_account_name, storage_container
     )
-    blob_container_client = blob_service_client.get_container_client(storage_container)
-
-    if not blob_container_client.exists():
-        logger.info(f"Creating {storage_container} container.")
-        blob_container_client.create_container()
-        logger.info("Done.")
 
-    upload_count = 0
-    for file in Path(local_folder).rglob("*"):
-        if file.is_file() and matches_pattern(file.name, file_patterns):
-            logger.info(f"Uploading {file} to {storage_container}.")
-
-            # construct blob name from file path
-            # everything rather than local_folder
-            file_subpath = os.path.relpath(file, start=local_folder)
-
-            # generate a unique name of the file
-            file_name = file_subpath.replace(os.sep, "_")
-
-            try:
-                logger.info(f"Ready to copy: {str(file)} to {file_name}.")
-                with open(file=str(file), mode="rb") as data:
-                    blob_container_client.upload_blob(
-                        name=file_name, data=data, overwrite=True
-                    )
-                logger.info("Done.")
-                upload_count += 1
-            except Exception as e:
-                logger.error(f"Exception uploading file name {file_name}: {e}")
+    summary = upload_files_to_container(
+        blob_container_client,
+        local_folder,
+        file_patterns,
+        max_workers=max_workers,
+        max_inflight_bytes=max_inflight_bytes,
+        sync=sync,
+        delete_extraneous=delete_extraneous,
+        block_settings=block_settings,
+        soft_delete=soft_delete,
+    )
 
     logger.info(
-        f"Successfully uploaded {upload_count} files matching patterns {file_patterns}."
+        f"Successfully uploaded {summary.uploaded} files matching patterns {file_patterns}: "
+        f"{format_throughput(summary.uploaded, summary.uploaded_bytes, summary.elapsed)}."
     )
+    if sync or delete_extraneous:
+        logger.info(
+            f"Sync report: {summary.uploaded} uploaded, {summary.skipped} skipped, "
+            f"{summary.deleted} deleted, {summary.marked_deleted} marked as deleted, "
+            f"{summary.skipped_bytes / (1024 * 1024):.2f} MB saved."
+        )
+    if summary.blocks_staged:
+        logger.info(
+            f"Block report: {summary.blocks_staged} blocks staged, "
+            f"{summary.blocks_retried} retried."
+        )
+    if summary.file_throughput:
+        slowest = min(summary.file_throughput, key=summary.file_throughput.get)
+        logger.info(
+            f"Slowest file: {slowest} at {summary.file_throughput[slowest]:.2f} MB/s."
+        )
+    for file_name, error in summary.failed.items():
+        logger.error(f"Failed to upload {file_name}: {error}")
+
+    return summary
 
 
 def main():
@@ -150,6 +657,59 @@ def main():
         default="*",
         help="File patterns to match, comma-separated (e.g., '*.pdf,*.docx,*.txt'). Default: '*' (all files)",
     )
+    parser.add_argument(
+        "--max_workers",
+        type=positive_int,
+        default=DEFAULT_MAX_WORKERS,
+        help=f"Number of files uploaded in parallel. Default: {DEFAULT_MAX_WORKERS}",
+    )
+    parser.add_argument(
+        "--max_inflight_mb",
+        type=positive_int,
+        default=DEFAULT_MAX_INFLIGHT_MB,
+        help=f"Upper bound of file megabytes being uploaded at the same time. Default: {DEFAULT_MAX_INFLIGHT_MB}",
+    )
+    parser.add_argument(
+        "--sync",
+        action="store_true",
+        help="Upload only new or changed files, comparing size and MD5 with the blobs already in the container",
+    )
+    parser.add_argument(
+        "--delete_extraneous",
+        action="store_true",
+        help="With --sync, delete blobs matching the file patterns that no longer exist locally",
+    )
+    parser.add_argument(
+        "--soft_delete",
+        action="store_true",
+        help=f"With --delete_extraneous, flag the extraneous blobs with the metadata "
+        f"{SOFT_DELETE_METADATA_KEY}={SOFT_DELETE_MARKER_VALUE} instead of deleting them, for data sources "
+        "using the metadata soft delete detection",
+    )
+    parser.add_argument(
+        "--single_put_mb",
+        type=positive_int,
+        default=DEFAULT_SINGLE_PUT_MB,
+        help=f"Files up to this size are uploaded in a single request, larger ones in blocks. Default: {DEFAULT_SINGLE_PUT_MB}",
+    )
+    parser.add_argument(
+        "--block_size_mb",
+        type=positive_int,
+        default=DEFAULT_BLOCK_SIZE_MB,
+        help=f"Size of each block of a large file. Default: {DEFAULT_BLOCK_SIZE_MB}",
+    )
+    parser.add_argument(
+        "--block_concurrency",
+        type=positive_int,
+        default=DEFAULT_BLOCK_CONCURRENCY,
+        help=f"Number of blocks of a large file uploaded in parallel. Default: {DEFAULT_BLOCK_CONCURRENCY}",
+    )
+    parser.add_argument(
+        "--block_retries",
+        type=non_negative_int,
+        default=DEFAULT_BLOCK_RETRIES,
+        help=f"Number of retries of a failed block before the file fails. Default: {DEFAULT_BLOCK_RETRIES}",
+    )
     # Add legacy support for old argument names (backward compatibility)
     parser.add_argument(
         "--storage_name",
@@ -157,6 +717,11 @@ def main():
     )
     args = parser.parse_args()
 
+    if args.delete_extraneous and not args.sync:
+        parser.error("--delete_extraneous requires --sync")
+    if args.soft_delete and not args.delete_extraneous:
+        parser.error("--soft_delete requires --delete_extraneous")
+
     # Handle legacy argument names for backward compatibility
     storage_account_name = args.storage_account_name or args.storage_name
     if not storage_account_name:
@@ -194,13 +759,28 @@ def main():
     # Upload the files
     logger.info(f"Uploading process has been started from local path: {args.data_path}")
     logger.info(f"File patterns: {file_patterns}")
-    upload_data_files(
+    summary = upload_data_files(
         credential=credential,
         storage_account_name=storage_account_name,
         storage_container=args.container_name,
         local_folder=args.data_path,
         file_patterns=file_patterns,
+        max_workers=args.max_workers,
+        max_inflight_bytes=args.max_inflight_mb * 1024 * 1024,
+        sync=args.sync,
+        delete_extraneous=args.delete_extraneous,
+        soft_delete=args.soft_delete,
+        block_settings=BlockSettings(
+            single_put_size=args.single_put_mb * 1024 * 1024,
+            block_size=args.block_size_mb * 1024 * 1024,
+            block_concurrency=args.block_concurrency,
+            block_retries=args.block_retries,
+        ),
     )
+    if summary.failed:
+        raise RuntimeError(
+            f"{len(summary.failed)} files failed to upload: {', '.join(sorted(summary.failed))}"
+        )
     logger.info("Uploading process has been completed.")
 
 
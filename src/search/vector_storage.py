@@ -0,0 +1,509 @@
+# Copyright (c) Microsoft Corporation.
+# Licensed under the MIT license.
+
+"""
+Vector storage profiles for Copilot Studio Azure AI Search Project
+
+A storage profile sets how the embeddings are stored in the index: the number of dimensions
+requested from the embedding model, the element type of the vector field, the quantization that
+compresses the vector index and whether a retrievable copy of the vectors is kept. A profile is
+applied to the rendered index and skillset together, so the vector field always has the dimensions
+of the embeddings the skillset produces.
+
+Run as a script to estimate the index size per chunk of every profile:
+
+    python vector_storage.py --chunks 100000 --text_bytes 2000
+"""
+
+import argparse
+import math
+import os
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple
+
+from json_template import load_template
+
+VECTOR_PROFILES_PATH = os.path.join(
+    os.path.dirname(__file__), "index_config/vectorProfiles.json"
+)
+INDEX_SCHEMA_PATH = os.path.join(
+    os.path.dirname(__file__), "index_config/documentIndex.json"
+)
+# The default profile keeps the vector field and compressions of the index file
+DEFAULT_VECTOR_PROFILE = "default"
+
+ELEMENT_BYTES = {"Edm.Single": 4, "Edm.Half": 2}
+COMPRESSION_KINDS = ["scalarQuantization", "binaryQuantization"]
+EMBEDDING_SKILL_TYPE = "#Microsoft.Skills.Text.AzureOpenAIEmbeddingSkill"
+# Dimensions of the embeddings of each model, when the skill does not request fewer
+MODEL_DIMENSIONS = {
+    "text-embedding-ada-002": 1536,
+    "text-embedding-3-small": 1536,
+    "text-embedding-3-large": 3072,
+}
+# Models that can return shortened embeddings through the dimensions of the skill
+SHORTENABLE_MODELS = {"text-embedding-3-small", "text-embedding-3-large"}
+# Bytes of a neighbor reference in the HNSW graph; the base layer keeps up to 2 * m neighbors
+HNSW_LINK_BYTES = 4
+# Ranges of the HNSW parameters accepted by the service
+HNSW_PARAMETER_RANGES = {
+    "m": (4, 10),
+    "efConstruction": (100, 1000),
+    "efSearch": (100, 1000),
+}
+# Typical size of the text of a chunk, in bytes, for the sizing estimate
+DEFAULT_TEXT_BYTES = 2000
+
+# Keys of a profile in vectorProfiles.json
+_PROFILE_KEYS = {
+    "dimensions",
+    "vectorType",
+    "stored",
+    "compression",
+    "rerankWithOriginalVectors",
+    "defaultOversampling",
+    "hnswParameters",
+}
+
+
+@dataclass
+class VectorStorageProfile:
+    """How the vectors of the index are stored."""
+
+    name: str
+    # Dimensions requested from the embedding model; None keeps those of the index file
+    dimensions: Optional[int] = None
+    # Element type of the vector field, a key of ELEMENT_BYTES; None keeps that of the index file
+    vector_type: Optional[str] = None
+    # Whether a retrievable copy of the vectors is stored; queries never need it
+    stored: bool = True
+    # One of COMPRESSION_KINDS, or None for uncompressed vectors
+    compression: Optional[str] = None
+    # Rescore the compressed results with the full precision vectors
+    rerank_with_original_vectors: bool = True
+    # Candidates retrieved from the compressed index per requested result, before rescoring
+    default_oversampling: Optional[float] = None
+    # HNSW parameters overriding those of the index file, e.g. from test/benchmark_hnsw.py
+    hnsw_parameters: Optional[Dict[str, int]] = None
+
+    @classmethod
+    def from_dict(cls, name: str, properties: dict) -> "VectorStorageProfile":
+        """
+        Build a profile from its entry in vectorProfiles.json.
+
+        Args:
+            name: The name of the profile.
+            properties: The properties of the profile, with the keys of the file.
+
+        Returns:
+            The profile
+
+        Raises:
+            ValueError: If a property is unknown or invalid
+        """
+        unknown = sorted(set(properties) - _PROFILE_KEYS)
+        if unknown:
+            raise ValueError(f"Unknown properties {unknown} in vector profile '{name}'")
+        profile = cls(
+            name,
+            dimensions=properties.get("dimensions"),
+            vector_type=properties.get("vectorType"),
+            stored=properties.get("stored", True),
+            compression=properties.get("compression"),
+            rerank_with_original_vectors=properties.get(
+                "rerankWithOriginalVectors", True
+            ),
+            default_oversampling=properties.get("defaultOversampling"),
+            hnsw_parameters=properties.get("hnswParameters"),
+        )
+        if profile.dimensions is not None and (
+            not isinstance(profile.dimensions, int) or profile.dimensions < 1
+        ):
+            raise ValueError(
+                f"Vector profile '{name}' needs positive integer dimensions, "
+                f"got {profile.dimensions!r}"
+            )
+        if profile.vector_type is not None and (
+            profile.vector_type not in ELEMENT_BYTES
+        ):
+            raise ValueError(
+                f"Vector profile '{name}' has vector type '{profile.vector_type}', "
+                f"expected one of {sorted(ELEMENT_BYTES)}"
+            )
+        if profile.compression is not None and (
+            profile.compression not in COMPRESSION_KINDS
+        ):
+            raise ValueError(
+                f"Vector profile '{name}' has compression '{profile.compression}', "
+                f"expected one of {COMPRESSION_KINDS}"
+            )
+        for parameter, value in (profile.hnsw_parameters or {}).items():
+            if parameter not in HNSW_PARAMETER_RANGES:
+                raise ValueError(
+                    f"Vector profile '{name}' has unknown HNSW parameter '{parameter}', "
+                    f"expected one of {sorted(HNSW_PARAMETER_RANGES)}"
+                )
+            low, high = HNSW_PARAMETER_RANGES[parameter]
+            if not isinstance(value, int) or not low <= value <= high:
+                raise ValueError(
+                    f"Vector profile '{name}' needs {parameter} between {low} and {high}, "
+                    f"got {value!r}"
+                )
+        return profile
+
+
+def load_vector_profiles(
+    profiles_file: str = VECTOR_PROFILES_PATH,
+) -> Dict[str, VectorStorageProfile]:
+    """
+    Read the vector storage profiles.
+
+    Args:
+        profiles_file: The path to the profiles file.
+
+    Returns:
+        Dictionary of profile name to profile, in file order
+    """
+    return {
+        name: VectorStorageProfile.from_dict(name, properties)
+        for name, properties in load_template(profiles_file).render({}).items()
+    }
+
+
+def get_vector_profile(
+    name: str, profiles_file: str = VECTOR_PROFILES_PATH
+) -> VectorStorageProfile:
+    """
+    Look up a vector storage profile by name.
+
+    Args:
+        name: The name of the profile.
+        profiles_file: The path to the profiles file.
+
+    Returns:
+        The profile
+
+    Raises:
+        ValueError: If the profile does not exist
+    """
+    profiles = load_vector_profiles(profiles_file)
+    if name not in profiles:
+        raise ValueError(
+            f"Unknown vector profile '{name}', expected one of {sorted(profiles)}"
+        )
+    return profiles[name]
+
+
+def _vector_fields(index_definition: dict) -> List[dict]:
+    return [
+        field
+        for field in index_definition.get("fields", [])
+        if field.get("dimensions") is not None
+    ]
+
+
+def apply_to_index(index_definition: dict, profile: VectorStorageProfile) -> dict:
+    """
+    Set the storage of the vector fields of an index definition.
+
+    Args:
+        index_definition: The rendered index definition, modified in place.
+        profile: The storage profile.
+
+    Returns:
+        The definition
+
+    Raises:
+        ValueError: If the profile requests more dimensions than a vector field has
+    """
+    vector_search = index_definition.setdefault("vectorSearch", {})
+    compressions = vector_search.setdefault("compressions", [])
+    profiles = {
+        search_profile["name"]: search_profile
+        for search_profile in vector_search.get("profiles", [])
+    }
+    if profile.hnsw_parameters:
+        for algorithm in vector_search.get("algorithms", []):
+            if algorithm.get("kind") == "hnsw":
+                algorithm.setdefault("hnswParameters", {}).update(
+                    profile.hnsw_parameters
+                )
+    for field in _vector_fields(index_definition):
+        if profile.dimensions is not None:
+            if profile.dimensions > field["dimensions"]:
+                raise ValueError(
+                    f"Vector profile '{profile.name}' requests {profile.dimensions} dimensions, "
+                    f"but field '{field['name']}' has only {field['dimensions']}"
+                )
+            field["dimensions"] = profile.dimensions
+        if profile.vector_type is not None:
+            field["type"] = f"Collection({profile.vector_type})"
+        if not profile.stored:
+            # Vectors that are not stored cannot be retrieved
+            field["stored"] = False
+            field["retrievable"] = False
+        if profile.compression is None:
+            continue
+
+        compression_name = f"vector-{index_definition['name']}-{profile.compression}"
+        if not any(entry["name"] == compression_name for entry in compressions):
+            compression = {
+                "name": compression_name,
+                "kind": profile.compression,
+                "rerankWithOriginalVectors": profile.rerank_with_original_vectors,
+            }
+            if profile.default_oversampling is not None:
+                compression["defaultOversampling"] = profile.default_oversampling
+            if profile.compression == "scalarQuantization":
+                compression["scalarQuantizationParameters"] = {
+                    "quantizedDataType": "int8"
+                }
+            compressions.append(compression)
+        search_profile = profiles.get(field.get("vectorSearchProfile"))
+        if search_profile is None:
+            raise ValueError(
+                f"Field '{field['name']}' has no vector search profile to compress"
+            )
+        search_profile["compression"] = compression_name
+    return index_definition
+
+
+def apply_to_skillset(skillset_definition: dict, profile: VectorStorageProfile) -> dict:
+    """
+    Request the dimensions of a storage profile from the embedding skills of a skillset.
+
+    Args:
+        skillset_definition: The rendered skillset definition, modified in place.
+        profile: The storage profile.
+
+    Returns:
+        The definition
+
+    Raises:
+        ValueError: If an embedding model cannot return shortened embeddings
+    """
+    if profile.dimensions is None:
+        return skillset_definition
+    for skill in skillset_definition.get("skills", []):
+        if skill.get("@odata.type") != EMBEDDING_SKILL_TYPE:
+            continue
+        model = skill.get("modelName")
+        if profile.dimensions != MODEL_DIMENSIONS.get(model) and (
+            model not in SHORTENABLE_MODELS
+        ):
+            raise ValueError(
+                f"Vector profile '{profile.name}' requests {profile.dimensions} dimensions, "
+                f"but the model '{model}' of skill '{skill.get('name')}' cannot shorten its embeddings"
+            )
+        skill["dimensions"] = profile.dimensions
+    return skillset_definition
+
+
+def check_dimensions(index_definition: dict, skillset_definition: dict):
+    """
+    Check that every vector field projected from an embedding skill has the skill's dimensions.
+
+    Args:
+        index_definition: The rendered index definition.
+        skillset_definition: The rendered skillset definition.
+
+    Raises:
+        ValueError: If a vector field and the embeddings projected into it differ in dimensions
+    """
+    # Dimensions of the embeddings by their path in the enriched document
+    embeddings = {}
+    for skill in skillset_definition.get("skills", []):
+        if skill.get("@odata.type") != EMBEDDING_SKILL_TYPE:
+            continue
+        dimensions = skill.get("dimensions") or MODEL_DIMENSIONS.get(
+            skill.get("modelName")
+        )
+        for output in skill.get("outputs", []):
+            path = f"{skill.get('context', '/document')}/{output.get('targetName') or output['name']}"
+            embeddings[path] = (skill.get("name"), dimensions)
+
+    fields = {field["name"]: field for field in _vector_fields(index_definition)}
+    selectors = (skillset_definition.get("indexProjections") or {}).get("selectors", [])
+    for selector in selectors:
+        if selector.get("targetIndexName") != index_definition["name"]:
+            continue
+        for mapping in selector.get("mappings", []):
+            field = fields.get(mapping["name"])
+            embedding = embeddings.get(mapping.get("source"))
+            if field is None or embedding is None or embedding[1] is None:
+                continue
+            if embedding[1] != field["dimensions"]:
+                raise ValueError(
+                    f"Skill '{embedding[0]}' produces {embedding[1]} dimensions, "
+                    f"but field '{field['name']}' has {field['dimensions']}"
+                )
+
+
+@dataclass
+class VectorSizing:
+    """Estimated index bytes per chunk of a storage profile."""
+
+    profile: str
+    dimensions: int
+    # Quantized vectors and HNSW graph, held in memory and counted in the vector index quota
+    vector_index_bytes: int
+    # Full precision vectors kept on disk, used for rescoring and to rebuild the graph
+    original_vector_bytes: int
+    # Retrievable copy of the vectors
+    stored_vector_bytes: int
+    text_bytes: int
+
+    @property
+    def total_bytes(self) -> int:
+        """All estimated bytes of a chunk."""
+        return (
+            self.vector_index_bytes
+            + self.original_vector_bytes
+            + self.stored_vector_bytes
+            + self.text_bytes
+        )
+
+
+def estimate_chunk_bytes(
+    profile: VectorStorageProfile,
+    base_dimensions: int,
+    base_vector_type: str = "Edm.Single",
+    hnsw_m: int = 4,
+    text_bytes: int = DEFAULT_TEXT_BYTES,
+) -> VectorSizing:
+    """
+    Estimate the index bytes per chunk of a storage profile.
+
+    The estimate counts the raw vector and text payloads and the HNSW neighbor lists; the
+    inverted index of the text fields and per-document overhead are not included.
+
+    Args:
+        profile: The storage profile.
+        base_dimensions: Dimensions of the vector field in the index file.
+        base_vector_type: Element type of the vector field in the index file.
+        hnsw_m: The m parameter of the HNSW algorithm, unless the profile sets it.
+        text_bytes: Bytes of the text fields of a chunk.
+
+    Returns:
+        The estimate
+    """
+    dimensions = profile.dimensions or base_dimensions
+    hnsw_m = (profile.hnsw_parameters or {}).get("m", hnsw_m)
+    vector_type = profile.vector_type or base_vector_type
+    full_precision = dimensions * ELEMENT_BYTES[vector_type]
+    if profile.compression == "binaryQuantization":
+        quantized = math.ceil(dimensions / 8)
+    elif profile.compression == "scalarQuantization":
+        quantized = dimensions
+    else:
+        quantized = full_precision
+    return VectorSizing(
+        profile=profile.name,
+        dimensions=dimensions,
+        vector_index_bytes=quantized + 2 * hnsw_m * HNSW_LINK_BYTES,
+        original_vector_bytes=full_precision,
+        stored_vector_bytes=full_precision if profile.stored else 0,
+        text_bytes=text_bytes,
+    )
+
+
+def _index_vector_field(index_file: str) -> Tuple[dict, dict]:
+    """Render an index file and find its vector field."""
+    template = load_template(index_file)
+    index_definition = template.render({name: name for name in template.placeholders})
+    return index_definition, _vector_fields(index_definition)[0]
+
+
+def vector_dimensions(
+    profile: VectorStorageProfile, index_file: str = INDEX_SCHEMA_PATH
+) -> int:
+    """
+    Compute the dimensions of the vector field of an index file with a storage profile applied.
+
+    Args:
+        profile: The storage profile.
+        index_file: The index definition file.
+
+    Returns:
+        The dimensions the embeddings must have
+    """
+    return profile.dimensions or _index_vector_field(index_file)[1]["dimensions"]
+
+
+def estimate_from_index_file(
+    profile: VectorStorageProfile,
+    text_bytes: int = DEFAULT_TEXT_BYTES,
+    index_file: str = INDEX_SCHEMA_PATH,
+) -> VectorSizing:
+    """
+    Estimate the index bytes per chunk of a storage profile applied to an index file.
+
+    Args:
+        profile: The storage profile.
+        text_bytes: Bytes of the text fields of a chunk.
+        index_file: The index definition providing the vector field and the HNSW parameters.
+
+    Returns:
+        The estimate
+    """
+    index_definition, vector_field = _index_vector_field(index_file)
+    # "Collection(Edm.Single)" -> "Edm.Single"
+    base_vector_type = vector_field["type"][len("Collection(") : -1]
+    hnsw_m = index_definition["vectorSearch"]["algorithms"][0]["hnswParameters"]["m"]
+    return estimate_chunk_bytes(
+        profile, vector_field["dimensions"], base_vector_type, hnsw_m, text_bytes
+    )
+
+
+def format_sizing_table(estimates: List[VectorSizing], chunks: int = 1) -> str:
+    """
+    Build a plain text table of sizing estimates.
+
+    Args:
+        estimates: The estimates, one per profile.
+        chunks: Number of chunks of the projected totals.
+
+    Returns:
+        The table, with bytes per chunk and megabytes for the given number of chunks
+    """
+    lines = [
+        f"{'profile':<14} {'dims':>5} {'vector index':>13} {'on disk':>8} "
+        f"{'total':>7} {'index MB':>9} {'total MB':>9}"
+    ]
+    for estimate in estimates:
+        on_disk = estimate.original_vector_bytes + estimate.stored_vector_bytes
+        lines.append(
+            f"{estimate.profile:<14} {estimate.dimensions:>5} "
+            f"{estimate.vector_index_bytes:>13} {on_disk:>8} {estimate.total_bytes:>7} "
+            f"{estimate.vector_index_bytes * chunks / 1e6:>9.1f} "
+            f"{estimate.total_bytes * chunks / 1e6:>9.1f}"
+        )
+    return "\n".join(lines)
+
+
+def main():
+    """Print the sizing estimate of every vector storage profile."""
+    parser = argparse.ArgumentParser(description="Vector storage sizing estimate")
+    parser.add_argument(
+        "--chunks",
+        type=int,
+        default=1,
+        help="Number of chunks of the projected totals. Default: 1",
+    )
+    parser.add_argument(
+        "--text_bytes",
+        type=int,
+        default=DEFAULT_TEXT_BYTES,
+        help=f"Bytes of the text fields of a chunk. Default: {DEFAULT_TEXT_BYTES}",
+    )
+    args = parser.parse_args()
+
+    estimates = [
+        estimate_from_index_file(profile, args.text_bytes)
+        for profile in load_vector_profiles().values()
+    ]
+    print(format_sizing_table(estimates, args.chunks))
+
+
+if __name__ == "__main__":
+    main()